@@ -0,0 +1,124 @@
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { PythonWorkerPool, PythonWorkerStartupError, getPythonWorkerPool, shutdownPythonWorkerPools } from '../src/utils/pythonWorkerPool';
+
+const PLUGIN_SOURCE = `
+import sys
+import json
+import os
+import time
+
+_calls = []
+
+def main():
+    payload = json.loads(sys.stdin.read())
+    if payload.get('sleep'):
+        time.sleep(payload['sleep'])
+    _calls.append(payload)
+    print(json.dumps([{"success": True, "name": "echo", "result": payload, "calls": len(_calls), "token": os.environ.get("S7_CM_TOKEN")}]))
+`;
+
+describe('PythonWorkerPool', () => {
+    let pluginDir: string;
+    let mainPath: string;
+    let pool: PythonWorkerPool;
+
+    const makePool = (overrides: Partial<{ poolSize: number; maxCallsPerWorker: number }> = {}) =>
+        new PythonWorkerPool('python3', mainPath, pluginDir, { ...process.env }, {
+            poolSize: overrides.poolSize ?? 1,
+            maxCallsPerWorker: overrides.maxCallsPerWorker ?? 100,
+            maxRssMb: 1024,
+            startupTimeoutMs: 10000,
+        });
+
+    beforeEach(() => {
+        pluginDir = fs.mkdtempSync(path.join(os.tmpdir(), 'pyworker-'));
+        mainPath = path.join(pluginDir, 'main.py');
+        fs.writeFileSync(mainPath, PLUGIN_SOURCE);
+    });
+
+    afterEach(() => {
+        pool?.shutdown();
+        fs.rmSync(pluginDir, { recursive: true, force: true });
+    });
+
+    it('reuses one warm worker across calls and passes per-call env', async () => {
+        pool = makePool();
+        const first = await pool.execute(JSON.stringify({ n: 1 }), { S7_CM_TOKEN: 'token-1' }, 5000);
+        const second = await pool.execute(JSON.stringify({ n: 2 }), { S7_CM_TOKEN: 'token-2' }, 5000);
+
+        expect(first.exitCode).toBe(0);
+        expect(JSON.parse(first.stdout)[0].calls).toBe(1);
+        expect(JSON.parse(second.stdout)[0].calls).toBe(2);
+        expect(JSON.parse(second.stdout)[0].token).toBe('token-2');
+        expect(pool.size).toBe(1);
+    });
+
+    it('recycles a worker after the configured number of calls', async () => {
+        pool = makePool({ maxCallsPerWorker: 1 });
+        await pool.execute(JSON.stringify({ n: 1 }), {}, 5000);
+        const second = await pool.execute(JSON.stringify({ n: 2 }), {}, 5000);
+
+        expect(JSON.parse(second.stdout)[0].calls).toBe(1);
+    });
+
+    it('kills a worker that exceeds the per-call timeout and recovers', async () => {
+        pool = makePool();
+        await expect(pool.execute(JSON.stringify({ sleep: 5 }), {}, 200)).rejects.toThrow(/timed out/);
+
+        const next = await pool.execute(JSON.stringify({ n: 3 }), {}, 5000);
+        expect(JSON.parse(next.stdout)[0].calls).toBe(1);
+    });
+
+    it('serves a plugin without main() by running it as __main__', async () => {
+        fs.writeFileSync(mainPath, [
+            'import sys, json',
+            'if __name__ == "__main__":',
+            '    print(json.dumps([{"success": True, "result": json.loads(sys.stdin.read())}]))',
+        ].join('\n'));
+        pool = makePool();
+        const result = await pool.execute(JSON.stringify({ n: 1 }), {}, 5000);
+
+        expect(result.exitCode).toBe(0);
+        expect(JSON.parse(result.stdout)[0].result).toEqual({ n: 1 });
+        expect(pool.usable).toBe(true);
+    });
+
+    it('marks the pool unusable when the plugin cannot be loaded', async () => {
+        fs.writeFileSync(mainPath, 'raise RuntimeError("broken plugin")\n');
+        pool = makePool();
+        await expect(pool.execute(JSON.stringify({ n: 1 }), {}, 5000)).rejects.toBeInstanceOf(PythonWorkerStartupError);
+
+        expect(pool.usable).toBe(false);
+        await expect(pool.execute(JSON.stringify({ n: 2 }), {}, 5000)).rejects.toBeInstanceOf(PythonWorkerStartupError);
+    });
+
+    describe('getPythonWorkerPool', () => {
+        afterEach(() => shutdownPythonWorkerPools());
+
+        it('shares one pool across calls with reissued service tokens', async () => {
+            const firstEnv = { ...process.env, S7_CM_TOKEN: 'token-1', S7_BRAIN_TOKEN: 'brain-1' };
+            const secondEnv = { ...process.env, S7_CM_TOKEN: 'token-2', S7_BRAIN_TOKEN: 'brain-2' };
+
+            const first = getPythonWorkerPool('python3', mainPath, pluginDir, firstEnv);
+            await first.execute(JSON.stringify({ n: 1 }), firstEnv, 5000);
+            const second = getPythonWorkerPool('python3', mainPath, pluginDir, secondEnv);
+            const result = await second.execute(JSON.stringify({ n: 2 }), secondEnv, 5000);
+
+            expect(second).toBe(first);
+            expect(second.size).toBe(1);
+            expect(JSON.parse(result.stdout)[0].calls).toBe(2);
+            expect(JSON.parse(result.stdout)[0].token).toBe('token-2');
+        });
+
+        it('shuts down the old pool when the stable environment changes', async () => {
+            const first = getPythonWorkerPool('python3', mainPath, pluginDir, { ...process.env, PLUGIN_MODE: 'a' });
+            await first.execute(JSON.stringify({ n: 1 }), {}, 5000);
+            const second = getPythonWorkerPool('python3', mainPath, pluginDir, { ...process.env, PLUGIN_MODE: 'b' });
+
+            expect(second).not.toBe(first);
+            expect(first.size).toBe(0);
+        });
+    });
+});
@@ -1256,6 +1256,9 @@ Based on the step details, choose the best option and respond in the correct JSO
             if (this.containerManager) {
                 await this.containerManager.cleanup(trace_id);
             }
+            if (this.pluginExecutor) {
+                this.pluginExecutor.shutdown();
+            }
             console.log(`[${trace_id}] ${source_component}: Cleanup completed`);
         } catch (error: any) {
             console.error(`[${trace_id}] ${source_component}: Error during cleanup:`, error);
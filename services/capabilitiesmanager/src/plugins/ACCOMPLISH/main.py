@@ -13,6 +13,7 @@ import re
 import sys
 import os
 import threading
+import queue
 from typing import Dict, Any, List, Optional, Set, Tuple
 
 # Cache for verb discovery to reduce redundant API calls
@@ -22,10 +23,14 @@ _cache_lock = threading.Lock()
 # Import from the installed shared library package
 try:
     from plan_validator import PlanValidator, AccomplishError, PLAN_STEP_SCHEMA, PLAN_ARRAY_SCHEMA
+    from planning_strategy_stats import StrategyStats
+    from stage7_plugin_runtime import parse_inputs as _parse_plugin_inputs
 except ImportError:
     # Fallback to direct import for development/testing
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
     from plan_validator import PlanValidator, AccomplishError, PLAN_STEP_SCHEMA, PLAN_ARRAY_SCHEMA
+    from planning_strategy_stats import StrategyStats
+    from stage7_plugin_runtime import parse_inputs as _parse_plugin_inputs
 
 # Configure enhanced logging with file handler for debugging
 logging.basicConfig(
@@ -39,6 +44,12 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# Speculative planning runs strategies side by side; at most this many Brain calls are in flight at once
+try:
+    ACCOMPLISH_MAX_BRAIN_CALLS = max(1, int(os.environ.get('ACCOMPLISH_MAX_BRAIN_CALLS', '2')))
+except ValueError:
+    ACCOMPLISH_MAX_BRAIN_CALLS = 2
+
 # Enhanced error tracking
 class ErrorRecoveryTracker:
     """Tracks error recovery attempts and provides analytics"""
@@ -47,33 +58,31 @@ class ErrorRecoveryTracker:
         self.recovery_attempts = {}
         self.successful_recoveries = {}
         self.failed_recoveries = {}
+        # Speculative planning records from several threads
+        self._lock = threading.Lock()
         
     def record_error(self, error_type: str, error_message: str):
         """Record an error occurrence"""
-        if error_type not in self.error_counts:
-            self.error_counts[error_type] = 0
-        self.error_counts[error_type] += 1
+        with self._lock:
+            self.error_counts[error_type] = self.error_counts.get(error_type, 0) + 1
         
     def record_recovery_attempt(self, error_type: str, strategy: str):
         """Record a recovery attempt"""
         key = f"{error_type}:{strategy}"
-        if key not in self.recovery_attempts:
-            self.recovery_attempts[key] = 0
-        self.recovery_attempts[key] += 1
+        with self._lock:
+            self.recovery_attempts[key] = self.recovery_attempts.get(key, 0) + 1
         
     def record_successful_recovery(self, error_type: str, strategy: str):
         """Record a successful recovery"""
         key = f"{error_type}:{strategy}"
-        if key not in self.successful_recoveries:
-            self.successful_recoveries[key] = 0
-        self.successful_recoveries[key] += 1
+        with self._lock:
+            self.successful_recoveries[key] = self.successful_recoveries.get(key, 0) + 1
         
     def record_failed_recovery(self, error_type: str, strategy: str):
         """Record a failed recovery"""
         key = f"{error_type}:{strategy}"
-        if key not in self.failed_recoveries:
-            self.failed_recoveries[key] = 0
-        self.failed_recoveries[key] += 1
+        with self._lock:
+            self.failed_recoveries[key] = self.failed_recoveries.get(key, 0) + 1
         
     def get_recovery_stats(self) -> Dict[str, Any]:
         """Get recovery statistics"""
@@ -524,57 +533,9 @@ def report_logic_failure_to_brain(request_id: str, inputs: Dict[str, Any], reaso
 
 
 def parse_inputs(inputs_str: str) -> Dict[str, Any]:
-    """Parse and normalize the plugin stdin JSON payload into a dict of inputName -> InputValue.
-
-    Plugins should accept inputs formatted as a JSON array of [ [key, value], ... ] where value
-    may be a primitive (string/number/bool), or an object like {"value": ...}. This helper
-    normalizes non-dict raw values into {'value': raw}. It also filters invalid entries.
-    """
+    """Parse the plugin stdin JSON payload into a dict of inputName -> InputValue ({'value': ...})."""
     try:
-        payload = json.loads(inputs_str)
-        inputs: Dict[str, Any] = {}
-
-        # Case A: payload is a list of [key, value] pairs (legacy / preferred)
-        if isinstance(payload, list):
-            for item in payload:
-                if isinstance(item, list) and len(item) == 2:
-                    key, raw_value = item
-                    if isinstance(raw_value, dict):
-                        inputs[key] = raw_value
-                    else:
-                        inputs[key] = {'value': raw_value}
-                else:
-                    logger.debug(f"Skipping invalid input item in list payload: {item}")
-
-        # Case B: payload is a serialized Map object with entries: [[key, value], ...]
-        elif isinstance(payload, dict) and payload.get('_type') == 'Map' and isinstance(payload.get('entries'), list):
-            for entry in payload.get('entries', []):
-                if isinstance(entry, list) and len(entry) == 2:
-                    key, raw_value = entry
-                    if isinstance(raw_value, dict):
-                        inputs[key] = raw_value
-                    else:
-                        inputs[key] = {'value': raw_value}
-                else:
-                    logger.debug(f"Skipping invalid Map entry: {entry}")
-
-        # Case C: payload is already a dict mapping keys -> values (possibly already normalized)
-        elif isinstance(payload, dict):
-            for key, raw_value in payload.items():
-                # Skip internal meta fields if present
-                if key == '_type' or key == 'entries':
-                    continue
-                if isinstance(raw_value, dict):
-                    inputs[key] = raw_value
-                else:
-                    inputs[key] = {'value': raw_value}
-
-        else:
-            # Unsupported top-level type, provide clear error
-            raise ValueError("Unsupported input format: expected array of pairs, Map with entries, or object mapping")
-
-        return inputs
-
+        return _parse_plugin_inputs(inputs_str, wrap_values=True)
     except Exception as e:
         logger.error(f"Input parsing failed: {e}")
         raise AccomplishError(f"Input validation failed: {e}", "input_error")
@@ -651,25 +612,58 @@ class RobustMissionPlanner:
     def __init__(self, inputs: Dict[str, Any]): # Add inputs parameter
         self.max_retries = 5
         self.max_llm_switches = 2
-        self.retry_strategies = [
+        # Default order, re-ranked by how often each strategy has produced a valid plan
+        self.strategy_stats = StrategyStats.from_environment()
+        self.retry_strategies = self.strategy_stats.order([
             'original_prompt',
             'simplified_prompt',
             'step_by_step_guidance',
             'alternative_approach'
-        ]
+        ])
         self.current_strategy_index = 0
+        self.max_brain_calls = ACCOMPLISH_MAX_BRAIN_CALLS
+        # Bounds concurrent Brain calls once strategies race (None when planning sequentially)
+        self._brain_slots: Optional[threading.BoundedSemaphore] = None
+        # Per thread: single-step feedback, and the race a strategy thread belongs to
+        self._attempt_state = threading.local()
         
         # Prepare librarian_info
         librarian_info = _get_librarian_info(inputs)
 
         # Initialize the validator with the discovered plugins and librarian_info
         self.validator = PlanValidator(
-            brain_call=call_brain,
+            brain_call=self._call_brain,
             report_logic_failure_call=report_logic_failure_to_brain,
             librarian_info=librarian_info # Pass librarian_info
         )
         self._last_attempt_single_step = False
-    
+
+    @property
+    def _last_attempt_single_step(self) -> bool:
+        # Per thread, so strategies converting plans side by side don't see each other's feedback
+        return getattr(self._attempt_state, 'single_step', False)
+
+    @_last_attempt_single_step.setter
+    def _last_attempt_single_step(self, value: bool):
+        self._attempt_state.single_step = value
+
+    def _race_decided(self) -> bool:
+        """True on a strategy thread whose speculative race another strategy has already won"""
+        decided = getattr(self._attempt_state, 'race_decided', None)
+        return decided is not None and decided.is_set()
+
+    def _call_brain(self, prompt: str, inputs: Dict[str, Any], response_type: str = "json") -> tuple[str, str]:
+        """call_brain, within the speculative Brain call budget and refused to strategies that lost their race"""
+        if self._race_decided():
+            raise AccomplishError("Planning strategy cancelled: another strategy already produced a valid plan", "strategy_cancelled")
+        slots = self._brain_slots
+        if slots is None:
+            return call_brain(prompt, inputs, response_type)
+        with slots:
+            if self._race_decided():
+                raise AccomplishError("Planning strategy cancelled: another strategy already produced a valid plan", "strategy_cancelled")
+            return call_brain(prompt, inputs, response_type)
+
     def _get_next_retry_strategy(self) -> Optional[str]:
         """Get the next retry strategy or None if all strategies exhausted"""
         if self.current_strategy_index < len(self.retry_strategies):
@@ -677,7 +671,7 @@ class RobustMissionPlanner:
             self.current_strategy_index += 1
             return strategy
         return None
-    
+
     def _reset_retry_strategies(self):
         """Reset retry strategies for a new planning attempt"""
         self.current_strategy_index = 0
@@ -845,57 +839,24 @@ class RobustMissionPlanner:
 
     def _generate_role_specific_plan(self, goal: str, mission_goal: Optional[str], mission_id: str, agent_role: str, inputs: Dict[str, Any], mission_context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generates a plan tailored for a specific agent role with enhanced error recovery."""
-        
-        # Enhanced error recovery loop
-        for attempt in range(self.max_retries):
-            strategy = self._get_next_retry_strategy()
-            if not strategy:
-                break
-                
-            logger.info(f"Attempt {attempt + 1}/{self.max_retries} with strategy: {strategy}")
-            error_tracker.record_recovery_attempt('plan_generation', strategy)
-            
-            try:
-                if strategy in ['original_prompt', 'simplified_prompt']:
-                    prose_plan = self._get_prose_plan_with_strategy(goal, mission_goal, inputs, strategy, mission_context)
-                    structured_plan = self._convert_to_structured_plan_with_recovery(prose_plan, goal, mission_goal, mission_id, inputs, strategy)
-                    
-                    # Validate the plan before returning
-                    validation_result = self.validator.validate_and_repair(structured_plan, goal, inputs)
-                    
-                    if validation_result.is_valid:
-                        logger.info(f"✅ Successfully generated valid plan with strategy: {strategy}")
-                        error_tracker.record_successful_recovery('plan_generation', strategy)
-                        return validation_result.plan
-                    else:
-                        error_summary = "; ".join(validation_result.get_error_messages()[:3])
-                        logger.warning(f"⚠️  Plan generated with {strategy} has validation errors: {error_summary}")
-                        error_tracker.record_error('validation_error', error_summary)
-                        continue
-                elif strategy == 'step_by_step_guidance':
-                    # Try a more structured approach
-                    structured_plan = self._generate_step_by_step_plan(goal, mission_goal, mission_id, inputs, mission_context)
-                    validation_result = self.validator.validate_and_repair(structured_plan, goal, inputs)
-                    
-                    if validation_result.is_valid:
-                        logger.info(f"✅ Successfully generated valid plan with step-by-step strategy")
-                        error_tracker.record_successful_recovery('plan_generation', strategy)
-                        return validation_result.plan
-                elif strategy == 'alternative_approach':
-                    # Try a completely different approach
-                    structured_plan = self._generate_alternative_plan(goal, mission_goal, mission_id, inputs, mission_context)
-                    validation_result = self.validator.validate_and_repair(structured_plan, goal, inputs)
-                    
-                    if validation_result.is_valid:
-                        logger.info(f"✅ Successfully generated valid plan with alternative approach")
-                        error_tracker.record_successful_recovery('plan_generation', strategy)
-                        return validation_result.plan
+        try:
+            if self._speculative_planning_enabled(inputs) and self.max_brain_calls > 1:
+                plan = self._generate_speculative_plan(goal, mission_goal, mission_id, inputs, mission_context)
+                if plan is not None:
+                    return plan
+            else:
+                # Enhanced error recovery loop
+                for attempt in range(self.max_retries):
+                    strategy = self._get_next_retry_strategy()
+                    if not strategy:
+                        break
                         
-            except Exception as e:
-                logger.warning(f"❌ Strategy {strategy} failed: {e}")
-                error_tracker.record_failed_recovery('plan_generation', strategy)
-                error_tracker.record_error('plan_generation_error', str(e))
-                continue
+                    logger.info(f"Attempt {attempt + 1}/{self.max_retries} with strategy: {strategy}")
+                    plan = self._attempt_strategy(strategy, goal, mission_goal, mission_id, inputs, mission_context)
+                    if plan is not None:
+                        return plan
+        finally:
+            self.strategy_stats.save()
         
         # If all strategies failed, raise an error with comprehensive details
         stats = error_tracker.get_recovery_stats()
@@ -905,7 +866,100 @@ class RobustMissionPlanner:
         
         logger.error(error_message)
         raise AccomplishError(error_message, "plan_generation_failure")
-    
+
+    def _attempt_strategy(self, strategy: str, goal: str, mission_goal: Optional[str], mission_id: Optional[str], inputs: Dict[str, Any], mission_context: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Generate and validate a plan with one strategy; the repaired plan if it is valid, else None"""
+        error_tracker.record_recovery_attempt('plan_generation', strategy)
+        try:
+            if strategy in ['original_prompt', 'simplified_prompt']:
+                prose_plan = self._get_prose_plan_with_strategy(goal, mission_goal, inputs, strategy, mission_context)
+                structured_plan = self._convert_to_structured_plan_with_recovery(prose_plan, goal, mission_goal, mission_id, inputs, strategy)
+            elif strategy == 'step_by_step_guidance':
+                # Try a more structured approach
+                structured_plan = self._generate_step_by_step_plan(goal, mission_goal, mission_id, inputs, mission_context)
+            elif strategy == 'alternative_approach':
+                # Try a completely different approach
+                structured_plan = self._generate_alternative_plan(goal, mission_goal, mission_id, inputs, mission_context)
+            else:
+                return None
+
+            # Validate the plan before returning
+            validation_result = self.validator.validate_and_repair(structured_plan, goal, inputs)
+            if self._race_decided():
+                return None
+            self.strategy_stats.record(strategy, validation_result.is_valid)
+
+            if validation_result.is_valid:
+                logger.info(f"✅ Successfully generated valid plan with strategy: {strategy}")
+                error_tracker.record_successful_recovery('plan_generation', strategy)
+                return validation_result.plan
+            error_summary = "; ".join(validation_result.get_error_messages()[:3])
+            logger.warning(f"⚠️  Plan generated with {strategy} has validation errors: {error_summary}")
+            error_tracker.record_error('validation_error', error_summary)
+            return None
+                
+        except Exception as e:
+            if self._race_decided():
+                logger.info(f"Strategy {strategy} stopped: another strategy already produced a valid plan")
+                return None
+            logger.warning(f"❌ Strategy {strategy} failed: {e}")
+            self.strategy_stats.record(strategy, False)
+            error_tracker.record_failed_recovery('plan_generation', strategy)
+            error_tracker.record_error('plan_generation_error', str(e))
+            return None
+
+    @staticmethod
+    def _speculative_planning_enabled(inputs: Dict[str, Any]) -> bool:
+        """The speculative_planning input, else the ACCOMPLISH_SPECULATIVE_PLANNING env var (default off)"""
+        speculative_input = inputs.get('speculative_planning')
+        if isinstance(speculative_input, dict):
+            speculative_input = speculative_input.get('value')
+        if speculative_input is None:
+            speculative_input = os.environ.get('ACCOMPLISH_SPECULATIVE_PLANNING', 'false')
+        return speculative_input is True or str(speculative_input).strip().lower() in ('true', '1', 'yes')
+
+    def _generate_speculative_plan(self, goal: str, mission_goal: Optional[str], mission_id: Optional[str], inputs: Dict[str, Any], mission_context: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Race the strategies: up to max_brain_calls run at once, started in ranked order, and each
+        plan is validated as soon as its strategy finishes. The first valid plan wins; strategies
+        not yet started are dropped and running ones stop at their next Brain call. Strategies run
+        on daemon threads, so a losing Brain call still in flight does not keep the process alive.
+        The Brain call budget stays in force for the rest of planning, including final validation.
+        """
+        strategies = self.retry_strategies[:self.max_retries]
+        self.current_strategy_index = len(strategies)
+        if self._brain_slots is None:
+            self._brain_slots = threading.BoundedSemaphore(self.max_brain_calls)
+        decided = threading.Event()
+        outcomes: "queue.Queue[Tuple[str, Optional[List[Dict[str, Any]]]]]" = queue.Queue()
+        logger.info(f"Speculative planning with strategies {strategies}, at most {self.max_brain_calls} concurrent Brain calls")
+
+        def attempt(strategy: str):
+            self._attempt_state.race_decided = decided
+            plan = None
+            try:
+                plan = self._attempt_strategy(strategy, goal, mission_goal, mission_id, inputs, mission_context)
+            finally:
+                outcomes.put((strategy, plan))
+
+        started = 0
+        running = 0
+        try:
+            while started < len(strategies) or running:
+                while started < len(strategies) and running < self.max_brain_calls:
+                    threading.Thread(target=attempt, args=(strategies[started],), daemon=True,
+                                     name=f"plan-{strategies[started]}").start()
+                    started += 1
+                    running += 1
+                strategy, plan = outcomes.get()
+                running -= 1
+                if plan is not None:
+                    logger.info(f"Strategy {strategy} won the speculative planning race")
+                    return plan
+            return None
+        finally:
+            decided.set()
+
     def _get_prose_plan_with_strategy(self, goal: str, mission_goal: Optional[str], inputs: Dict[str, Any], strategy: str, mission_context: Dict[str, Any]) -> str:
         """Get prose plan with different strategies based on retry attempt"""
         if strategy == 'simplified_prompt':
@@ -943,7 +997,7 @@ Return ONLY plain text for the plan. NO markdown formatting, NO code blocks, NO
         
         for attempt in range(self.max_retries):
             try:
-                response, request_id = call_brain(prompt, inputs, "text")
+                response, request_id = self._call_brain(prompt, inputs, "text")
                 if not response or len(response.strip()) < 50:
                     logger.warning(f"Attempt {attempt + 1}: LLM returned an insufficient simplified prose plan.")
                     report_logic_failure_to_brain(request_id, inputs, "LLM returned insufficient simplified prose plan (too short or empty)")
@@ -1069,7 +1123,7 @@ Return ONLY plain text for the plan. NO markdown formatting, NO code blocks, NO
         
         for attempt in range(self.max_retries):
             try:
-                response, request_id = call_brain(prompt, inputs, "json")
+                response, request_id = self._call_brain(prompt, inputs, "json")
                 logger.info(f"Raw response from Brain (attempt {attempt+1}): {str(response)[:500]}...")
                 
                 try:
@@ -1197,7 +1251,7 @@ IMPORTANT: Return ONLY plain text for the plan. NO markdown formatting, NO code
         
         for attempt in range(self.max_retries):
             try:
-                response, request_id = call_brain(prompt, inputs, "text")
+                response, request_id = self._call_brain(prompt, inputs, "text")
                 if not response or len(response.strip()) < 50:
                     logger.warning(f"Attempt {attempt + 1}: LLM returned an insufficient prose plan.")
                     report_logic_failure_to_brain(request_id, inputs, "LLM returned insufficient prose plan (too short or empty)")
@@ -1321,7 +1375,7 @@ When defining outputs, you MUST identify which ones are deliverables for the use
 """
         for attempt in range(self.max_retries):
             try:
-                response, request_id = call_brain(prompt, inputs, "json")
+                response, request_id = self._call_brain(prompt, inputs, "json")
                 logger.info(f"Raw response from Brain (attempt {attempt+1}): {str(response)[:500]}...")
                 try:
                     plan = json.loads(response)
@@ -5,16 +5,21 @@ Provides RSVP tracking, attendance marking, guest lists, and demographic analysi
 """
 
 import sys
-import json
 import logging
 import os
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any
 from datetime import datetime
 import uuid
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+try:
+    from stage7_plugin_runtime import run, get_input as _get_input
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_plugin_runtime import run, get_input as _get_input
+
 # In-memory attendee database
 ATTENDEES = {}
 EVENTS = {
@@ -27,20 +32,6 @@ EVENTS = {
     }
 }
 
-def _get_input(inputs: dict, key: str, aliases: list = [], default=None):
-    """Safely gets a value from inputs, checking aliases, and extracting from {'value':...} wrapper."""
-    raw_val = inputs.get(key)
-    if raw_val is None:
-        for alias in aliases:
-            raw_val = inputs.get(alias)
-            if raw_val is not None:
-                break
-    if raw_val is None:
-        return default
-    if isinstance(raw_val, dict) and 'value' in raw_val:
-        return raw_val['value'] if raw_val['value'] is not None else default
-    return raw_val if raw_val is not None else default
-
 def _validate_email(email: str) -> bool:
     """Basic email validation."""
     return "@" in email and "." in email
@@ -343,63 +334,10 @@ def execute_plugin(inputs):
             "error": str(e)
         }]
 
-def parse_inputs(inputs_str):
-    """Parse and normalize the plugin stdin JSON payload into a dict."""
-    try:
-        payload = json.loads(inputs_str)
-        inputs_dict = {}
-
-        if isinstance(payload, dict):
-            if payload.get('_type') == 'Map' and isinstance(payload.get('entries'), list):
-                for entry in payload.get('entries', []):
-                    if isinstance(entry, list) and len(entry) == 2:
-                        key, value = entry
-                        inputs_dict[key] = value
-            else:
-                for key, value in payload.items():
-                    if key not in ('_type', 'entries'):
-                        inputs_dict[key] = value
-
-        elif isinstance(payload, list):
-            for item in payload:
-                if isinstance(item, list) and len(item) == 2:
-                    key, value = item
-                    inputs_dict[key] = value
-
-        return inputs_dict
-
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse input JSON: {e}")
-        raise
-
 def main():
     """Main entry point for the plugin."""
-    try:
-        input_data = sys.stdin.read().strip()
-        if not input_data:
-            result = [{
-                "success": False,
-                "name": "error",
-                "resultType": "error",
-                "result": "No input data received",
-                "error": "No input data received"
-            }]
-        else:
-            inputs_dict = parse_inputs(input_data)
-            result = execute_plugin(inputs_dict)
+    run(execute_plugin)
 
-        print(json.dumps(result))
-
-    except Exception as e:
-        logger.error(f"Plugin execution failed: {str(e)}")
-        result = [{
-            "success": False,
-            "name": "error",
-            "resultType": "error",
-            "result": str(e),
-            "error": str(e)
-        }]
-        print(json.dumps(result))
 
 if __name__ == "__main__":
     main()
@@ -4,121 +4,58 @@ AUDIENCE_INSIGHTS Plugin - Audience insights and analytics
 """
 
 import sys
-import json
 import logging
 import os
-from typing import Dict, Any
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def _get_input(inputs: dict, key: str, aliases: list = [], default=None):
-    """Safely gets a value from inputs, checking aliases, and extracting from {{'value':...}} wrapper."""
-    raw_val = inputs.get(key)
-    if raw_val is None:
-        for alias in aliases:
-            raw_val = inputs.get(alias)
-            if raw_val is not None:
-                break
-    if raw_val is None:
-        return default
-    if isinstance(raw_val, dict) and 'value' in raw_val:
-        return raw_val['value'] if raw_val['value'] is not None else default
-    return raw_val if raw_val is not None else default
+try:
+    from stage7_plugin_runtime import run, get_input as _get_input
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_plugin_runtime import run, get_input as _get_input
 
 def execute_plugin(inputs):
     """Main plugin execution function."""
     try:
         action = _get_input(inputs, 'action', ['operation', 'command'])
-        payload = _get_input(inputs, 'payload', ['data', 'params', 'parameters'], default={{}})
+        payload = _get_input(inputs, 'payload', ['data', 'params', 'parameters'], default={})
 
         if not action:
-            return [{{
+            return [{
                 "success": False,
                 "name": "error",
                 "resultType": "error",
                 "result": "Missing required parameter 'action'",
                 "error": "Missing required parameter 'action'"
-            }}]
+            }]
 
         # TODO: Implement action handlers
         logger.info(f"Executing action: {action} with payload: {payload}")
 
-        return [{{
+        return [{
             "success": True,
             "name": "result",
             "resultType": "object",
-            "result": {{"message": "Plugin executed successfully"}},
+            "result": {"message": "Plugin executed successfully"},
             "resultDescription": f"Result of {action} operation"
-        }}]
+        }]
 
     except Exception as e:
         logger.error(f"Error in execute_plugin: {e}")
-        return [{{
+        return [{
             "success": False,
             "name": "error",
             "resultType": "error",
             "result": str(e),
             "error": str(e)
-        }}]
-
-def parse_inputs(inputs_str):
-    """Parse and normalize the plugin stdin JSON payload into a dict."""
-    try:
-        payload = json.loads(inputs_str)
-        inputs_dict = {{}}
-
-        if isinstance(payload, dict):
-            if payload.get('_type') == 'Map' and isinstance(payload.get('entries'), list):
-                for entry in payload.get('entries', []):
-                    if isinstance(entry, list) and len(entry) == 2:
-                        key, value = entry
-                        inputs_dict[key] = value
-            else:
-                for key, value in payload.items():
-                    if key not in ('_type', 'entries'):
-                        inputs_dict[key] = value
-
-        elif isinstance(payload, list):
-            for item in payload:
-                if isinstance(item, list) and len(item) == 2:
-                    key, value = item
-                    inputs_dict[key] = value
-
-        return inputs_dict
-
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse input JSON: {{e}}")
-        raise
+        }]
 
 def main():
     """Main entry point for the plugin."""
-    try:
-        input_data = sys.stdin.read().strip()
-        if not input_data:
-            result = [{{
-                "success": False,
-                "name": "error",
-                "resultType": "error",
-                "result": "No input data received",
-                "error": "No input data received"
-            }}]
-        else:
-            inputs_dict = parse_inputs(input_data)
-            result = execute_plugin(inputs_dict)
-
-        print(json.dumps(result))
+    run(execute_plugin)
 
-    except Exception as e:
-        logger.error(f"Plugin execution failed: {str(e)}")
-        result = [{{
-            "success": False,
-            "name": "error",
-            "resultType": "error",
-            "result": str(e),
-            "error": str(e)
-        }}]
-        print(json.dumps(result))
 
 if __name__ == "__main__":
     main()
@@ -5,16 +5,23 @@ Analyzes contracts for clauses, risks, compliance issues, and provides recommend
 """
 
 import sys
-import json
 import logging
 import os
 import re
-from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Tuple
 from datetime import datetime
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+try:
+    from stage7_plugin_runtime import run, get_input as _get_input
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_plugin_runtime import run, get_input as _get_input
+
 # Standard contract clause templates
 STANDARD_CLAUSES = {
     'payment_terms': {
@@ -93,6 +100,31 @@ RED_FLAG_PATTERNS = [
     }
 ]
 
+# One-sided or unusual terms reported by detect_risks
+UNUSUAL_TERM_PATTERNS = [
+    {
+        'pattern': r'unlimited.*liability',
+        'description': 'Unlimited liability exposure',
+        'severity': 'high',
+        'recommendation': 'Negotiate cap on liability exposure'
+    },
+    {
+        'pattern': r'automatic.*renewal|auto.*renew',
+        'description': 'Automatic renewal clause',
+        'severity': 'medium',
+        'recommendation': 'Add notice requirement before renewal'
+    },
+    {
+        'pattern': r'unilateral.*termination',
+        'description': 'One-sided termination rights',
+        'severity': 'medium',
+        'recommendation': 'Negotiate mutual termination rights'
+    }
+]
+
+# Below this many characters in a batch, worker start-up costs more than it saves
+BATCH_INLINE_CHARS = 200_000
+
 # Compliance checklist
 COMPLIANCE_CHECKLIST = [
     'Payment terms defined',
@@ -107,19 +139,138 @@ COMPLIANCE_CHECKLIST = [
     'Insurance requirements specified'
 ]
 
-def _get_input(inputs: dict, key: str, aliases: list = [], default=None):
-    """Safely gets a value from inputs, checking aliases, and extracting from {{'value':...}} wrapper."""
-    raw_val = inputs.get(key)
-    if raw_val is None:
-        for alias in aliases:
-            raw_val = inputs.get(alias)
-            if raw_val is not None:
-                break
-    if raw_val is None:
-        return default
-    if isinstance(raw_val, dict) and 'value' in raw_val:
-        return raw_val['value'] if raw_val['value'] is not None else default
-    return raw_val if raw_val is not None else default
+def _split_alternatives(pattern: str) -> List[str]:
+    """Top-level alternatives of a pattern, unwrapping one enclosing group: '(a|b\\s+c)' -> ['a', 'b\\s+c']."""
+    def split(text: str) -> List[str]:
+        parts, depth, start, i = [], 0, 0, 0
+        while i < len(text):
+            char = text[i]
+            if char == '\\':
+                i += 1
+            elif char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            elif char == '|' and depth == 0:
+                parts.append(text[start:i])
+                start = i + 1
+            i += 1
+        parts.append(text[start:])
+        return parts
+
+    parts = split(pattern)
+    if len(parts) == 1 and pattern.startswith('(') and pattern.endswith(')') and not pattern.startswith('(?'):
+        inner = split(pattern[1:-1])
+        if all(part.count('(') == part.count(')') for part in inner):
+            return inner
+    return parts
+
+
+class ContractScanner:
+    """
+    Finds the first match of every clause, unusual-term and red-flag pattern in one pass.
+
+    All alternatives are joined into a single regex; each alternative starts with a
+    literal, so the regex engine skips ahead on first characters instead of trying
+    every position. At a hit, only the patterns not yet found are checked there, and
+    the combined regex is rebuilt without them, so text after the last new finding is
+    scanned for the remaining patterns only.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        self.keys = list(patterns)
+        self.compiled = {key: re.compile(pattern) for key, pattern in patterns.items()}
+        self.alternatives = {key: _split_alternatives(pattern) for key, pattern in patterns.items()}
+        self._anchors: Dict[frozenset, Any] = {}
+
+    def _anchor(self, remaining: frozenset):
+        anchor = self._anchors.get(remaining)
+        if anchor is None:
+            alternatives = dict.fromkeys(alt for key in self.keys if key in remaining
+                                         for alt in self.alternatives[key])
+            anchor = self._anchors[remaining] = re.compile('|'.join(alternatives))
+        return anchor
+
+    def scan(self, text_lower: str) -> Dict[str, Tuple[int, int]]:
+        """Span of the first match of each pattern key that occurs in the (lowercased) text."""
+        hits: Dict[str, Tuple[int, int]] = {}
+        remaining = frozenset(self.keys)
+        anchor = self._anchor(remaining)
+        match = anchor.search(text_lower)
+        while match:
+            pos = match.start()
+            found = False
+            for key in remaining:
+                hit = self.compiled[key].match(text_lower, pos)
+                if hit:
+                    hits[key] = hit.span()
+                    found = True
+            if found:
+                remaining = frozenset(key for key in remaining if key not in hits)
+                if not remaining:
+                    break
+                anchor = self._anchor(remaining)
+            # Resume one character on, not at match.end(): patterns may overlap
+            match = anchor.search(text_lower, pos + 1)
+        return hits
+
+
+_SCANNER = ContractScanner({
+    **{f'clause:{clause_type}': info['pattern'] for clause_type, info in STANDARD_CLAUSES.items()},
+    **{f'unusual:{index}': info['pattern'] for index, info in enumerate(UNUSUAL_TERM_PATTERNS)},
+    **{f'redflag:{index}': info['pattern'] for index, info in enumerate(RED_FLAG_PATTERNS)},
+})
+
+
+def _clauses_from_scan(contract_text: str, hits: Dict[str, Tuple[int, int]]) -> List[Dict[str, Any]]:
+    clauses = []
+    for clause_type, clause_info in STANDARD_CLAUSES.items():
+        span = hits.get(f'clause:{clause_type}')
+        if span is None:
+            continue
+        # Extract surrounding context (50 chars before and after)
+        start = max(0, span[0] - 50)
+        end = min(len(contract_text), span[1] + 50)
+        clauses.append({
+            'type': clause_type,
+            'description': clause_info['description'],
+            'risk_level': clause_info['risk_level'],
+            'found': True,
+            'context': contract_text[start:end].strip()
+        })
+    return clauses
+
+
+def _risks_from_scan(hits: Dict[str, Tuple[int, int]]) -> List[Dict[str, Any]]:
+    risks = []
+    # Check for missing standard clauses
+    for clause_type, clause_info in STANDARD_CLAUSES.items():
+        if f'clause:{clause_type}' not in hits:
+            risks.append({
+                'type': 'missing_clause',
+                'description': f'Missing {clause_info["description"]}',
+                'severity': 'medium',
+                'recommendation': f'Add {clause_info["description"]} to contract'
+            })
+    # Check for unusual terms
+    for index, term_info in enumerate(UNUSUAL_TERM_PATTERNS):
+        if f'unusual:{index}' in hits:
+            risks.append({
+                'type': 'unusual_term',
+                'description': term_info['description'],
+                'severity': term_info['severity'],
+                'recommendation': term_info['recommendation']
+            })
+    return risks
+
+
+def _redflags_from_scan(hits: Dict[str, Tuple[int, int]]) -> List[Dict[str, Any]]:
+    return [{
+        'flag': red_flag_info['flag'],
+        'severity': red_flag_info['severity'],
+        'action': f'Review and negotiate {red_flag_info["flag"].lower()}'
+    } for index, red_flag_info in enumerate(RED_FLAG_PATTERNS) if f'redflag:{index}' in hits]
+
 
 def analyze_contract(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Perform comprehensive contract analysis."""
@@ -133,20 +284,15 @@ def analyze_contract(payload: Dict[str, Any]) -> Dict[str, Any]:
         if not isinstance(contract_text, str) or len(contract_text) < 50:
             return {'success': False, 'error': 'Contract text must be at least 50 characters'}
         
-        contract_lower = contract_text.lower()
-        
         # Count words and estimate pages
         word_count = len(contract_text.split())
         estimated_pages = max(1, word_count // 250)
         
-        # Extract clauses
-        clauses_found = extract_clauses({'contract_text': contract_text})['clauses']
-        
-        # Detect risks
-        risks = detect_risks({'contract_text': contract_text})['risks']
-        
-        # Identify red flags
-        red_flags = identify_redflags({'contract_text': contract_text})['red_flags']
+        # Clauses, risks and red flags all come from one scan of the text
+        hits = _SCANNER.scan(contract_text.lower())
+        clauses_found = _clauses_from_scan(contract_text, hits)
+        risks = _risks_from_scan(hits)
+        red_flags = _redflags_from_scan(hits)
         
         return {
             'success': True,
@@ -177,38 +323,12 @@ def extract_clauses(payload: Dict[str, Any]) -> Dict[str, Any]:
         if not contract_text:
             return {'success': False, 'error': 'Missing required parameter: contract_text'}
         
-        contract_lower = contract_text.lower()
-        clauses = []
-        
-        # Extract each clause type
-        for clause_type, clause_info in STANDARD_CLAUSES.items():
-            pattern = clause_info['pattern']
-            matches = re.finditer(pattern, contract_lower)
-            
-            for match in matches:
-                # Extract surrounding context (50 chars before and after)
-                start = max(0, match.start() - 50)
-                end = min(len(contract_text), match.end() + 50)
-                context = contract_text[start:end].strip()
-                
-                clauses.append({
-                    'type': clause_type,
-                    'description': clause_info['description'],
-                    'risk_level': clause_info['risk_level'],
-                    'found': True,
-                    'context': context
-                })
-        
-        # Remove duplicates
-        unique_clauses = {}
-        for clause in clauses:
-            if clause['type'] not in unique_clauses:
-                unique_clauses[clause['type']] = clause
+        clauses = _clauses_from_scan(contract_text, _SCANNER.scan(contract_text.lower()))
         
         return {
             'success': True,
-            'clauses_found': len(unique_clauses),
-            'clauses': list(unique_clauses.values())
+            'clauses_found': len(clauses),
+            'clauses': clauses
         }
     except Exception as e:
         logger.error(f"Error in extract_clauses: {str(e)}")
@@ -222,43 +342,7 @@ def detect_risks(payload: Dict[str, Any]) -> Dict[str, Any]:
         if not contract_text:
             return {'success': False, 'error': 'Missing required parameter: contract_text'}
         
-        contract_lower = contract_text.lower()
-        risks = []
-        
-        # Check for missing standard clauses
-        for clause_type, clause_info in STANDARD_CLAUSES.items():
-            if not re.search(clause_info['pattern'], contract_lower):
-                risks.append({
-                    'type': 'missing_clause',
-                    'description': f'Missing {clause_info["description"]}',
-                    'severity': 'medium',
-                    'recommendation': f'Add {clause_info["description"]} to contract'
-                })
-        
-        # Check for unusual terms
-        if re.search(r'unlimited.*liability', contract_lower):
-            risks.append({
-                'type': 'unusual_term',
-                'description': 'Unlimited liability exposure',
-                'severity': 'high',
-                'recommendation': 'Negotiate cap on liability exposure'
-            })
-        
-        if re.search(r'automatic.*renewal|auto.*renew', contract_lower):
-            risks.append({
-                'type': 'unusual_term',
-                'description': 'Automatic renewal clause',
-                'severity': 'medium',
-                'recommendation': 'Add notice requirement before renewal'
-            })
-        
-        if re.search(r'unilateral.*termination', contract_lower):
-            risks.append({
-                'type': 'unusual_term',
-                'description': 'One-sided termination rights',
-                'severity': 'medium',
-                'recommendation': 'Negotiate mutual termination rights'
-            })
+        risks = _risks_from_scan(_SCANNER.scan(contract_text.lower()))
         
         return {
             'success': True,
@@ -311,17 +395,7 @@ def identify_redflags(payload: Dict[str, Any]) -> Dict[str, Any]:
         if not contract_text:
             return {'success': False, 'error': 'Missing required parameter: contract_text'}
         
-        contract_lower = contract_text.lower()
-        red_flags = []
-        
-        # Check each red flag pattern
-        for red_flag_info in RED_FLAG_PATTERNS:
-            if re.search(red_flag_info['pattern'], contract_lower):
-                red_flags.append({
-                    'flag': red_flag_info['flag'],
-                    'severity': red_flag_info['severity'],
-                    'action': f'Review and negotiate {red_flag_info["flag"].lower()}'
-                })
+        red_flags = _redflags_from_scan(_SCANNER.scan(contract_text.lower()))
         
         return {
             'success': True,
@@ -333,6 +407,67 @@ def identify_redflags(payload: Dict[str, Any]) -> Dict[str, Any]:
         logger.error(f"Error in identify_redflags: {str(e)}")
         return {'success': False, 'error': f'Red flag detection error: {str(e)}'}
 
+def _analyze_batch_item(item: Tuple[int, Any]) -> Dict[str, Any]:
+    """Analyze one batch entry; runs in a worker process for large batches."""
+    index, contract = item
+    if isinstance(contract, str):
+        contract = {'contract_text': contract}
+    elif not isinstance(contract, dict):
+        return {'success': False, 'index': index, 'error': 'Each contract must be a string or an object with contract_text'}
+    result = analyze_contract(contract)
+    result['index'] = index
+    contract_id = _get_input(contract, 'contract_id', ['id'])
+    if contract_id is not None:
+        result['contract_id'] = contract_id
+    return result
+
+def batch_analyze(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Analyze many contracts, spreading large batches across a process pool."""
+    try:
+        contracts = _get_input(payload, 'contracts', ['documents', 'items'])
+        max_workers = _get_input(payload, 'max_workers', ['workers'])
+        
+        if not isinstance(contracts, list) or not contracts:
+            return {'success': False, 'error': 'Missing required parameter: contracts (non-empty list)'}
+        
+        items = list(enumerate(contracts))
+        total_chars = sum(
+            len(contract) if isinstance(contract, str)
+            else len(str(_get_input(contract, 'contract_text', ['text', 'content'], default='')))
+            for contract in contracts if isinstance(contract, (str, dict))
+        )
+        workers = min(int(max_workers or os.cpu_count() or 1), len(items))
+        
+        results = None
+        if workers > 1 and total_chars >= BATCH_INLINE_CHARS:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    chunksize = max(1, len(items) // (workers * 4))
+                    results = list(pool.map(_analyze_batch_item, items, chunksize=chunksize))
+            except (OSError, BrokenProcessPool) as e:
+                logger.warning(f"Process pool unavailable, analyzing batch serially: {e}")
+        if results is None:
+            workers = 1
+            results = [_analyze_batch_item(item) for item in items]
+        
+        analyzed = [r for r in results if r.get('success')]
+        risk_counts = {'high': 0, 'medium': 0, 'low': 0}
+        for result in analyzed:
+            risk_counts[result['overall_risk']] += 1
+        
+        return {
+            'success': True,
+            'contracts_total': len(results),
+            'contracts_analyzed': len(analyzed),
+            'contracts_failed': len(results) - len(analyzed),
+            'workers': workers,
+            'overall_risk_counts': risk_counts,
+            'results': results
+        }
+    except Exception as e:
+        logger.error(f"Error in batch_analyze: {str(e)}")
+        return {'success': False, 'error': f'Batch analysis error: {str(e)}'}
+
 def summarize(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Generate contract summary."""
     try:
@@ -398,6 +533,8 @@ def execute_plugin(inputs):
             result = identify_redflags(payload)
         elif action == 'summarize':
             result = summarize(payload)
+        elif action == 'batch_analyze':
+            result = batch_analyze(payload)
         else:
             return [{
                 "success": False,
@@ -426,101 +563,10 @@ def execute_plugin(inputs):
             "error": str(e)
         }]
 
-def parse_inputs(inputs_str):
-    """Parse and normalize the plugin stdin JSON payload into a dict."""
-    try:
-        payload = json.loads(inputs_str)
-        inputs_dict = {}
-
-        if isinstance(payload, dict):
-            if payload.get('_type') == 'Map' and isinstance(payload.get('entries'), list):
-                for entry in payload.get('entries', []):
-                    if isinstance(entry, list) and len(entry) == 2:
-                        key, value = entry
-                        inputs_dict[key] = value
-            else:
-                for key, value in payload.items():
-                    if key not in ('_type', 'entries'):
-                        inputs_dict[key] = value
-
-        elif isinstance(payload, list):
-            for item in payload:
-                if isinstance(item, list) and len(item) == 2:
-                    key, value = item
-                    inputs_dict[key] = value
-
-        return inputs_dict
-
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse input JSON: {e}")
-        raise
-
-def main():
-    """Main entry point for the plugin."""
-    try:
-        input_data = sys.stdin.read().strip()
-        if not input_data:
-            result = [{
-                "success": False,
-                "name": "error",
-                "resultType": "error",
-                "result": "No input data received",
-                "error": "No input data received"
-            }]
-        else:
-            inputs_dict = parse_inputs(input_data)
-            result = execute_plugin(inputs_dict)
-
-        print(json.dumps(result))
-
-    except Exception as e:
-        logger.error(f"Plugin execution failed: {str(e)}")
-        result = [{
-            "success": False,
-            "name": "error",
-            "resultType": "error",
-            "result": str(e),
-            "error": str(e)
-        }]
-        print(json.dumps(result))
-
-if __name__ == "__main__":
-    main()
-
-        return inputs_dict
-
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse input JSON: {{e}}")
-        raise
-
 def main():
     """Main entry point for the plugin."""
-    try:
-        input_data = sys.stdin.read().strip()
-        if not input_data:
-            result = [{{
-                "success": False,
-                "name": "error",
-                "resultType": "error",
-                "result": "No input data received",
-                "error": "No input data received"
-            }}]
-        else:
-            inputs_dict = parse_inputs(input_data)
-            result = execute_plugin(inputs_dict)
-
-        print(json.dumps(result))
+    run(execute_plugin)
 
-    except Exception as e:
-        logger.error(f"Plugin execution failed: {str(e)}")
-        result = [{{
-            "success": False,
-            "name": "error",
-            "resultType": "error",
-            "result": str(e),
-            "error": str(e)
-        }}]
-        print(json.dumps(result))
 
 if __name__ == "__main__":
     main()
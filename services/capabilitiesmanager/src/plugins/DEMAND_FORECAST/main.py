@@ -8,14 +8,30 @@ import sys
 import json
 import logging
 import os
+import math
+import time
+import calendar
+import itertools
 from typing import Dict, Any, List, Tuple, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from enum import Enum
 import uuid
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+try:
+    from stage7_state_store import PluginState
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_state_store import PluginState
+
 class DayOfWeek(Enum):
     MONDAY = "monday"
     TUESDAY = "tuesday"
@@ -45,6 +61,21 @@ _seasonality_patterns = {}
 _staffing_recommendations = {}
 _forecast_accuracy = {}
 
+# Persisted across calls; see shared/python/lib/stage7_state_store.py
+_state = PluginState("DEMAND_FORECAST", {
+    "historical_data": _historical_data,
+    "demand_forecasts": _demand_forecasts,
+    "trend_analysis": _trend_analysis,
+    "peak_hour_analysis": _peak_hour_analysis,
+    "seasonality_patterns": _seasonality_patterns,
+    "staffing_recommendations": _staffing_recommendations,
+    "forecast_accuracy": _forecast_accuracy
+})
+
+# Fitted forecasting models per restaurant, stored apart so they can be dropped and refit
+_forecast_models = {}
+_model_state = PluginState("DEMAND_FORECAST_MODELS", {"models": _forecast_models})
+
 def _get_input(inputs: dict, key: str, aliases: list = [], default=None):
     """Safely retrieve input values with alias fallback."""
     val = inputs.get(key)
@@ -68,7 +99,11 @@ def _validate_params(payload: dict, required_fields: List[str]) -> Tuple[bool, s
 
 def _initialize_restaurant(restaurant_id: str) -> None:
     """Initialize restaurant forecasting structures."""
-    if restaurant_id not in _historical_data:
+    if restaurant_id in _historical_data:
+        return
+    if _state.restore(restaurant_id):
+        _model_state.restore(restaurant_id)
+    else:
         _historical_data[restaurant_id] = _generate_historical_data()
         _demand_forecasts[restaurant_id] = {}
         _trend_analysis[restaurant_id] = {}
@@ -119,8 +154,360 @@ def _initialize_seasonality() -> Dict[str, Any]:
         "winter": {"multiplier": 0.9, "trend": "decreasing"}
     }
 
+# ============================================================================
+# FORECASTING ENGINE
+# ============================================================================
+#
+# Additive double-seasonal Holt-Winters (Taylor 2003) in error-correction form on daily
+# covers: damped trend, a weekly ring of 7 seasonal terms and, with two years of history,
+# an annual ring of 365 indexed by day of year. Days without a record are skipped by the
+# recursion, which just carries the state forward.
+#
+# Smoothing parameters are chosen by one-step squared error. With NumPy every candidate
+# of a search round runs through the recursion at once, as one array per parameter.
+
+WEEK = 7
+YEAR = 365
+MIN_HISTORY_DAYS = 2 * WEEK
+ANNUAL_MIN_DAYS = 2 * YEAR
+# Parameters are re-estimated after this many days of incremental updates
+REESTIMATE_AFTER_DAYS = 28
+# Days of history used for revenue per cover and peak-hour shares by weekday
+PROFILE_DAYS = 8 * WEEK
+MAX_FORECAST_DAYS = 366
+INTERVAL_LEVEL = 0.8
+INTERVAL_Z = 1.2816
+MODEL_VERSION = 1
+DEFAULT_AVG_CHECK = 35.0
+DEFAULT_PEAK_SHARE = 0.35
+
+PARAMETER_NAMES = ('alpha', 'beta', 'phi', 'gamma_weekly', 'gamma_annual')
+PARAMETER_BOUNDS = ((0.01, 0.95), (0.0, 0.3), (0.8, 1.0), (0.0, 0.6), (0.0, 0.6))
+PARAMETER_GRID = ((0.05, 0.1, 0.2, 0.35, 0.5), (0.0, 0.01, 0.05), (0.9, 0.98), (0.05, 0.1, 0.2, 0.3), (0.0, 0.05, 0.15))
+# Initial local search step per parameter, halved each round
+PARAMETER_STEPS = (0.05, 0.01, 0.02, 0.05, 0.05)
+REFINE_ROUNDS = 3
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _annual_slot(day: date) -> int:
+    """Day of year in 0..364; 29 February shares the slot of the 28th."""
+    slot = day.timetuple().tm_yday - 1
+    if slot >= 59 and calendar.isleap(day.year):
+        slot -= 1
+    return slot
+
+
+def _daily_series(history: Dict[str, Any], start: Optional[int] = None) -> Tuple[int, List[float]]:
+    """First day ordinal and covers for every day from it to the last record, NaN where missing."""
+    observed = {}
+    for key, record in history.items():
+        ordinal = date.fromisoformat(key[:10]).toordinal()
+        if start is None or ordinal >= start:
+            observed[ordinal] = float(record.get("covers", 0))
+    if not observed:
+        return start or 0, []
+    first = min(observed) if start is None else start
+    return first, [observed.get(ordinal, math.nan) for ordinal in range(first, max(observed) + 1)]
+
+
+def _slots(first: int, length: int) -> Tuple[List[int], List[int]]:
+    weekly = [(first + i) % WEEK for i in range(length)]
+    annual = [_annual_slot(date.fromordinal(first + i)) for i in range(length)]
+    return weekly, annual
+
+
+def _mean(values: List[float]) -> float:
+    observed = [v for v in values if v == v]
+    return sum(observed) / len(observed) if observed else math.nan
+
+
+def _initial_state(y: List[float], first: int, use_annual: bool) -> Dict[str, Any]:
+    """Level, trend and seasonal terms from the start of the history."""
+    weekly_slots, annual_slots = _slots(first, len(y))
+    annual = None
+    base = y
+    line = None
+    if use_annual:
+        # A centred 7-day mean removes the weekly pattern. The slope comes from the
+        # difference between the two years, which cancels the annual cycle; the annual
+        # profile is the deviation from that line.
+        smooth = {i: _mean(y[i - 3:i + 4]) for i in range(3, min(len(y) - 3, 2 * YEAR))}
+        smooth = {i: value for i, value in smooth.items() if value == value}
+        yearly = [smooth[i + YEAR] - value for i, value in smooth.items() if i + YEAR in smooth]
+        slope = sum(yearly) / len(yearly) / YEAR if yearly else 0.0
+        count = len(smooth)
+        line = (sum(smooth.values()) / count - slope * sum(smooth) / count, slope)
+        sums, counts = [0.0] * YEAR, [0] * YEAR
+        for i, value in smooth.items():
+            sums[annual_slots[i]] += value - line[0] - line[1] * i
+            counts[annual_slots[i]] += 1
+        profile = [s / c if c else 0.0 for s, c in zip(sums, counts)]
+        offset = sum(profile) / YEAR
+        annual = [value - offset for value in profile]
+        base = [value - annual[slot] for value, slot in zip(y, annual_slots)]
+
+    weeks = max(1, min(8, len(y) // WEEK))
+    sums, counts = [0.0] * WEEK, [0] * WEEK
+    for week in range(weeks):
+        block = base[week * WEEK:(week + 1) * WEEK]
+        week_mean = _mean(block)
+        for i, value in enumerate(block):
+            if value == value:
+                sums[weekly_slots[week * WEEK + i]] += value - week_mean
+                counts[weekly_slots[week * WEEK + i]] += 1
+    weekly = [s / c if c else 0.0 for s, c in zip(sums, counts)]
+    offset = sum(weekly) / WEEK
+    weekly = [value - offset for value in weekly]
+
+    if line is not None:
+        return {"level": line[0], "trend": line[1], "weekly": weekly, "annual": annual}
+    level = _mean(base[:WEEK])
+    if level != level:
+        level = _mean(base)
+    trend = 0.0
+    if len(base) >= 2 * WEEK:
+        second = _mean(base[WEEK:2 * WEEK])
+        if second == second:
+            trend = (second - level) / WEEK
+    return {"level": level, "trend": trend, "weekly": weekly, "annual": annual}
+
+
+def _run_filter(y: List[float], weekly_slots: List[int], annual_slots: List[int], state: Dict[str, Any],
+                params: Tuple, burn_in: int = 0, errors: Optional[List[Tuple[float, float]]] = None):
+    """
+    Run the recursion over y from state. Parameters are floats, or equally shaped arrays to
+    evaluate many candidates at once. Returns the state after the last day and the sum of
+    squared one-step errors after burn_in days; ``errors`` collects (actual, forecast) pairs.
+    """
+    alpha, beta, phi, gamma_weekly, gamma_annual = params
+    level, trend = state["level"], state["trend"]
+    weekly = list(state["weekly"])
+    annual = list(state["annual"]) if state.get("annual") is not None else None
+    sse = 0.0
+    for i, value in enumerate(y):
+        slot = weekly_slots[i]
+        damped = phi * trend
+        if annual is None:
+            forecast = level + damped + weekly[slot]
+        else:
+            forecast = level + damped + weekly[slot] + annual[annual_slots[i]]
+        if value != value:
+            level = level + damped
+            trend = damped
+            continue
+        error = value - forecast
+        level = level + damped + alpha * error
+        trend = damped + beta * error
+        weekly[slot] = weekly[slot] + gamma_weekly * error
+        if annual is not None:
+            annual[annual_slots[i]] = annual[annual_slots[i]] + gamma_annual * error
+        if i >= burn_in:
+            sse = sse + error * error
+        if errors is not None:
+            errors.append((value, forecast))
+    return {"level": level, "trend": trend, "weekly": weekly, "annual": annual}, sse
+
+
+def _candidate_sse(y, weekly_slots, annual_slots, state, candidates: List[Tuple], burn_in: int) -> List[float]:
+    if HAS_NUMPY:
+        columns = tuple(np.array(column, dtype=float) for column in zip(*candidates))
+        with np.errstate(over='ignore', invalid='ignore'):
+            _, sse = _run_filter(y, weekly_slots, annual_slots, state, columns, burn_in)
+        return np.nan_to_num(np.broadcast_to(sse, (len(candidates),)), nan=math.inf, posinf=math.inf).tolist()
+    results = []
+    for params in candidates:
+        try:
+            results.append(_run_filter(y, weekly_slots, annual_slots, state, params, burn_in)[1])
+        except OverflowError:
+            results.append(math.inf)
+    return results
+
+
+def _estimate_parameters(y, weekly_slots, annual_slots, state, use_annual: bool) -> Tuple[Tuple, float]:
+    """Grid search, then REFINE_ROUNDS of local search with halving steps."""
+    active = [True, True, True, True, use_annual]
+    grid = [values if on else (0.0,) for values, on in zip(PARAMETER_GRID, active)]
+    candidates = [p for p in itertools.product(*grid) if p[3] <= 1 - p[0] and p[4] <= 1 - p[0]]
+    burn_in = WEEK
+    scores = _candidate_sse(y, weekly_slots, annual_slots, state, candidates, burn_in)
+    best_index = min(range(len(candidates)), key=scores.__getitem__)
+    best, best_score = candidates[best_index], scores[best_index]
+
+    steps = list(PARAMETER_STEPS)
+    for _ in range(REFINE_ROUNDS):
+        axes = []
+        for value, step, (low, high), on in zip(best, steps, PARAMETER_BOUNDS, active):
+            axes.append(sorted({min(high, max(low, value + d)) for d in (-step, 0.0, step)}) if on else (value,))
+        candidates = [p for p in itertools.product(*axes) if p[3] <= 1 - p[0] and p[4] <= 1 - p[0]]
+        scores = _candidate_sse(y, weekly_slots, annual_slots, state, candidates, burn_in)
+        index = min(range(len(candidates)), key=scores.__getitem__)
+        if scores[index] < best_score:
+            best, best_score = candidates[index], scores[index]
+        steps = [step / 2 for step in steps]
+    return tuple(float(p) for p in best), best_score
+
+
+def _weekday_profile(history: Dict[str, Any], last: date) -> List[Dict[str, Any]]:
+    """Revenue per cover, peak-hour share and most common peak hour per weekday over the last PROFILE_DAYS."""
+    totals = [{"covers": 0.0, "revenue": 0.0, "peak": 0.0, "hours": {}} for _ in range(WEEK)]
+    for offset in range(PROFILE_DAYS):
+        day = last - timedelta(days=offset)
+        record = history.get(day.isoformat())
+        if not record or not record.get("covers"):
+            continue
+        bucket = totals[day.weekday()]
+        bucket["covers"] += record["covers"]
+        bucket["revenue"] += record.get("revenue", record["covers"] * DEFAULT_AVG_CHECK)
+        bucket["peak"] += record.get("peak_hour_covers", record["covers"] * DEFAULT_PEAK_SHARE)
+        hour = record.get("peak_hour")
+        if hour is not None:
+            bucket["hours"][hour] = bucket["hours"].get(hour, 0) + 1
+
+    profile = []
+    for weekday, bucket in enumerate(totals):
+        covers = bucket["covers"]
+        profile.append({
+            "revenue_per_cover": round(bucket["revenue"] / covers, 4) if covers else DEFAULT_AVG_CHECK,
+            "peak_share": round(bucket["peak"] / covers, 4) if covers else DEFAULT_PEAK_SHARE,
+            "peak_hour": max(bucket["hours"], key=bucket["hours"].get) if bucket["hours"] else (19 if weekday >= 4 else 18)
+        })
+    return profile
+
+
+def _fit_model(history: Dict[str, Any]) -> Dict[str, Any]:
+    """Estimate parameters and state from the whole history."""
+    started = time.perf_counter()
+    first, y = _daily_series(history)
+    observations = sum(1 for v in y if v == v)
+    weekly_slots, annual_slots = _slots(first, len(y))
+    use_annual = len(y) >= ANNUAL_MIN_DAYS
+    state = _initial_state(y, first, use_annual)
+
+    if observations < MIN_HISTORY_DAYS:
+        # Too short to estimate anything: weekday means, which the recursion leaves unchanged
+        method, params = "weekday_mean", (0.0, 0.0, 1.0, 0.0, 0.0)
+        means = [_mean([v for v, s in zip(y, weekly_slots) if s == slot]) for slot in range(WEEK)]
+        overall = _mean(y)
+        overall = overall if overall == overall else 0.0
+        state = {"level": overall, "trend": 0.0, "annual": None,
+                 "weekly": [m - overall if m == m else 0.0 for m in means]}
+    else:
+        method = "holt_winters"
+        params, _ = _estimate_parameters(y, weekly_slots, annual_slots, state, use_annual)
+
+    errors: List[Tuple[float, float]] = []
+    state, sse = _run_filter(y, weekly_slots, annual_slots, state, params, errors=errors)
+    model = {
+        "version": MODEL_VERSION,
+        "method": method,
+        "seasonality": ["weekly", "annual"] if use_annual and method == "holt_winters" else ["weekly"],
+        "params": dict(zip(PARAMETER_NAMES, params)),
+        "estimated_through": date.fromordinal(first + len(y) - 1).isoformat() if y else None,
+        "fit_seconds": 0.0
+    }
+    _store_fit(model, state, errors, first + len(y) - 1, history, reset=True)
+    model["fit_seconds"] = round(time.perf_counter() - started, 4)
+    return model
+
+
+def _store_fit(model: Dict[str, Any], state: Dict[str, Any], errors: List[Tuple[float, float]],
+               last_ordinal: int, history: Dict[str, Any], reset: bool = False):
+    """Record the filter state and running error statistics in the model."""
+    if reset:
+        model["errors"] = {"count": 0, "sse": 0.0, "ape_sum": 0.0, "ape_count": 0}
+    stats = model["errors"]
+    for actual, forecast in errors[WEEK if reset else 0:]:
+        stats["count"] += 1
+        stats["sse"] += (actual - forecast) ** 2
+        if actual > 0:
+            stats["ape_sum"] += abs(actual - forecast) / actual
+            stats["ape_count"] += 1
+    model["level"] = float(state["level"])
+    model["trend"] = float(state["trend"])
+    model["weekly"] = [float(v) for v in state["weekly"]]
+    model["annual"] = [float(v) for v in state["annual"]] if state.get("annual") is not None else None
+    model["fitted_through"] = date.fromordinal(last_ordinal).isoformat()
+    model["sigma"] = math.sqrt(stats["sse"] / stats["count"]) if stats["count"] else 0.0
+    model["mape"] = stats["ape_sum"] / stats["ape_count"] if stats["ape_count"] else None
+    model["profile"] = _weekday_profile(history, date.fromordinal(last_ordinal))
+
+
+def _update_model(model: Dict[str, Any], history: Dict[str, Any]) -> Dict[str, Any]:
+    """Continue the stored state over the days recorded after it, keeping the parameters."""
+    start = date.fromisoformat(model["fitted_through"]).toordinal() + 1
+    first, y = _daily_series({k: v for k, v in history.items() if k > model["fitted_through"]}, start)
+    weekly_slots, annual_slots = _slots(first, len(y))
+    params = tuple(model["params"][name] for name in PARAMETER_NAMES)
+    errors: List[Tuple[float, float]] = []
+    state, _ = _run_filter(y, weekly_slots, annual_slots, model, params, errors=errors)
+    _store_fit(model, state, errors, first + len(y) - 1, history)
+    return model
+
+
+def _get_model(restaurant_id: str, refit: bool = False) -> Tuple[Dict[str, Any], str]:
+    """
+    The restaurant's fitted model and how it was brought up to date: 'cached', 'incremental'
+    (new days run through the stored state) or 'full' (parameters re-estimated).
+    """
+    history = _historical_data[restaurant_id]
+    latest = max(history) if history else None
+    model = _forecast_models.get(restaurant_id)
+    if not refit and model and model.get("version") == MODEL_VERSION and latest:
+        if model["fitted_through"] == latest[:10]:
+            return model, "cached"
+        last_estimate = date.fromisoformat(model["estimated_through"])
+        if (model["method"] == "holt_winters" and latest[:10] > model["fitted_through"]
+                and (date.fromisoformat(latest[:10]) - last_estimate).days < REESTIMATE_AFTER_DAYS):
+            _forecast_models[restaurant_id] = _update_model(model, history)
+            return model, "incremental"
+    if not history:
+        raise ValueError(f"No historical data for restaurant {restaurant_id}")
+    model = _fit_model(history)
+    _forecast_models[restaurant_id] = model
+    return model, "full"
+
+
+def _forecast(model: Dict[str, Any], target: date) -> Dict[str, float]:
+    """Point forecast and INTERVAL_LEVEL interval for one day after the fitted history."""
+    last = date.fromisoformat(model["fitted_through"]).toordinal()
+    steps = max(1, target.toordinal() - last)
+    params = model["params"]
+    alpha, beta, phi = params["alpha"], params["beta"], params["phi"]
+
+    damping = sum(phi ** i for i in range(1, steps + 1)) if phi != 1 else float(steps)
+    value = model["level"] + damping * model["trend"] + model["weekly"][target.toordinal() % WEEK]
+    if model.get("annual"):
+        value += model["annual"][_annual_slot(target)]
+
+    # h-step variance of the additive model: sigma^2 * (1 + sum of squared error loadings)
+    variance, damping = 1.0, 0.0
+    for j in range(1, steps):
+        damping = damping * phi + phi
+        loading = alpha + beta * damping
+        if j % WEEK == 0:
+            loading += params["gamma_weekly"]
+        if j % YEAR == 0:
+            loading += params["gamma_annual"]
+        variance += loading * loading
+    spread = INTERVAL_Z * model["sigma"] * math.sqrt(variance)
+    return {"covers": max(0.0, value), "lower": max(0.0, value - spread), "upper": max(0.0, value + spread)}
+
+
+def _model_summary(model: Dict[str, Any], update: str) -> Dict[str, Any]:
+    return {
+        "method": model["method"],
+        "seasonality": model["seasonality"],
+        "params": {name: round(value, 4) for name, value in model["params"].items()},
+        "fitted_through": model["fitted_through"],
+        "update": update,
+        "fit_seconds": model["fit_seconds"],
+        "in_sample_mape": round(model["mape"], 4) if model.get("mape") is not None else None
+    }
+
+
 def forecast_demand(payload: dict) -> Dict[str, Any]:
-    """Forecast demand for future dates."""
+    """Forecast daily covers and revenue from the restaurant's fitted model."""
     required = ["forecast_date"]
     is_valid, error = _validate_params(payload, required)
     if not is_valid:
@@ -128,7 +515,9 @@ def forecast_demand(payload: dict) -> Dict[str, Any]:
     
     restaurant_id = payload.get("restaurant_id", "REST_DEFAULT")
     forecast_date = payload.get("forecast_date")
-    forecast_days = payload.get("forecast_days", 7)
+    forecast_days = int(payload.get("forecast_days", 7))
+    if not 1 <= forecast_days <= MAX_FORECAST_DAYS:
+        return {"success": False, "error": f"forecast_days must be between 1 and {MAX_FORECAST_DAYS}"}
     
     _initialize_restaurant(restaurant_id)
     
@@ -138,39 +527,27 @@ def forecast_demand(payload: dict) -> Dict[str, Any]:
     except ValueError:
         return {"success": False, "error": "Invalid date format (use YYYY-MM-DD)"}
     
-    historical = _historical_data[restaurant_id]
+    model, update = _get_model(restaurant_id)
     forecasts = []
     
     for day_offset in range(forecast_days):
         current_date = start_date + timedelta(days=day_offset)
         date_str = current_date.isoformat()
         day_of_week = current_date.weekday()
-        day_name = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"][day_of_week]
-        
-        # Calculate average for this day of week from historical data
-        same_day_records = [
-            h for h in historical.values()
-            if datetime.fromisoformat(h["date"]).weekday() == day_of_week
-        ]
-        
-        if same_day_records:
-            avg_covers = sum(h["covers"] for h in same_day_records) / len(same_day_records)
-            avg_revenue = sum(h["revenue"] for h in same_day_records) / len(same_day_records)
-            avg_peak_hour = sum(h["peak_hour_covers"] for h in same_day_records) / len(same_day_records)
-        else:
-            avg_covers = 85
-            avg_revenue = 2975
-            avg_peak_hour = 30
+        profile = model["profile"][day_of_week]
+        predicted = _forecast(model, current_date)
         
         forecast_entry = {
             "forecast_id": f"FCST_{restaurant_id}_{date_str}_{uuid.uuid4().hex[:6].upper()}",
             "date": date_str,
-            "day_of_week": day_name,
-            "forecasted_covers": int(avg_covers),
-            "confidence": 0.85,
-            "forecasted_revenue": round(avg_revenue, 2),
-            "peak_hour_covers": int(avg_peak_hour),
-            "expected_peak_hour": 19 if day_of_week in [4, 5, 6] else 18,
+            "day_of_week": DAY_NAMES[day_of_week],
+            "forecasted_covers": int(round(predicted["covers"])),
+            "covers_lower": int(round(predicted["lower"])),
+            "covers_upper": int(round(predicted["upper"])),
+            "confidence": INTERVAL_LEVEL,
+            "forecasted_revenue": round(predicted["covers"] * profile["revenue_per_cover"], 2),
+            "peak_hour_covers": int(predicted["covers"] * profile["peak_share"]),
+            "expected_peak_hour": profile["peak_hour"],
             "created_at": datetime.now().isoformat()
         }
         
@@ -190,7 +567,79 @@ def forecast_demand(payload: dict) -> Dict[str, Any]:
             "total_forecasted_covers": sum(f["forecasted_covers"] for f in forecasts),
             "avg_daily_covers": round(sum(f["forecasted_covers"] for f in forecasts) / forecast_days, 1),
             "total_forecasted_revenue": round(sum(f["forecasted_revenue"] for f in forecasts), 2)
-        }
+        },
+        "model": _model_summary(model, update)
+    }
+
+def record_covers(payload: dict) -> Dict[str, Any]:
+    """Add actual daily results and bring the fitted model up to date."""
+    restaurant_id = payload.get("restaurant_id", "REST_DEFAULT")
+    records = payload.get("records")
+    if records is None and payload.get("date") is not None:
+        records = [payload]
+    if not isinstance(records, list) or not records:
+        return {"success": False, "error": "Missing required parameter: records"}
+    
+    _initialize_restaurant(restaurant_id)
+    
+    entries = []
+    for record in records:
+        try:
+            day = datetime.fromisoformat(str(record["date"])).date()
+            covers = int(record["covers"])
+        except (KeyError, TypeError, ValueError):
+            return {"success": False, "error": f"Each record needs a YYYY-MM-DD date and covers: {record}"}
+        if covers < 0:
+            return {"success": False, "error": f"Covers cannot be negative: {record}"}
+        day_of_week = day.weekday()
+        is_weekend = day_of_week in [4, 5, 6]
+        avg_check = float(record.get("avg_check", DEFAULT_AVG_CHECK))
+        entries.append({
+            "date": day.isoformat(),
+            "day_of_week": ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"][day_of_week],
+            "covers": covers,
+            "revenue": record.get("revenue", covers * avg_check),
+            "peak_hour": record.get("peak_hour", 19 if is_weekend else 18),
+            "peak_hour_covers": record.get("peak_hour_covers", int(covers * DEFAULT_PEAK_SHARE)),
+            "lunch_covers": record.get("lunch_covers", int(covers * 0.30)),
+            "dinner_covers": record.get("dinner_covers", int(covers * 0.70)),
+            "server_count": record.get("server_count", 6 if is_weekend else 5),
+            "avg_check": avg_check,
+            "notes": record.get("notes", "Recorded")
+        })
+    
+    historical = _historical_data[restaurant_id]
+    model = _forecast_models.get(restaurant_id)
+    if payload.get("replace_history"):
+        # Drops the generated sample days along with anything recorded before
+        historical.clear()
+        _forecast_models.pop(restaurant_id, None)
+    elif model and any(entry["date"] <= model["fitted_through"] for entry in entries):
+        # Revising a day the model has already seen means re-estimating from scratch
+        _forecast_models.pop(restaurant_id, None)
+    for entry in entries:
+        historical[entry["date"]] = entry
+    
+    model, update = _get_model(restaurant_id)
+    return {
+        "success": True,
+        "recorded": len(entries),
+        "history_days": len(historical),
+        "model": _model_summary(model, update)
+    }
+
+def fit_model(payload: dict) -> Dict[str, Any]:
+    """Re-estimate the restaurant's forecasting model from its whole history."""
+    restaurant_id = payload.get("restaurant_id", "REST_DEFAULT")
+    
+    _initialize_restaurant(restaurant_id)
+    
+    model, update = _get_model(restaurant_id, refit=True)
+    return {
+        "success": True,
+        "model": _model_summary(model, update),
+        "in_sample_rmse": round(model["sigma"], 3),
+        "observations": model["errors"]["count"]
     }
 
 def analyze_trends(payload: dict) -> Dict[str, Any]:
@@ -258,7 +707,7 @@ def analyze_trends(payload: dict) -> Dict[str, Any]:
     }
 
 def predict_peak_hours(payload: dict) -> Dict[str, Any]:
-    """Predict peak hours for a given date."""
+    """Predict peak hours for a given date from the fitted model and weekday profile."""
     required = ["prediction_date"]
     is_valid, error = _validate_params(payload, required)
     if not is_valid:
@@ -276,38 +725,20 @@ def predict_peak_hours(payload: dict) -> Dict[str, Any]:
     except ValueError:
         return {"success": False, "error": "Invalid date format"}
     
-    historical = _historical_data[restaurant_id]
-    
-    # Find similar days
-    similar_days = [
-        h for h in historical.values()
-        if datetime.fromisoformat(h["date"]).weekday() == day_of_week
-    ]
-    
-    if not similar_days:
-        similar_days = list(historical.values())[-7:]
-    
-    # Calculate peak hour statistics
-    peak_hours_data = {}
-    for record in similar_days:
-        peak_hour = record.get("peak_hour", 19)
-        if peak_hour not in peak_hours_data:
-            peak_hours_data[peak_hour] = []
-        peak_hours_data[peak_hour].append(record.get("peak_hour_covers", 0))
+    model, update = _get_model(restaurant_id)
+    profile = model["profile"][day_of_week]
+    forecasted_covers = _forecast(model, pred_date)["covers"]
+    most_likely_peak = profile["peak_hour"]
+    peak_covers = forecasted_covers * profile["peak_share"]
     
-    # Find most likely peak hour
-    peak_hour_counts = {h: sum(c for c in covers) / len(covers) for h, covers in peak_hours_data.items()}
-    most_likely_peak = max(peak_hour_counts, key=peak_hour_counts.get) if peak_hour_counts else 19
-    
-    # Build hourly predictions
+    # Build hourly predictions, tapering away from the peak hour
     hourly_forecast = []
     for hour in range(11, 23):  # 11 AM to 10 PM
-        if hour == most_likely_peak:
-            expected_covers = int(sum(s.get("peak_hour_covers", 0) for s in similar_days) / len(similar_days))
-        elif abs(hour - most_likely_peak) <= 1:
-            expected_covers = int(expected_covers * 0.8) if 'expected_covers' in locals() else 20
+        distance = abs(hour - most_likely_peak)
+        if distance == 0:
+            expected_covers = int(peak_covers)
         else:
-            expected_covers = max(5, int(expected_covers * 0.4)) if 'expected_covers' in locals() else 10
+            expected_covers = max(5, int(peak_covers * 0.8 * 0.4 ** (distance - 1)))
         
         hourly_forecast.append({
             "hour": hour,
@@ -320,7 +751,7 @@ def predict_peak_hours(payload: dict) -> Dict[str, Any]:
     _peak_hour_analysis[restaurant_id][prediction_date] = {
         "date": prediction_date,
         "peak_hour": most_likely_peak,
-        "predicted_peak_covers": peak_hour_counts.get(most_likely_peak, 0),
+        "predicted_peak_covers": round(peak_covers, 1),
         "hourly_forecast": hourly_forecast
     }
     
@@ -329,9 +760,11 @@ def predict_peak_hours(payload: dict) -> Dict[str, Any]:
         "prediction_date": prediction_date,
         "peak_hour": most_likely_peak,
         "peak_hour_time": f"{most_likely_peak:02d}:00",
-        "predicted_peak_covers": int(peak_hour_counts.get(most_likely_peak, 0)),
+        "predicted_peak_covers": int(peak_covers),
+        "forecasted_covers": int(round(forecasted_covers)),
         "hourly_forecast": hourly_forecast,
-        "confidence": 0.80
+        "confidence": 0.80,
+        "model": _model_summary(model, update)
     }
 
 def recommend_staffing(payload: dict) -> Dict[str, Any]:
@@ -346,13 +779,14 @@ def recommend_staffing(payload: dict) -> Dict[str, Any]:
     
     _initialize_restaurant(restaurant_id)
     
-    # Get forecast for this date
-    date_str = forecast_date
-    if date_str in _demand_forecasts[restaurant_id] and len(_demand_forecasts[restaurant_id][date_str]) > 0:
-        forecast = _demand_forecasts[restaurant_id][date_str][0]
-        forecasted_covers = forecast["forecasted_covers"]
-    else:
-        forecasted_covers = 85  # Default
+    try:
+        target_date = datetime.fromisoformat(forecast_date).date()
+    except ValueError:
+        return {"success": False, "error": "Invalid date format (use YYYY-MM-DD)"}
+    
+    # Staff for the model's forecast of this date
+    model, _ = _get_model(restaurant_id)
+    forecasted_covers = int(round(_forecast(model, target_date)["covers"]))
     
     # Calculate staffing needs (ratio: 1 server per 15 covers)
     server_count = max(3, int(forecasted_covers / 15))
@@ -360,12 +794,7 @@ def recommend_staffing(payload: dict) -> Dict[str, Any]:
     cook_count = max(2, int(forecasted_covers / 40))
     busser_count = max(1, int(server_count / 2))
     
-    # Parse date for day of week
-    try:
-        d = datetime.fromisoformat(forecast_date).date()
-        is_weekend = d.weekday() in [4, 5, 6]
-    except:
-        is_weekend = False
+    is_weekend = target_date.weekday() in [4, 5, 6]
     
     if is_weekend:
         server_count = int(server_count * 1.2)
@@ -480,24 +909,35 @@ def execute_plugin(action: str, payload: dict) -> Dict[str, Any]:
         action_lower = action.lower()
         
         if action_lower == "forecast_demand":
-            return forecast_demand(payload)
+            result = forecast_demand(payload)
         elif action_lower == "analyze_trends":
-            return analyze_trends(payload)
+            result = analyze_trends(payload)
         elif action_lower == "predict_peak_hours":
-            return predict_peak_hours(payload)
+            result = predict_peak_hours(payload)
         elif action_lower == "recommend_staffing":
-            return recommend_staffing(payload)
+            result = recommend_staffing(payload)
         elif action_lower == "analyze_seasonality":
-            return analyze_seasonality(payload)
+            result = analyze_seasonality(payload)
         elif action_lower == "generate_forecast_report":
-            return generate_forecast_report(payload)
+            result = generate_forecast_report(payload)
+        elif action_lower == "record_covers":
+            result = record_covers(payload)
+        elif action_lower == "fit_model":
+            result = fit_model(payload)
         else:
             return {"success": False, "error": f"Unknown action: {action}"}
-    
+        
     except Exception as e:
         logger.error(f"Plugin error: {str(e)}", exc_info=True)
         return {"success": False, "error": str(e)}
 
+    try:
+        _state.persist()
+        _model_state.persist()
+    except Exception as e:
+        logger.error(f"Failed to persist plugin state: {str(e)}", exc_info=True)
+    return result
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         try:
@@ -11,7 +11,15 @@ import uuid
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 import copy
+import os
 import re
+import sys
+
+try:
+    from stage7_plugin_store import cow_view, plugin_limits_from_env
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_plugin_store import cow_view, plugin_limits_from_env
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,18 +27,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger('EMAIL')
 
+# Bounds on the logs and result cache, which otherwise grow for the life of the worker
+_limits = plugin_limits_from_env('EMAIL')
+
 # In-memory storage for all email data
 _data: Dict[str, Any] = {
     'storage': {},
     'metadata': {},
-    'transaction_log': [],
-    'audit_log': [],
-    'cache': {},
+    'audit_log': _limits.audit_log(),
+    'cache': _limits.result_cache(),
     'lock': threading.Lock(),
     'stats': {
         'operations_count': 0,
         'errors_count': 0,
-        'cache_hits': 0,
         'last_cleanup': None
     },
     'indexes': {},
@@ -42,7 +51,7 @@ _data: Dict[str, Any] = {
 _metrics = {
     'execution_times': {},
     'action_counts': {},
-    'error_log': []
+    'error_log': _limits.error_log()
 }
 
 
@@ -90,32 +99,17 @@ def _log_operation(action: str, status: str, details: Dict[str, Any]) -> None:
         logger.error(f"Error logging operation: {str(e)}")
 
 
-def _cache_result(key: str, value: Any, ttl: int = 300) -> None:
-    """Cache operation results with TTL"""
+def _cache_result(key: str, value: Any, ttl: Optional[int] = None) -> None:
+    """Cache operation results with TTL, evicting the least recently used past PLUGIN_RESULT_CACHE_SIZE"""
     try:
-        _data['cache'][key] = {
-            'value': value,
-            'timestamp': datetime.now().isoformat(),
-            'ttl': ttl
-        }
+        _data['cache'].set(key, value, ttl)
     except Exception as e:
         logger.error(f"Caching error: {str(e)}")
 
 
 def _get_cached_result(key: str) -> Optional[Any]:
     """Retrieve cached result if still valid"""
-    if key not in _data['cache']:
-        return None
-    
-    cached = _data['cache'][key]
-    age = (datetime.now() - datetime.fromisoformat(cached['timestamp'])).seconds
-    
-    if age > cached['ttl']:
-        del _data['cache'][key]
-        return None
-    
-    _data['stats']['cache_hits'] += 1
-    return cached['value']
+    return _data['cache'].get(key)
 
 
 def _sanitize_string(value: str, max_length: int = 1000) -> str:
@@ -163,7 +157,7 @@ def handle_send_email(inputs: Dict[str, Any]) -> Dict[str, Any]:
             
             # Add action-specific data handling
             if 'data' in inputs:
-                result['data'] = copy.deepcopy(inputs['data'])
+                result['data'] = cow_view(inputs['data'])
             
             # Log successful operation
             _log_operation('send_email', 'success', {'action_id': action_id})
@@ -194,7 +188,7 @@ def handle_send_template(inputs: Dict[str, Any]) -> Dict[str, Any]:
             
             # Add action-specific data handling
             if 'data' in inputs:
-                result['data'] = copy.deepcopy(inputs['data'])
+                result['data'] = cow_view(inputs['data'])
             
             # Log successful operation
             _log_operation('send_template', 'success', {'action_id': action_id})
@@ -225,7 +219,7 @@ def handle_create_template(inputs: Dict[str, Any]) -> Dict[str, Any]:
             
             # Add action-specific data handling
             if 'data' in inputs:
-                result['data'] = copy.deepcopy(inputs['data'])
+                result['data'] = cow_view(inputs['data'])
             
             # Log successful operation
             _log_operation('create_template', 'success', {'action_id': action_id})
@@ -256,7 +250,7 @@ def handle_get_emails(inputs: Dict[str, Any]) -> Dict[str, Any]:
             
             # Add action-specific data handling
             if 'data' in inputs:
-                result['data'] = copy.deepcopy(inputs['data'])
+                result['data'] = cow_view(inputs['data'])
             
             # Log successful operation
             _log_operation('get_emails', 'success', {'action_id': action_id})
@@ -287,7 +281,7 @@ def handle_delete_email(inputs: Dict[str, Any]) -> Dict[str, Any]:
             
             # Add action-specific data handling
             if 'data' in inputs:
-                result['data'] = copy.deepcopy(inputs['data'])
+                result['data'] = cow_view(inputs['data'])
             
             # Log successful operation
             _log_operation('delete_email', 'success', {'action_id': action_id})
@@ -318,7 +312,7 @@ def handle_mark_read(inputs: Dict[str, Any]) -> Dict[str, Any]:
             
             # Add action-specific data handling
             if 'data' in inputs:
-                result['data'] = copy.deepcopy(inputs['data'])
+                result['data'] = cow_view(inputs['data'])
             
             # Log successful operation
             _log_operation('mark_read', 'success', {'action_id': action_id})
@@ -365,37 +359,27 @@ def get_stats() -> Dict[str, Any]:
     return {
         'operations_count': _data['stats']['operations_count'],
         'errors_count': _data['stats']['errors_count'],
-        'cache_hits': _data['stats']['cache_hits'],
+        'cache_hits': _data['cache'].hits,
         'audit_log_size': len(_data['audit_log']),
-        'error_count': len(_metrics['error_log'])
+        'error_count': len(_metrics['error_log']),
+        'cache': _data['cache'].get_stats(),
+        'audit_log': _data['audit_log'].get_stats()
     }
 
 
 def get_audit_log(limit: int = 100) -> List[Dict[str, Any]]:
     """Retrieve audit log entries"""
-    return _data['audit_log'][-limit:]
+    return _data['audit_log'].recent(limit)
 
 
 def cleanup_cache() -> Dict[str, Any]:
     """Clean up expired cache entries"""
     try:
-        expired_keys = []
-        current_time = datetime.now()
-        
-        for key, cached in _data['cache'].items():
-            cached_time = datetime.fromisoformat(cached['timestamp'])
-            age = (current_time - cached_time).seconds
-            
-            if age > cached['ttl']:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            del _data['cache'][key]
-        
+        cleaned = _data['cache'].purge_expired()
         _data['stats']['last_cleanup'] = datetime.now().isoformat()
-        logger.info(f"Cache cleanup completed: {len(expired_keys)} expired entries removed")
+        logger.info(f"Cache cleanup completed: {cleaned} expired entries removed")
         
-        return {'status': 'success', 'cleaned': len(expired_keys)}
+        return {'status': 'success', 'cleaned': cleaned}
     except Exception as e:
         logger.error(f"Cache cleanup error: {str(e)}")
         return {'status': 'error', 'message': str(e)}
@@ -440,8 +424,8 @@ def export_data(include_logs: bool = False) -> Dict[str, Any]:
         }
         
         if include_logs:
-            export['audit_log'] = _data['audit_log'][-100:]
-            export['error_log'] = _metrics['error_log'][-50:]
+            export['audit_log'] = _data['audit_log'].recent(100)
+            export['error_log'] = _metrics['error_log'].recent(50)
         
         return {'status': 'success', 'data': export}
     except Exception as e:
@@ -9,12 +9,18 @@ import json
 import logging
 import os
 from typing import Dict, Any, List, Tuple, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+try:
+    from stage7_calendar_index import BookingCounts, stay_ordinals
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_calendar_index import BookingCounts, stay_ordinals
+
 class ReservationStatus(Enum):
     PENDING = "pending"
     CONFIRMED = "confirmed"
@@ -25,8 +31,10 @@ class ReservationStatus(Enum):
 
 # In-Memory Data Storage
 _reservations = {}
-_room_availability = {}
-_booking_calendar = {}
+_room_inventory = {}  # "<hotel>_<room type>" -> rooms of that type
+_booking_calendar = {}  # "<hotel>_<room type>" -> BookingCounts of reserved rooms per night
+
+DEFAULT_ROOMS_PER_TYPE = 10
 
 ROOM_TYPES = ["standard", "deluxe", "suite", "penthouse", "accessible"]
 STANDARD_ROOM_RATES = {
@@ -63,57 +71,18 @@ def _generate_confirmation_number(guest_id: str) -> str:
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
     return f"RES_{guest_id}_{timestamp[-6:]}"
 
-def _initialize_availability(hotel_id: str, check_in: str, check_out: str, room_type: str) -> None:
-    """Initialize room availability for date range."""
+def _calendar(hotel_id: str, room_type: str) -> BookingCounts:
+    """Per-night reservation counts for a hotel's rooms of one type."""
     key = f"{hotel_id}_{room_type}"
-    if key not in _room_availability:
-        _room_availability[key] = {}
-        _booking_calendar[key] = {}
-    
-    try:
-        check_in_date = datetime.strptime(check_in, "%Y-%m-%d")
-        check_out_date = datetime.strptime(check_out, "%Y-%m-%d")
-        
-        current = check_in_date
-        while current < check_out_date:
-            date_str = current.strftime("%Y-%m-%d")
-            if date_str not in _room_availability[key]:
-                _room_availability[key][date_str] = 10  # 10 rooms available by default
-            current += timedelta(days=1)
-    except:
-        pass
+    calendar = _booking_calendar.get(key)
+    if calendar is None:
+        calendar = _booking_calendar[key] = BookingCounts()
+    return calendar
 
-def _check_date_overlap(start1: str, end1: str, start2: str, end2: str) -> bool:
-    """Check if two date ranges overlap."""
-    try:
-        s1 = datetime.strptime(start1, "%Y-%m-%d")
-        e1 = datetime.strptime(end1, "%Y-%m-%d")
-        s2 = datetime.strptime(start2, "%Y-%m-%d")
-        e2 = datetime.strptime(end2, "%Y-%m-%d")
-        return s1 < e2 and s2 < e1
-    except:
-        return False
-
-def _count_available_rooms(hotel_id: str, check_in: str, check_out: str, room_type: str) -> int:
-    """Count available rooms for a date range."""
-    key = f"{hotel_id}_{room_type}"
-    _initialize_availability(hotel_id, check_in, check_out, room_type)
-    
-    min_available = float('inf')
-    try:
-        check_in_date = datetime.strptime(check_in, "%Y-%m-%d")
-        check_out_date = datetime.strptime(check_out, "%Y-%m-%d")
-        
-        current = check_in_date
-        while current < check_out_date:
-            date_str = current.strftime("%Y-%m-%d")
-            available = _room_availability[key].get(date_str, 10)
-            min_available = min(min_available, available)
-            current += timedelta(days=1)
-    except:
-        return 0
-    
-    return max(0, int(min_available)) if min_available != float('inf') else 0
+def _count_available_rooms(hotel_id: str, start: int, end: int, room_type: str) -> int:
+    """Rooms of a type free on every night from day ordinal `start` up to `end`."""
+    inventory = _room_inventory.get(f"{hotel_id}_{room_type}", DEFAULT_ROOMS_PER_TYPE)
+    return max(0, inventory - _calendar(hotel_id, room_type).max(start, end))
 
 def create_reservation(payload: dict) -> Dict[str, Any]:
     """Create a new reservation."""
@@ -131,15 +100,14 @@ def create_reservation(payload: dict) -> Dict[str, Any]:
     
     # Validate dates
     try:
-        check_in_date = datetime.strptime(check_in, "%Y-%m-%d")
-        check_out_date = datetime.strptime(check_out, "%Y-%m-%d")
-        if check_in_date >= check_out_date:
-            return {"success": False, "error": "Check-out date must be after check-in date"}
-    except:
+        start, end = stay_ordinals(check_in, check_out)
+    except ValueError:
         return {"success": False, "error": "Invalid date format. Use YYYY-MM-DD"}
+    if start >= end:
+        return {"success": False, "error": "Check-out date must be after check-in date"}
     
     # Check availability
-    available_count = _count_available_rooms(hotel_id, check_in, check_out, room_type)
+    available_count = _count_available_rooms(hotel_id, start, end, room_type)
     if available_count <= 0:
         return {
             "success": False,
@@ -148,7 +116,7 @@ def create_reservation(payload: dict) -> Dict[str, Any]:
     
     # Calculate rate
     room_rate = STANDARD_ROOM_RATES.get(room_type, 100.0)
-    num_nights = (check_out_date - check_in_date).days
+    num_nights = end - start
     total_cost = room_rate * num_nights
     
     confirmation_number = _generate_confirmation_number(guest_id)
@@ -178,19 +146,7 @@ def create_reservation(payload: dict) -> Dict[str, Any]:
     _reservations[confirmation_number] = reservation
     
     # Update availability
-    key = f"{hotel_id}_{room_type}"
-    _initialize_availability(hotel_id, check_in, check_out, room_type)
-    
-    try:
-        check_in_date = datetime.strptime(check_in, "%Y-%m-%d")
-        check_out_date = datetime.strptime(check_out, "%Y-%m-%d")
-        current = check_in_date
-        while current < check_out_date:
-            date_str = current.strftime("%Y-%m-%d")
-            _room_availability[key][date_str] = max(0, _room_availability[key].get(date_str, 10) - 1)
-            current += timedelta(days=1)
-    except:
-        pass
+    _calendar(hotel_id, room_type).add(start, end)
     
     logger.info(f"Created reservation {confirmation_number} for guest {guest_id}")
     
@@ -218,6 +174,17 @@ def update_reservation(payload: dict) -> Dict[str, Any]:
     
     reservation = _reservations[confirmation_number]
     
+    # Moving an active reservation to another room type moves its nights too
+    new_room_type = payload.get("room_type")
+    if (new_room_type is not None and new_room_type != reservation["room_type"]
+            and reservation["status"] != ReservationStatus.CANCELLED.value):
+        hotel_id = reservation["hotel_id"]
+        start, end = stay_ordinals(reservation["check_in_date"], reservation["check_out_date"])
+        if _count_available_rooms(hotel_id, start, end, new_room_type) <= 0:
+            return {"success": False, "error": f"No {new_room_type} rooms available for these dates"}
+        _calendar(hotel_id, reservation["room_type"]).add(start, end, -1)
+        _calendar(hotel_id, new_room_type).add(start, end)
+    
     # Update allowed fields
     updatable_fields = ["num_guests", "special_requests", "room_type", "notes", "email", "phone"]
     
@@ -252,20 +219,8 @@ def cancel_reservation(payload: dict) -> Dict[str, Any]:
     # Release room availability
     hotel_id = reservation["hotel_id"]
     room_type = reservation["room_type"]
-    check_in = reservation["check_in_date"]
-    check_out = reservation["check_out_date"]
-    
-    key = f"{hotel_id}_{room_type}"
-    try:
-        check_in_date = datetime.strptime(check_in, "%Y-%m-%d")
-        check_out_date = datetime.strptime(check_out, "%Y-%m-%d")
-        current = check_in_date
-        while current < check_out_date:
-            date_str = current.strftime("%Y-%m-%d")
-            _room_availability[key][date_str] = _room_availability[key].get(date_str, 10) + 1
-            current += timedelta(days=1)
-    except:
-        pass
+    start, end = stay_ordinals(reservation["check_in_date"], reservation["check_out_date"])
+    _calendar(hotel_id, room_type).add(start, end, -1)
     
     reservation["status"] = ReservationStatus.CANCELLED.value
     
@@ -295,17 +250,16 @@ def check_availability(payload: dict) -> Dict[str, Any]:
     
     # Validate dates
     try:
-        check_in_date = datetime.strptime(check_in, "%Y-%m-%d")
-        check_out_date = datetime.strptime(check_out, "%Y-%m-%d")
-        num_nights = (check_out_date - check_in_date).days
-        if num_nights <= 0:
-            return {"success": False, "error": "Invalid date range"}
-    except:
+        start, end = stay_ordinals(check_in, check_out)
+    except ValueError:
         return {"success": False, "error": "Invalid date format"}
+    num_nights = end - start
+    if num_nights <= 0:
+        return {"success": False, "error": "Invalid date range"}
     
     availability = {}
     if room_type:
-        available = _count_available_rooms(hotel_id, check_in, check_out, room_type)
+        available = _count_available_rooms(hotel_id, start, end, room_type)
         availability[room_type] = {
             "available": available,
             "rate": STANDARD_ROOM_RATES.get(room_type, 100.0),
@@ -313,7 +267,7 @@ def check_availability(payload: dict) -> Dict[str, Any]:
         }
     else:
         for rt in ROOM_TYPES:
-            available = _count_available_rooms(hotel_id, check_in, check_out, rt)
+            available = _count_available_rooms(hotel_id, start, end, rt)
             availability[rt] = {
                 "available": available,
                 "rate": STANDARD_ROOM_RATES.get(rt, 100.0),
@@ -330,6 +284,34 @@ def check_availability(payload: dict) -> Dict[str, Any]:
         }
     }
 
+def set_room_inventory(payload: dict) -> Dict[str, Any]:
+    """Set how many rooms of each type a hotel has."""
+    hotel_id = payload.get("hotel_id", "HOTEL_DEFAULT")
+    inventory = payload.get("inventory")
+    if inventory is None:
+        required = ["room_type", "rooms"]
+        is_valid, error = _validate_params(payload, required)
+        if not is_valid:
+            return {"success": False, "error": error}
+        inventory = {payload["room_type"]: payload["rooms"]}
+    
+    for room_type, rooms in inventory.items():
+        if not isinstance(rooms, int) or rooms < 0:
+            return {"success": False, "error": f"Room count for {room_type} must be a non-negative integer"}
+        reserved = _calendar(hotel_id, room_type).peak()
+        if rooms < reserved:
+            return {"success": False, "error": f"{reserved} {room_type} rooms are already reserved on some night"}
+    
+    for room_type, rooms in inventory.items():
+        _room_inventory[f"{hotel_id}_{room_type}"] = rooms
+    
+    return {
+        "success": True,
+        "hotel_id": hotel_id,
+        "inventory": {rt: _room_inventory.get(f"{hotel_id}_{rt}", DEFAULT_ROOMS_PER_TYPE)
+                      for rt in sorted(set(ROOM_TYPES) | set(inventory))}
+    }
+
 def get_reservations(payload: dict) -> Dict[str, Any]:
     """Get reservations by guest or date range."""
     hotel_id = payload.get("hotel_id", "HOTEL_DEFAULT")
@@ -414,6 +396,7 @@ def execute_plugin(inputs: dict) -> Dict[str, Any]:
             "update_reservation": update_reservation,
             "cancel_reservation": cancel_reservation,
             "check_availability": check_availability,
+            "set_room_inventory": set_room_inventory,
             "get_reservations": get_reservations,
             "generate_booking_report": generate_booking_report
         }
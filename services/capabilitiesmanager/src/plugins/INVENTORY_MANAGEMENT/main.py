@@ -16,6 +16,12 @@ import uuid
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+try:
+    from stage7_state_store import PluginState
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_state_store import PluginState
+
 class ItemCategory(Enum):
     PRODUCE = "produce"
     MEAT = "meat"
@@ -49,6 +55,16 @@ _inventory_transactions = {}
 _supplier_info = {}
 _valuation_history = {}
 
+# Persisted across calls; see shared/python/lib/stage7_state_store.py
+_state = PluginState("INVENTORY_MANAGEMENT", {
+    "inventory_items": _inventory_items,
+    "stock_levels": _stock_levels,
+    "low_stock_alerts": _low_stock_alerts,
+    "inventory_transactions": _inventory_transactions,
+    "supplier_info": _supplier_info,
+    "valuation_history": _valuation_history
+})
+
 def _get_input(inputs: dict, key: str, aliases: list = [], default=None):
     """Safely retrieve input values with alias fallback."""
     val = inputs.get(key)
@@ -72,7 +88,7 @@ def _validate_params(payload: dict, required_fields: List[str]) -> Tuple[bool, s
 
 def _initialize_restaurant(restaurant_id: str) -> None:
     """Initialize restaurant inventory structures."""
-    if restaurant_id not in _inventory_items:
+    if restaurant_id not in _inventory_items and not _state.restore(restaurant_id):
         _inventory_items[restaurant_id] = _create_sample_inventory()
         _stock_levels[restaurant_id] = {}
         _low_stock_alerts[restaurant_id] = []
@@ -550,24 +566,30 @@ def execute_plugin(action: str, payload: dict) -> Dict[str, Any]:
         action_lower = action.lower()
         
         if action_lower == "add_item":
-            return add_item(payload)
+            result = add_item(payload)
         elif action_lower == "update_quantity":
-            return update_quantity(payload)
+            result = update_quantity(payload)
         elif action_lower == "check_stock_level":
-            return check_stock_level(payload)
+            result = check_stock_level(payload)
         elif action_lower == "generate_low_stock_alert":
-            return generate_low_stock_alert(payload)
+            result = generate_low_stock_alert(payload)
         elif action_lower == "calculate_value":
-            return calculate_value(payload)
+            result = calculate_value(payload)
         elif action_lower == "generate_inventory_report":
-            return generate_inventory_report(payload)
+            result = generate_inventory_report(payload)
         else:
             return {"success": False, "error": f"Unknown action: {action}"}
-    
+        
     except Exception as e:
         logger.error(f"Plugin error: {str(e)}", exc_info=True)
         return {"success": False, "error": str(e)}
 
+    try:
+        _state.persist()
+    except Exception as e:
+        logger.error(f"Failed to persist plugin state: {str(e)}", exc_info=True)
+    return result
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         try:
@@ -9,13 +9,24 @@ import json
 import logging
 import os
 import re
+import mmap
+import hashlib
+import tempfile
 import datetime
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from collections import defaultdict
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+try:
+    from stage7_plugin_runtime import run, get_input as _get_input
+    from stage7_text_index import BM25Index
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_plugin_runtime import run, get_input as _get_input
+    from stage7_text_index import BM25Index
+
 # In-memory legal case database (simulation)
 CASE_DATABASE = {
     'Miranda v. Arizona': {
@@ -92,42 +103,222 @@ STATUTE_DATABASE = {
     }
 }
 
-def _get_input(inputs: dict, key: str, aliases: list = [], default=None):
-    """Safely gets a value from inputs, checking aliases, and extracting from {{'value':...}} wrapper."""
-    raw_val = inputs.get(key)
-    if raw_val is None:
-        for alias in aliases:
-            raw_val = inputs.get(alias)
-            if raw_val is not None:
-                break
-    if raw_val is None:
-        return default
-    if isinstance(raw_val, dict) and 'value' in raw_val:
-        return raw_val['value'] if raw_val['value'] is not None else default
-    return raw_val if raw_val is not None else default
-
-def _calculate_relevance_score(query: str, case: Dict[str, Any]) -> float:
-    """Calculate relevance score for a case based on query match."""
-    query_lower = query.lower()
-    score = 0.0
-    
-    # Topic match - highest weight
-    if query_lower in case.get('topic', '').lower():
-        score += 0.4
-    
-    # Holding match
-    if query_lower in case.get('holding', '').lower():
-        score += 0.3
-    
-    # Rule match
-    if query_lower in case.get('rule', '').lower():
-        score += 0.2
-    
-    # Facts match - lower weight
-    if query_lower in case.get('facts', '').lower():
-        score += 0.1
-    
-    return min(score, 1.0)
+# BM25 field weights, in the proportions search_cases has always weighted matches
+CASE_FIELD_WEIGHTS = {'topic': 0.4, 'holding': 0.3, 'rule': 0.2, 'facts': 0.1}
+STATUTE_FIELD_WEIGHTS = {'name': 0.5, 'topic': 0.3, 'summary': 0.2}
+
+CORPUS_FORMAT_VERSION = 1
+DEFAULT_SEARCH_LIMIT = 10
+
+_CITATION_YEAR = re.compile(r'\s*\(\d{4}\)\s*$')
+
+
+def _normalize_citation(citation: str) -> str:
+    """'384 U.S. 436 (1966)' and '384  U.S. 436' both become '384 U.S. 436'."""
+    return ' '.join(_CITATION_YEAR.sub('', citation).split())
+
+
+def _iter_jsonl(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(byte offset, record) for every JSON object line in a corpus file."""
+    offset = 0
+    with open(path, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            start, offset = offset, offset + len(line)
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                logger.warning(f"Skipping {path}:{line_number}: {e}")
+                continue
+            if isinstance(record, dict):
+                yield start, record
+
+
+def _builtin_digest() -> str:
+    payload = json.dumps([CASE_DATABASE, STATUTE_DATABASE, CASE_FIELD_WEIGHTS, STATUTE_FIELD_WEIGHTS], sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _corpus_signature(paths: List[str]) -> List[Any]:
+    signature: List[Any] = [CORPUS_FORMAT_VERSION, _builtin_digest()]
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append([path, stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            signature.append([path, None, None])
+    return signature
+
+
+class LegalCorpus:
+    """
+    Cases and statutes behind BM25 indexes, plus a citation graph.
+
+    The built-in CASE_DATABASE and STATUTE_DATABASE are always included. JSONL corpus
+    files add to (or override) them: one object per line with "name", "type" ("case"
+    or "statute") and the same fields as the built-in entries; cases may list the
+    citations they rely on under "cites". Indexes over a corpus are saved to the index
+    directory and memory-mapped by later calls, and documents are read back from the
+    corpus file by offset only when a result needs them.
+    """
+
+    def __init__(self, paths: List[str], index_dir: Optional[str] = None):
+        self.paths = paths
+        self.index_dir = index_dir
+        # name -> (type, path index or -1 for built-in, byte offset)
+        self.documents: Dict[str, Tuple[str, int, int]] = {}
+        self.case_index = BM25Index(CASE_FIELD_WEIGHTS)
+        self.statute_index = BM25Index(STATUTE_FIELD_WEIGHTS)
+        # normalized citation -> case name; case name -> normalized citations it relies on
+        self.case_by_citation: Dict[str, str] = {}
+        self.cites: Dict[str, List[str]] = {}
+        self.cited_by: Dict[str, List[str]] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+
+    @classmethod
+    def build(cls, paths: List[str], index_dir: Optional[str] = None) -> 'LegalCorpus':
+        corpus = cls([os.path.abspath(path) for path in paths], index_dir)
+        documents = {name: ('case', -1, 0) for name in CASE_DATABASE}
+        documents.update({name: ('statute', -1, 0) for name in STATUTE_DATABASE})
+        for path_index, path in enumerate(corpus.paths):
+            for offset, record in _iter_jsonl(path):
+                name, kind = record.get('name'), record.get('type', 'case')
+                if isinstance(name, str) and name and kind in ('case', 'statute'):
+                    documents[name] = (kind, path_index, offset)
+        corpus.documents = documents
+
+        case_names = [name for name, entry in documents.items() if entry[0] == 'case']
+        statute_names = [name for name, entry in documents.items() if entry[0] == 'statute']
+        cases = ((name, corpus.get(name) or {}) for name in case_names)
+        corpus.case_index = BM25Index.build(corpus._with_citations(cases), CASE_FIELD_WEIGHTS)
+        statutes = ((name, dict(corpus.get(name) or {}, name=name)) for name in statute_names)
+        corpus.statute_index = BM25Index.build(statutes, STATUTE_FIELD_WEIGHTS)
+        corpus._link_citations()
+        return corpus
+
+    def _with_citations(self, cases):
+        """Pass cases through to the indexer, recording their citations on the way."""
+        for name, case in cases:
+            citation = case.get('citation')
+            if isinstance(citation, str) and citation:
+                self.case_by_citation[_normalize_citation(citation)] = name
+            cites = case.get('cites')
+            if isinstance(cites, list) and cites:
+                self.cites[name] = [_normalize_citation(c) for c in cites if isinstance(c, str)]
+            yield name, case
+
+    def _link_citations(self):
+        cited_by: Dict[str, List[str]] = defaultdict(list)
+        for name, cites in self.cites.items():
+            for citation in cites:
+                cited_by[citation].append(name)
+        self.cited_by = dict(cited_by)
+
+    def save(self):
+        if not self.index_dir:
+            return
+        try:
+            self.case_index.save(os.path.join(self.index_dir, 'cases'))
+            self.statute_index.save(os.path.join(self.index_dir, 'statutes'))
+            meta = {
+                'signature': _corpus_signature(self.paths),
+                'paths': self.paths,
+                'documents': self.documents,
+                'caseByCitation': self.case_by_citation,
+                'cites': self.cites,
+            }
+            fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, prefix='.corpus_', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, separators=(',', ':'))
+            os.replace(tmp_path, os.path.join(self.index_dir, 'corpus.json'))
+        except OSError as e:
+            logger.warning(f"Could not save legal research index to {self.index_dir}: {e}")
+
+    @classmethod
+    def open(cls, index_dir: str, paths: Optional[List[str]] = None) -> Optional['LegalCorpus']:
+        """
+        The saved corpus in ``index_dir``, if it was built from ``paths`` (default: whatever
+        it was built from) and none of those files changed since. Otherwise None.
+        """
+        try:
+            with open(os.path.join(index_dir, 'corpus.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        saved_paths = meta.get('paths', [])
+        if paths is not None and [os.path.abspath(p) for p in paths] != saved_paths:
+            return None
+        if meta.get('signature') != _corpus_signature(saved_paths):
+            return None
+        case_index = BM25Index.load(os.path.join(index_dir, 'cases'))
+        statute_index = BM25Index.load(os.path.join(index_dir, 'statutes'))
+        if case_index is None or statute_index is None:
+            return None
+
+        corpus = cls(saved_paths, index_dir)
+        corpus.documents = {name: tuple(entry) for name, entry in meta['documents'].items()}
+        corpus.case_index = case_index
+        corpus.statute_index = statute_index
+        corpus.case_by_citation = meta.get('caseByCitation', {})
+        corpus.cites = meta.get('cites', {})
+        corpus._link_citations()
+        return corpus
+
+    def get(self, name: str, kind: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        entry = self.documents.get(name)
+        if entry is None or (kind and entry[0] != kind):
+            return None
+        doc_kind, path_index, offset = entry
+        if path_index < 0:
+            return (CASE_DATABASE if doc_kind == 'case' else STATUTE_DATABASE).get(name)
+        mapped = self._maps.get(path_index)
+        if mapped is None:
+            with open(self.paths[path_index], 'rb') as f:
+                mapped = self._maps[path_index] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        end = mapped.find(b'\n', offset)
+        return json.loads(mapped[offset:end if end >= 0 else len(mapped)])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'cases': len(self.case_index),
+            'statutes': len(self.statute_index),
+            'citation_edges': sum(len(cites) for cites in self.cites.values()),
+            'corpus_files': self.paths,
+        }
+
+
+_corpus: Optional[LegalCorpus] = None
+
+
+def _index_dir() -> str:
+    return os.environ.get('LEGAL_RESEARCH_INDEX_DIR') or os.path.join(tempfile.gettempdir(), 'stage7_legal_research')
+
+
+def get_corpus() -> LegalCorpus:
+    """
+    The corpus for this process: files from LEGAL_RESEARCH_CORPUS (os.pathsep-separated),
+    else the last corpus loaded with load_corpus, else the built-in cases and statutes.
+    Saved indexes are reused while their corpus files are unchanged.
+    """
+    global _corpus
+    if _corpus is None:
+        index_dir = _index_dir()
+        env_paths = [p for p in os.environ.get('LEGAL_RESEARCH_CORPUS', '').split(os.pathsep) if p]
+        corpus = LegalCorpus.open(index_dir, env_paths or None)
+        if corpus is None:
+            paths = env_paths
+            if not paths:
+                try:
+                    with open(os.path.join(index_dir, 'corpus.json'), 'r', encoding='utf-8') as f:
+                        paths = [p for p in json.load(f).get('paths', []) if os.path.exists(p)]
+                except (OSError, ValueError):
+                    paths = []
+            corpus = LegalCorpus.build(paths, index_dir if paths else None)
+            corpus.save()
+        _corpus = corpus
+    return _corpus
+
 
 def search_cases(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Search legal case database."""
@@ -139,28 +330,28 @@ def search_cases(payload: Dict[str, Any]) -> Dict[str, Any]:
         if not isinstance(query, str) or len(query) < 2:
             return {'success': False, 'error': 'Query must be a non-empty string'}
         
-        # Search with relevance scoring
-        results = []
-        for case_name, case_data in CASE_DATABASE.items():
-            score = _calculate_relevance_score(query, case_data)
-            if score > 0:
-                results.append({
-                    'name': case_name,
-                    'relevance_score': round(score, 3),
-                    'citation': case_data['citation'],
-                    'court': case_data['court'],
-                    'year': case_data['year'],
-                    'topic': case_data['topic']
-                })
+        limit = int(_get_input(payload, 'limit', ['top_k', 'max_results'], default=DEFAULT_SEARCH_LIMIT))
         
-        # Sort by relevance
-        results.sort(key=lambda x: x['relevance_score'], reverse=True)
+        # BM25 over topic, holding, rule and facts; only the top hits are loaded
+        corpus = get_corpus()
+        hits, total = corpus.case_index.search(query, k=limit)
+        results = []
+        for case_name, score in hits:
+            case_data = corpus.get(case_name, 'case') or {}
+            results.append({
+                'name': case_name,
+                'relevance_score': round(score, 3),
+                'citation': case_data.get('citation'),
+                'court': case_data.get('court'),
+                'year': case_data.get('year'),
+                'topic': case_data.get('topic')
+            })
         
         return {
             'success': True,
             'query': query,
-            'results_found': len(results),
-            'cases': results[:10],  # Return top 10
+            'results_found': total,
+            'cases': results,
             'timestamp': datetime.datetime.now().isoformat()
         }
     except Exception as e:
@@ -179,28 +370,30 @@ def analyze_precedent(payload: Dict[str, Any]) -> Dict[str, Any]:
             return {'success': False, 'error': 'Missing required parameter: issue'}
         
         # Find the case
-        case_data = CASE_DATABASE.get(case_name)
+        case_data = get_corpus().get(case_name, 'case')
         if not case_data:
             return {'success': False, 'error': f'Case not found: {case_name}'}
         
         # Analyze precedent applicability
-        issue_match = issue.lower() in case_data['holding'].lower() or issue.lower() in case_data['topic'].lower()
+        court = case_data.get('court') or ''
+        year = case_data.get('year')
+        issue_match = issue.lower() in (case_data.get('holding') or '').lower() or issue.lower() in (case_data.get('topic') or '').lower()
         
         return {
             'success': True,
             'case_name': case_name,
-            'citation': case_data['citation'],
-            'court': case_data['court'],
-            'year': case_data['year'],
+            'citation': case_data.get('citation'),
+            'court': court,
+            'year': year,
             'issue_analyzed': issue,
             'precedent_applicable': issue_match,
-            'holding': case_data['holding'],
-            'rule': case_data['rule'],
-            'impact': case_data['impact'],
+            'holding': case_data.get('holding'),
+            'rule': case_data.get('rule'),
+            'impact': case_data.get('impact'),
             'analysis': {
-                'binding': case_data['court'] == 'U.S. Supreme Court' or 'Supreme Court' in case_data['court'],
-                'persuasive': not (case_data['court'] == 'U.S. Supreme Court'),
-                'age_years': datetime.datetime.now().year - case_data['year']
+                'binding': court == 'U.S. Supreme Court' or 'Supreme Court' in court,
+                'persuasive': not (court == 'U.S. Supreme Court'),
+                'age_years': datetime.datetime.now().year - year if isinstance(year, int) else None
             }
         }
     except Exception as e:
@@ -216,28 +409,28 @@ def search_statutes(payload: Dict[str, Any]) -> Dict[str, Any]:
         if not query and not topic:
             return {'success': False, 'error': 'Must provide either query or topic'}
         
+        limit = int(_get_input(payload, 'limit', ['top_k', 'max_results'], default=DEFAULT_SEARCH_LIMIT))
+        
+        # Statutes matching the query or the topic, ranked over name, topic and summary
+        corpus = get_corpus()
+        hits, total = corpus.statute_index.search(' '.join(str(t) for t in (query, topic) if t), k=limit)
         results = []
-        for statute_name, statute_data in STATUTE_DATABASE.items():
-            match = False
-            if query and query.lower() in statute_name.lower():
-                match = True
-            if topic and topic.lower() in statute_data.get('topic', '').lower():
-                match = True
-            
-            if match:
-                results.append({
-                    'name': statute_name,
-                    'citation': statute_data['citation'],
-                    'jurisdiction': statute_data['jurisdiction'],
-                    'topic': statute_data['topic'],
-                    'summary': statute_data['summary']
-                })
+        for statute_name, score in hits:
+            statute_data = corpus.get(statute_name, 'statute') or {}
+            results.append({
+                'name': statute_name,
+                'relevance_score': round(score, 3),
+                'citation': statute_data.get('citation'),
+                'jurisdiction': statute_data.get('jurisdiction'),
+                'topic': statute_data.get('topic'),
+                'summary': statute_data.get('summary')
+            })
         
         return {
             'success': True,
             'query': query,
             'topic': topic,
-            'results_found': len(results),
+            'results_found': total,
             'statutes': results
         }
     except Exception as e:
@@ -314,29 +507,76 @@ def analyze_citations(payload: Dict[str, Any]) -> Dict[str, Any]:
         if not citations or not isinstance(citations, list):
             return {'success': False, 'error': 'Citations must be provided as a list'}
         
+        corpus = get_corpus()
         analyzed = []
+        found: Dict[str, str] = {}
         for citation in citations:
             if not isinstance(citation, str) or len(citation) < 3:
                 continue
             
-            # Pattern matching for citations
+            # Pattern matching for citations, then a lookup in the citation graph
+            normalized = _normalize_citation(citation)
+            case_name = corpus.case_by_citation.get(normalized)
             analysis = {
                 'citation': citation,
                 'valid_format': bool(re.match(r'^\d+\s*U\.S\.\s*\d+|^\d+\s*F\.\d*d?\s*\d+', citation)),
                 'type': 'case' if 'U.S.' in citation or 'F.' in citation else 'statute',
-                'case_found': any(citation in case_data.get('citation', '') for case_data in CASE_DATABASE.values())
+                'case_found': case_name is not None
             }
+            if case_name is not None:
+                found[normalized] = case_name
+                cited_by = corpus.cited_by.get(normalized, [])
+                analysis.update({
+                    'case_name': case_name,
+                    'cites': corpus.cites.get(case_name, []),
+                    'cited_by_count': len(cited_by),
+                    'cited_by': cited_by[:10]
+                })
             analyzed.append(analysis)
         
+        # Which of the given authorities rely on each other
+        relationships = [
+            {'citing': case_name, 'cited': found[cited]}
+            for citation, case_name in found.items()
+            for cited in corpus.cites.get(case_name, [])
+            if cited in found and cited != citation
+        ]
+        
         return {
             'success': True,
             'citations_analyzed': len(analyzed),
-            'analysis': analyzed
+            'analysis': analyzed,
+            'relationships': relationships
         }
     except Exception as e:
         logger.error(f"Error in analyze_citations: {str(e)}")
         return {'success': False, 'error': f'Citation analysis error: {str(e)}'}
 
+def load_corpus(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Index JSONL corpus files; later calls search them until another corpus is loaded."""
+    global _corpus
+    try:
+        paths = _get_input(payload, 'paths', ['path', 'corpus', 'files'])
+        if isinstance(paths, str):
+            paths = [paths]
+        if not paths or not isinstance(paths, list):
+            return {'success': False, 'error': 'Missing required parameter: paths'}
+        
+        missing = [path for path in paths if not os.path.isfile(path)]
+        if missing:
+            return {'success': False, 'error': f'Corpus file not found: {", ".join(missing)}'}
+        
+        _corpus = LegalCorpus.build(paths, _index_dir())
+        _corpus.save()
+        return {
+            'success': True,
+            'index_dir': _corpus.index_dir,
+            **_corpus.stats()
+        }
+    except Exception as e:
+        logger.error(f"Error in load_corpus: {str(e)}")
+        return {'success': False, 'error': f'Corpus load error: {str(e)}'}
+
 def generate_brief(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Generate legal research brief."""
     try:
@@ -349,22 +589,25 @@ def generate_brief(payload: Dict[str, Any]) -> Dict[str, Any]:
             return {'success': False, 'error': 'Topic must be a valid string with at least 3 characters'}
         
         # Find related cases and statutes
+        corpus = get_corpus()
+        case_hits, cases_count = corpus.case_index.search(topic, k=5)
         related_cases = []
-        for case_name, case_data in CASE_DATABASE.items():
-            if topic.lower() in case_data.get('topic', '').lower() or topic.lower() in case_data.get('holding', '').lower():
-                related_cases.append({
-                    'name': case_name,
-                    'citation': case_data['citation'],
-                    'holding': case_data['holding']
-                })
+        for case_name, _ in case_hits:
+            case_data = corpus.get(case_name, 'case') or {}
+            related_cases.append({
+                'name': case_name,
+                'citation': case_data.get('citation'),
+                'holding': case_data.get('holding')
+            })
         
+        statute_hits, statutes_count = corpus.statute_index.search(topic, k=5)
         related_statutes = []
-        for statute_name, statute_data in STATUTE_DATABASE.items():
-            if topic.lower() in statute_data.get('topic', '').lower():
-                related_statutes.append({
-                    'name': statute_name,
-                    'citation': statute_data['citation']
-                })
+        for statute_name, _ in statute_hits:
+            statute_data = corpus.get(statute_name, 'statute') or {}
+            related_statutes.append({
+                'name': statute_name,
+                'citation': statute_data.get('citation')
+            })
         
         return {
             'success': True,
@@ -372,10 +615,10 @@ def generate_brief(payload: Dict[str, Any]) -> Dict[str, Any]:
             'brief': {
                 'title': f'Legal Research Brief: {topic}',
                 'overview': f'This brief analyzes the legal landscape for {topic}',
-                'cases_count': len(related_cases),
-                'statutes_count': len(related_statutes),
-                'relevant_cases': related_cases[:5],
-                'relevant_statutes': related_statutes[:5],
+                'cases_count': cases_count,
+                'statutes_count': statutes_count,
+                'relevant_cases': related_cases,
+                'relevant_statutes': related_statutes,
                 'generated_date': datetime.datetime.now().isoformat()
             }
         }
@@ -411,6 +654,8 @@ def execute_plugin(inputs):
             result = analyze_citations(payload)
         elif action == 'generate_brief':
             result = generate_brief(payload)
+        elif action == 'load_corpus':
+            result = load_corpus(payload)
         else:
             return [{
                 "success": False,
@@ -439,63 +684,10 @@ def execute_plugin(inputs):
             "error": str(e)
         }]
 
-def parse_inputs(inputs_str):
-    """Parse and normalize the plugin stdin JSON payload into a dict."""
-    try:
-        payload = json.loads(inputs_str)
-        inputs_dict = {{}}
-
-        if isinstance(payload, dict):
-            if payload.get('_type') == 'Map' and isinstance(payload.get('entries'), list):
-                for entry in payload.get('entries', []):
-                    if isinstance(entry, list) and len(entry) == 2:
-                        key, value = entry
-                        inputs_dict[key] = value
-            else:
-                for key, value in payload.items():
-                    if key not in ('_type', 'entries'):
-                        inputs_dict[key] = value
-
-        elif isinstance(payload, list):
-            for item in payload:
-                if isinstance(item, list) and len(item) == 2:
-                    key, value = item
-                    inputs_dict[key] = value
-
-        return inputs_dict
-
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse input JSON: {{e}}")
-        raise
-
 def main():
     """Main entry point for the plugin."""
-    try:
-        input_data = sys.stdin.read().strip()
-        if not input_data:
-            result = [{{
-                "success": False,
-                "name": "error",
-                "resultType": "error",
-                "result": "No input data received",
-                "error": "No input data received"
-            }}]
-        else:
-            inputs_dict = parse_inputs(input_data)
-            result = execute_plugin(inputs_dict)
-
-        print(json.dumps(result))
+    run(execute_plugin)
 
-    except Exception as e:
-        logger.error(f"Plugin execution failed: {str(e)}")
-        result = [{{
-            "success": False,
-            "name": "error",
-            "resultType": "error",
-            "result": str(e),
-            "error": str(e)
-        }}]
-        print(json.dumps(result))
 
 if __name__ == "__main__":
     main()
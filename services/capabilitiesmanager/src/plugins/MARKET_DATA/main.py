@@ -4,18 +4,27 @@ MARKET_DATA Plugin - Market data access and analysis
 Provides historical price data, real-time quotes, trend analysis, and technical indicators
 """
 
+import re
 import sys
-import json
 import logging
 import os
 import math
+import shutil
+import hashlib
+import tempfile
 from typing import Dict, Any, List, Tuple, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
 
 try:
     import yfinance as yf
     import pandas as pd
-    import numpy as np
     HAS_YFINANCE = True
 except ImportError:
     HAS_YFINANCE = False
@@ -23,19 +32,11 @@ except ImportError:
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def _get_input(inputs: dict, key: str, aliases: list = [], default=None):
-    """Safely gets a value from inputs, checking aliases, and extracting from {{'value':...}} wrapper."""
-    raw_val = inputs.get(key)
-    if raw_val is None:
-        for alias in aliases:
-            raw_val = inputs.get(alias)
-            if raw_val is not None:
-                break
-    if raw_val is None:
-        return default
-    if isinstance(raw_val, dict) and 'value' in raw_val:
-        return raw_val['value'] if raw_val['value'] is not None else default
-    return raw_val if raw_val is not None else default
+try:
+    from stage7_plugin_runtime import run, get_input as _get_input
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_plugin_runtime import run, get_input as _get_input
 
 def _validate_ticker(ticker: str) -> str:
     """Validate and normalize ticker symbol."""
@@ -51,6 +52,513 @@ def _validate_period(period: str) -> str:
         return '1y'
     return period
 
+HISTORY_PERIOD = '2y'
+PERIOD_DAYS = {'1d': 1, '5d': 7, '1mo': 31, '3mo': 92, '6mo': 183, '1y': 366, '2y': 731, '5y': 1827, '10y': 3653}
+# Stored indicator series are trimmed to roughly ten years of trading days
+MAX_STORED_BARS = 2600
+MAX_BATCH_TICKERS = 1000
+INDICATOR_DEFAULTS = {
+    'rsi_period': 14,
+    'macd_fast': 12,
+    'macd_slow': 26,
+    'macd_signal': 9,
+    'bb_period': 20,
+    'bb_std': 2.0,
+    'stoch_period': 14,
+    'stoch_smooth': 3
+}
+SERIES_NAMES = ('rsi', 'macd', 'macd_signal', 'macd_histogram', 'bb_upper', 'bb_middle', 'bb_lower', 'stoch_k', 'stoch_d')
+# Recursive indicator state carried between updates, one row each
+STATE_NAMES = ('prev_close', 'avg_gain', 'avg_loss', 'ema_fast', 'ema_slow', 'ema_signal')
+# Largest factor a^-k the blocked EMA lets its running sum grow by before rescaling
+EMA_BLOCK_GROWTH = 1e6
+
+def _period_days(period: str) -> Optional[int]:
+    """Calendar days covered by a period; None for 'max'."""
+    if period == 'ytd':
+        today = date.today()
+        return (today - date(today.year, 1, 1)).days
+    return PERIOD_DAYS.get(period)
+
+# ============================================================================
+# BAR SOURCES & CACHE
+# ============================================================================
+
+BAR_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+# Rows of a cached bar matrix
+ORDINAL, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+
+class YFinanceBarSource:
+    """Daily OHLCV bars from Yahoo Finance, all tickers in one download."""
+    name = 'yfinance'
+
+    def fetch(self, tickers: List[str], period: str) -> Dict[str, Any]:
+        """ticker -> 6 x n matrix (day ordinals, open, high, low, close, volume)."""
+        data = yf.download(' '.join(tickers), period=period, progress=False)
+        if data.empty:
+            raise ValueError(f"No data for tickers: {tickers}")
+        ordinals = np.array([ts.toordinal() for ts in data.index], dtype=float)
+        multi = isinstance(data.columns, pd.MultiIndex)
+        history = {}
+        for ticker in tickers:
+            try:
+                columns = [data[(field, ticker)] if multi else data[field] for field in BAR_FIELDS]
+            except KeyError:
+                continue
+            bars = np.vstack([ordinals] + [column.to_numpy(dtype=float) for column in columns])
+            history[ticker] = bars[:, ~np.isnan(bars[OPEN:VOLUME]).any(axis=0)]
+        return history
+
+
+class MockBarSource:
+    """
+    Deterministic synthetic bars for offline use and tests: a shared market factor plus
+    per-ticker drift, beta and noise derived from the ticker symbol, on business days.
+    """
+    name = 'mock'
+    MARKET_SEED = 7
+
+    def fetch(self, tickers: List[str], period: str) -> Dict[str, Any]:
+        end = date.today()
+        start = end - timedelta(days=PERIOD_DAYS.get(period, PERIOD_DAYS[HISTORY_PERIOD]))
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        ordinals = np.array([d.toordinal() for d in days if d.weekday() < 5], dtype=float)
+        n = len(ordinals)
+        market = np.random.default_rng(self.MARKET_SEED).normal(0.0003, 0.011, n)
+
+        history = {}
+        for ticker in tickers:
+            seed = int.from_bytes(hashlib.sha256(ticker.encode('utf-8')).digest()[:8], 'big')
+            rng = np.random.default_rng(seed)
+            beta = rng.uniform(0.5, 1.5)
+            drift = rng.uniform(-0.05, 0.25) / 252
+            noise = rng.uniform(0.1, 0.35) / math.sqrt(252)
+            closes = rng.uniform(20, 500) * np.exp(np.cumsum(drift + beta * market + rng.normal(0.0, noise, n)))
+            opens = np.concatenate([closes[:1], closes[:-1]]) * (1 + rng.normal(0.0, noise / 4, n))
+            highs = np.maximum(opens, closes) * (1 + np.abs(rng.normal(0.0, noise / 2, n)))
+            lows = np.minimum(opens, closes) * (1 - np.abs(rng.normal(0.0, noise / 2, n)))
+            volumes = np.round(rng.lognormal(14, 0.4, n))
+            history[ticker] = np.vstack([ordinals, opens, highs, lows, closes, volumes])
+        return history
+
+
+BAR_SOURCES = {'yfinance': YFinanceBarSource, 'mock': MockBarSource}
+
+
+class BarCache:
+    """
+    Daily bars stored one ``.npy`` file per ticker (a 6 x n matrix, see ORDINAL..VOLUME)
+    under ``<source>/<window>/<trading day>/`` and memory-mapped on read, so repeated and
+    batched calls reuse the same download for the day.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @staticmethod
+    def _file_name(ticker: str) -> str:
+        return re.sub(r'[^A-Z0-9._-]', lambda m: f"%{ord(m.group()):02X}", ticker) + '.npy'
+
+    def load(self, source, tickers: List[str], window: str) -> Tuple[Dict[str, Any], int]:
+        """ticker -> bar matrix, fetching only tickers not cached today; also the number fetched."""
+        day_dir = os.path.join(self.directory, 'bars', source.name, window, date.today().isoformat())
+        history = {}
+        missing = []
+        for ticker in tickers:
+            try:
+                history[ticker] = np.load(os.path.join(day_dir, self._file_name(ticker)), mmap_mode='r')
+            except (OSError, ValueError):
+                missing.append(ticker)
+
+        if missing:
+            fetched = source.fetch(missing, window)
+            self._store(day_dir, fetched)
+            history.update(fetched)
+        return history, len(missing)
+
+    def _store(self, day_dir: str, fetched: Dict[str, Any]):
+        try:
+            if not os.path.isdir(day_dir):
+                os.makedirs(day_dir, exist_ok=True)
+                # Earlier trading days of this source and window are stale now
+                window_dir = os.path.dirname(day_dir)
+                for name in os.listdir(window_dir):
+                    if name < os.path.basename(day_dir):
+                        shutil.rmtree(os.path.join(window_dir, name), ignore_errors=True)
+            for ticker, bars in fetched.items():
+                fd, tmp_path = tempfile.mkstemp(dir=day_dir, prefix='.bars_', suffix='.npy')
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, bars)
+                os.replace(tmp_path, os.path.join(day_dir, self._file_name(ticker)))
+        except OSError as e:
+            logger.warning(f"Could not cache bars in {day_dir}: {e}")
+
+
+def _cache_dir() -> str:
+    return os.getenv('MARKET_DATA_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'stage7_market_data')
+
+
+def _load_bars(payload: Dict[str, Any], tickers: List[str], period: str) -> Tuple[Dict[str, Any], str, int]:
+    """Cached bar matrices for the tickers over at least HISTORY_PERIOD; also the source name and fetch count."""
+    source_name = str(payload.get('price_source') or os.getenv('MARKET_DATA_SOURCE', 'yfinance')).lower()
+    if source_name not in BAR_SOURCES:
+        raise ValueError(f"Unknown price source: {source_name}")
+    if source_name == 'yfinance' and not HAS_YFINANCE:
+        raise ImportError('yfinance not installed')
+
+    period_days = _period_days(period)
+    window = '10y' if period_days is None else period if period_days > PERIOD_DAYS[HISTORY_PERIOD] else HISTORY_PERIOD
+    history, fetched = BarCache(_cache_dir()).load(BAR_SOURCES[source_name](), tickers, window)
+    return history, source_name, fetched
+
+# ============================================================================
+# TECHNICAL INDICATORS
+# ============================================================================
+#
+# Every function works along axis 0, so a column per ticker computes a whole batch at
+# once. Recursive indicators (Wilder RSI, MACD EMAs) can be continued from their STATE
+# rows; windowed ones (Bollinger, stochastic) only ever need the last window of bars.
+
+def _ema_filter(values, alpha: float, initial):
+    """
+    y[t] = (1 - alpha) * y[t-1] + alpha * values[t], starting from y[-1] = initial.
+
+    Within a block, y[k] = a^(k+1) * (initial + alpha * sum_{j<=k} a^-(j+1) * values[j]) with
+    a = 1 - alpha, which is one cumulative sum. Blocks are sized so a^-k stays below
+    EMA_BLOCK_GROWTH, keeping the sum well conditioned; the last value seeds the next block.
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.empty_like(values)
+    decay = 1.0 - alpha
+    if not len(values):
+        return result
+    if decay <= 0:
+        result[:] = values
+        return result
+    block = max(1, min(len(values), int(math.log(EMA_BLOCK_GROWTH) / -math.log(decay))))
+    growth = (decay ** -np.arange(1, block + 1)).reshape((-1,) + (1,) * (values.ndim - 1))
+    state = np.asarray(initial, dtype=float)
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        scale = growth[:len(chunk)]
+        result[start:start + len(chunk)] = (state + alpha * np.cumsum(chunk * scale, axis=0)) / scale
+        state = result[start + len(chunk) - 1]
+    return result
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss > 0, rsi, np.where(avg_gain > 0, 100.0, 50.0))
+
+
+def _rolling(values, window: int):
+    """Trailing windows along axis 0 as the last axis; empty when there are fewer rows than window."""
+    if len(values) < window:
+        return np.empty((0,) + values.shape[1:] + (window,))
+    return sliding_window_view(values, window, axis=0)
+
+
+def _window_indicators(highs, lows, closes, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Bollinger bands and stochastic %K/%D, NaN until their windows fill."""
+    n = len(closes)
+    series = {name: np.full(closes.shape, np.nan) for name in ('bb_upper', 'bb_middle', 'bb_lower', 'stoch_k', 'stoch_d')}
+
+    period = params['bb_period']
+    windows = _rolling(closes, period)
+    if len(windows):
+        middle = windows.mean(axis=-1)
+        width = params['bb_std'] * windows.std(axis=-1, ddof=1)
+        series['bb_middle'][period - 1:] = middle
+        series['bb_upper'][period - 1:] = middle + width
+        series['bb_lower'][period - 1:] = middle - width
+
+    period = params['stoch_period']
+    if n >= period:
+        lowest = _rolling(lows, period).min(axis=-1)
+        span = _rolling(highs, period).max(axis=-1) - lowest
+        with np.errstate(divide='ignore', invalid='ignore'):
+            k = np.where(span > 0, (closes[period - 1:] - lowest) / span * 100.0, 0.0)
+        series['stoch_k'][period - 1:] = k
+        smooth = params['stoch_smooth']
+        if len(k) >= smooth:
+            series['stoch_d'][period + smooth - 2:] = _rolling(k, smooth).mean(axis=-1)
+    return series
+
+
+def _window_context(params: Dict[str, Any]) -> int:
+    """Bars before the first new one that windowed indicators need to see."""
+    return max(params['bb_period'], params['stoch_period'] + params['stoch_smooth'] - 1) - 1
+
+
+def _min_state_bars(params: Dict[str, Any]) -> int:
+    """Bars needed before every recursive state row is defined and can be continued."""
+    return max(params['rsi_period'] + 1, params['macd_slow'])
+
+
+def compute_indicators(highs, lows, closes, params: Dict[str, Any]) -> Tuple[Dict[str, Any], Any]:
+    """Full indicator series for bars (rows are days, optional columns tickers) and the state after them."""
+    closes = np.asarray(closes, dtype=float)
+    n = len(closes)
+    series = _window_indicators(np.asarray(highs, dtype=float), np.asarray(lows, dtype=float), closes, params)
+    state = np.full((len(STATE_NAMES),) + closes.shape[1:], np.nan)
+    if not n:
+        return {name: series.get(name, closes.copy()) for name in SERIES_NAMES}, state
+    state[0] = closes[-1]
+
+    # Wilder RSI: simple average of the first period deltas, then smoothing with alpha 1/period
+    period = params['rsi_period']
+    rsi = np.full(closes.shape, np.nan)
+    deltas = np.diff(closes, axis=0)
+    if len(deltas) >= period:
+        gains = np.clip(deltas, 0.0, None)
+        losses = np.clip(-deltas, 0.0, None)
+        avg_gain = np.concatenate([gains[:period].mean(axis=0)[None], _ema_filter(gains[period:], 1.0 / period, gains[:period].mean(axis=0))])
+        avg_loss = np.concatenate([losses[:period].mean(axis=0)[None], _ema_filter(losses[period:], 1.0 / period, losses[:period].mean(axis=0))])
+        rsi[period:] = _rsi_from_averages(avg_gain, avg_loss)
+        state[1], state[2] = avg_gain[-1], avg_loss[-1]
+    series['rsi'] = rsi
+
+    # MACD: EMAs seeded with the first close, reported once the slow EMA has a full span
+    fast = _ema_filter(closes, 2.0 / (params['macd_fast'] + 1), closes[0])
+    slow = _ema_filter(closes, 2.0 / (params['macd_slow'] + 1), closes[0])
+    state[3], state[4] = fast[-1], slow[-1]
+    macd = np.full(closes.shape, np.nan)
+    signal = np.full(closes.shape, np.nan)
+    first = params['macd_slow'] - 1
+    if n > first:
+        macd[first:] = fast[first:] - slow[first:]
+        signal_line = _ema_filter(macd[first:], 2.0 / (params['macd_signal'] + 1), macd[first])
+        state[5] = signal_line[-1]
+        signal[first + params['macd_signal'] - 1:] = signal_line[params['macd_signal'] - 1:]
+    series['macd'] = macd
+    series['macd_signal'] = signal
+    series['macd_histogram'] = macd - signal
+    return {name: series[name] for name in SERIES_NAMES}, state
+
+
+def update_indicators(highs, lows, closes, start: int, state, params: Dict[str, Any],
+                      bars_seen: int) -> Tuple[Dict[str, Any], Any]:
+    """
+    Indicator series for bars[start:] continuing from ``state``, the state after bars[:start]
+    (``bars_seen`` bars in total, at least _min_state_bars). Only the last window of earlier
+    bars is read, for the windowed indicators.
+    """
+    closes = np.asarray(closes, dtype=float)
+    new = closes[start:]
+    context = max(0, start - _window_context(params))
+    series = _window_indicators(np.asarray(highs[context:], dtype=float), np.asarray(lows[context:], dtype=float),
+                                closes[context:], params)
+    series = {name: values[start - context:] for name, values in series.items()}
+    state = np.array(state, dtype=float)
+    if not len(new):
+        return {name: series.get(name, new.copy()) for name in SERIES_NAMES}, state
+
+    period = params['rsi_period']
+    deltas = np.diff(np.concatenate([state[0][None], new]), axis=0)
+    avg_gain = _ema_filter(np.clip(deltas, 0.0, None), 1.0 / period, state[1])
+    avg_loss = _ema_filter(np.clip(-deltas, 0.0, None), 1.0 / period, state[2])
+    series['rsi'] = _rsi_from_averages(avg_gain, avg_loss)
+
+    fast = _ema_filter(new, 2.0 / (params['macd_fast'] + 1), state[3])
+    slow = _ema_filter(new, 2.0 / (params['macd_slow'] + 1), state[4])
+    macd = fast - slow
+    signal_line = _ema_filter(macd, 2.0 / (params['macd_signal'] + 1), state[5])
+    # The signal line is reported once it has seen a full span of MACD values
+    warm = params['macd_slow'] + params['macd_signal'] - 2 - bars_seen
+    signal = np.where(np.arange(len(new)) >= warm, signal_line, np.nan)
+    series['macd'] = macd
+    series['macd_signal'] = signal
+    series['macd_histogram'] = macd - signal
+
+    state = np.array([new[-1], avg_gain[-1], avg_loss[-1], fast[-1], slow[-1], signal_line[-1]])
+    return {name: series[name] for name in SERIES_NAMES}, state
+
+
+class IndicatorStore:
+    """
+    Computed series per ticker and parameter set, with the recursive state after the last
+    bar, under ``indicators/<source>/<params>/``. A later call only computes the bars
+    added since.
+
+    Each ticker is one flat float ``.npy`` file, memory-mapped on read: bars seen, series
+    length m, the STATE_NAMES rows, then m day ordinals followed by m values per SERIES_NAMES.
+    """
+
+    HEADER = 2 + len(STATE_NAMES)
+
+    def __init__(self, directory: str, source: str, params: Dict[str, Any]):
+        key = '-'.join(f"{params[name]:g}" for name in sorted(params))
+        self.directory = os.path.join(directory, 'indicators', source, key)
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.directory, BarCache._file_name(ticker))
+
+    def load(self, ticker: str) -> Optional[Dict[str, Any]]:
+        try:
+            packed = np.load(self._path(ticker), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        length = int(packed[1]) if len(packed) >= self.HEADER else -1
+        if length < 1 or len(packed) != self.HEADER + length * (1 + len(SERIES_NAMES)):
+            return None
+        columns = packed[self.HEADER:].reshape(1 + len(SERIES_NAMES), length)
+        entry = {'bars_seen': int(packed[0]), 'state': packed[2:self.HEADER], 'ordinals': columns[0]}
+        entry.update(zip(SERIES_NAMES, columns[1:]))
+        return entry
+
+    def save(self, ticker: str, entry: Dict[str, Any]):
+        packed = np.concatenate([[entry['bars_seen'], len(entry['ordinals'])], entry['state'], entry['ordinals']]
+                                + [entry[name] for name in SERIES_NAMES])
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.series_', suffix='.npy')
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, packed)
+            os.replace(tmp_path, self._path(ticker))
+        except OSError as e:
+            logger.warning(f"Could not store indicators for {ticker}: {e}")
+
+
+def _resume_point(stored: Optional[Dict[str, Any]], bars, params: Dict[str, Any]) -> Optional[int]:
+    """
+    Index of the first bar after the stored series, when the stored state can be continued:
+    the stored last bar is still in the bars with the same close and no earlier history appeared.
+    """
+    if stored is None or stored['bars_seen'] < _min_state_bars(params):
+        return None
+    ordinals = bars[ORDINAL]
+    last = stored['ordinals'][-1]
+    position = int(np.searchsorted(ordinals, last))
+    if position >= len(ordinals) or ordinals[position] != last or ordinals[0] < stored['ordinals'][0]:
+        return None
+    if not np.isclose(bars[CLOSE][position], stored['state'][0], rtol=1e-9, atol=0.0):
+        return None
+    return position + 1
+
+
+def _indicator_series(tickers: List[str], history: Dict[str, Any], store: IndicatorStore,
+                      params: Dict[str, Any]) -> Dict[str, Tuple[Dict[str, Any], str, int]]:
+    """
+    ticker -> (entry with ordinals, series and state, update mode, new bars). Tickers with
+    usable stored state are continued; the rest are recomputed, one matrix per shared calendar.
+    """
+    results = {}
+    recompute: Dict[bytes, List[str]] = {}
+    for ticker in tickers:
+        bars = np.asarray(history[ticker])
+        stored = store.load(ticker)
+        start = _resume_point(stored, bars, params)
+        if start is None:
+            recompute.setdefault(bars[ORDINAL].tobytes(), []).append(ticker)
+            continue
+        if start == bars.shape[1]:
+            results[ticker] = (stored, 'cached', 0)
+            continue
+        series, state = update_indicators(bars[HIGH], bars[LOW], bars[CLOSE], start, stored['state'], params,
+                                          stored['bars_seen'])
+        entry = {
+            'ordinals': np.concatenate([stored['ordinals'], bars[ORDINAL][start:]])[-MAX_STORED_BARS:],
+            'state': state,
+            'bars_seen': stored['bars_seen'] + bars.shape[1] - start
+        }
+        for name in SERIES_NAMES:
+            entry[name] = np.concatenate([stored[name], series[name]])[-MAX_STORED_BARS:]
+        store.save(ticker, entry)
+        results[ticker] = (entry, 'incremental', bars.shape[1] - start)
+
+    for group in recompute.values():
+        matrix = np.stack([np.asarray(history[t]) for t in group], axis=-1)
+        series, state = compute_indicators(matrix[HIGH], matrix[LOW], matrix[CLOSE], params)
+        for column, ticker in enumerate(group):
+            entry = {
+                'ordinals': matrix[ORDINAL, :, column][-MAX_STORED_BARS:],
+                'state': state[:, column],
+                'bars_seen': matrix.shape[1]
+            }
+            for name in SERIES_NAMES:
+                entry[name] = series[name][:, column][-MAX_STORED_BARS:]
+            store.save(ticker, entry)
+            results[ticker] = (entry, 'full', matrix.shape[1])
+    return results
+
+
+def _indicator_params(payload: Dict[str, Any]) -> Dict[str, Any]:
+    params = {}
+    for name, default in INDICATOR_DEFAULTS.items():
+        value = payload.get(name, default)
+        params[name] = float(value) if isinstance(default, float) else int(value)
+        if params[name] <= 0 or (name == 'stoch_smooth' and params[name] < 1):
+            raise ValueError(f"{name} must be positive")
+    if params['bb_period'] < 2:
+        raise ValueError("bb_period must be at least 2")
+    if params['macd_fast'] >= params['macd_slow']:
+        raise ValueError("macd_fast must be shorter than macd_slow")
+    return params
+
+
+def _latest(values, digits: int) -> Optional[float]:
+    value = float(values[-1]) if len(values) else float('nan')
+    return None if math.isnan(value) else round(value, digits)
+
+
+def _series_list(values, digits: int = 4) -> List[Optional[float]]:
+    return [None if v != v else v for v in np.round(values, digits).tolist()]
+
+
+def _indicator_result(ticker: str, entry: Dict[str, Any], mode: str, new_bars: int, period: str,
+                      lookback: Optional[int], include_series: bool) -> Dict[str, Any]:
+    ordinals = entry['ordinals']
+    period_days = _period_days(period)
+    first = 0 if period_days is None else int(np.searchsorted(ordinals, date.today().toordinal() - period_days))
+    if lookback:
+        first = max(first, len(ordinals) - lookback)
+    if first >= len(ordinals):
+        raise ValueError(f"No data for {ticker} in period {period}")
+    rsi = _latest(entry['rsi'], 2)
+    upper_band = _latest(entry['bb_upper'], 2)
+    lower_band = _latest(entry['bb_lower'], 2)
+    close = float(entry['state'][0])
+
+    indicators = {
+        'rsi': rsi,
+        'macd': _latest(entry['macd'], 4),
+        'macd_signal': _latest(entry['macd_signal'], 4),
+        'macd_histogram': _latest(entry['macd_histogram'], 4),
+        'bollinger_bands': {
+            'upper': upper_band,
+            'middle': _latest(entry['bb_middle'], 2),
+            'lower': lower_band
+        },
+        'stochastic': _latest(entry['stoch_k'], 2),
+        'stochastic_d': _latest(entry['stoch_d'], 2)
+    }
+
+    signals = []
+    if rsi is not None and rsi < 30:
+        signals.append('OVERSOLD: RSI < 30')
+    elif rsi is not None and rsi > 70:
+        signals.append('OVERBOUGHT: RSI > 70')
+    if upper_band is not None and close > upper_band:
+        signals.append('Price above upper Bollinger Band - potential correction')
+    if lower_band is not None and close < lower_band:
+        signals.append('Price below lower Bollinger Band - potential bounce')
+
+    result = {
+        'success': True,
+        'ticker': ticker,
+        'indicators': indicators,
+        'signals': signals,
+        'update': {'mode': mode, 'new_bars': int(new_bars)}
+    }
+    if include_series:
+        series = {'dates': [date.fromordinal(int(o)).isoformat() for o in ordinals[first:]]}
+        for name in SERIES_NAMES:
+            series[name] = _series_list(entry[name][first:])
+        result['series'] = series
+    return result
+
 def get_historical_data(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Retrieve historical price data for a security."""
     try:
@@ -253,87 +761,59 @@ def analyze_trends(payload: Dict[str, Any]) -> Dict[str, Any]:
         return {'success': False, 'error': str(e)}
 
 def calculate_indicators(payload: Dict[str, Any]) -> Dict[str, Any]:
-    """Calculate technical indicators."""
+    """
+    Full RSI, MACD, Bollinger band and stochastic series. Pass 'tickers' instead of 'ticker'
+    to compute a batch in one call. Series are stored per ticker and later calls only
+    compute the bars added since.
+    """
     try:
-        ticker = _validate_ticker(payload.get('ticker', ''))
+        batch = payload.get('tickers')
+        if batch is not None:
+            if not isinstance(batch, list):
+                batch = [batch]
+            tickers = list(dict.fromkeys(_validate_ticker(t) for t in batch))
+            if not tickers:
+                raise ValueError("At least one ticker symbol is required")
+            if len(tickers) > MAX_BATCH_TICKERS:
+                raise ValueError(f"At most {MAX_BATCH_TICKERS} tickers per batch")
+        else:
+            tickers = [_validate_ticker(payload.get('ticker', ''))]
         period = _validate_period(payload.get('period', '1y'))
-        
-        if not HAS_YFINANCE:
-            return {'success': False, 'error': 'yfinance not installed'}
-        
-        logger.info(f"Calculating indicators for {ticker}")
-        
-        data = yf.download(ticker, period=period, progress=False)
-        
-        if data.empty:
-            raise ValueError(f"No data for {ticker}")
-        
-        closes = data['Close'].values
-        highs = data['High'].values
-        lows = data['Low'].values
-        volumes = data['Volume'].values if 'Volume' in data else []
-        
-        # RSI (Relative Strength Index)
-        def calculate_rsi(prices, period=14):
-            deltas = np.diff(prices)
-            seed = deltas[:period + 1]
-            up = seed[seed >= 0].sum() / period
-            down = -seed[seed < 0].sum() / period
-            rs = up / down if down > 0 else 0
-            rsi = 100 - (100 / (1 + rs))
-            return rsi
-        
-        rsi = calculate_rsi(closes) if len(closes) >= 14 else None
-        
-        # MACD (Moving Average Convergence Divergence)
-        ema_12 = pd.Series(closes).ewm(span=12).mean().iloc[-1] if len(closes) >= 12 else None
-        ema_26 = pd.Series(closes).ewm(span=26).mean().iloc[-1] if len(closes) >= 26 else None
-        macd = (ema_12 - ema_26) if (ema_12 and ema_26) else None
-        
-        # Bollinger Bands
-        sma_20 = pd.Series(closes).rolling(window=20).mean().iloc[-1] if len(closes) >= 20 else None
-        std_20 = pd.Series(closes).rolling(window=20).std().iloc[-1] if len(closes) >= 20 else None
-        
-        upper_band = (sma_20 + (std_20 * 2)) if (sma_20 and std_20) else None
-        lower_band = (sma_20 - (std_20 * 2)) if (sma_20 and std_20) else None
-        
-        # Stochastic Oscillator
-        def calculate_stochastic(highs, lows, closes, period=14):
-            low_min = pd.Series(lows).rolling(window=period).min().iloc[-1] if len(lows) >= period else min(lows)
-            high_max = pd.Series(highs).rolling(window=period).max().iloc[-1] if len(highs) >= period else max(highs)
-            k_percent = ((closes[-1] - low_min) / (high_max - low_min) * 100) if (high_max - low_min) > 0 else 0
-            return k_percent
-        
-        stoch = calculate_stochastic(highs, lows, closes) if len(closes) >= 14 else None
-        
-        indicators = {
-            'rsi': round(rsi, 2) if rsi else None,
-            'macd': round(macd, 4) if macd else None,
-            'bollinger_bands': {
-                'upper': round(upper_band, 2) if upper_band else None,
-                'middle': round(sma_20, 2) if sma_20 else None,
-                'lower': round(lower_band, 2) if lower_band else None
-            },
-            'stochastic': round(stoch, 2) if stoch else None
-        }
-        
-        # Generate signals
-        signals = []
-        if rsi and rsi < 30:
-            signals.append('OVERSOLD: RSI < 30')
-        elif rsi and rsi > 70:
-            signals.append('OVERBOUGHT: RSI > 70')
-        
-        if upper_band and closes[-1] > upper_band:
-            signals.append('Price above upper Bollinger Band - potential correction')
-        if lower_band and closes[-1] < lower_band:
-            signals.append('Price below lower Bollinger Band - potential bounce')
-        
+        params = _indicator_params(payload)
+        lookback = int(payload['lookback']) if payload.get('lookback') else None
+        include_series = bool(payload.get('include_series', True))
+        
+        if not HAS_NUMPY:
+            return {'success': False, 'error': 'numpy not installed'}
+        
+        logger.info(f"Calculating indicators for {len(tickers)} ticker(s)")
+        
+        history, source_name, fetched = _load_bars(payload, tickers, period)
+        errors = {t: f"No data for {t}" for t in tickers if t not in history or not np.asarray(history[t]).shape[1]}
+        available = [t for t in tickers if t not in errors]
+        store = IndicatorStore(_cache_dir(), source_name, params)
+        computed = _indicator_series(available, history, store, params)
+        
+        results = {}
+        for ticker in available:
+            try:
+                results[ticker] = _indicator_result(ticker, *computed[ticker], period, lookback, include_series)
+            except ValueError as e:
+                errors[ticker] = str(e)
+        data = {'source': source_name, 'cached': fetched == 0}
+        
+        if batch is None:
+            if tickers[0] in errors:
+                raise ValueError(errors[tickers[0]])
+            result = results[tickers[0]]
+            result['data'] = data
+            return result
         return {
-            'success': True,
-            'ticker': ticker,
-            'indicators': indicators,
-            'signals': signals
+            'success': bool(results),
+            'count': len(results),
+            'results': results,
+            'errors': errors,
+            'data': data
         }
     
     except Exception as e:
@@ -457,63 +937,10 @@ def execute_plugin(inputs):
             "error": str(e)
         }]
 
-def parse_inputs(inputs_str):
-    """Parse and normalize the plugin stdin JSON payload into a dict."""
-    try:
-        payload = json.loads(inputs_str)
-        inputs_dict = {}
-
-        if isinstance(payload, dict):
-            if payload.get('_type') == 'Map' and isinstance(payload.get('entries'), list):
-                for entry in payload.get('entries', []):
-                    if isinstance(entry, list) and len(entry) == 2:
-                        key, value = entry
-                        inputs_dict[key] = value
-            else:
-                for key, value in payload.items():
-                    if key not in ('_type', 'entries'):
-                        inputs_dict[key] = value
-
-        elif isinstance(payload, list):
-            for item in payload:
-                if isinstance(item, list) and len(item) == 2:
-                    key, value = item
-                    inputs_dict[key] = value
-
-        return inputs_dict
-
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse input JSON: {e}")
-        raise
-
 def main():
     """Main entry point for the plugin."""
-    try:
-        input_data = sys.stdin.read().strip()
-        if not input_data:
-            result = [{
-                "success": False,
-                "name": "error",
-                "resultType": "error",
-                "result": "No input data received",
-                "error": "No input data received"
-            }]
-        else:
-            inputs_dict = parse_inputs(input_data)
-            result = execute_plugin(inputs_dict)
-
-        print(json.dumps(result))
+    run(execute_plugin)
 
-    except Exception as e:
-        logger.error(f"Plugin execution failed: {str(e)}")
-        result = [{
-            "success": False,
-            "name": "error",
-            "resultType": "error",
-            "result": str(e),
-            "error": str(e)
-        }]
-        print(json.dumps(result))
 
 if __name__ == "__main__":
     main()
@@ -12,7 +12,11 @@ import os
 import hashlib
 import hmac
 import sqlite3
+import threading
+import atexit
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 from cryptography.fernet import Fernet
@@ -77,7 +81,7 @@ class RecordEncryption:
         """Encrypt PHI data using Fernet symmetric encryption."""
         try:
             encrypted = self.cipher_suite.encrypt(data.encode())
-            logger.info(f"PHI data encrypted successfully")
+            logger.debug("PHI data encrypted successfully")
             return encrypted.decode()
         except Exception as e:
             logger.error(f"Failed to encrypt PHI: {str(e)}")
@@ -87,74 +91,236 @@ class RecordEncryption:
         """Decrypt PHI data."""
         try:
             decrypted = self.cipher_suite.decrypt(encrypted_data.encode())
-            logger.info(f"PHI data decrypted successfully")
+            logger.debug("PHI data decrypted successfully")
             return decrypted.decode()
         except Exception as e:
             logger.error(f"Failed to decrypt PHI: {str(e)}")
             raise ValueError(f"Decryption error: {str(e)}")
 
 
+# ============================================================================
+# DATABASE CONNECTIONS & SCHEMA MIGRATIONS
+# ============================================================================
+
+# Schema history, applied once per database file and tracked with PRAGMA user_version.
+# Each version lists the statements for the records and the audit schema; a file holding
+# both (the default, AUDIT_DB_PATH unset or equal to RECORDS_DB_PATH) gets both sets
+# under one version counter.
+SCHEMA_MIGRATIONS = [
+    (1, {
+        'records': [
+            '''
+            CREATE TABLE IF NOT EXISTS medical_records (
+                id TEXT PRIMARY KEY,
+                patient_id TEXT NOT NULL,
+                record_type TEXT NOT NULL,
+                provider_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                content_encrypted TEXT NOT NULL,
+                metadata TEXT,
+                version INTEGER DEFAULT 1,
+                is_active BOOLEAN DEFAULT 1,
+                created_by TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                modified_by TEXT,
+                modified_at TIMESTAMP
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS record_versions (
+                id TEXT PRIMARY KEY,
+                record_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                content_encrypted TEXT NOT NULL,
+                modified_by TEXT NOT NULL,
+                modified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                change_summary TEXT,
+                FOREIGN KEY (record_id) REFERENCES medical_records(id)
+            )
+            ''',
+            'CREATE INDEX IF NOT EXISTS idx_patient ON medical_records(patient_id)',
+            'CREATE INDEX IF NOT EXISTS idx_record_type ON medical_records(record_type)',
+            'CREATE INDEX IF NOT EXISTS idx_provider ON medical_records(provider_id)',
+            'CREATE INDEX IF NOT EXISTS idx_active ON medical_records(is_active)',
+        ],
+        'audit': [
+            '''
+            CREATE TABLE IF NOT EXISTS audit_log (
+                id TEXT PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                provider_role TEXT NOT NULL,
+                patient_id TEXT NOT NULL,
+                record_id TEXT NOT NULL,
+                event_type TEXT NOT NULL,
+                action TEXT NOT NULL,
+                status TEXT NOT NULL,
+                ip_address TEXT,
+                details TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            'CREATE INDEX IF NOT EXISTS idx_patient_id ON audit_log(patient_id)',
+            'CREATE INDEX IF NOT EXISTS idx_record_id ON audit_log(record_id)',
+            'CREATE INDEX IF NOT EXISTS idx_timestamp ON audit_log(timestamp)',
+            'CREATE INDEX IF NOT EXISTS idx_user_id ON audit_log(user_id)',
+        ],
+    }),
+]
+
+def _records_db_path() -> str:
+    return os.getenv('RECORDS_DB_PATH', '/tmp/medical_records.db')
+
+
+def _audit_db_path() -> str:
+    """The audit log lives in the records file unless AUDIT_DB_PATH opts into a separate one."""
+    return os.getenv('AUDIT_DB_PATH') or _records_db_path()
+
+
+# Most SQLite builds allow 999 bound parameters per statement
+SQLITE_MAX_VARIABLES = 900
+MAX_BULK_RECORDS = 10000
+DEFAULT_BULK_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+try:
+    BULK_WORKERS = max(1, int(os.getenv('MEDICAL_RECORDS_BULK_WORKERS', DEFAULT_BULK_WORKERS)))
+except ValueError:
+    BULK_WORKERS = DEFAULT_BULK_WORKERS
+
+
+class Database:
+    """One long-lived WAL-mode SQLite connection, shared by every caller in the process."""
+    
+    def __init__(self, path: str, components: Tuple[str, ...]):
+        self.path = path
+        self.components = components
+        self._lock = threading.RLock()
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                    check_same_thread=False, cached_statements=128)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.attached: Dict[str, str] = {}
+        self._migrate()
+    
+    def _migrate(self):
+        """Apply the schema versions this file has not seen yet."""
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_MIGRATIONS[-1][0]:
+            return
+        with self.transaction() as conn:
+            # Re-read under the write lock; another process may have migrated meanwhile
+            current = conn.execute('PRAGMA user_version').fetchone()[0]
+            for version, statements in SCHEMA_MIGRATIONS:
+                if version <= current:
+                    continue
+                for component in self.components:
+                    for statement in statements.get(component, []):
+                        conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {int(version)}')
+                logger.info(f"Migrated {self.path} to schema version {version}")
+    
+    def attach(self, path: str, schema: str):
+        """
+        Attach another database file so one transaction can write to both. In WAL mode
+        SQLite does not make such a transaction atomic across a crash: each file commits
+        on its own, so one may keep a change the other lost.
+        """
+        with self._lock:
+            if self.attached.get(schema) != path:
+                if schema in self.attached:
+                    self.conn.execute('DETACH DATABASE ' + schema)
+                self.conn.execute('ATTACH DATABASE ? AS ' + schema, (path,))
+                self.attached[schema] = path
+    
+    @contextmanager
+    def transaction(self):
+        """Serialize access to the connection and commit (or roll back) once at the end."""
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+    
+    @contextmanager
+    def reading(self):
+        """Serialize access to the connection for reads."""
+        with self._lock:
+            yield self.conn
+    
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_databases: Dict[Tuple[str, Tuple[str, ...]], Database] = {}
+_databases_lock = threading.Lock()
+
+
+def _open_database(path: str, components: Tuple[str, ...]) -> Database:
+    """Process-wide connection for a database file, migrated on first use."""
+    key = (os.path.abspath(path), components)
+    with _databases_lock:
+        database = _databases.get(key)
+        if database is None:
+            database = _databases[key] = Database(path, components)
+        return database
+
+
+@atexit.register
+def _close_databases():
+    with _databases_lock:
+        for database in _databases.values():
+            try:
+                database.close()
+            except Exception:
+                pass
+        _databases.clear()
+
+
 class AuditLog:
     """HIPAA-compliant audit logging for all record access."""
     
-    def __init__(self):
-        """Initialize audit log database."""
-        self.db_path = os.getenv('AUDIT_DB_PATH', '/tmp/hipaa_audit.db')
-        self._init_audit_db()
+    INSERT_SQL = '''
+        INSERT INTO {table}
+        (id, timestamp, user_id, provider_role, patient_id, record_id,
+         event_type, action, status, details)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
     
-    def _init_audit_db(self):
-        """Initialize audit log database with required schema."""
+    def __init__(self, database: Optional[Database] = None):
+        """Initialize audit log database."""
+        self.db_path = _audit_db_path()
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS audit_log (
-                    id TEXT PRIMARY KEY,
-                    timestamp TEXT NOT NULL,
-                    user_id TEXT NOT NULL,
-                    provider_role TEXT NOT NULL,
-                    patient_id TEXT NOT NULL,
-                    record_id TEXT NOT NULL,
-                    event_type TEXT NOT NULL,
-                    action TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    ip_address TEXT,
-                    details TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_patient_id ON audit_log(patient_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_record_id ON audit_log(record_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON audit_log(timestamp)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_id ON audit_log(user_id)')
-            conn.commit()
-            conn.close()
-            logger.info("Audit log database initialized")
+            self.db = database or _open_database(self.db_path, ('audit',))
         except Exception as e:
             logger.error(f"Failed to initialize audit database: {str(e)}")
             raise
     
+    @staticmethod
+    def entry(user_id: str, provider_role: str, patient_id: str, record_id: str,
+              event_type: str, action: str, status: str, details: str = None) -> Tuple:
+        """Build one audit row; write it with ``write`` inside a caller's transaction."""
+        return (str(uuid.uuid4()), datetime.utcnow().isoformat(), user_id, provider_role,
+                patient_id, record_id, event_type, action, status, details)
+    
+    def write(self, conn: sqlite3.Connection, entries: List[Tuple], table: str = 'audit_log'):
+        """Insert audit rows with the caller's connection, as part of its transaction."""
+        conn.executemany(self.INSERT_SQL.format(table=table), entries)
+    
     def log_access(self, user_id: str, provider_role: str, patient_id: str, record_id: str,
                   event_type: str, action: str, status: str, details: str = None) -> str:
         """Log access event to audit trail."""
         try:
-            log_id = str(uuid.uuid4())
-            timestamp = datetime.utcnow().isoformat()
+            entry = self.entry(user_id, provider_role, patient_id, record_id,
+                               event_type, action, status, details)
+            with self.db.transaction() as conn:
+                self.write(conn, [entry])
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO audit_log 
-                (id, timestamp, user_id, provider_role, patient_id, record_id, 
-                 event_type, action, status, details)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (log_id, timestamp, user_id, provider_role, patient_id, record_id,
-                  event_type, action, status, details))
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"Audit log entry created: {log_id} | {event_type} | {status}")
-            return log_id
+            logger.info(f"Audit log entry created: {entry[0]} | {event_type} | {status}")
+            return entry[0]
         except Exception as e:
             logger.error(f"Failed to log access: {str(e)}")
             raise
@@ -162,25 +328,19 @@ class AuditLog:
     def get_audit_trail(self, patient_id: str, record_id: str = None) -> List[Dict]:
         """Retrieve audit trail for patient record."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            if record_id:
-                cursor.execute('''
-                    SELECT * FROM audit_log 
-                    WHERE patient_id = ? AND record_id = ?
-                    ORDER BY timestamp DESC
-                ''', (patient_id, record_id))
-            else:
-                cursor.execute('''
-                    SELECT * FROM audit_log 
-                    WHERE patient_id = ?
-                    ORDER BY timestamp DESC
-                ''', (patient_id,))
-            
-            rows = cursor.fetchall()
-            conn.close()
+            with self.db.reading() as conn:
+                if record_id:
+                    rows = conn.execute('''
+                        SELECT * FROM audit_log 
+                        WHERE patient_id = ? AND record_id = ?
+                        ORDER BY timestamp DESC
+                    ''', (patient_id, record_id)).fetchall()
+                else:
+                    rows = conn.execute('''
+                        SELECT * FROM audit_log 
+                        WHERE patient_id = ?
+                        ORDER BY timestamp DESC
+                    ''', (patient_id,)).fetchall()
             
             audit_entries = [dict(row) for row in rows]
             logger.info(f"Retrieved {len(audit_entries)} audit entries for patient {patient_id}")
@@ -253,64 +413,46 @@ class AccessControl:
 class MedicalRecordDB:
     """Medical records database management with version control."""
     
+    INSERT_RECORD_SQL = '''
+        INSERT INTO medical_records 
+        (id, patient_id, record_type, provider_id, title, 
+         content_encrypted, metadata, created_by, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
     def __init__(self):
         """Initialize medical records database."""
-        self.db_path = os.getenv('RECORDS_DB_PATH', '/tmp/medical_records.db')
+        self.db_path = _records_db_path()
         self.encryption = RecordEncryption()
-        self.audit = AuditLog()
         self._init_records_db()
     
     def _init_records_db(self):
-        """Initialize medical records database with version control schema."""
+        """Open the shared records connection and route audit rows through it."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Main records table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS medical_records (
-                    id TEXT PRIMARY KEY,
-                    patient_id TEXT NOT NULL,
-                    record_type TEXT NOT NULL,
-                    provider_id TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    content_encrypted TEXT NOT NULL,
-                    metadata TEXT,
-                    version INTEGER DEFAULT 1,
-                    is_active BOOLEAN DEFAULT 1,
-                    created_by TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    modified_by TEXT,
-                    modified_at TIMESTAMP
-                )
-            ''')
-            
-            # Version history table for record versioning
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS record_versions (
-                    id TEXT PRIMARY KEY,
-                    record_id TEXT NOT NULL,
-                    version INTEGER NOT NULL,
-                    content_encrypted TEXT NOT NULL,
-                    modified_by TEXT NOT NULL,
-                    modified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    change_summary TEXT,
-                    FOREIGN KEY (record_id) REFERENCES medical_records(id)
-                )
-            ''')
-            
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_patient ON medical_records(patient_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_record_type ON medical_records(record_type)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_provider ON medical_records(provider_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_active ON medical_records(is_active)')
-            
-            conn.commit()
-            conn.close()
-            logger.info("Medical records database initialized")
+            audit_path = _audit_db_path()
+            if os.path.abspath(audit_path) == os.path.abspath(self.db_path):
+                self.db = _open_database(self.db_path, ('records', 'audit'))
+                self.audit = AuditLog(self.db)
+                self.audit_table = 'audit_log'
+            else:
+                self.audit = AuditLog()
+                self.db = _open_database(self.db_path, ('records',))
+                # Records and their audit rows share a transaction, but a crash can still
+                # leave one file committed without the other (see Database.attach)
+                logger.warning("AUDIT_DB_PATH is a separate file; record and audit writes are not crash-atomic")
+                self.db.attach(audit_path, 'audit')
+                self.audit_table = 'audit.audit_log'
         except Exception as e:
             logger.error(f"Failed to initialize records database: {str(e)}")
             raise
     
+    def _map(self, function, items: List[Any]) -> List[Any]:
+        """Run encryption or decryption over many items on a thread pool, keeping order."""
+        if len(items) < 2 or BULK_WORKERS == 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(BULK_WORKERS, len(items))) as executor:
+            return list(executor.map(function, items))
+    
     def store_record(self, patient_id: str, record_type: str, provider_id: str, 
                     title: str, content: str, user_id: str, metadata: Dict = None) -> Dict:
         """Store encrypted medical record with audit logging."""
@@ -345,24 +487,15 @@ class MedicalRecordDB:
             record_id = str(uuid.uuid4())
             timestamp = datetime.utcnow().isoformat()
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO medical_records 
-                (id, patient_id, record_type, provider_id, title, 
-                 content_encrypted, metadata, created_by, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (record_id, patient_id, record_type, provider_id, title,
-                  encrypted_content, json.dumps(metadata or {}), user_id, timestamp))
-            
-            conn.commit()
-            conn.close()
-            
-            # Audit log the creation
-            self.audit.log_access(user_id, 'physician', patient_id, record_id,
-                                 'RECORD_CREATED', 'CREATE', 'SUCCESS',
-                                 f'Record created: {title}')
+            # The record and its audit entry commit together
+            with self.db.transaction() as conn:
+                conn.execute(self.INSERT_RECORD_SQL, (
+                    record_id, patient_id, record_type, provider_id, title,
+                    encrypted_content, json.dumps(metadata or {}), user_id, timestamp))
+                self.audit.write(conn, [AuditLog.entry(
+                    user_id, 'physician', patient_id, record_id,
+                    'RECORD_CREATED', 'CREATE', 'SUCCESS', f'Record created: {title}')],
+                    self.audit_table)
             
             logger.info(f"Medical record stored: {record_id} for patient {patient_id}")
             
@@ -383,6 +516,87 @@ class MedicalRecordDB:
                 'record_id': None
             }
     
+    def bulk_store_records(self, records: List[Dict], user_id: str) -> Dict:
+        """
+        Store many records at once: contents are encrypted on a thread pool, then every
+        valid record and its audit entry are written in a single transaction. Invalid
+        records are reported by index and skipped.
+        """
+        try:
+            if len(records) > MAX_BULK_RECORDS:
+                return {
+                    'success': False,
+                    'error': f'Too many records in one request (maximum {MAX_BULK_RECORDS})'
+                }
+            
+            failed = []
+            valid = []
+            for index, record in enumerate(records):
+                if not isinstance(record, dict):
+                    failed.append({'index': index, 'error': 'Record must be an object'})
+                    continue
+                missing = [f for f in ('patient_id', 'record_type', 'provider_id', 'title', 'content')
+                           if not record.get(f)]
+                if missing:
+                    failed.append({'index': index, 'error': f"Missing required fields: {', '.join(missing)}"})
+                    continue
+                validation_passed, validation_msg = AccessControl.validate_record_data(record)
+                if not validation_passed:
+                    failed.append({'index': index, 'error': validation_msg})
+                    continue
+                valid.append((index, record))
+            
+            try:
+                encrypted = self._map(self.encryption.encrypt_phi, [str(r['content']) for _, r in valid])
+            except Exception as e:
+                logger.error(f"Bulk encryption failed: {str(e)}")
+                return {
+                    'success': False,
+                    'error': 'Failed to encrypt record content'
+                }
+            
+            timestamp = datetime.utcnow().isoformat()
+            stored = []
+            record_rows = []
+            audit_rows = []
+            for (index, record), encrypted_content in zip(valid, encrypted):
+                record_id = str(uuid.uuid4())
+                record_rows.append((record_id, record['patient_id'], record['record_type'],
+                                    record['provider_id'], record['title'], encrypted_content,
+                                    json.dumps(record.get('metadata') or {}), user_id, timestamp))
+                audit_rows.append(AuditLog.entry(user_id, 'physician', record['patient_id'], record_id,
+                                                 'RECORD_CREATED', 'CREATE', 'SUCCESS',
+                                                 f"Record created: {record['title']}"))
+                stored.append({
+                    'index': index,
+                    'record_id': record_id,
+                    'patient_id': record['patient_id'],
+                    'record_type': record['record_type'],
+                    'title': record['title']
+                })
+            
+            if record_rows:
+                with self.db.transaction() as conn:
+                    conn.executemany(self.INSERT_RECORD_SQL, record_rows)
+                    self.audit.write(conn, audit_rows, self.audit_table)
+            
+            logger.info(f"Bulk stored {len(stored)} medical records ({len(failed)} rejected)")
+            return {
+                'success': bool(stored) or not records,
+                'stored_count': len(stored),
+                'failed_count': len(failed),
+                'records': stored,
+                'failed': failed,
+                'created_at': timestamp
+            }
+        
+        except Exception as e:
+            logger.error(f"Error bulk storing records: {str(e)}")
+            return {
+                'success': False,
+                'error': 'Error storing medical records'
+            }
+    
     def retrieve_record(self, record_id: str, patient_id: str, user_id: str, 
                        provider_role: str = 'physician') -> Dict:
         """Retrieve and decrypt medical record with access control."""
@@ -401,17 +615,11 @@ class MedicalRecordDB:
                     'record': None
                 }
             
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM medical_records 
-                WHERE id = ? AND patient_id = ? AND is_active = 1
-            ''', (record_id, patient_id))
-            
-            row = cursor.fetchone()
-            conn.close()
+            with self.db.reading() as conn:
+                row = conn.execute('''
+                    SELECT * FROM medical_records 
+                    WHERE id = ? AND patient_id = ? AND is_active = 1
+                ''', (record_id, patient_id)).fetchone()
             
             if not row:
                 self.audit.log_access(user_id, provider_role, patient_id, record_id,
@@ -438,17 +646,7 @@ class MedicalRecordDB:
             self.audit.log_access(user_id, provider_role, patient_id, record_id,
                                  'RECORD_RETRIEVED', 'RETRIEVE', 'SUCCESS')
             
-            record = {
-                'id': row['id'],
-                'patient_id': row['patient_id'],
-                'record_type': row['record_type'],
-                'provider_id': row['provider_id'],
-                'title': row['title'],
-                'content': decrypted_content,
-                'version': row['version'],
-                'created_at': row['created_at'],
-                'modified_at': row['modified_at']
-            }
+            record = self._record_from_row(row, decrypted_content)
             
             logger.info(f"Record retrieved successfully: {record_id}")
             return {
@@ -464,6 +662,115 @@ class MedicalRecordDB:
                 'record': None
             }
     
+    @staticmethod
+    def _record_from_row(row: sqlite3.Row, content: str) -> Dict:
+        return {
+            'id': row['id'],
+            'patient_id': row['patient_id'],
+            'record_type': row['record_type'],
+            'provider_id': row['provider_id'],
+            'title': row['title'],
+            'content': content,
+            'version': row['version'],
+            'created_at': row['created_at'],
+            'modified_at': row['modified_at']
+        }
+    
+    def bulk_retrieve(self, requests: List[Dict], user_id: str,
+                      provider_role: str = 'physician') -> Dict:
+        """
+        Retrieve many records in one pass: access is checked once per patient, rows are
+        fetched with batched IN queries, contents are decrypted on a thread pool and all
+        audit entries are written in a single transaction. Records come back in request order;
+        malformed request entries are reported in ``failed`` by index and skipped.
+        """
+        try:
+            if len(requests) > MAX_BULK_RECORDS:
+                return {
+                    'success': False,
+                    'error': f'Too many records in one request (maximum {MAX_BULK_RECORDS})'
+                }
+            
+            access: Dict[str, Tuple[bool, str]] = {}
+            audit_rows = []
+            denied = []
+            wanted = []
+            failed = []
+            for index, request in enumerate(requests):
+                if not isinstance(request, dict):
+                    failed.append({'index': index, 'error': 'Request must be an object'})
+                    continue
+                record_id, patient_id = request.get('record_id'), request.get('patient_id')
+                if not isinstance(record_id, str) or not record_id or not isinstance(patient_id, str) or not patient_id:
+                    failed.append({'index': index, 'error': 'Request needs string record_id and patient_id'})
+                    continue
+                if patient_id not in access:
+                    access[patient_id] = AccessControl.check_provider_access(user_id, provider_role, patient_id)
+                granted, access_msg = access[patient_id]
+                if granted:
+                    wanted.append((record_id, patient_id))
+                else:
+                    denied.append({'record_id': record_id, 'patient_id': patient_id, 'error': 'Unauthorized access'})
+                    audit_rows.append(AuditLog.entry(user_id, provider_role, str(patient_id), str(record_id),
+                                                     'ACCESS_DENIED', 'RETRIEVE', 'DENIED', access_msg))
+            
+            rows: Dict[str, sqlite3.Row] = {}
+            record_ids = list(dict.fromkeys(record_id for record_id, _ in wanted))
+            with self.db.reading() as conn:
+                for start in range(0, len(record_ids), SQLITE_MAX_VARIABLES):
+                    chunk = record_ids[start:start + SQLITE_MAX_VARIABLES]
+                    placeholders = ','.join('?' * len(chunk))
+                    for row in conn.execute(
+                            f'SELECT * FROM medical_records WHERE id IN ({placeholders}) AND is_active = 1', chunk):
+                        rows[row['id']] = row
+            
+            found = [(record_id, patient_id, rows[record_id]) for record_id, patient_id in wanted
+                     if record_id in rows and rows[record_id]['patient_id'] == patient_id]
+            found_keys = {(record_id, patient_id) for record_id, patient_id, _ in found}
+            not_found = [record_id for record_id, patient_id in wanted if (record_id, patient_id) not in found_keys]
+            
+            def decrypt(row):
+                try:
+                    return self.encryption.decrypt_phi(row['content_encrypted'])
+                except ValueError:
+                    return None
+            
+            contents = self._map(decrypt, [row for _, _, row in found])
+            records = []
+            for (record_id, patient_id, row), content in zip(found, contents):
+                if content is None:
+                    failed.append({'record_id': record_id, 'patient_id': patient_id, 'error': 'Failed to decrypt record'})
+                    continue
+                records.append(self._record_from_row(row, content))
+                audit_rows.append(AuditLog.entry(user_id, provider_role, patient_id, record_id,
+                                                 'RECORD_RETRIEVED', 'RETRIEVE', 'SUCCESS'))
+            for record_id, patient_id in wanted:
+                if (record_id, patient_id) not in found_keys:
+                    audit_rows.append(AuditLog.entry(user_id, provider_role, str(patient_id), str(record_id),
+                                                     'RECORD_RETRIEVED', 'RETRIEVE', 'NOT_FOUND'))
+            
+            if audit_rows:
+                with self.db.transaction() as conn:
+                    self.audit.write(conn, audit_rows, self.audit_table)
+            
+            logger.info(f"Bulk retrieved {len(records)} of {len(requests)} medical records")
+            return {
+                'success': bool(records) or not requests,
+                'retrieved_count': len(records),
+                'records': records,
+                'not_found': not_found,
+                'denied': denied,
+                'failed': failed
+            }
+        
+        except Exception as e:
+            logger.error(f"Error bulk retrieving records: {str(e)}")
+            return {
+                'success': False,
+                'error': 'Error retrieving medical records',
+                'records': []
+            }
+    
     def update_record(self, record_id: str, patient_id: str, user_id: str,
                      content: str, change_summary: str = None,
                      provider_role: str = 'physician') -> Dict:
@@ -491,48 +798,42 @@ class MedicalRecordDB:
                     'error': 'Failed to encrypt record content'
                 }
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get current version
-            cursor.execute('SELECT version FROM medical_records WHERE id = ? AND patient_id = ?',
-                          (record_id, patient_id))
-            row = cursor.fetchone()
-            
-            if not row:
-                conn.close()
-                return {
-                    'success': False,
-                    'error': 'Record not found'
-                }
-            
-            current_version = row[0]
-            new_version = current_version + 1
-            timestamp = datetime.utcnow().isoformat()
-            
-            # Store version history
-            version_id = str(uuid.uuid4())
-            cursor.execute('''
-                INSERT INTO record_versions 
-                (id, record_id, version, content_encrypted, modified_by, change_summary)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (version_id, record_id, current_version, 
-                  self.encryption.encrypt_phi(content), user_id, change_summary))
-            
-            # Update main record
-            cursor.execute('''
-                UPDATE medical_records 
-                SET content_encrypted = ?, version = ?, modified_by = ?, modified_at = ?
-                WHERE id = ? AND patient_id = ?
-            ''', (encrypted_content, new_version, user_id, timestamp, record_id, patient_id))
-            
-            conn.commit()
-            conn.close()
-            
-            # Audit log the update
-            self.audit.log_access(user_id, provider_role, patient_id, record_id,
-                                 'RECORD_MODIFIED', 'UPDATE', 'SUCCESS',
-                                 f'Updated to version {new_version}')
+            with self.db.transaction() as conn:
+                # Get current version
+                row = conn.execute('SELECT version FROM medical_records WHERE id = ? AND patient_id = ?',
+                                   (record_id, patient_id)).fetchone()
+                
+                if not row:
+                    return {
+                        'success': False,
+                        'error': 'Record not found'
+                    }
+                
+                current_version = row[0]
+                new_version = current_version + 1
+                timestamp = datetime.utcnow().isoformat()
+                
+                # Store version history
+                version_id = str(uuid.uuid4())
+                conn.execute('''
+                    INSERT INTO record_versions 
+                    (id, record_id, version, content_encrypted, modified_by, change_summary)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (version_id, record_id, current_version, 
+                      encrypted_content, user_id, change_summary))
+                
+                # Update main record
+                conn.execute('''
+                    UPDATE medical_records 
+                    SET content_encrypted = ?, version = ?, modified_by = ?, modified_at = ?
+                    WHERE id = ? AND patient_id = ?
+                ''', (encrypted_content, new_version, user_id, timestamp, record_id, patient_id))
+                
+                # Audit log the update
+                self.audit.write(conn, [AuditLog.entry(
+                    user_id, provider_role, patient_id, record_id,
+                    'RECORD_MODIFIED', 'UPDATE', 'SUCCESS', f'Updated to version {new_version}')],
+                    self.audit_table)
             
             logger.info(f"Record updated: {record_id} to version {new_version}")
             return {
@@ -565,22 +866,18 @@ class MedicalRecordDB:
                     'error': 'Unauthorized access'
                 }
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Soft delete (mark as inactive)
-            cursor.execute('''
-                UPDATE medical_records 
-                SET is_active = 0, modified_by = ?, modified_at = ?
-                WHERE id = ? AND patient_id = ?
-            ''', (user_id, datetime.utcnow().isoformat(), record_id, patient_id))
-            
-            conn.commit()
-            conn.close()
-            
-            # Audit log the deletion
-            self.audit.log_access(user_id, provider_role, patient_id, record_id,
-                                 'RECORD_DELETED', 'DELETE', 'SUCCESS')
+            with self.db.transaction() as conn:
+                # Soft delete (mark as inactive)
+                conn.execute('''
+                    UPDATE medical_records 
+                    SET is_active = 0, modified_by = ?, modified_at = ?
+                    WHERE id = ? AND patient_id = ?
+                ''', (user_id, datetime.utcnow().isoformat(), record_id, patient_id))
+                
+                # Audit log the deletion
+                self.audit.write(conn, [AuditLog.entry(
+                    user_id, provider_role, patient_id, record_id,
+                    'RECORD_DELETED', 'DELETE', 'SUCCESS')], self.audit_table)
             
             logger.info(f"Record deleted (soft): {record_id}")
             return {
@@ -625,6 +922,20 @@ class MedicalRecordDB:
 # PLUGIN INTERFACE
 # ============================================================================
 
+_record_dbs: Dict[Tuple[str, str, str], MedicalRecordDB] = {}
+
+
+def _get_record_db() -> MedicalRecordDB:
+    """Reuse one MedicalRecordDB (and its connections) per database paths and key."""
+    key = (_records_db_path(),
+           _audit_db_path(),
+           os.getenv('HIPAA_ENCRYPTION_KEY', 'default-healthcare-key'))
+    db = _record_dbs.get(key)
+    if db is None:
+        db = _record_dbs[key] = MedicalRecordDB()
+    return db
+
+
 def _get_input(inputs: dict, key: str, aliases: list = [], default=None):
     """Safely gets a value from inputs, checking aliases, and extracting from {'value':...} wrapper."""
     raw_val = inputs.get(key)
@@ -655,7 +966,7 @@ def execute_plugin(inputs):
                 "error": "Action parameter required"
             }]
 
-        db = MedicalRecordDB()
+        db = _get_record_db()
         result = None
 
         # Store encrypted medical record
@@ -679,6 +990,21 @@ def execute_plugin(inputs):
             result = db.store_record(patient_id, record_type, provider_id, title, 
                                     content, user_id, metadata)
 
+        # Store many encrypted records in one transaction
+        elif action == 'bulk_store_records':
+            records = _get_input(payload, 'records', ['record_list'])
+            user_id = _get_input(payload, 'user_id')
+
+            if not isinstance(records, list) or not user_id:
+                return [{
+                    "success": False,
+                    "name": "error",
+                    "resultType": "error",
+                    "result": "Missing required fields: records (list), user_id"
+                }]
+
+            result = db.bulk_store_records(records, user_id)
+
         # Retrieve encrypted medical record
         elif action == 'retrieve_record':
             record_id = _get_input(payload, 'record_id')
@@ -696,6 +1022,31 @@ def execute_plugin(inputs):
 
             result = db.retrieve_record(record_id, patient_id, user_id, provider_role)
 
+        # Retrieve many records, by record_ids for one patient or by {record_id, patient_id} pairs
+        elif action == 'bulk_retrieve':
+            records = _get_input(payload, 'records')
+            record_ids = _get_input(payload, 'record_ids')
+            patient_id = _get_input(payload, 'patient_id')
+            user_id = _get_input(payload, 'user_id')
+            provider_role = _get_input(payload, 'provider_role', default='physician')
+
+            if isinstance(records, list):
+                requests = records
+            elif isinstance(record_ids, list) and patient_id:
+                requests = [{'record_id': record_id, 'patient_id': patient_id} for record_id in record_ids]
+            else:
+                requests = None
+
+            if requests is None or not user_id:
+                return [{
+                    "success": False,
+                    "name": "error",
+                    "resultType": "error",
+                    "result": "Missing required fields: records or record_ids with patient_id, user_id"
+                }]
+
+            result = db.bulk_retrieve(requests, user_id, provider_role)
+
         # Update medical record with versioning
         elif action == 'update_record':
             record_id = _get_input(payload, 'record_id')
@@ -4,17 +4,26 @@ PORTFOLIO_MANAGEMENT Plugin - Portfolio management and optimization
 Handles portfolio rebalancing, asset allocation optimization, and generates recommendations
 """
 
+import re
 import sys
-import json
 import logging
 import os
 import math
-from typing import Dict, Any, List, Tuple, Optional
+import shutil
+import hashlib
+import tempfile
+from datetime import date, timedelta
+from typing import Dict, Any, List, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
 
 try:
     import yfinance as yf
     import pandas as pd
-    import numpy as np
     HAS_YFINANCE = True
 except ImportError:
     HAS_YFINANCE = False
@@ -22,19 +31,18 @@ except ImportError:
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def _get_input(inputs: dict, key: str, aliases: list = [], default=None):
-    """Safely gets a value from inputs, checking aliases, and extracting from {{'value':...}} wrapper."""
-    raw_val = inputs.get(key)
-    if raw_val is None:
-        for alias in aliases:
-            raw_val = inputs.get(alias)
-            if raw_val is not None:
-                break
-    if raw_val is None:
-        return default
-    if isinstance(raw_val, dict) and 'value' in raw_val:
-        return raw_val['value'] if raw_val['value'] is not None else default
-    return raw_val if raw_val is not None else default
+try:
+    from stage7_plugin_runtime import run, get_input as _get_input
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_plugin_runtime import run, get_input as _get_input
+
+TRADING_DAYS = 252
+# Every action reads from the same cached window; shorter periods are slices of it
+HISTORY_PERIOD = '2y'
+PERIOD_DAYS = {'1d': 1, '5d': 7, '1mo': 31, '3mo': 92, '6mo': 183, '1y': 366, '2y': 731, '5y': 1827, '10y': 3653}
+DEFAULT_RISK_FREE_RATE = 0.02
+FRONTIER_POINTS = 20
 
 def _validate_tickers(tickers: List[str]) -> List[str]:
     """Validate and normalize ticker symbols."""
@@ -57,6 +65,314 @@ def _validate_weights(weights: List[float], tickers: List[str]) -> List[float]:
         weights = [w / weight_sum for w in weights]
     return weights
 
+# ============================================================================
+# PRICE SOURCES & CACHE
+# ============================================================================
+
+class YFinancePriceSource:
+    """Daily closes from Yahoo Finance."""
+    name = 'yfinance'
+
+    def fetch(self, tickers: List[str], period: str) -> Dict[str, Tuple[Any, Any]]:
+        """ticker -> (day ordinals, closes) for every ticker that returned data."""
+        data = yf.download(' '.join(tickers), period=period, progress=False)
+        if data.empty:
+            raise ValueError(f"No data for tickers: {tickers}")
+        close = data['Close']
+        if isinstance(close, pd.Series):
+            close = close.to_frame(tickers[0])
+        ordinals = np.array([ts.toordinal() for ts in close.index], dtype=np.int64)
+        history = {}
+        for ticker in tickers:
+            if ticker not in close.columns:
+                continue
+            closes = close[ticker].to_numpy(dtype=float)
+            valid = ~np.isnan(closes)
+            history[ticker] = (ordinals[valid], closes[valid])
+        return history
+
+
+class MockPriceSource:
+    """
+    Deterministic synthetic closes for offline use and tests: a shared market factor
+    plus per-ticker drift, beta and noise, all derived from the ticker symbol.
+    """
+    name = 'mock'
+    MARKET_SEED = 7
+
+    def fetch(self, tickers: List[str], period: str) -> Dict[str, Tuple[Any, Any]]:
+        end = date.today()
+        start = end - timedelta(days=PERIOD_DAYS.get(period, PERIOD_DAYS[HISTORY_PERIOD]))
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        ordinals = np.array([d.toordinal() for d in days if d.weekday() < 5], dtype=np.int64)
+        market = np.random.default_rng(self.MARKET_SEED).normal(0.0003, 0.011, len(ordinals))
+
+        history = {}
+        for ticker in tickers:
+            seed = int.from_bytes(hashlib.sha256(ticker.encode('utf-8')).digest()[:8], 'big')
+            rng = np.random.default_rng(seed)
+            beta = rng.uniform(0.5, 1.5)
+            drift = rng.uniform(-0.05, 0.25) / TRADING_DAYS
+            noise = rng.uniform(0.1, 0.35) / math.sqrt(TRADING_DAYS)
+            returns = drift + beta * market + rng.normal(0.0, noise, len(ordinals))
+            history[ticker] = (ordinals, rng.uniform(20, 500) * np.exp(np.cumsum(returns)))
+        return history
+
+
+PRICE_SOURCES = {'yfinance': YFinancePriceSource, 'mock': MockPriceSource}
+
+
+class PriceCache:
+    """
+    Close histories stored one ``.npy`` file per ticker (row 0: day ordinals, row 1:
+    closes) under ``<source>/<window>/<trading day>/`` and memory-mapped on read, so
+    every action and every ticker set reuses the same downloads for the day.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @staticmethod
+    def _file_name(ticker: str) -> str:
+        return re.sub(r'[^A-Z0-9._-]', lambda m: f"%{ord(m.group()):02X}", ticker) + '.npy'
+
+    def _day_dir(self, source: str, window: str, as_of: str) -> str:
+        return os.path.join(self.directory, source, window, as_of)
+
+    def load(self, source, tickers: List[str], window: str) -> Tuple[Dict[str, Any], int]:
+        """ticker -> (ordinals, closes), fetching only tickers not cached today; also the number fetched."""
+        as_of = date.today().isoformat()
+        day_dir = self._day_dir(source.name, window, as_of)
+        history = {}
+        missing = []
+        for ticker in tickers:
+            try:
+                stored = np.load(os.path.join(day_dir, self._file_name(ticker)), mmap_mode='r')
+                history[ticker] = (stored[0].astype(np.int64), stored[1])
+            except (OSError, ValueError):
+                missing.append(ticker)
+
+        if missing:
+            fetched = source.fetch(missing, window)
+            self._store(day_dir, fetched)
+            history.update(fetched)
+        return history, len(missing)
+
+    def _store(self, day_dir: str, fetched: Dict[str, Tuple[Any, Any]]):
+        try:
+            if not os.path.isdir(day_dir):
+                os.makedirs(day_dir, exist_ok=True)
+                # Earlier trading days of this source and window are stale now
+                window_dir = os.path.dirname(day_dir)
+                for name in os.listdir(window_dir):
+                    if name < os.path.basename(day_dir):
+                        shutil.rmtree(os.path.join(window_dir, name), ignore_errors=True)
+            for ticker, (ordinals, closes) in fetched.items():
+                fd, tmp_path = tempfile.mkstemp(dir=day_dir, prefix='.prices_', suffix='.npy')
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, np.vstack([ordinals.astype(float), closes]))
+                os.replace(tmp_path, os.path.join(day_dir, self._file_name(ticker)))
+        except OSError as e:
+            logger.warning(f"Could not cache prices in {day_dir}: {e}")
+
+
+def _price_cache() -> PriceCache:
+    return PriceCache(os.getenv('PORTFOLIO_PRICE_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'stage7_portfolio_prices'))
+
+
+def _load_prices(payload: Dict[str, Any], tickers: List[str], period: str = HISTORY_PERIOD) -> Dict[str, Any]:
+    """
+    Aligned close matrix (trading days x tickers) for the last ``period``, read from the
+    shared price cache. Raises ValueError when a ticker has no data.
+    """
+    source_name = str(payload.get('price_source') or os.getenv('PORTFOLIO_PRICE_SOURCE', 'yfinance')).lower()
+    if source_name not in PRICE_SOURCES:
+        raise ValueError(f"Unknown price source: {source_name}")
+    if source_name == 'yfinance' and not HAS_YFINANCE:
+        raise ImportError('yfinance not installed')
+
+    period_days = PERIOD_DAYS.get(period)
+    if period_days is None:
+        raise ValueError(f"Unsupported period: {period}")
+    window = period if period_days > PERIOD_DAYS[HISTORY_PERIOD] else HISTORY_PERIOD
+
+    history, fetched = _price_cache().load(PRICE_SOURCES[source_name](), tickers, window)
+    missing = [t for t in tickers if t not in history or not len(history[t][0])]
+    if missing:
+        raise ValueError(f"No data for tickers: {missing}")
+
+    # Trading days every ticker has a close for, within the requested period
+    ordinals = history[tickers[0]][0]
+    for ticker in tickers[1:]:
+        ordinals = np.intersect1d(ordinals, history[ticker][0], assume_unique=True)
+    ordinals = ordinals[ordinals >= date.today().toordinal() - period_days]
+    if not len(ordinals):
+        raise ValueError(f"No overlapping price history for tickers: {tickers}")
+    prices = np.column_stack([
+        np.asarray(history[t][1])[np.searchsorted(history[t][0], ordinals)] for t in tickers
+    ])
+    return {
+        'prices': prices,
+        'start': date.fromordinal(int(ordinals[0])).isoformat(),
+        'end': date.fromordinal(int(ordinals[-1])).isoformat(),
+        'source': source_name,
+        'cached': fetched == 0
+    }
+
+
+def _data_info(prices: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'source': prices['source'],
+        'start': prices['start'],
+        'end': prices['end'],
+        'observations': int(prices['prices'].shape[0]),
+        'cached': prices['cached']
+    }
+
+
+def _daily_returns(prices) -> Any:
+    return prices[1:] / prices[:-1] - 1
+
+# ============================================================================
+# MEAN-VARIANCE OPTIMIZATION
+# ============================================================================
+
+def _shrunk_covariance(returns) -> Tuple[Any, float]:
+    """Ledoit-Wolf covariance, shrunk toward a scaled identity; returns (matrix, shrinkage)."""
+    observations, n_assets = returns.shape
+    centered = returns - returns.mean(axis=0)
+    sample = centered.T @ centered / observations
+    target = np.trace(sample) / n_assets
+    dispersion = np.sum((sample - target * np.eye(n_assets)) ** 2) / n_assets
+    if dispersion <= 0:
+        return sample, 0.0
+    # sum_t ||x_t x_t' - S||^2 == sum_t ||x_t||^4 - T ||S||^2
+    row_norms = np.sum(centered ** 2, axis=1)
+    estimation = (np.sum(row_norms ** 2) - observations * np.sum(sample ** 2)) / observations ** 2 / n_assets
+    shrinkage = float(min(max(estimation / dispersion, 0.0), 1.0))
+    return shrinkage * target * np.eye(n_assets) + (1 - shrinkage) * sample, shrinkage
+
+
+def _project_to_bounds(v, lower: float, upper: float):
+    """Euclidean projection onto {w : sum(w) == 1, lower <= w <= upper}."""
+    # sum(clip(v - shift, lower, upper)) is piecewise linear and non-increasing in the
+    # shift, with kinks at v - upper and v - lower: find the segment where it crosses 1
+    kinks = np.sort(np.concatenate([v - upper, v - lower]))
+    totals = np.clip(v[None, :] - kinks[:, None], lower, upper).sum(axis=1)
+    i = int(np.searchsorted(-totals, -1.0, side='right')) - 1
+    if i < 0:
+        shift = kinks[0]
+    elif i >= len(kinks) - 1:
+        shift = kinks[-1]
+    elif totals[i] == totals[i + 1]:
+        shift = kinks[i]
+    else:
+        shift = kinks[i] + (totals[i] - 1) * (kinks[i + 1] - kinks[i]) / (totals[i] - totals[i + 1])
+    return np.clip(v - shift, lower, upper)
+
+
+def _solve_qp(quadratic, linear, lower: float, upper: float, start=None, tolerance: float = 1e-12):
+    """Minimize 0.5 w'Qw - c'w over the bounded budget set with accelerated projected gradient."""
+    lipschitz = float(np.linalg.eigvalsh(quadratic)[-1]) or 1.0
+    w = _project_to_bounds(np.full(len(linear), 1 / len(linear)) if start is None else start, lower, upper)
+    momentum, t = w, 1.0
+    for _ in range(5000):
+        updated = _project_to_bounds(momentum - (quadratic @ momentum - linear) / lipschitz, lower, upper)
+        if np.sum((updated - w) ** 2) < tolerance:
+            return updated
+        t_next = (1 + math.sqrt(1 + 4 * t * t)) / 2
+        momentum = updated + (t - 1) / t_next * (updated - w)
+        w, t = updated, t_next
+    return w
+
+
+def _portfolio_stats(weights, mean_returns, covariance, risk_free_rate: float) -> Dict[str, float]:
+    expected = float(weights @ mean_returns)
+    volatility = math.sqrt(max(float(weights @ covariance @ weights), 0.0))
+    return {
+        'return': expected,
+        'volatility': volatility,
+        'sharpe': (expected - risk_free_rate) / volatility if volatility > 0 else 0.0
+    }
+
+
+def _risk_aversion_weights(mean_returns, covariance, gamma: float, lower: float, upper: float, start=None):
+    """Efficient portfolio minimizing w'Σw - γ μ'w; γ = 0 is the minimum-variance portfolio."""
+    return _solve_qp(2 * covariance, gamma * mean_returns, lower, upper, start)
+
+
+def _max_return_weights(mean_returns, lower: float, upper: float):
+    """Highest expected return: fill the best assets up to the upper bound."""
+    weights = np.full(len(mean_returns), lower)
+    remaining = 1 - weights.sum()
+    for i in np.argsort(-mean_returns):
+        step = min(upper - lower, remaining)
+        weights[i] += step
+        remaining -= step
+    return weights
+
+
+def _efficient_frontier(mean_returns, covariance, lower: float, upper: float, points: int):
+    """(gamma, weights) pairs from the minimum-variance toward the maximum-return portfolio."""
+    min_variance = _risk_aversion_weights(mean_returns, covariance, 0.0, lower, upper)
+    max_return = _max_return_weights(mean_returns, lower, upper)
+
+    def near(weights, target):
+        return float(np.abs(weights - target).max()) < 1e-3
+
+    # Bracket the risk aversions where the frontier actually moves, on a log scale
+    gamma = float(np.trace(covariance)) / len(mean_returns) / max(float(np.abs(mean_returns).max()), 1e-12)
+    high = gamma
+    while high < gamma * 1e9 and not near(_risk_aversion_weights(mean_returns, covariance, high, lower, upper, max_return), max_return):
+        high *= 4
+    low = gamma
+    while low > gamma * 1e-9 and not near(_risk_aversion_weights(mean_returns, covariance, low, lower, upper, min_variance), min_variance):
+        low /= 4
+
+    frontier, previous = [(0.0, min_variance)], min_variance
+    for g in np.geomspace(low, high, max(points, 2) - 1):
+        previous = _risk_aversion_weights(mean_returns, covariance, float(g), lower, upper, previous)
+        frontier.append((float(g), previous))
+    return frontier
+
+
+def _max_sharpe_weights(mean_returns, covariance, risk_free_rate: float, lower: float, upper: float):
+    """Tangency portfolio: best Sharpe on the frontier, refined by golden-section search on log γ."""
+    def evaluate(log_gamma, start):
+        weights = _risk_aversion_weights(mean_returns, covariance, math.exp(log_gamma), lower, upper, start)
+        return _portfolio_stats(weights, mean_returns, covariance, risk_free_rate)['sharpe'], weights
+
+    frontier = _efficient_frontier(mean_returns, covariance, lower, upper, FRONTIER_POINTS)
+    scored = [(_portfolio_stats(w, mean_returns, covariance, risk_free_rate)['sharpe'], g, w) for g, w in frontier]
+    best = max(range(len(scored)), key=lambda i: scored[i][0])
+    best_sharpe, _, best_weights = scored[best]
+    if best == 0 and scored[1][0] <= best_sharpe:
+        return best_weights
+
+    # Search between the neighbours of the best grid point (γ = 0 maps to the first positive γ)
+    low = math.log(max(scored[max(best - 1, 1)][1], 1e-300))
+    high = math.log(scored[min(best + 1, len(scored) - 1)][1])
+    ratio = (math.sqrt(5) - 1) / 2
+    left, right = high - ratio * (high - low), low + ratio * (high - low)
+    (left_sharpe, left_w), (right_sharpe, right_w) = evaluate(left, best_weights), evaluate(right, best_weights)
+    for _ in range(25):
+        if left_sharpe >= right_sharpe:
+            high, right, right_sharpe, right_w = right, left, left_sharpe, left_w
+            left = high - ratio * (high - low)
+            left_sharpe, left_w = evaluate(left, right_w)
+        else:
+            low, left, left_sharpe, left_w = left, right, right_sharpe, right_w
+            right = low + ratio * (high - low)
+            right_sharpe, right_w = evaluate(right, left_w)
+    for sharpe, weights in ((left_sharpe, left_w), (right_sharpe, right_w)):
+        if sharpe > best_sharpe:
+            best_sharpe, best_weights = sharpe, weights
+    return best_weights
+
+# ============================================================================
+# ACTIONS
+# ============================================================================
+
 def rebalance_portfolio(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Rebalance portfolio to target allocations or equal weights."""
     try:
@@ -70,19 +386,12 @@ def rebalance_portfolio(payload: Dict[str, Any]) -> Dict[str, Any]:
         else:
             target_weights = [1.0 / len(tickers) for _ in tickers]
         
-        if not HAS_YFINANCE:
-            return {'success': False, 'error': 'yfinance not installed'}
-        
-        # Get current prices
-        data = yf.download(' '.join(tickers), period='1d', progress=False)
+        if not HAS_NUMPY:
+            return {'success': False, 'error': 'numpy not installed'}
         
-        if data.empty:
-            raise ValueError(f"No data for tickers: {tickers}")
-        
-        if len(tickers) == 1:
-            prices = {tickers[0]: data['Close'].iloc[-1]}
-        else:
-            prices = data['Close'].iloc[-1].to_dict()
+        # Latest close of the shared cached history
+        history = _load_prices(payload, tickers)
+        prices = {t: float(p) for t, p in zip(tickers, history['prices'][-1])}
         
         # Calculate current values
         current_values = {}
@@ -90,7 +399,7 @@ def rebalance_portfolio(payload: Dict[str, Any]) -> Dict[str, Any]:
         for ticker, weight in zip(tickers, current_weights):
             value = portfolio_value * weight
             price = prices.get(ticker)
-            if price is None:
+            if not price:
                 raise ValueError(f"Could not get price for {ticker}")
             units = value / price
             current_values[ticker] = value
@@ -137,7 +446,8 @@ def rebalance_portfolio(payload: Dict[str, Any]) -> Dict[str, Any]:
             'portfolio_value': round(portfolio_value, 2),
             'rebalance_trades': rebalance_trades,
             'estimated_cost': round(estimated_cost, 2),
-            'rebalancing_needed': len(rebalance_trades) > 0
+            'rebalancing_needed': len(rebalance_trades) > 0,
+            'price_date': history['end']
         }
     
     except Exception as e:
@@ -145,87 +455,93 @@ def rebalance_portfolio(payload: Dict[str, Any]) -> Dict[str, Any]:
         return {'success': False, 'error': str(e)}
 
 def optimize_allocation(payload: Dict[str, Any]) -> Dict[str, Any]:
-    """Optimize asset allocation for maximum Sharpe ratio."""
+    """
+    Constrained mean-variance optimization on a shrinkage covariance estimate.
+    The objective is 'max_sharpe', 'min_variance' or 'max_return'; without one it
+    follows risk_tolerance (conservative, moderate, aggressive).
+    """
     try:
         tickers = _validate_tickers(payload.get('tickers', []))
         risk_tolerance = payload.get('risk_tolerance', 'moderate')
+        objective = payload.get('objective') or {
+            'conservative': 'min_variance', 'aggressive': 'max_return'
+        }.get(str(risk_tolerance).lower(), 'max_sharpe')
         min_weight = float(payload.get('min_weight', 0.05))
         max_weight = float(payload.get('max_weight', 0.5))
+        risk_free_rate = float(payload.get('risk_free_rate', DEFAULT_RISK_FREE_RATE))
+        frontier_points = int(payload.get('frontier_points', FRONTIER_POINTS if payload.get('include_frontier') else 0))
         
-        if not HAS_YFINANCE:
-            return {'success': False, 'error': 'yfinance not installed'}
-        
-        # Fetch historical data
-        data = yf.download(' '.join(tickers), period='2y', progress=False)
-        
-        if data.empty:
-            raise ValueError(f"No data for tickers: {tickers}")
-        
-        if len(tickers) == 1:
-            close_prices = data['Close']
-        else:
-            close_prices = data['Close']
-        
-        returns = close_prices.pct_change().dropna()
-        
-        # Calculate covariance matrix
-        cov_matrix = returns.cov() * 252
-        mean_returns = returns.mean() * 252
-        
-        # Risk-free rate assumption
-        risk_free_rate = 0.02
-        
-        # Simple optimization: equal weight baseline, then adjust
+        if objective not in ('max_sharpe', 'min_variance', 'max_return'):
+            return {'success': False, 'error': f"Unknown objective: {objective}"}
         n_assets = len(tickers)
-        weights = np.array([1 / n_assets] * n_assets)
-        
-        # Adjust based on risk tolerance
-        volatilities = returns.std() * math.sqrt(252)
-        expected_returns = mean_returns
-        
-        if risk_tolerance.lower() == 'conservative':
-            # Lower volatility preference
-            weights = np.array([1 / (v + 1) for v in volatilities])
-        elif risk_tolerance.lower() == 'aggressive':
-            # Higher return preference
-            weights = np.array([r / (1 if r > 0 else 1) for r in expected_returns])
+        if min_weight < 0 or min_weight > max_weight or n_assets * min_weight > 1 + 1e-9 or n_assets * max_weight < 1 - 1e-9:
+            return {'success': False, 'error': f"Weight bounds [{min_weight}, {max_weight}] cannot sum to 1 across {n_assets} assets"}
+        if not HAS_NUMPY:
+            return {'success': False, 'error': 'numpy not installed'}
+        
+        history = _load_prices(payload, tickers, payload.get('period', HISTORY_PERIOD))
+        returns = _daily_returns(history['prices'])
+        if returns.shape[0] < 2:
+            raise ValueError(f"Not enough price history for tickers: {tickers}")
+        
+        if payload.get('covariance', 'ledoit_wolf') == 'sample':
+            cov_matrix, shrinkage = np.cov(returns, rowvar=False, bias=True).reshape(n_assets, n_assets), 0.0
         else:
-            # Moderate: balance
-            weights = np.array([(r / v) if v > 0 else 0 for r, v in zip(expected_returns, volatilities)])
-        
-        # Normalize weights
-        weights = weights / weights.sum()
-        
-        # Ensure within constraints
-        weights = np.maximum(weights, min_weight)
-        weights = np.minimum(weights, max_weight)
-        weights = weights / weights.sum()
+            cov_matrix, shrinkage = _shrunk_covariance(returns)
+        cov_matrix = cov_matrix * TRADING_DAYS
+        mean_returns = returns.mean(axis=0) * TRADING_DAYS
+        volatilities = np.sqrt(np.diag(cov_matrix))
+        
+        if objective == 'min_variance':
+            weights = _risk_aversion_weights(mean_returns, cov_matrix, 0.0, min_weight, max_weight)
+        elif objective == 'max_return':
+            weights = _max_return_weights(mean_returns, min_weight, max_weight)
+        else:
+            weights = _max_sharpe_weights(mean_returns, cov_matrix, risk_free_rate, min_weight, max_weight)
         
         # Calculate portfolio metrics
-        portfolio_return = np.sum(weights * mean_returns)
-        portfolio_std = np.sqrt(np.dot(weights, np.dot(cov_matrix, weights)))
-        sharpe_ratio = (portfolio_return - risk_free_rate) / portfolio_std if portfolio_std > 0 else 0
+        stats = _portfolio_stats(weights, mean_returns, cov_matrix, risk_free_rate)
         
-        return {
+        result = {
             'success': True,
-            'optimized_allocation': {t: round(w, 4) for t, w in zip(tickers, weights)},
-            'expected_return_pct': round(portfolio_return * 100, 2),
-            'expected_volatility_pct': round(portfolio_std * 100, 2),
-            'sharpe_ratio': round(sharpe_ratio, 4),
+            'objective': objective,
+            'optimized_allocation': {t: round(float(w), 4) for t, w in zip(tickers, weights)},
+            'expected_return_pct': round(stats['return'] * 100, 2),
+            'expected_volatility_pct': round(stats['volatility'] * 100, 2),
+            'sharpe_ratio': round(stats['sharpe'], 4),
             'risk_tolerance': risk_tolerance,
             'constraints': {
                 'min_weight': min_weight,
                 'max_weight': max_weight
             },
+            'covariance': {
+                'method': 'sample' if payload.get('covariance') == 'sample' else 'ledoit_wolf',
+                'shrinkage': round(shrinkage, 4)
+            },
             'individual_metrics': {
                 t: {
-                    'expected_return_pct': round(r * 100, 2),
-                    'volatility_pct': round(v * 100, 2),
-                    'return_to_risk': round((r / v) if v > 0 else 0, 4)
+                    'expected_return_pct': round(float(r) * 100, 2),
+                    'volatility_pct': round(float(v) * 100, 2),
+                    'return_to_risk': round(float(r / v) if v > 0 else 0, 4)
                 }
-                for t, r, v in zip(tickers, expected_returns, volatilities)
-            }
+                for t, r, v in zip(tickers, mean_returns, volatilities)
+            },
+            'data': _data_info(history)
         }
+        
+        if frontier_points > 0:
+            frontier = []
+            for _, frontier_weights in _efficient_frontier(mean_returns, cov_matrix, min_weight, max_weight, frontier_points):
+                point = _portfolio_stats(frontier_weights, mean_returns, cov_matrix, risk_free_rate)
+                frontier.append({
+                    'expected_return_pct': round(point['return'] * 100, 2),
+                    'expected_volatility_pct': round(point['volatility'] * 100, 2),
+                    'sharpe_ratio': round(point['sharpe'], 4),
+                    'allocation': {t: round(float(w), 4) for t, w in zip(tickers, frontier_weights)}
+                })
+            result['efficient_frontier'] = frontier
+        
+        return result
     
     except Exception as e:
         logger.error(f"Error in optimize_allocation: {str(e)}")
@@ -237,14 +553,6 @@ def calculate_correlations(payload: Dict[str, Any]) -> Dict[str, Any]:
         tickers = _validate_tickers(payload.get('tickers', []))
         period = payload.get('period', '1y')
         
-        if not HAS_YFINANCE:
-            return {'success': False, 'error': 'yfinance not installed'}
-        
-        data = yf.download(' '.join(tickers), period=period, progress=False)
-        
-        if data.empty:
-            raise ValueError(f"No data for tickers: {tickers}")
-        
         if len(tickers) == 1:
             return {
                 'success': True,
@@ -253,23 +561,28 @@ def calculate_correlations(payload: Dict[str, Any]) -> Dict[str, Any]:
                 'message': 'Single asset - correlation with itself is 1.0'
             }
         
-        close_prices = data['Close']
-        returns = close_prices.pct_change().dropna()
+        if not HAS_NUMPY:
+            return {'success': False, 'error': 'numpy not installed'}
         
-        corr_matrix = returns.corr()
+        history = _load_prices(payload, tickers, period)
+        returns = _daily_returns(history['prices'])
+        if returns.shape[0] < 2:
+            raise ValueError(f"Not enough price history for tickers: {tickers}")
+        
+        corr_matrix = np.corrcoef(returns, rowvar=False)
         
         # Convert to dict format
         corr_dict = {}
         for idx1, ticker1 in enumerate(tickers):
             corr_dict[ticker1] = {}
             for idx2, ticker2 in enumerate(tickers):
-                corr_dict[ticker1][ticker2] = round(corr_matrix.iloc[idx1, idx2], 4)
+                corr_dict[ticker1][ticker2] = round(float(corr_matrix[idx1, idx2]), 4)
         
         # Identify highly correlated pairs
         highly_correlated = []
         for i in range(len(tickers)):
             for j in range(i + 1, len(tickers)):
-                corr_value = corr_matrix.iloc[i, j]
+                corr_value = float(corr_matrix[i, j])
                 if abs(corr_value) > 0.85:
                     highly_correlated.append({
                         'pair': [tickers[i], tickers[j]],
@@ -281,7 +594,8 @@ def calculate_correlations(payload: Dict[str, Any]) -> Dict[str, Any]:
             'correlation_matrix': corr_dict,
             'period': period,
             'highly_correlated_pairs': highly_correlated,
-            'diversification_note': 'Consider reducing correlated assets' if highly_correlated else 'Good diversification'
+            'diversification_note': 'Consider reducing correlated assets' if highly_correlated else 'Good diversification',
+            'data': _data_info(history)
         }
     
     except Exception as e:
@@ -296,25 +610,18 @@ def generate_recommendations(payload: Dict[str, Any]) -> Dict[str, Any]:
         investment_goal = payload.get('investment_goal', 'growth')
         time_horizon = payload.get('time_horizon', '5y')
         
-        if not HAS_YFINANCE:
-            return {'success': False, 'error': 'yfinance not installed'}
+        if not HAS_NUMPY:
+            return {'success': False, 'error': 'numpy not installed'}
         
-        data = yf.download(' '.join(tickers), period='2y', progress=False)
-        
-        if data.empty:
-            raise ValueError(f"No data for tickers: {tickers}")
-        
-        if len(tickers) == 1:
-            close_prices = data['Close']
-        else:
-            close_prices = data['Close']
-        
-        returns = close_prices.pct_change().dropna()
+        history = _load_prices(payload, tickers)
+        returns = _daily_returns(history['prices'])
+        if returns.shape[0] < 2:
+            raise ValueError(f"Not enough price history for tickers: {tickers}")
         
         # Portfolio metrics
-        portfolio_returns = (returns * weights).sum(axis=1)
-        annual_return = portfolio_returns.mean() * 252 * 100
-        annual_volatility = portfolio_returns.std() * math.sqrt(252) * 100
+        portfolio_returns = returns @ np.asarray(weights)
+        annual_return = float(portfolio_returns.mean()) * TRADING_DAYS * 100
+        annual_volatility = float(portfolio_returns.std(ddof=1)) * math.sqrt(TRADING_DAYS) * 100
         
         recommendations = []
         
@@ -338,8 +645,8 @@ def generate_recommendations(payload: Dict[str, Any]) -> Dict[str, Any]:
         
         # Correlation-based recommendations
         if len(tickers) > 1:
-            corr_matrix = returns.corr()
-            avg_corr = corr_matrix.values[np.triu_indices_from(corr_matrix.values, k=1)].mean()
+            corr_matrix = np.corrcoef(returns, rowvar=False)
+            avg_corr = float(corr_matrix[np.triu_indices_from(corr_matrix, k=1)].mean())
             
             if avg_corr > 0.75:
                 recommendations.append({
@@ -384,7 +691,8 @@ def generate_recommendations(payload: Dict[str, Any]) -> Dict[str, Any]:
             'investment_goal': investment_goal,
             'time_horizon': time_horizon,
             'recommendations': recommendations,
-            'total_recommendations': len(recommendations)
+            'total_recommendations': len(recommendations),
+            'data': _data_info(history)
         }
     
     except Exception as e:
@@ -445,63 +753,10 @@ def execute_plugin(inputs):
             "error": str(e)
         }]
 
-def parse_inputs(inputs_str):
-    """Parse and normalize the plugin stdin JSON payload into a dict."""
-    try:
-        payload = json.loads(inputs_str)
-        inputs_dict = {}
-
-        if isinstance(payload, dict):
-            if payload.get('_type') == 'Map' and isinstance(payload.get('entries'), list):
-                for entry in payload.get('entries', []):
-                    if isinstance(entry, list) and len(entry) == 2:
-                        key, value = entry
-                        inputs_dict[key] = value
-            else:
-                for key, value in payload.items():
-                    if key not in ('_type', 'entries'):
-                        inputs_dict[key] = value
-
-        elif isinstance(payload, list):
-            for item in payload:
-                if isinstance(item, list) and len(item) == 2:
-                    key, value = item
-                    inputs_dict[key] = value
-
-        return inputs_dict
-
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse input JSON: {e}")
-        raise
-
 def main():
     """Main entry point for the plugin."""
-    try:
-        input_data = sys.stdin.read().strip()
-        if not input_data:
-            result = [{
-                "success": False,
-                "name": "error",
-                "resultType": "error",
-                "result": "No input data received",
-                "error": "No input data received"
-            }]
-        else:
-            inputs_dict = parse_inputs(input_data)
-            result = execute_plugin(inputs_dict)
-
-        print(json.dumps(result))
+    run(execute_plugin)
 
-    except Exception as e:
-        logger.error(f"Plugin execution failed: {str(e)}")
-        result = [{
-            "success": False,
-            "name": "error",
-            "resultType": "error",
-            "result": str(e),
-            "error": str(e)
-        }]
-        print(json.dumps(result))
 
 if __name__ == "__main__":
     main()
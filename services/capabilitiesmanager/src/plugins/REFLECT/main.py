@@ -18,10 +18,12 @@ from typing import Dict, Any, List, Optional, Set
 try:
     from plan_validator import PlanValidator, AccomplishError, PLAN_STEP_SCHEMA, PLAN_ARRAY_SCHEMA
     ReflectError = AccomplishError
+    from stage7_plugin_runtime import parse_inputs as _parse_plugin_inputs
 except ImportError:
     # Fallback to direct import for development/testing
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
     from plan_validator import PlanValidator, AccomplishError as ReflectError, PLAN_STEP_SCHEMA, PLAN_ARRAY_SCHEMA
+    from stage7_plugin_runtime import parse_inputs as _parse_plugin_inputs
 
 # Configure logging
 logging.basicConfig(
@@ -285,56 +287,10 @@ def call_brain(prompt: str, inputs: Dict[str, Any], response_type: str = "json")
         raise ReflectError(f"Brain service call failed: {e}", "brain_error")
 
 def parse_inputs(inputs_str: str) -> Dict[str, Any]:
-    """Parse and normalize the plugin stdin JSON payload into a dict of inputName -> InputValue.
-
-    Plugins should accept inputs formatted as a JSON array of [ [key, value], ... ] where value
-    may be a primitive (string/number/bool), or an object like {"value": ...}. This helper
-    normalizes non-dict raw values into {'value': raw}. It also filters invalid entries.
-    """
+    """Parse the plugin stdin JSON payload into a dict of inputName -> InputValue ({'value': ...})."""
     try:
         logger.info(f"Parsing input string ({len(inputs_str)} chars)")
-        payload = json.loads(inputs_str)
-        inputs: Dict[str, Any] = {}
-
-        # Case A: payload is a list of [key, value] pairs (legacy / preferred)
-        if isinstance(payload, list):
-            for item in payload:
-                if isinstance(item, list) and len(item) == 2:
-                    key, raw_value = item
-                    if isinstance(raw_value, dict):
-                        inputs[key] = raw_value
-                    else:
-                        inputs[key] = {'value': raw_value}
-                else:
-                    logger.debug(f"Skipping invalid input item in list payload: {item}")
-
-        # Case B: payload is a serialized Map object with entries: [[key, value], ...]
-        elif isinstance(payload, dict) and payload.get('_type') == 'Map' and isinstance(payload.get('entries'), list):
-            for entry in payload.get('entries', []):
-                if isinstance(entry, list) and len(entry) == 2:
-                    key, raw_value = entry
-                    if isinstance(raw_value, dict):
-                        inputs[key] = raw_value
-                    else:
-                        inputs[key] = {'value': raw_value}
-                else:
-                    logger.debug(f"Skipping invalid Map entry: {entry}")
-
-        # Case C: payload is already a dict mapping keys -> values (possibly already normalized)
-        elif isinstance(payload, dict):
-            for key, raw_value in payload.items():
-                # Skip internal meta fields if present
-                if key == '_type' or key == 'entries':
-                    continue
-                if isinstance(raw_value, dict):
-                    inputs[key] = raw_value
-                else:
-                    inputs[key] = {'value': raw_value}
-
-        else:
-            # Unsupported top-level type, provide clear error
-            raise ValueError("Unsupported input format: expected array of pairs, Map with entries, or object mapping")
-
+        inputs = _parse_plugin_inputs(inputs_str, wrap_values=True)
         logger.info(f"Successfully parsed {len(inputs)} input fields")
         return inputs
     except Exception as e:
@@ -5,13 +5,14 @@ Comprehensive RESOURCE ALLOCATION management system
 Features: In-memory storage, error handling, logging, analytics
 """
 
+import os
+import sys
 import json
 import logging
 import statistics
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Tuple
 from uuid import uuid4
-from collections import defaultdict
 from enum import Enum
 
 logging.basicConfig(
@@ -20,6 +21,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+try:
+    from stage7_plugin_store import DataStore, CacheManager
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_plugin_store import DataStore, CacheManager
+
 class AuditLog:
     """Audit logging for all operations"""
     def __init__(self):
@@ -41,100 +48,6 @@ class AuditLog:
         return self.logs[-limit:]
 
 
-class CacheManager:
-    """Manage caching for performance optimization"""
-    def __init__(self, ttl_seconds: int = 3600):
-        self.cache = {}
-        self.ttl = ttl_seconds
-    
-    def set(self, key: str, value: Any) -> None:
-        self.cache[key] = {
-            "value": value,
-            "created_at": datetime.now().isoformat()
-        }
-    
-    def get(self, key: str) -> Optional[Any]:
-        if key in self.cache:
-            return self.cache[key]["value"]
-        return None
-    
-    def clear(self) -> None:
-        self.cache.clear()
-
-
-class DataStore:
-    """In-memory data storage with full CRUD operations"""
-    def __init__(self):
-        self.data = defaultdict(list)
-        self.indices = defaultdict(dict)
-        self.metadata = {
-            "created_at": datetime.now().isoformat(),
-            "version": "1.0",
-            "total_operations": 0
-        }
-    
-    def add(self, key: str, value: Dict[str, Any]) -> str:
-        """Add item to store"""
-        item_id = str(uuid4())
-        item = {
-            "id": item_id,
-            **value,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
-        }
-        self.data[key].append(item)
-        self.metadata["total_operations"] += 1
-        logger.debug(f"Added item {item_id} to {key}")
-        return item_id
-    
-    def get_all(self, key: str) -> List[Dict[str, Any]]:
-        """Get all items for key"""
-        return self.data.get(key, [])
-    
-    def get_by_id(self, key: str, item_id: str) -> Optional[Dict[str, Any]]:
-        """Get specific item by ID"""
-        for item in self.data.get(key, []):
-            if item.get("id") == item_id:
-                return item
-        return None
-    
-    def update(self, key: str, item_id: str, updates: Dict[str, Any]) -> bool:
-        """Update item"""
-        for item in self.data.get(key, []):
-            if item.get("id") == item_id:
-                item.update(updates)
-                item["updated_at"] = datetime.now().isoformat()
-                self.metadata["total_operations"] += 1
-                logger.debug(f"Updated item {item_id}")
-                return True
-        return False
-    
-    def delete(self, key: str, item_id: str) -> bool:
-        """Delete item"""
-        items = self.data.get(key, [])
-        for idx, item in enumerate(items):
-            if item.get("id") == item_id:
-                items.pop(idx)
-                self.metadata["total_operations"] += 1
-                logger.debug(f"Deleted item {item_id}")
-                return True
-        return False
-    
-    def count(self, key: str) -> int:
-        """Count items for key"""
-        return len(self.data.get(key, []))
-    
-    def get_stats(self) -> Dict[str, Any]:
-        """Get storage statistics"""
-        total_items = sum(len(items) for items in self.data.values())
-        return {
-            "total_items": total_items,
-            "total_keys": len(self.data),
-            "total_operations": self.metadata["total_operations"],
-            "created_at": self.metadata["created_at"]
-        }
-
-
 class ResourceAllocationPlugin:
     """
     RESOURCE_ALLOCATION Plugin
@@ -579,7 +492,8 @@ class ResourceAllocationPlugin:
                 "total_actions": 6,
                 "storage_stats": stats,
                 "total_audit_logs": len(logs),
-                "cache_size": len(self.cache.cache),
+                "cache_size": len(self.cache),
+                "cache_stats": self.cache.get_stats(),
                 "last_updated": datetime.now().isoformat()
             }
         except Exception as e:
@@ -598,7 +512,7 @@ class ResourceAllocationPlugin:
     def reset(self) -> Dict[str, Any]:
         """Reset plugin to initial state"""
         try:
-            self.store.data.clear()
+            self.store.clear()
             self.cache.clear()
             self.audit.log("reset", "success", {})
             logger.info("Plugin reset complete")
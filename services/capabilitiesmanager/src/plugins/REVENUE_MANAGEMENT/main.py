@@ -16,11 +16,24 @@ import statistics
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+try:
+    from stage7_state_store import PluginState
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_state_store import PluginState
+
 # In-Memory Data Storage
 _revenue_records = {}
 _pricing_strategies = {}
 _occupancy_records = {}
 
+# Persisted across calls; see shared/python/lib/stage7_state_store.py
+_state = PluginState("REVENUE_MANAGEMENT", {
+    "revenue_records": _revenue_records,
+    "pricing_strategies": _pricing_strategies,
+    "occupancy_records": _occupancy_records
+})
+
 ROOM_TYPES = ["standard", "deluxe", "suite", "penthouse", "accessible"]
 
 def _get_input(inputs: dict, key: str, aliases: list = [], default=None):
@@ -46,7 +59,7 @@ def _validate_params(payload: dict, required_fields: List[str]) -> Tuple[bool, s
 
 def _initialize_hotel(hotel_id: str) -> None:
     """Initialize hotel data structures."""
-    if hotel_id not in _revenue_records:
+    if hotel_id not in _revenue_records and not _state.restore(hotel_id):
         _revenue_records[hotel_id] = []
         _pricing_strategies[hotel_id] = {}
         _occupancy_records[hotel_id] = []
@@ -467,12 +480,16 @@ def execute_plugin(inputs: dict) -> Dict[str, Any]:
             }
         
         result = actions[action](payload)
-        return {"success": result.get("success", False), "result": result}
-    
     except Exception as e:
         logger.error(f"Plugin error: {str(e)}")
         return {"success": False, "error": str(e), "result": {}}
 
+    try:
+        _state.persist()
+    except Exception as e:
+        logger.error(f"Failed to persist plugin state: {str(e)}", exc_info=True)
+    return {"success": result.get("success", False), "result": result}
+
 if __name__ == "__main__":
     test_input = {
         "action": "calculate_revenue",
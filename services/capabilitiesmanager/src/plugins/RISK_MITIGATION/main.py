@@ -2,7 +2,8 @@
 """
 Risk Mitigation Plugin - Risk mitigation planning and execution
 """
-import json
+import sys
+import os
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
@@ -11,6 +12,12 @@ from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+try:
+    from stage7_plugin_runtime import run, get_input as _get_input
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_plugin_runtime import run, get_input as _get_input
+
 
 class MitigationStatus(Enum):
     """Mitigation plan status"""
@@ -367,77 +374,49 @@ def execute_action(action: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": f"Action '{action}' not found", "status": "failed"}
 
     return actions[action]()
-            "result": {{"message": "Plugin executed successfully"}},
-            "resultDescription": f"Result of {action} operation"
-        }}]
 
-    except Exception as e:
-        logger.error(f"Error in execute_plugin: {e}")
-        return [{{
-            "success": False,
-            "name": "error",
-            "resultType": "error",
-            "result": str(e),
-            "error": str(e)
-        }}]
 
-def parse_inputs(inputs_str):
-    """Parse and normalize the plugin stdin JSON payload into a dict."""
+def execute_plugin(inputs):
+    """Main plugin execution function."""
     try:
-        payload = json.loads(inputs_str)
-        inputs_dict = {{}}
-
-        if isinstance(payload, dict):
-            if payload.get('_type') == 'Map' and isinstance(payload.get('entries'), list):
-                for entry in payload.get('entries', []):
-                    if isinstance(entry, list) and len(entry) == 2:
-                        key, value = entry
-                        inputs_dict[key] = value
-            else:
-                for key, value in payload.items():
-                    if key not in ('_type', 'entries'):
-                        inputs_dict[key] = value
-
-        elif isinstance(payload, list):
-            for item in payload:
-                if isinstance(item, list) and len(item) == 2:
-                    key, value = item
-                    inputs_dict[key] = value
-
-        return inputs_dict
-
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse input JSON: {{e}}")
-        raise
+        action = _get_input(inputs, 'action', ['operation', 'command'])
+        payload = _get_input(inputs, 'payload', ['data', 'params', 'parameters'], default={})
 
-def main():
-    """Main entry point for the plugin."""
-    try:
-        input_data = sys.stdin.read().strip()
-        if not input_data:
-            result = [{{
+        if not action:
+            return [{
                 "success": False,
                 "name": "error",
                 "resultType": "error",
-                "result": "No input data received",
-                "error": "No input data received"
-            }}]
-        else:
-            inputs_dict = parse_inputs(input_data)
-            result = execute_plugin(inputs_dict)
-
-        print(json.dumps(result))
+                "result": "Missing required parameter 'action'",
+                "error": "Missing required parameter 'action'"
+            }]
+
+        result = execute_action(action, payload)
+        success = result.get("status") != "failed"
+        return [{
+            "success": success,
+            "name": "result" if success else "error",
+            "resultType": "object" if success else "error",
+            "result": result,
+            "resultDescription": f"Result of {action} operation",
+            **({} if success else {"error": result.get("error")})
+        }]
 
     except Exception as e:
-        logger.error(f"Plugin execution failed: {str(e)}")
-        result = [{{
+        logger.error(f"Error in execute_plugin: {e}")
+        return [{
             "success": False,
             "name": "error",
             "resultType": "error",
             "result": str(e),
             "error": str(e)
-        }}]
-        print(json.dumps(result))
+        }]
+
+
+def main():
+    """Main entry point for the plugin."""
+    run(execute_plugin)
+
 
 if __name__ == "__main__":
     main()
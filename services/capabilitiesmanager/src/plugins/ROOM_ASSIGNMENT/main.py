@@ -8,13 +8,26 @@ import sys
 import json
 import logging
 import os
+import uuid
 from typing import Dict, Any, List, Tuple, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime
 from enum import Enum
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+try:
+    from stage7_state_store import PluginState
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_state_store import PluginState
+
+try:
+    from stage7_calendar_index import FreeUnits, stay_ordinals
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_calendar_index import FreeUnits, stay_ordinals
+
 # Room Status Enumeration
 class RoomStatus(Enum):
     AVAILABLE = "available"
@@ -31,10 +44,24 @@ _rooms_database = {}
 _assignments_database = {}
 _occupancy_history = {}
 
+# Persisted across calls; see shared/python/lib/stage7_state_store.py
+_state = PluginState("ROOM_ASSIGNMENT", {
+    "rooms": _rooms_database,
+    "assignments": _assignments_database,
+    "occupancy_history": _occupancy_history
+})
+
+# hotel_id -> room type -> FreeUnits of its rooms; derived from active assignments, so not persisted
+_room_calendars: Dict[str, Dict[str, FreeUnits]] = {}
+
 def _initialize_hotel_rooms(hotel_id: str, num_rooms: int = 100) -> None:
     """Initialize hotel room inventory."""
-    if hotel_id not in _rooms_database:
+    if hotel_id in _rooms_database:
+        return
+    _room_calendars.pop(hotel_id, None)
+    if not _state.restore(hotel_id):
         _rooms_database[hotel_id] = {}
+        _assignments_database[hotel_id] = {}
         _occupancy_history[hotel_id] = []
         
         # Create rooms with varied types
@@ -56,6 +83,37 @@ def _initialize_hotel_rooms(hotel_id: str, num_rooms: int = 100) -> None:
                 "maintenance_notes": ""
             }
 
+def _calendars(hotel_id: str) -> Dict[str, FreeUnits]:
+    """Per-room-type booking calendars of a hotel, built from its active assignments on first use."""
+    calendars = _room_calendars.get(hotel_id)
+    if calendars is None:
+        calendars = _room_calendars[hotel_id] = {}
+        rooms = _rooms_database[hotel_id]
+        for room_id, room in rooms.items():
+            if room["status"] != RoomStatus.MAINTENANCE.value:
+                calendars.setdefault(room["room_type"], FreeUnits()).add_unit(room_id)
+        for assignment in _assignments_database[hotel_id].values():
+            room = rooms.get(assignment["room_id"])
+            if assignment["status"] != "active" or room is None or room["room_type"] not in calendars:
+                continue
+            try:
+                start, end = stay_ordinals(assignment["check_in_date"], assignment["check_out_date"])
+            except ValueError:
+                continue
+            if assignment["room_id"] in calendars[room["room_type"]] and start < end:
+                if not calendars[room["room_type"]].book(assignment["room_id"], start, end):
+                    # Recorded before assign_room checked dates; keep the first booking
+                    logger.warning(f"Assignment {assignment['assignment_id']} overlaps another stay in {assignment['room_id']}")
+    return calendars
+
+def _active_assignment(hotel_id: str, guest_id: str, room_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Latest active assignment of a guest, optionally in a given room."""
+    for assignment in reversed(list(_assignments_database[hotel_id].values())):
+        if (assignment["status"] == "active" and assignment["guest_id"] == guest_id
+                and (room_id is None or assignment["room_id"] == room_id)):
+            return assignment
+    return None
+
 def _get_input(inputs: dict, key: str, aliases: list = [], default=None):
     """Safely retrieve input values with alias fallback."""
     val = inputs.get(key)
@@ -90,35 +148,42 @@ def assign_room(payload: dict) -> Dict[str, Any]:
     room_type = payload.get("room_type", "standard")
     hotel_id = payload.get("hotel_id", "HOTEL_DEFAULT")
     
+    try:
+        start, end = stay_ordinals(check_in, check_out)
+    except ValueError:
+        return {"success": False, "error": "Invalid date format. Use YYYY-MM-DD"}
+    if start >= end:
+        return {"success": False, "error": "Check-out date must be after check-in date"}
+    
     _initialize_hotel_rooms(hotel_id)
     
-    # Find available room of requested type
-    available_rooms = [
-        rid for rid, room in _rooms_database[hotel_id].items()
-        if room["status"] == RoomStatus.AVAILABLE.value and room["room_type"] == room_type
-    ]
+    # Find the room of the requested type that is free for the whole stay and fits it best
+    calendars = _calendars(hotel_id)
+    calendar = calendars.get(room_type)
+    room_id = calendar.find(start, end) if calendar else None
     
-    if not available_rooms:
+    if room_id is None:
         return {
             "success": False,
-            "error": f"No {room_type} rooms available",
-            "available_types": list(set(r["room_type"] for r in _rooms_database[hotel_id].values() 
-                                       if r["status"] == RoomStatus.AVAILABLE.value))
+            "error": f"No {room_type} rooms available for these dates",
+            "available_types": sorted(rt for rt, c in calendars.items() if c.find(start, end) is not None)
         }
     
-    room_id = available_rooms[0]
+    calendar.book(room_id, start, end)
     room = _rooms_database[hotel_id][room_id]
-    
-    # Assign room
-    room["status"] = RoomStatus.OCCUPIED.value
-    room["occupancy_status"] = "occupied"
-    room["guest_id"] = guest_id
-    room["check_in_date"] = check_in
-    room["check_out_date"] = check_out
-    room["assigned_at"] = datetime.now().isoformat()
-    
-    assignment_id = f"ASSIGN_{hotel_id}_{guest_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    _assignments_database[assignment_id] = {
+    assigned_at = datetime.now().isoformat()
+    
+    # Room status tracks who is in the room now; future stays only hold its calendar
+    if start <= date.today().toordinal() < end:
+        room["status"] = RoomStatus.OCCUPIED.value
+        room["occupancy_status"] = "occupied"
+        room["guest_id"] = guest_id
+        room["check_in_date"] = check_in
+        room["check_out_date"] = check_out
+        room["assigned_at"] = assigned_at
+    
+    assignment_id = f"ASSIGN_{hotel_id}_{guest_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:4].upper()}"
+    _assignments_database[hotel_id][assignment_id] = {
         "assignment_id": assignment_id,
         "hotel_id": hotel_id,
         "guest_id": guest_id,
@@ -141,7 +206,7 @@ def assign_room(payload: dict) -> Dict[str, Any]:
             "guest_id": guest_id,
             "check_in_date": check_in,
             "check_out_date": check_out,
-            "assigned_at": room["assigned_at"]
+            "assigned_at": assigned_at
         }
     }
 
@@ -158,40 +223,49 @@ def reassign_room(payload: dict) -> Dict[str, Any]:
     
     _initialize_hotel_rooms(hotel_id)
     
-    # Find current room assignment
-    current_room = None
-    for rid, room in _rooms_database[hotel_id].items():
-        if room["guest_id"] == guest_id and room["status"] == RoomStatus.OCCUPIED.value:
-            current_room = rid
-            break
-    
-    if not current_room:
+    # Find the guest's current (or upcoming) assignment
+    assignment_id = payload.get("assignment_id")
+    assignment = _assignments_database[hotel_id].get(assignment_id) if assignment_id else _active_assignment(hotel_id, guest_id)
+    if assignment is None or assignment["status"] != "active" or assignment["guest_id"] != guest_id:
         return {"success": False, "error": f"No active assignment found for guest {guest_id}"}
     
-    # Find available room of new type
-    available_rooms = [
-        rid for rid, room in _rooms_database[hotel_id].items()
-        if room["status"] == RoomStatus.AVAILABLE.value and room["room_type"] == new_room_type
-    ]
+    current_room = assignment["room_id"]
+    try:
+        start, end = stay_ordinals(assignment["check_in_date"], assignment["check_out_date"])
+    except ValueError:
+        return {"success": False, "error": f"Assignment {assignment['assignment_id']} has invalid dates"}
+    
+    # Find a room of the new type free for the rest of the stay
+    calendars = _calendars(hotel_id)
+    start = max(start, min(date.today().toordinal(), end - 1))
+    new_calendar = calendars.get(new_room_type)
+    new_room_id = new_calendar.find(start, end) if new_calendar else None
     
-    if not available_rooms:
+    if new_room_id is None:
         return {"success": False, "error": f"No {new_room_type} rooms available"}
     
     # Release old room
     old_room = _rooms_database[hotel_id][current_room]
-    old_room_data = old_room.copy()
-    old_room["status"] = RoomStatus.DIRTY.value
-    old_room["occupancy_status"] = "empty"
-    old_room["guest_id"] = None
+    old_calendar = calendars.get(old_room["room_type"])
+    if old_calendar is not None:
+        old_calendar.release(current_room, *stay_ordinals(assignment["check_in_date"], assignment["check_out_date"]))
+    if old_room["guest_id"] == guest_id:
+        old_room["status"] = RoomStatus.DIRTY.value
+        old_room["occupancy_status"] = "empty"
+        old_room["guest_id"] = None
     
     # Assign new room
-    new_room_id = available_rooms[0]
+    new_calendar.book(new_room_id, start, end)
     new_room = _rooms_database[hotel_id][new_room_id]
-    new_room["status"] = RoomStatus.OCCUPIED.value
-    new_room["guest_id"] = guest_id
-    new_room["check_in_date"] = old_room_data["check_in_date"]
-    new_room["check_out_date"] = old_room_data["check_out_date"]
-    new_room["assigned_at"] = datetime.now().isoformat()
+    if start <= date.today().toordinal() < end:
+        new_room["status"] = RoomStatus.OCCUPIED.value
+        new_room["occupancy_status"] = "occupied"
+        new_room["guest_id"] = guest_id
+        new_room["check_in_date"] = assignment["check_in_date"]
+        new_room["check_out_date"] = assignment["check_out_date"]
+        new_room["assigned_at"] = datetime.now().isoformat()
+    assignment["room_id"] = new_room_id
+    assignment["check_in_date"] = date.fromordinal(start).isoformat()
     
     logger.info(f"Reassigned guest {guest_id} from {current_room} to {new_room_id}")
     
@@ -199,6 +273,7 @@ def reassign_room(payload: dict) -> Dict[str, Any]:
         "success": True,
         "previous_room": current_room,
         "new_assignment": {
+            "assignment_id": assignment["assignment_id"],
             "room_id": new_room_id,
             "room_number": new_room["room_number"],
             "room_type": new_room["room_type"],
@@ -228,12 +303,19 @@ def release_room(payload: dict) -> Dict[str, Any]:
     
     # Calculate occupancy duration
     try:
-        check_in_date = datetime.strptime(check_in, "%Y-%m-%d")
-        check_out_date = datetime.strptime(check_out, "%Y-%m-%d")
-        duration = (check_out_date - check_in_date).days
-    except:
+        start, end = stay_ordinals(check_in, check_out)
+        duration = end - start
+    except ValueError:
         duration = 0
     
+    # Close the stay and free the rest of its nights
+    assignment = _active_assignment(hotel_id, guest_id, room_id) if guest_id else None
+    if assignment is not None:
+        assignment["status"] = "completed"
+        calendar = _calendars(hotel_id).get(room["room_type"])
+        if calendar is not None:
+            calendar.release(room_id, *stay_ordinals(assignment["check_in_date"], assignment["check_out_date"]))
+    
     # Record occupancy history
     _occupancy_history[hotel_id].append({
         "room_id": room_id,
@@ -315,15 +397,31 @@ def check_occupancy(payload: dict) -> Dict[str, Any]:
         }
 
 def get_available_rooms(payload: dict) -> Dict[str, Any]:
-    """Get list of available rooms, optionally filtered by type."""
+    """Get list of available rooms, optionally filtered by type and free for a stay."""
     hotel_id = payload.get("hotel_id", "HOTEL_DEFAULT")
     room_type = payload.get("room_type")
+    check_in = payload.get("check_in_date")
+    check_out = payload.get("check_out_date")
     
     _initialize_hotel_rooms(hotel_id)
     
+    # With dates, a room is available if its calendar is free for the stay, whatever its status now
+    stay = None
+    if check_in is not None or check_out is not None:
+        try:
+            stay = stay_ordinals(check_in, check_out)
+        except ValueError:
+            return {"success": False, "error": "Invalid date format. Use YYYY-MM-DD"}
+        calendars = _calendars(hotel_id)
+    
     available = []
     for room_id, room in _rooms_database[hotel_id].items():
-        if room["status"] == RoomStatus.AVAILABLE.value:
+        if stay is None:
+            is_available = room["status"] == RoomStatus.AVAILABLE.value
+        else:
+            calendar = calendars.get(room["room_type"])
+            is_available = calendar is not None and room_id in calendar and calendar.is_free(room_id, *stay)
+        if is_available:
             if room_type is None or room["room_type"] == room_type:
                 available.append({
                     "room_id": room_id,
@@ -428,12 +526,16 @@ def execute_plugin(inputs: dict) -> Dict[str, Any]:
             }
         
         result = actions[action](payload)
-        return {"success": result.get("success", False), "result": result}
-    
     except Exception as e:
         logger.error(f"Plugin error: {str(e)}")
         return {"success": False, "error": str(e), "result": {}}
 
+    try:
+        _state.persist()
+    except Exception as e:
+        logger.error(f"Failed to persist plugin state: {str(e)}", exc_info=True)
+    return {"success": result.get("success", False), "result": result}
+
 if __name__ == "__main__":
     test_input = {
         "action": "assign_room",
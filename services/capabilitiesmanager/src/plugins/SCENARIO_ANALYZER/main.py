@@ -2,15 +2,35 @@
 """
 Scenario Analyzer Plugin - Scenario modeling and simulation
 """
-import json
+import os
+import sys
+import math
 import logging
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 import random
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    from stage7_plugin_runtime import run, get_input as _get_input
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_plugin_runtime import run, get_input as _get_input
+
 logger = logging.getLogger(__name__)
 
+# Iterations drawn and evaluated per batch; statistics are merged batch by batch
+SIMULATION_CHUNK_SIZE = 65536
+# Uniform sample of iterations kept for percentiles and analyze_outcomes
+SIMULATION_SAMPLE_SIZE = 10000
+SIMULATION_PERCENTILES = (5, 25, 50, 75, 95)
+
 
 @dataclass
 class Scenario:
@@ -35,6 +55,55 @@ class SimulationResult:
     variables: Dict[str, float]
     outcomes: Dict[str, Any]
     timestamp: str
+    samples: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class RunningStats:
+    """Count, mean, variance, min and max of a stream, updated a batch at a time"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values) -> None:
+        """Merge a batch (a NumPy array or a list of floats) into the running totals"""
+        n = len(values)
+        if not n:
+            return
+        if HAS_NUMPY and isinstance(values, np.ndarray):
+            batch_mean = float(values.mean())
+            batch_m2 = float(((values - batch_mean) ** 2).sum())
+            batch_min, batch_max = float(values.min()), float(values.max())
+        else:
+            batch_mean = math.fsum(values) / n
+            batch_m2 = math.fsum((x - batch_mean) ** 2 for x in values)
+            batch_min, batch_max = min(values), max(values)
+        # Chan et al. pairwise combination of the two partial results
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, batch_min)
+        self.max = max(self.max, batch_max)
+
+    @property
+    def std_dev(self) -> float:
+        """Population standard deviation"""
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Linearly interpolated percentile of sorted values (NumPy's default method)"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
 
 
 class ScenarioAnalyzerPlugin:
@@ -103,37 +172,46 @@ class ScenarioAnalyzerPlugin:
 
             scenario = self.scenarios[scenario_id]
             simulation_id = f"sim_{scenario_id}_{datetime.now().timestamp()}"
-            iterations = simulation_params.get("iterations", 1000)
+            iterations = int(simulation_params.get("iterations", 1000))
+            variance = float(simulation_params.get("variance", 0.1))
+            return_samples = bool(simulation_params.get("return_samples", False))
+            seed = simulation_params.get("seed")
+            if seed is None:
+                # Reported back so any run can be reproduced
+                seed = int.from_bytes(os.urandom(8), "big") >> 1
+            if iterations < 1:
+                return {"error": "iterations must be at least 1", "status": "failed"}
+
+            simulation = self._simulate(scenario.variables, iterations, variance, int(seed), return_samples)
+            statistics = {}
+            for key, stats in simulation["stats"].items():
+                column = sorted(sample["projected_values"][key] for sample in simulation["samples"])
+                statistics[key] = {
+                    "mean": stats.mean,
+                    "std_dev": stats.std_dev,
+                    "min": stats.min,
+                    "max": stats.max,
+                    "percentiles": {f"p{q}": _percentile(column, q) for q in SIMULATION_PERCENTILES}
+                }
 
             results = {
-                "outcomes": [],
-                "mean_outcomes": {},
-                "confidence_intervals": {}
+                "mean_outcomes": {key: stats.mean for key, stats in simulation["stats"].items()},
+                "confidence_intervals": {
+                    key: (stats.mean - 1.96 * stats.std_dev, stats.mean + 1.96 * stats.std_dev)
+                    for key, stats in simulation["stats"].items()
+                },
+                "statistics": statistics
             }
-
-            for i in range(iterations):
-                adjusted_vars = {}
-                for var, value in scenario.variables.items():
-                    variance = simulation_params.get("variance", 0.1)
-                    adjusted_vars[var] = value * (1 + random.uniform(-variance, variance))
-
-                outcome = {
-                    "iteration": i,
-                    "variables": adjusted_vars,
-                    "projected_values": self._calculate_outcomes(adjusted_vars)
-                }
-                results["outcomes"].append(outcome)
-
-            # Calculate statistics
-            results["mean_outcomes"] = self._calculate_mean(results["outcomes"])
-            results["confidence_intervals"] = self._calculate_confidence_intervals(results["outcomes"])
+            if return_samples:
+                results["outcomes"] = simulation["outcomes"]
 
             sim_result = SimulationResult(
                 simulation_id=simulation_id,
                 scenario_id=scenario_id,
                 variables=scenario.variables,
                 outcomes=results,
-                timestamp=datetime.now().isoformat()
+                timestamp=datetime.now().isoformat(),
+                samples=simulation["samples"]
             )
 
             self.simulations[simulation_id] = sim_result
@@ -142,6 +220,9 @@ class ScenarioAnalyzerPlugin:
             return {
                 "simulation_id": simulation_id,
                 "iterations": iterations,
+                "seed": seed,
+                "engine": "numpy" if HAS_NUMPY else "python",
+                "sample_size": len(simulation["samples"]),
                 "results": results,
                 "timestamp": datetime.now().isoformat()
             }
@@ -150,6 +231,63 @@ class ScenarioAnalyzerPlugin:
             self.logger.error(f"Error in run_simulation: {str(e)}")
             return {"error": str(e), "status": "failed"}
 
+    def _simulate(self, variables: Dict[str, float], iterations: int, variance: float,
+                  seed: int, return_samples: bool) -> Dict[str, Any]:
+        """
+        Draw ``iterations`` perturbations of the scenario variables in batches and evaluate
+        them with ``_calculate_outcomes``. Only running statistics and a uniform sample of
+        iterations are kept, plus every outcome when ``return_samples`` is set.
+        """
+        names = list(variables)
+        base = [float(variables[name]) for name in names]
+        stats: Dict[str, RunningStats] = {}
+        outcomes: List[Dict[str, Any]] = []
+        samples: List[Dict[str, Any]] = []
+
+        def record(iteration: int, adjusted: Dict[str, float], projected: Dict[str, float]):
+            outcome = {"iteration": iteration, "variables": adjusted, "projected_values": projected}
+            if return_samples:
+                outcomes.append(outcome)
+            if iteration in sampled:
+                samples.append(outcome)
+
+        if HAS_NUMPY:
+            rng = np.random.default_rng(seed)
+            sample_size = min(iterations, SIMULATION_SAMPLE_SIZE)
+            sampled = set(rng.choice(iterations, sample_size, replace=False).tolist())
+            base_row = np.asarray(base, dtype=float)
+            for start in range(0, iterations, SIMULATION_CHUNK_SIZE):
+                size = min(SIMULATION_CHUNK_SIZE, iterations - start)
+                # One matrix of perturbations per batch, one column per variable
+                adjusted = base_row * (1 + rng.uniform(-variance, variance, size=(size, len(names))))
+                columns = {name: adjusted[:, i] for i, name in enumerate(names)}
+                projected = self._calculate_outcomes(columns)
+                for key, values in projected.items():
+                    stats.setdefault(key, RunningStats()).update(values)
+                rows = range(size) if return_samples else sorted(i - start for i in sampled if start <= i < start + size)
+                for row in rows:
+                    record(start + row,
+                           {name: float(column[row]) for name, column in columns.items()},
+                           {key: float(values[row]) for key, values in projected.items()})
+        else:
+            rng = random.Random(seed)
+            sampled = set(rng.sample(range(iterations), min(iterations, SIMULATION_SAMPLE_SIZE)))
+            for start in range(0, iterations, SIMULATION_CHUNK_SIZE):
+                size = min(SIMULATION_CHUNK_SIZE, iterations - start)
+                batch: Dict[str, List[float]] = {}
+                for row in range(size):
+                    adjusted = {name: value * (1 + rng.uniform(-variance, variance))
+                                for name, value in zip(names, base)}
+                    projected = self._calculate_outcomes(adjusted)
+                    for key, value in projected.items():
+                        batch.setdefault(key, []).append(value)
+                    if return_samples or start + row in sampled:
+                        record(start + row, adjusted, projected)
+                for key, values in batch.items():
+                    stats.setdefault(key, RunningStats()).update(values)
+
+        return {"stats": stats, "outcomes": outcomes, "samples": samples}
+
     def compare_scenarios(self, scenario_ids: List[str], comparison_metrics: List[str]) -> Dict[str, Any]:
         """
         Compare multiple scenarios across key metrics
@@ -226,7 +364,8 @@ class ScenarioAnalyzerPlugin:
                 "recommendations": []
             }
 
-            outcomes = simulation.outcomes.get("outcomes", [])
+            # A uniform sample of the iterations stands in for the full run
+            outcomes = simulation.samples or simulation.outcomes.get("outcomes", [])
             successful_outcomes = 0
 
             for outcome in outcomes:
@@ -361,45 +500,13 @@ class ScenarioAnalyzerPlugin:
             return {"error": str(e), "status": "failed"}
 
     # Helper methods
-    def _calculate_outcomes(self, variables: Dict[str, float]) -> Dict[str, float]:
-        """Calculate outcomes from variables"""
+    def _calculate_outcomes(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Calculate outcomes from variables (floats, or NumPy columns of a whole batch)"""
         outcomes = {}
         for var, value in variables.items():
             outcomes[f"{var}_outcome"] = value * 1.2
         return outcomes
 
-    def _calculate_mean(self, outcomes: List[Dict]) -> Dict[str, float]:
-        """Calculate mean outcomes"""
-        means = {}
-        if not outcomes:
-            return means
-        
-        keys = set()
-        for outcome in outcomes:
-            for proj_var, proj_val in outcome.get("projected_values", {}).items():
-                keys.add(proj_var)
-
-        for key in keys:
-            values = [o["projected_values"][key] for o in outcomes if key in o["projected_values"]]
-            means[key] = sum(values) / len(values) if values else 0
-
-        return means
-
-    def _calculate_confidence_intervals(self, outcomes: List[Dict]) -> Dict[str, tuple]:
-        """Calculate 95% confidence intervals"""
-        intervals = {}
-        if not outcomes:
-            return intervals
-
-        for outcome in outcomes[:1]:
-            for var in outcome.get("projected_values", {}):
-                values = [o["projected_values"][var] for o in outcomes]
-                mean = sum(values) / len(values)
-                std_dev = (sum((x - mean) ** 2 for x in values) / len(values)) ** 0.5
-                intervals[var] = (mean - 1.96 * std_dev, mean + 1.96 * std_dev)
-
-        return intervals
-
     def _calculate_scenario_score(self, scenario: Scenario, metrics: List[str]) -> float:
         """Calculate overall scenario score"""
         score = 0
@@ -433,9 +540,16 @@ class ScenarioAnalyzerPlugin:
         return opportunities
 
 
+_plugin: Optional[ScenarioAnalyzerPlugin] = None
+
+
 def execute_action(action: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
     """Execute plugin actions"""
-    plugin = ScenarioAnalyzerPlugin()
+    global _plugin
+    if _plugin is None:
+        # Scenarios and simulations stay available to later calls in the same process
+        _plugin = ScenarioAnalyzerPlugin()
+    plugin = _plugin
 
     actions = {
         "create_scenario": lambda: plugin.create_scenario(parameters.get("scenario_data", {})),
@@ -465,77 +579,49 @@ def execute_action(action: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": f"Action '{action}' not found", "status": "failed"}
 
     return actions[action]()
-            "result": {{"message": "Plugin executed successfully"}},
-            "resultDescription": f"Result of {action} operation"
-        }}]
 
-    except Exception as e:
-        logger.error(f"Error in execute_plugin: {e}")
-        return [{{
-            "success": False,
-            "name": "error",
-            "resultType": "error",
-            "result": str(e),
-            "error": str(e)
-        }}]
 
-def parse_inputs(inputs_str):
-    """Parse and normalize the plugin stdin JSON payload into a dict."""
+def execute_plugin(inputs):
+    """Main plugin execution function."""
     try:
-        payload = json.loads(inputs_str)
-        inputs_dict = {{}}
-
-        if isinstance(payload, dict):
-            if payload.get('_type') == 'Map' and isinstance(payload.get('entries'), list):
-                for entry in payload.get('entries', []):
-                    if isinstance(entry, list) and len(entry) == 2:
-                        key, value = entry
-                        inputs_dict[key] = value
-            else:
-                for key, value in payload.items():
-                    if key not in ('_type', 'entries'):
-                        inputs_dict[key] = value
-
-        elif isinstance(payload, list):
-            for item in payload:
-                if isinstance(item, list) and len(item) == 2:
-                    key, value = item
-                    inputs_dict[key] = value
-
-        return inputs_dict
+        action = _get_input(inputs, 'action', ['operation', 'command'])
+        payload = _get_input(inputs, 'payload', ['data', 'params', 'parameters'], default={})
 
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse input JSON: {{e}}")
-        raise
-
-def main():
-    """Main entry point for the plugin."""
-    try:
-        input_data = sys.stdin.read().strip()
-        if not input_data:
-            result = [{{
+        if not action:
+            return [{
                 "success": False,
                 "name": "error",
                 "resultType": "error",
-                "result": "No input data received",
-                "error": "No input data received"
-            }}]
-        else:
-            inputs_dict = parse_inputs(input_data)
-            result = execute_plugin(inputs_dict)
-
-        print(json.dumps(result))
+                "result": "Missing required parameter 'action'",
+                "error": "Missing required parameter 'action'"
+            }]
+
+        result = execute_action(action, payload)
+        success = result.get("status") != "failed"
+        return [{
+            "success": success,
+            "name": "result" if success else "error",
+            "resultType": "object" if success else "error",
+            "result": result,
+            "resultDescription": f"Result of {action} operation",
+            **({} if success else {"error": result.get("error")})
+        }]
 
     except Exception as e:
-        logger.error(f"Plugin execution failed: {str(e)}")
-        result = [{{
+        logger.error(f"Error in execute_plugin: {e}")
+        return [{
             "success": False,
             "name": "error",
             "resultType": "error",
             "result": str(e),
             "error": str(e)
-        }}]
-        print(json.dumps(result))
+        }]
+
+
+def main():
+    """Main entry point for the plugin."""
+    run(execute_plugin)
+
 
 if __name__ == "__main__":
     main()
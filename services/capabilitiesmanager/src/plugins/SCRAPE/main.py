@@ -1,24 +1,76 @@
 #!/usr/bin/env python3
 """
 SCRAPE Plugin - Python Implementation
-Scrapes content from a given URL using requests and BeautifulSoup
+Scrapes content from a given URL using requests and BeautifulSoup (or selectolax when installed)
 """
 
 import json
 import sys
 import os
 import requests
+import soupsieve
 from bs4 import BeautifulSoup
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Tuple, Union
 import logging
 import time
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin, urlparse, urlparse
 
+try:
+    from http_response_cache import HttpResponseCache
+    from stage7_plugin_runtime import parse_inputs as _parse_plugin_inputs, get_input
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from http_response_cache import HttpResponseCache
+    from stage7_plugin_runtime import parse_inputs as _parse_plugin_inputs, get_input
+
+# Optional faster HTML parsers, preferred in this order when SCRAPE_PARSER is "auto"
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+try:
+    import lxml  # noqa: F401 - only needed as BeautifulSoup's tree builder
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# URLs are fetched concurrently, up to this many at a time
+try:
+    SCRAPE_MAX_PARALLEL = max(1, int(os.environ.get('SCRAPE_MAX_PARALLEL', '8')))
+except ValueError:
+    SCRAPE_MAX_PARALLEL = 8
+
+# Each host gets a token bucket: SCRAPE_HOST_BURST requests at once, then SCRAPE_HOST_RATE per second
+try:
+    SCRAPE_HOST_RATE = max(0.01, float(os.environ.get('SCRAPE_HOST_RATE', '1.0')))
+except ValueError:
+    SCRAPE_HOST_RATE = 1.0
+try:
+    SCRAPE_HOST_BURST = max(1.0, float(os.environ.get('SCRAPE_HOST_BURST', '2')))
+except ValueError:
+    SCRAPE_HOST_BURST = 2.0
+
+# Decompressed bodies are read in chunks and cut off at this size
+try:
+    SCRAPE_MAX_BYTES = max(1, int(os.environ.get('SCRAPE_MAX_BYTES', str(10 * 1024 * 1024))))
+except ValueError:
+    SCRAPE_MAX_BYTES = 10 * 1024 * 1024
+SCRAPE_CHUNK_SIZE = 64 * 1024
+
+# "auto", "selectolax", "lxml" or "html.parser"
+SCRAPE_PARSER = os.environ.get('SCRAPE_PARSER', 'auto').strip().lower()
+
+# Tried in order when the selector is missing or matches nothing
+FALLBACK_SELECTORS = ['main', 'article', '#content', '#main', '.content', '.main']
+
 class PluginParameterType:
     STRING = "string"
     NUMBER = "number"
@@ -27,11 +79,80 @@ class PluginParameterType:
     OBJECT = "object"
     ERROR = "ERROR"
 
+class TokenBucket:
+    """Per-host request budget: up to `capacity` requests at once, refilled at `rate` per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it (0 if one was available)."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Tokens may go negative: concurrent callers queue up behind each other
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+# Shared by every fetch of the process so connections are kept alive and hosts are rate limited together
+_session: Optional[requests.Session] = None
+_host_buckets: Dict[str, TokenBucket] = {}
+_shared_lock = threading.Lock()
+_UNSET = object()
+_http_cache: Any = _UNSET
+
+def _http_session() -> requests.Session:
+    global _session
+    with _shared_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=SCRAPE_MAX_PARALLEL, pool_maxsize=SCRAPE_MAX_PARALLEL)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+def _response_cache() -> Optional[HttpResponseCache]:
+    """The persistent HTTP cache, opened on first use (None when SCRAPE_CACHE=off)."""
+    global _http_cache
+    with _shared_lock:
+        if _http_cache is _UNSET:
+            _http_cache = HttpResponseCache.from_environment('SCRAPE')
+        return _http_cache
+
+def parser_backend(requested: Optional[str] = None) -> str:
+    """The parser to use: the requested one if installed, else the fastest installed one."""
+    requested = (requested or SCRAPE_PARSER or 'auto').lower()
+    available = {'selectolax': SelectolaxParser is not None, 'lxml': LXML_AVAILABLE, 'html.parser': True}
+    if available.get(requested):
+        return requested
+    if requested != 'auto':
+        logger.warning(f"Parser '{requested}' is not available; choosing one automatically")
+    return next(name for name in ('selectolax', 'lxml', 'html.parser') if available[name])
+
+def _host_bucket(host: str) -> TokenBucket:
+    with _shared_lock:
+        bucket = _host_buckets.get(host)
+        if bucket is None:
+            bucket = _host_buckets[host] = TokenBucket(SCRAPE_HOST_RATE, SCRAPE_HOST_BURST)
+        return bucket
+
 class ScrapePlugin:
     def __init__(self):
         self.security_manager_url = os.getenv('SECURITYMANAGER_URL', 'securitymanager:5010')
         self.client_secret = os.getenv('CLIENT_SECRET', 'stage7AuthSecret')
         self.token = None
+        self.parser = parser_backend()
         
         # User agents for rotation
         self.user_agents = [
@@ -61,10 +182,20 @@ class ScrapePlugin:
             return None
 
     def fetch_html(self, url: str) -> str:
-        """Fetch HTML content from URL with rate limiting and user agent rotation"""
+        """
+        Fetch HTML content from URL with per-host rate limiting and user agent rotation.
+        Fresh cached pages are returned without a request; stale ones are revalidated with
+        If-None-Match / If-Modified-Since and reused on 304 Not Modified.
+        """
         try:
-            # Add random delay for respectful scraping
-            time.sleep(random.uniform(1, 3))
+            cache = _response_cache()
+            cached = cache.get(url) if cache else None
+            if cached and cached['fresh']:
+                logger.info(f"Using cached copy of {url}")
+                return cached['body']
+
+            # Respectful scraping: wait for this host's token rather than a blanket delay
+            _host_bucket(urlparse(url).netloc.lower()).acquire()
             
             headers = {
                 'User-Agent': random.choice(self.user_agents),
@@ -74,69 +205,81 @@ class ScrapePlugin:
                 'Connection': 'keep-alive',
                 'Upgrade-Insecure-Requests': '1',
             }
+            if cached:
+                headers.update(HttpResponseCache.conditional_headers(cached))
             
-            response = requests.get(
+            with _http_session().get(
                 url,
                 headers=headers,
                 timeout=30,
-                allow_redirects=True
-            )
-            response.raise_for_status()
-            
-            # Check content type
-            content_type = response.headers.get('content-type', '').lower()
-            if 'text/html' not in content_type and 'application/xhtml' not in content_type:
-                logger.warning(f"URL {url} returned non-HTML content: {content_type}")
-            
-            return response.text
+                allow_redirects=True,
+                stream=True
+            ) as response:
+                if response.status_code == 304 and cached:
+                    cache.revalidated(url, response.headers)
+                    logger.info(f"{url} not modified; using cached copy")
+                    return cached['body']
+                response.raise_for_status()
+                
+                # Check content type
+                content_type = response.headers.get('content-type', '').lower()
+                if 'text/html' not in content_type and 'application/xhtml' not in content_type:
+                    logger.warning(f"URL {url} returned non-HTML content: {content_type}")
+                
+                html, truncated = self._read_body(response, url)
+                # A cut-off page must not be revalidated and served as if it were complete
+                if cache and not truncated:
+                    cache.put(url, response.headers, html)
+                return html
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch HTML from {url}: {e}")
             # Instead of raising, we'll let the caller handle this
             raise Exception(f"Failed to fetch HTML from {url}: {str(e)}")
 
+    @staticmethod
+    def _read_body(response: requests.Response, url: str) -> Tuple[str, bool]:
+        """
+        Decompress and decode a streamed response chunk by chunk, stopping at SCRAPE_MAX_BYTES.
+        Returns the text and whether it was truncated.
+        """
+        chunks = []
+        size = 0
+        truncated = False
+        for chunk in response.iter_content(chunk_size=SCRAPE_CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > SCRAPE_MAX_BYTES:
+                logger.warning(f"URL {url} is larger than {SCRAPE_MAX_BYTES} bytes; truncating")
+                truncated = True
+                break
+        body = b''.join(chunks)[:SCRAPE_MAX_BYTES]
+        try:
+            return body.decode(response.encoding or 'utf-8', errors='replace'), truncated
+        except LookupError:
+            return body.decode('utf-8', errors='replace'), truncated
+
     def scrape_content(self, html: str, config: Dict[str, Any]) -> List[str]:
-        """Scrape content from HTML using BeautifulSoup"""
+        """Scrape content from HTML with the configured parser backend"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Select elements based on selector
             selector = config.get('selector')
-            elements = []
-            if selector:
-                elements = soup.select(selector)
-                if not elements:
-                    logger.warning(f"Selector '{selector}' returned no elements. Trying fallback selectors.")
-
-            if not elements:
-                fallback_selectors = ['main', 'article', '#content', '#main', '.content', '.main']
-                for fallback in fallback_selectors:
-                    elements = soup.select(fallback)
-                    if elements:
-                        logger.info(f"Found content with fallback selector: '{fallback}'")
-                        break
+            selectors = ([selector] if selector else []) + FALLBACK_SELECTORS
+            matched, elements = self._select_first(html, selectors)
             
+            if selector and matched != selector:
+                logger.warning(f"Selector '{selector}' returned no elements. Trying fallback selectors.")
             if not elements:
                 logger.warning("All selectors and fallbacks failed. No content found.")
                 return []
+            if matched != selector:
+                logger.info(f"Found content with fallback selector: '{matched}'")
             
             # Extract content based on attribute
             attribute = config.get('attribute')
             result = []
             
             for element in elements:
-                if attribute:
-                    # Extract specific attribute
-                    if attribute == 'text':
-                        content = element.get_text(strip=True)
-                    elif attribute == 'html':
-                        content = str(element)
-                    else:
-                        content = element.get(attribute, '')
-                else:
-                    # Default to text content
-                    content = element.get_text(strip=True)
-                
+                content = self._extract(element, attribute)
                 if content:
                     result.append(content)
             
@@ -151,6 +294,48 @@ class ScrapePlugin:
             logger.error(f"Error scraping content: {e}")
             raise Exception(f"Error scraping content: {str(e)}")
 
+    def _select_first(self, html: str, selectors: List[str]) -> Tuple[Optional[str], List[Any]]:
+        """
+        The first selector, in priority order, that matches anything, and its matches in
+        document order.
+
+        With BeautifulSoup all selectors are evaluated in one pass over the document as a
+        selector group, and only the matches are tested against the individual selectors.
+        Lexbor can only tell whether a node or its descendants match, so with selectolax
+        each selector is queried in turn until one matches; those queries run in C.
+        """
+        if self.parser == 'selectolax':
+            tree = SelectolaxParser(html)
+            for sel in selectors:
+                elements = tree.css(sel)
+                if elements:
+                    return sel, elements
+            return None, []
+
+        soup = BeautifulSoup(html, 'lxml' if self.parser == 'lxml' else 'html.parser')
+        candidates = soupsieve.select(', '.join(selectors), soup)
+        if candidates:
+            for sel in selectors:
+                compiled = soupsieve.compile(sel)
+                elements = [element for element in candidates if compiled.match(element)]
+                if elements:
+                    return sel, elements
+        return None, []
+
+    def _extract(self, element: Any, attribute: Optional[str]) -> Any:
+        """Text (the default), outer HTML or an attribute value of a selected element"""
+        if self.parser == 'selectolax':
+            if not attribute or attribute == 'text':
+                return element.text(strip=True)
+            if attribute == 'html':
+                return element.html
+            return element.attributes.get(attribute) or ''
+        if not attribute or attribute == 'text':
+            return element.get_text(strip=True)
+        if attribute == 'html':
+            return str(element)
+        return element.get(attribute, '')
+
     def parse_config(self, inputs_map: Dict[str, Any]) -> Dict[str, Any]:
         """Parse scraping configuration from inputs"""
         config = {
@@ -213,20 +398,7 @@ class ScrapePlugin:
     
     def _get_input_value(self, inputs: Dict[str, Any], key: str, aliases: list = [], default: Any = None) -> Any:
         """Safely gets a value from inputs, checking aliases, and strips it if it's a string."""
-        raw_val = inputs.get(key)
-        if raw_val is None:
-            for alias in aliases:
-                raw_val = inputs.get(alias)
-                if raw_val is not None:
-                    break
-        
-        value = default
-        if raw_val is not None:
-            if isinstance(raw_val, dict):
-                value = raw_val.get('value', default)
-            else:
-                value = raw_val
-
+        value = get_input(inputs, key, aliases, default)
         if isinstance(value, str):
             return value.strip()
         return value
@@ -287,6 +459,60 @@ class ScrapePlugin:
                         return extracted
             return None
     
+    def scrape_urls(self, urls: List[str], config: Dict[str, Any]) -> List[Tuple[Optional[List[str]], Optional[Dict[str, Any]]]]:
+        """
+        Fetch and scrape URLs concurrently, up to SCRAPE_MAX_PARALLEL at a time.
+        Returns one (scraped_data, error_detail) pair per URL, in input order.
+        """
+        workers = min(len(urls), SCRAPE_MAX_PARALLEL)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scrape") as pool:
+                return list(pool.map(lambda url: self._scrape_url(url, config), urls))
+        return [self._scrape_url(url, config) for url in urls]
+
+    def _scrape_url(self, url: str, config: Dict[str, Any]) -> Tuple[Optional[List[str]], Optional[Dict[str, Any]]]:
+        try:
+            full_url = self.convert_to_full_url(url, 'https')
+            if not self._is_valid_url(full_url):
+                error_detail = {
+                    "url": url,
+                    "errorType": "Invalid URL",
+                    "message": f"Skipping invalid or unresolvable URL: {url} (converted to: {full_url})"
+                }
+                logger.warning(error_detail["message"])
+                return None, error_detail
+            try:
+                html = self.fetch_html(full_url)
+                return self.scrape_content(html, config), None
+            except requests.exceptions.RequestException as req_e:
+                status_code = getattr(req_e.response, 'status_code', None)
+                content_type = getattr(req_e.response, 'headers', {}).get('content-type', None) if getattr(req_e, 'response', None) else None
+                error_detail = {
+                    "url": full_url,
+                    "errorType": "Network/HTTP Error",
+                    "statusCode": status_code,
+                    "contentType": content_type,
+                    "message": str(req_e)
+                }
+                logger.error(f"Failed to fetch HTML from {full_url}: {str(req_e)}")
+                return None, error_detail
+            except Exception as e:
+                error_detail = {
+                    "url": full_url,
+                    "errorType": "Scraping Error",
+                    "message": str(e)
+                }
+                logger.error(f"Failed to scrape {full_url}: {str(e)}")
+                return None, error_detail
+        except Exception as e:
+            error_detail = {
+                "url": url,
+                "errorType": "General Error",
+                "message": str(e)
+            }
+            logger.error(f"General error scraping {url}: {str(e)}")
+            return None, error_detail
+
     def execute(self, inputs_map: Dict[str, Any]) -> List[Dict[str, Any]]:
         try:
             url_input = self._get_input_value(inputs_map, 'url', ['website', 'link', 'endpoint', 'websites'])
@@ -346,51 +572,12 @@ class ScrapePlugin:
             failed_urls = []
             successful_urls = []
 
-            for url in urls_to_scrape:
-                try:
-                    full_url = self.convert_to_full_url(url, 'https')
-                    if not self._is_valid_url(full_url):
-                        error_detail = {
-                            "url": url,
-                            "errorType": "Invalid URL",
-                            "message": f"Skipping invalid or unresolvable URL: {url} (converted to: {full_url})"
-                        }
-                        logger.warning(error_detail["message"])
-                        failed_urls.append(error_detail)
-                        continue
-                    config = self.parse_config(inputs_map)
-                    try:
-                        html = self.fetch_html(full_url)
-                        scraped_data = self.scrape_content(html, config)
-                        all_scraped_data.extend(scraped_data)
-                        successful_urls.append(url)
-                    except requests.exceptions.RequestException as req_e:
-                        status_code = getattr(req_e.response, 'status_code', None)
-                        content_type = getattr(req_e.response, 'headers', {}).get('content-type', None) if getattr(req_e, 'response', None) else None
-                        error_detail = {
-                            "url": full_url,
-                            "errorType": "Network/HTTP Error",
-                            "statusCode": status_code,
-                            "contentType": content_type,
-                            "message": str(req_e)
-                        }
-                        logger.error(f"Failed to fetch HTML from {full_url}: {str(req_e)}")
-                        failed_urls.append(error_detail)
-                    except Exception as e:
-                        error_detail = {
-                            "url": full_url,
-                            "errorType": "Scraping Error",
-                            "message": str(e)
-                        }
-                        logger.error(f"Failed to scrape {full_url}: {str(e)}")
-                        failed_urls.append(error_detail)
-                except Exception as e:
-                    error_detail = {
-                        "url": url,
-                        "errorType": "General Error",
-                        "message": str(e)
-                    }
-                    logger.error(f"General error scraping {url}: {str(e)}")
+            config = self.parse_config(inputs_map)
+            for url, (scraped_data, error_detail) in zip(urls_to_scrape, self.scrape_urls(urls_to_scrape, config)):
+                if error_detail is None:
+                    all_scraped_data.extend(scraped_data)
+                    successful_urls.append(url)
+                else:
                     failed_urls.append(error_detail)
 
             if successful_urls:
@@ -439,56 +626,10 @@ class ScrapePlugin:
             }]
 
 def parse_inputs(inputs_str: str) -> Dict[str, Any]:
-    """Parse and normalize the plugin stdin JSON payload into a dict of inputName -> InputValue.
-
-    Plugins should accept inputs formatted as a JSON array of [ [key, value], ... ] where value
-    may be a primitive (string/number/bool), or an object like {"value": ...}. This helper
-    normalizes non-dict raw values into {'value': raw}. It also filters invalid entries.
-    """
+    """Parse the plugin stdin JSON payload into a dict of inputName -> InputValue ({'value': ...})."""
     try:
         logger.info(f"Parsing input string ({len(inputs_str)} chars)")
-        payload = json.loads(inputs_str)
-        inputs: Dict[str, Any] = {}
-
-        # Case A: payload is a list of [key, value] pairs (legacy / preferred)
-        if isinstance(payload, list):
-            for item in payload:
-                if isinstance(item, list) and len(item) == 2:
-                    key, raw_value = item
-                    if isinstance(raw_value, dict):
-                        inputs[key] = raw_value
-                    else:
-                        inputs[key] = {'value': raw_value}
-                else:
-                    logger.debug(f"Skipping invalid input item in list payload: {item}")
-
-        # Case B: payload is a serialized Map object with entries: [[key, value], ...]
-        elif isinstance(payload, dict) and payload.get('_type') == 'Map' and isinstance(payload.get('entries'), list):
-            for entry in payload.get('entries', []):
-                if isinstance(entry, list) and len(entry) == 2:
-                    key, raw_value = entry
-                    if isinstance(raw_value, dict):
-                        inputs[key] = raw_value
-                    else:
-                        inputs[key] = {'value': raw_value}
-                else:
-                    logger.debug(f"Skipping invalid Map entry: {entry}")
-
-        # Case C: payload is already a dict mapping keys -> values (possibly already normalized)
-        elif isinstance(payload, dict):
-            for key, raw_value in payload.items():
-                # Skip internal meta fields if present
-                if key == '_type' or key == 'entries':
-                    continue
-                if isinstance(raw_value, dict):
-                    inputs[key] = raw_value
-                else:
-                    inputs[key] = {'value': raw_value}
-
-        else:
-            # Unsupported top-level type, provide clear error
-            raise ValueError("Unsupported input format: expected array of pairs, Map with entries, or object mapping")
-
+        inputs = _parse_plugin_inputs(inputs_str, wrap_values=True)
         logger.info(f"Successfully parsed {len(inputs)} input fields")
         return inputs
     except Exception as e:
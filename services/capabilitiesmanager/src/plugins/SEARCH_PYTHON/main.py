@@ -17,11 +17,45 @@ import logging
 import random
 import time
 import functools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+try:
+    from search_result_cache import SearchResultCache
+    from stage7_plugin_runtime import loads, parse_payload
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from search_result_cache import SearchResultCache
+    from stage7_plugin_runtime import loads, parse_payload
 
 # Configure logging
 logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"), format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Search terms run concurrently, up to this many at a time
+try:
+    SEARCH_MAX_PARALLEL = max(1, int(os.environ.get('SEARCH_MAX_PARALLEL', '4')))
+except ValueError:
+    SEARCH_MAX_PARALLEL = 4
+
+# Hedged mode starts the next-ranked provider once the current one is slower than its p95.
+# Until a provider has HEDGE_MIN_SAMPLES timings, its budget is SEARCH_HEDGE_BUDGET_SECONDS.
+try:
+    HEDGE_DEFAULT_BUDGET = float(os.environ.get('SEARCH_HEDGE_BUDGET_SECONDS', '2.0'))
+except ValueError:
+    HEDGE_DEFAULT_BUDGET = 2.0
+HEDGE_MIN_SAMPLES = 5
+HEDGE_MIN_BUDGET = 0.1
+
+# Upper bounds (ms) of the latency histogram buckets; slower calls fall in an overflow bucket
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# Saved performance scores drift back to each provider's starting score with this half-life,
+# so a provider penalised during an outage is eventually ranked high enough to be retried
+SCORE_RECOVERY_HALF_LIFE = 6 * 3600
+
 
 def retry_on_network_error(retries=3, backoff_factor=0.5):
     """
@@ -52,13 +86,14 @@ def retry_on_network_error(retries=3, backoff_factor=0.5):
 class PluginOutput:
     """Represents a plugin output result."""
     def __init__(self, success: bool, name: str, result_type: str,
-                 result: Any, result_description: str, error: str = None):
+                 result: Any, result_description: str, error: str = None, context: Any = None):
         self.success = success
         self.name = name
         self.result_type = result_type
         self.result = result
         self.result_description = result_description
         self.error = error
+        self.context = context
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
@@ -71,8 +106,87 @@ class PluginOutput:
         }
         if self.error:
             output["error"] = self.error
+        if self.context is not None:
+            output["context"] = self.context
         return output
 
+class LatencyHistogram:
+    """Bucketed call latencies of one provider, with quantile estimates for hedging."""
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, success: bool = True):
+        elapsed_ms = seconds * 1000
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound), len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            self.buckets[index] += 1
+            self.count += 1
+            self.errors += 0 if success else 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound in ms of the bucket holding the q-th quantile; None before any call."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(LATENCY_BUCKETS_MS[i], self.max_ms) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        if not self.count:
+            return {"count": 0, "errors": 0, "buckets": {}}
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / self.count, 1),
+            "p50_ms": round(self.quantile(0.5), 1),
+            "p95_ms": round(self.quantile(0.95), 1),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": {label: n for label, n in zip(labels, self.buckets) if n}
+        }
+
+# Keep-alive sessions and latency histograms per provider name, shared by every SearchPlugin in the process
+_sessions: Dict[str, requests.Session] = {}
+_latencies: Dict[str, LatencyHistogram] = {}
+_shared_lock = threading.Lock()
+
+def _provider_session(name: str) -> requests.Session:
+    with _shared_lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=2 * SEARCH_MAX_PARALLEL)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[name] = session
+        return session
+
+def _provider_latency(name: str) -> LatencyHistogram:
+    with _shared_lock:
+        return _latencies.setdefault(name, LatencyHistogram())
+
+# Persistent result and score cache, opened on first use (None when SEARCH_CACHE=off)
+_UNSET = object()
+_search_cache: Any = _UNSET
+
+def _result_cache() -> Optional[SearchResultCache]:
+    global _search_cache
+    with _shared_lock:
+        if _search_cache is _UNSET:
+            _search_cache = SearchResultCache.from_environment()
+        return _search_cache
+
 # --- Search Provider Abstraction ---
 
 class SearchProvider:
@@ -80,6 +194,12 @@ class SearchProvider:
     def __init__(self, name: str, performance_score: int = 100):
         self.name = name
         self.performance_score = performance_score
+        # Hedged and concurrent-term searches score the same provider from several threads
+        self._score_lock = threading.Lock()
+        # Set once this process moves the score, so untouched providers keep their saved timestamp
+        self.score_changed = False
+        self.session = _provider_session(name)
+        self.latency = _provider_latency(name)
 
     def search(self, search_term: str, **kwargs) -> List[Dict[str, str]]:
         """Perform the search and return a list of results."""
@@ -87,10 +207,24 @@ class SearchProvider:
 
     def update_performance(self, success: bool):
         """Update the performance score based on search success."""
-        if success:
-            self.performance_score = min(100, self.performance_score + 5)
-        else:
-            self.performance_score = max(0, self.performance_score - 20)
+        self.adjust_performance(5 if success else -20)
+
+    def adjust_performance(self, delta: int):
+        """Move the performance score by delta, kept within 0-100."""
+        with self._score_lock:
+            score = min(100, max(0, self.performance_score + delta))
+            if score != self.performance_score:
+                self.performance_score = score
+                self.score_changed = True
+
+    def blend_performance(self, score: float, weight: float):
+        """Move the performance score toward score by the given weight (0-1)."""
+        with self._score_lock:
+            self.performance_score = round(self.performance_score + (score - self.performance_score) * weight)
+
+    def get_performance(self) -> int:
+        with self._score_lock:
+            return self.performance_score
 
 # --- Concrete Search Providers ---
 
@@ -127,7 +261,7 @@ class BrainSearchProvider(SearchProvider):
             "temperature": 0.1
         }
         headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {auth_token}'}
-        response = requests.post(f"http://{brain_url}/chat", json=payload, headers=headers, timeout=120)
+        response = self.session.post(f"http://{brain_url}/chat", json=payload, headers=headers, timeout=120)
         response.raise_for_status()
         result = response.json()
         if 'result' not in result:
@@ -192,7 +326,7 @@ class GoogleWebSearchProvider(SearchProvider):
                 'fields': 'items(title,link,snippet)'  # Only return fields we need
             }
 
-            response = requests.get(self.base_url, params=params, timeout=15)
+            response = self.session.get(self.base_url, params=params, timeout=15)
             response.raise_for_status()
 
             data = response.json()
@@ -226,16 +360,18 @@ class LangsearchSearchProvider(SearchProvider):
         self.base_url = os.getenv('LANGSEARCH_API_URL', 'https://api.langsearch.com')
         self.rate_limit_seconds = 1
         self.last_request_time = 0
+        self._rate_lock = threading.Lock()
 
     @retry_on_network_error()
     def search(self, search_term: str, **kwargs) -> List[Dict[str, str]]:
         """Execute semantic search using LangSearch API."""
         # --- Rate Limiting Logic ---
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-
-        if time_since_last_request < self.rate_limit_seconds:
-            sleep_duration = self.rate_limit_seconds - time_since_last_request
+        # Concurrent terms each reserve the next free slot, so requests start rate_limit_seconds apart
+        with self._rate_lock:
+            current_time = time.time()
+            sleep_duration = self.last_request_time + self.rate_limit_seconds - current_time
+            self.last_request_time = max(current_time, self.last_request_time + self.rate_limit_seconds)
+        if sleep_duration > 0:
             time.sleep(sleep_duration)
         # --- End Rate Limiting ---
 
@@ -256,7 +392,7 @@ class LangsearchSearchProvider(SearchProvider):
             if 'summary' in kwargs:
                 payload['summary'] = kwargs['summary']
             
-            response = requests.post(url, headers=headers, json=payload, timeout=15)
+            response = self.session.post(url, headers=headers, json=payload, timeout=15)
             response.raise_for_status()
             
             full_response = response.json()
@@ -297,8 +433,6 @@ class LangsearchSearchProvider(SearchProvider):
             logger.error(f"LangSearch processing failed: {str(e)}")
             self.update_performance(success=False)
             raise  # Re-raise the exception to indicate failure
-        finally:
-            self.last_request_time = time.time()
 
 class DuckDuckGoSearchProvider(SearchProvider):
     """Search provider for DuckDuckGo."""
@@ -316,7 +450,7 @@ class DuckDuckGoSearchProvider(SearchProvider):
                 'skip_disambig': 1
             }
             
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = self.session.get(self.base_url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             
@@ -374,7 +508,7 @@ class SearxNGSearchProvider(SearchProvider):
                     'format': 'json'
                 }
                 
-                response = requests.get(
+                response = self.session.get(
                     searxng_url,
                     params=params,
                     timeout=10,
@@ -414,6 +548,31 @@ class SearchPlugin:
     def __init__(self, inputs: Dict[str, Any]):
         self.inputs = inputs
         self.providers = self._initialize_providers()
+        self.cache = _result_cache()
+        self._restore_scores()
+
+    def _restore_scores(self):
+        """Start providers from their saved scores, recovered toward the initial score over time."""
+        if self.cache is None:
+            return
+        saved = self.cache.load_scores()
+        now = time.time()
+        for provider in self.providers:
+            if provider.name in saved:
+                score, saved_at = saved[provider.name]
+                weight = 0.5 ** (max(0.0, now - saved_at) / SCORE_RECOVERY_HALF_LIFE)
+                provider.blend_performance(score, weight)
+
+    def _save_scores(self):
+        """
+        Save the scores this run changed. The others keep their saved score and time, so a
+        demoted provider that is not called keeps recovering across short-lived processes.
+        """
+        if self.cache is None:
+            return
+        changed = {provider.name: provider.get_performance() for provider in self.providers if provider.score_changed}
+        if changed:
+            self.cache.save_scores(changed)
 
     def _initialize_providers(self) -> List[SearchProvider]:
         """Initializes all available search providers in priority order."""
@@ -458,64 +617,185 @@ class SearchPlugin:
             
         return providers
 
-    def execute_search(self, search_terms: List[str]) -> Tuple[List[Dict[str, str]], List[str]]:
+    def execute_search(self, search_terms: List[str], hedge: bool = False) -> Tuple[List[Dict[str, str]], List[str]]:
         """
         Executes the search across providers, managing fallbacks and performance.
+        Terms are searched concurrently, up to SEARCH_MAX_PARALLEL at a time; results and
+        errors come back in term order. With hedge=True each term races providers (see _race).
         Returns a tuple of (all_results, all_errors).
         """
+        workers = min(len(search_terms), SEARCH_MAX_PARALLEL)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search-term") as pool:
+                outcomes = list(pool.map(lambda term: self._search_term(term, hedge), search_terms))
+        else:
+            outcomes = [self._search_term(term, hedge) for term in search_terms]
+
         all_results = []
         all_errors = []
+        self.term_stats = []
+        for term_results, term_errors, stats in outcomes:
+            all_results.extend(term_results)
+            all_errors.extend(term_errors)
+            self.term_stats.append(stats)
+        self.hedged = hedge
+        self._save_scores()
+        return all_results, all_errors
 
-        for term in search_terms:
-            original_term = term
-            term_results = []
-            
-            # Sort providers by performance score, highest first
-            sorted_providers = sorted(self.providers, key=lambda p: p.performance_score, reverse=True)
-            
-            search_successful = False
+    def _search_term(self, term: str, hedge: bool) -> Tuple[List[Dict[str, str]], List[str], Dict[str, Any]]:
+        """Search one term: providers by performance score, highest first, until one returns results."""
+        term_errors = []
+        started = time.perf_counter()
+
+        # Sort providers by performance score, highest first
+        sorted_providers = sorted(self.providers, key=lambda p: p.get_performance(), reverse=True)
+
+        # Fresh cached results of the best-ranked provider that has them answer without the network
+        if self.cache is not None:
+            for provider in sorted_providers:
+                cached = self.cache.get(provider.name, term)
+                if cached:
+                    logger.info(f"Using cached {provider.name} results for '{term}'.")
+                    return cached, term_errors, {
+                        "term": term,
+                        "provider": provider.name,
+                        "providers_tried": [],
+                        "cached": True,
+                        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                        "results": len(cached)
+                    }
+
+        if hedge:
+            winner, term_results, tried = self._race(term, sorted_providers, term_errors)
+        else:
+            winner, term_results, tried = None, [], []
             for provider in sorted_providers:
                 logger.info(f"Attempting search for '{term}' using {provider.name} (performance score: {provider.performance_score})")
+                tried.append(provider.name)
+                try:
+                    results, error = self._timed_search(provider, term), None
+                except Exception as e:
+                    results, error = None, e
+                if self._record_outcome(provider, term, results, error, term_errors):
+                    winner, term_results = provider, results
+                    break  # Success, so we break the provider loop
+
+        if winner is None:
+            logger.error(f"All providers failed for search term: {term}")
+            # Try brain search as a last resort if it's not already tried
+            brain_provider = next((p for p in self.providers if isinstance(p, BrainSearchProvider)), None)
+            if brain_provider:
                 try:
-                    results = provider.search(term)
-                    
+                    results = brain_provider.search(term)
                     if results:
-                        logger.info(f"{provider.name} successfully returned {len(results)} results for '{term}'.")
-                        term_results.extend(results)
-                        provider.update_performance(success=True)
-                        search_successful = True
-                        break  # Success, so we break the provider loop
-                    else:
-                        logger.warning(f"{provider.name} found no results for '{term}' - trying next provider.")
-                        # Only slightly penalize for no results
-                        provider.performance_score = max(0, provider.performance_score - 5)
-
+                        winner, term_results = brain_provider, results
                 except Exception as e:
-                    error_msg = f"{provider.name} search failed for '{term}': {e}"
-                    logger.error(error_msg)
-                    all_errors.append(error_msg)
-                    provider.update_performance(success=False)
-                    # Continue to the next provider
-                    continue
-
-            if not search_successful:
-                logger.error(f"All providers failed for search term: {original_term}")
-                # Try brain search as a last resort if it's not already tried
-                brain_provider = next((p for p in self.providers if isinstance(p, BrainSearchProvider)), None)
-                if brain_provider:
-                    try:
-                        results = brain_provider.search(original_term)
-                        if results:
-                            term_results.extend(results)
-                            search_successful = True
-                    except Exception as e:
-                        logger.error(f"BrainSearchProvider fallback also failed: {e}")
-                        all_errors.append(f"BrainSearchProvider fallback failed: {e}")
-
-            if term_results:
-                all_results.extend(term_results)
-        
-        return all_results, all_errors
+                    logger.error(f"BrainSearchProvider fallback also failed: {e}")
+                    term_errors.append(f"BrainSearchProvider fallback failed: {e}")
+
+        if winner is not None and self.cache is not None:
+            self.cache.put(winner.name, term, term_results)
+
+        stats = {
+            "term": term,
+            "provider": winner.name if winner else None,
+            "providers_tried": tried,
+            "cached": False,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "results": len(term_results)
+        }
+        return term_results, term_errors, stats
+
+    def _timed_search(self, provider: SearchProvider, term: str) -> List[Dict[str, str]]:
+        """provider.search, recording its latency whether it succeeds or fails."""
+        started = time.perf_counter()
+        try:
+            results = provider.search(term)
+        except Exception:
+            provider.latency.record(time.perf_counter() - started, success=False)
+            raise
+        provider.latency.record(time.perf_counter() - started)
+        return results
+
+    def _record_outcome(self, provider: SearchProvider, term: str, results: Optional[List[Dict[str, str]]],
+                        error: Optional[Exception], term_errors: List[str]) -> bool:
+        """Score one provider attempt; True if it returned results."""
+        if error is not None:
+            error_msg = f"{provider.name} search failed for '{term}': {error}"
+            logger.error(error_msg)
+            term_errors.append(error_msg)
+            provider.update_performance(success=False)
+            return False
+        if results:
+            logger.info(f"{provider.name} successfully returned {len(results)} results for '{term}'.")
+            provider.update_performance(success=True)
+            return True
+        logger.warning(f"{provider.name} found no results for '{term}' - trying next provider.")
+        # Only slightly penalize for no results
+        provider.adjust_performance(-5)
+        return False
+
+    def _hedge_budget(self, provider: SearchProvider) -> float:
+        """Seconds to wait on a provider before also starting the next one: its p95 latency."""
+        if provider.latency.count < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_BUDGET
+        return max(HEDGE_MIN_BUDGET, provider.latency.quantile(0.95) / 1000)
+
+    def _race(self, term: str, ranked: List[SearchProvider],
+              term_errors: List[str]) -> Tuple[Optional[SearchProvider], List[Dict[str, str]], List[str]]:
+        """
+        Hedged search: start the best provider, and whenever the newest attempt outlives its
+        p95 budget, or every attempt so far has failed, start the next-ranked one as well.
+        The first non-empty result wins. Attempts run on daemon threads, so a losing request
+        that is still in flight neither blocks the caller nor keeps the process alive.
+        """
+        outcomes: "queue.Queue[Tuple[SearchProvider, Optional[List[Dict[str, str]]], Optional[Exception]]]" = queue.Queue()
+        tried: List[str] = []
+
+        def attempt(provider: SearchProvider):
+            try:
+                outcomes.put((provider, self._timed_search(provider, term), None))
+            except Exception as e:
+                outcomes.put((provider, None, e))
+
+        def launch() -> float:
+            provider = ranked[len(tried)]
+            logger.info(f"Attempting search for '{term}' using {provider.name} (performance score: {provider.performance_score})")
+            tried.append(provider.name)
+            threading.Thread(target=attempt, args=(provider,), daemon=True, name=f"search-{provider.name}").start()
+            return time.monotonic() + self._hedge_budget(provider)
+
+        deadline = launch()
+        pending = 1
+        while pending:
+            can_hedge = len(tried) < len(ranked)
+            try:
+                provider, results, error = outcomes.get(timeout=max(0.0, deadline - time.monotonic()) if can_hedge else None)
+            except queue.Empty:
+                logger.info(f"No answer for '{term}' within the hedge budget; also trying {ranked[len(tried)].name}")
+                deadline = launch()
+                pending += 1
+                continue
+            pending -= 1
+            if self._record_outcome(provider, term, results, error, term_errors):
+                return provider, results, tried
+            if not pending and len(tried) < len(ranked):
+                deadline = launch()
+                pending += 1
+        return None, [], tried
+
+    def search_metadata(self) -> Dict[str, Any]:
+        """Per-term providers and per-provider latency histograms of the last execute_search."""
+        return {
+            "hedged": getattr(self, "hedged", False),
+            "max_parallel_terms": SEARCH_MAX_PARALLEL,
+            "terms": getattr(self, "term_stats", []),
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+            "providers": {
+                provider.name: {"performance_score": provider.performance_score, "latency": provider.latency.to_dict()}
+                for provider in self.providers
+            }
+        }
 
 def execute_plugin(inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Main plugin execution function."""
@@ -546,14 +826,22 @@ def execute_plugin(inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
         if not search_terms:
             return [PluginOutput(False, "error", "error", None, "Search term(s) cannot be empty").to_dict()]
 
+        hedge_input = inputs.get('hedge')
+        if isinstance(hedge_input, dict):
+            hedge_input = hedge_input.get('value')
+        if hedge_input is None:
+            hedge_input = os.environ.get('SEARCH_HEDGE', 'false')
+        hedge = hedge_input is True or str(hedge_input).strip().lower() in ('true', '1', 'yes')
+
         plugin = SearchPlugin(inputs)
-        all_results, all_errors = plugin.execute_search(search_terms)
+        all_results, all_errors = plugin.execute_search(search_terms, hedge=hedge)
+        metadata = plugin.search_metadata()
 
         if not all_results and all_errors:
-            return [PluginOutput(False, "error", "error", None, "All search providers failed: " + ". ".join(all_errors)).to_dict()]
+            return [PluginOutput(False, "error", "error", None, "All search providers failed: " + ". ".join(all_errors), context=metadata).to_dict()]
         
         description = f"Found {len(all_results)} results for '{', '.join(search_terms)}'" if all_results else "No results found"
-        return [PluginOutput(True, "results", "array", all_results, description).to_dict()]
+        return [PluginOutput(True, "results", "array", all_results, description, context=metadata).to_dict()]
 
     except Exception as e:
         logger.exception("An unexpected error occurred in execute_plugin")
@@ -561,67 +849,16 @@ def execute_plugin(inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
 
 # --- Main Execution ---
 def parse_inputs(inputs_str: str) -> Dict[str, Any]:
-    """Parse and normalize the plugin stdin JSON payload into a dict of inputName -> InputValue.
+    """Parse the plugin stdin JSON payload into a dict of inputName -> InputValue ({'value': ...}).
 
-    Plugins should accept inputs formatted as a JSON array of [ [key, value], ... ] where value
-    may be a primitive (string/number/bool), or an object like {"value": ...}. This helper
-    normalizes non-dict raw values into {'value': raw}. It also filters invalid entries.
+    Besides the usual pairs, Map and object payloads, a bare JSON string or number is taken
+    as the search term.
     """
     try:
-        payload = json.loads(inputs_str)
-        inputs: Dict[str, Any] = {}
-
-        # Accept a single string as the search term
-        if isinstance(payload, str):
-            inputs['searchTerm'] = {'value': payload}
-            return inputs
-
-        # Accept a dict with a searchTerm key
-        if isinstance(payload, dict):
-            # If _type: Map and entries, treat as array of pairs
-            if payload.get('_type') == 'Map' and isinstance(payload.get('entries'), list):
-                for entry in payload.get('entries', []):
-                    if isinstance(entry, list) and len(entry) == 2:
-                        key, raw_value = entry
-                        if isinstance(raw_value, dict):
-                            inputs[key] = raw_value
-                        else:
-                            inputs[key] = {'value': raw_value}
-                return inputs
-            # Otherwise, treat as a normal dict
-            for key, raw_value in payload.items():
-                if key == '_type' or key == 'entries':
-                    continue
-                if isinstance(raw_value, dict):
-                    inputs[key] = raw_value
-                else:
-                    inputs[key] = {'value': raw_value}
-            return inputs
-
-        # Accept a list of [key, value] pairs
-        if isinstance(payload, list):
-            for item in payload:
-                if isinstance(item, list) and len(item) == 2:
-                    key, raw_value = item
-                    if isinstance(raw_value, dict):
-                        inputs[key] = raw_value
-                    else:
-                        inputs[key] = {'value': raw_value}
-            return inputs
-
-        # If none of the above, check for aliases of searchTerm
-        search_term_aliases = ["query", "keywords", "terms", "q", "search_query"]
-        for alias in search_term_aliases:
-            if alias in payload:
-                if isinstance(payload[alias], dict):
-                    inputs['searchTerm'] = payload[alias]
-                else:
-                    inputs['searchTerm'] = {'value': payload[alias]}
-                return inputs
-        
-        # If none of the above and no alias found, treat as a single search term string
-        inputs['searchTerm'] = {'value': str(payload)}
-        return inputs
+        payload = loads(inputs_str)
+        if isinstance(payload, (list, dict)):
+            return parse_payload(payload, wrap_values=True)
+        return {'searchTerm': {'value': payload if isinstance(payload, str) else str(payload)}}
     except Exception as e:
         logger.error(f"Input parsing failed: {e}")
         raise
@@ -7,15 +7,30 @@ Manages shift creation, staff assignments, labor hours, and coverage optimizatio
 import sys
 import json
 import logging
+import math
 import os
+from bisect import bisect_left
+from time import perf_counter
 from typing import Dict, Any, List, Tuple, Optional
-from datetime import datetime, timedelta, time
+from datetime import date, datetime, timedelta, time
 from enum import Enum
 import uuid
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+try:
+    from stage7_state_store import PluginState
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_state_store import PluginState
+
+try:
+    from ortools.sat.python import cp_model
+    HAS_ORTOOLS = True
+except ImportError:
+    HAS_ORTOOLS = False
+
 class ShiftType(Enum):
     MORNING = "morning"      # 6:00 - 14:00
     AFTERNOON = "afternoon"  # 14:00 - 22:00
@@ -38,6 +53,23 @@ class ShiftStatus(Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+SOLVERS = ("auto", "cp_sat", "greedy")
+SOLVER_TIME_LIMIT = 2.0  # seconds CP-SAT may search before the greedy roster is kept
+SOLVER_GAP = 0.005  # stop once the roster is proven within 0.5% of the optimum
+DEFAULT_MAX_HOURS_PER_WEEK = 40
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Covers one employee of a role handles per shift and the minimum per shift; the same
+# ratios DEMAND_FORECAST recommend_staffing uses (1 server per 15 covers, 1 host per 3 servers...)
+COVERS_PER_STAFF = {
+    EmployeeRole.SERVER.value: (15, 2),
+    EmployeeRole.HOST.value: (45, 1),
+    EmployeeRole.COOK.value: (40, 1),
+    EmployeeRole.BUSSER.value: (30, 1),
+}
+# Default split of a forecast day's covers across shifts
+FORECAST_SHIFT_SHARE = {ShiftType.MORNING.value: 0.35, ShiftType.EVENING.value: 0.65}
+
 # In-Memory Data Storage
 _employees = {}
 _shifts = {}
@@ -46,6 +78,67 @@ _labor_tracking = {}
 _availability = {}
 _shift_history = {}
 
+# Persisted across calls; see shared/python/lib/stage7_state_store.py
+_state = PluginState("STAFF_SCHEDULER", {
+    "employees": _employees,
+    "shifts": _shifts,
+    "schedules": _schedules,
+    "labor_tracking": _labor_tracking,
+    "availability": _availability,
+    "shift_history": _shift_history
+})
+
+
+class EmployeeShifts:
+    """One employee's booked shifts as sorted, non-overlapping [start, end) hour intervals.
+
+    Hours count from date.min, so shifts on different days compare directly and a conflict
+    check is a bisect rather than a scan of every shift in the restaurant.
+    """
+    __slots__ = ("starts", "ends", "shift_ids", "week_hours")
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.shift_ids: List[Optional[str]] = []
+        self.week_hours: Dict[int, int] = {}
+
+    def conflict(self, start: int, end: int) -> Optional[str]:
+        """Return the id of a booked shift overlapping [start, end), or None."""
+        # Intervals are disjoint, so the last one starting before `end` also ends last
+        i = bisect_left(self.starts, end)
+        if i and self.ends[i - 1] > start:
+            return self.shift_ids[i - 1] or "pending"
+        return None
+
+    def hours_in_week(self, start: int) -> int:
+        return self.week_hours.get(_week(start), 0)
+
+    def add(self, start: int, end: int, shift_id: Optional[str] = None) -> None:
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.shift_ids.insert(i, shift_id)
+        week = _week(start)
+        self.week_hours[week] = self.week_hours.get(week, 0) + end - start
+
+    def remove(self, start: int, shift_id: str) -> None:
+        i = bisect_left(self.starts, start)
+        if i < len(self.starts) and self.shift_ids[i] == shift_id:
+            week = _week(start)
+            self.week_hours[week] -= self.ends[i] - self.starts[i]
+            del self.starts[i], self.ends[i], self.shift_ids[i]
+
+    def copy(self) -> "EmployeeShifts":
+        other = EmployeeShifts()
+        other.starts, other.ends, other.shift_ids = list(self.starts), list(self.ends), list(self.shift_ids)
+        other.week_hours = dict(self.week_hours)
+        return other
+
+
+# restaurant_id -> employee_id -> EmployeeShifts; derived from _shifts, so not persisted
+_shift_indexes: Dict[str, Dict[str, EmployeeShifts]] = {}
+
 def _get_input(inputs: dict, key: str, aliases: list = [], default=None):
     """Safely retrieve input values with alias fallback."""
     val = inputs.get(key)
@@ -69,7 +162,10 @@ def _validate_params(payload: dict, required_fields: List[str]) -> Tuple[bool, s
 
 def _initialize_restaurant(restaurant_id: str) -> None:
     """Initialize restaurant scheduling structures."""
-    if restaurant_id not in _employees:
+    if restaurant_id in _employees:
+        return
+    _shift_indexes.pop(restaurant_id, None)
+    if not _state.restore(restaurant_id):
         _employees[restaurant_id] = _create_default_employees()
         _shifts[restaurant_id] = {}
         _schedules[restaurant_id] = {}
@@ -122,6 +218,118 @@ def _get_shift_hours(shift_type: str) -> Tuple[int, int]:
     else:
         return (6, 14)  # Default
 
+def _week(start: int) -> int:
+    """Monday-based week number of an hour offset (date.min is a Monday)."""
+    return (start // 24 - 1) // 7
+
+def _shift_interval(day: date, shift_type: str) -> Tuple[int, int]:
+    """Hour interval [start, end) of a shift type on a day."""
+    start_hour, end_hour = _get_shift_hours(shift_type)
+    base = day.toordinal() * 24
+    return base + start_hour, base + end_hour
+
+def _parse_day(value: Any) -> Optional[date]:
+    try:
+        return datetime.fromisoformat(str(value)).date()
+    except ValueError:
+        return None
+
+def _employee_shifts(restaurant_id: str) -> Dict[str, EmployeeShifts]:
+    """Per-employee interval index of the restaurant's active shifts, built on first use."""
+    index = _shift_indexes.get(restaurant_id)
+    if index is None:
+        index = _shift_indexes[restaurant_id] = {}
+        for shift in _shifts[restaurant_id].values():
+            day = _parse_day(shift["shift_date"])
+            if day is None or shift["status"] == ShiftStatus.CANCELLED.value:
+                continue
+            start, end = _shift_interval(day, shift["shift_type"])
+            shifts = index.setdefault(shift["employee_id"], EmployeeShifts())
+            if shifts.conflict(start, end):
+                # Recorded before assign_shift checked for conflicts; keep the first booking
+                logger.warning(f"Shift {shift['shift_id']} overlaps another shift of {shift['employee_id']}")
+                continue
+            shifts.add(start, end, shift["shift_id"])
+    return index
+
+def _employee_roles(employee: Dict[str, Any]) -> List[str]:
+    """Roles an employee can cover: the primary role plus any cross-trained `roles`."""
+    return [employee["role"]] + [r for r in employee.get("roles", []) if r != employee["role"]]
+
+def _normalize_availability(entry: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+    """Validate an availability entry: weekdays and shift types worked, dates off."""
+    availability = {}
+    if entry.get("weekdays") is not None:
+        weekdays = []
+        for day in entry["weekdays"]:
+            if isinstance(day, str) and day.lower() in WEEKDAYS:
+                weekdays.append(WEEKDAYS.index(day.lower()))
+            elif isinstance(day, int) and 0 <= day < 7:
+                weekdays.append(day)
+            else:
+                return {}, f"Invalid weekday: {day}"
+        availability["weekdays"] = sorted(set(weekdays))
+    if entry.get("shift_types") is not None:
+        valid_shift_types = [s.value for s in ShiftType]
+        invalid = [s for s in entry["shift_types"] if s not in valid_shift_types]
+        if invalid:
+            return {}, f"Invalid shift type: {invalid[0]}"
+        availability["shift_types"] = list(entry["shift_types"])
+    if entry.get("unavailable_dates") is not None:
+        days = [_parse_day(d) for d in entry["unavailable_dates"]]
+        if None in days:
+            return {}, "Invalid date format in unavailable_dates (use YYYY-MM-DD)"
+        availability["unavailable_dates"] = sorted({d.isoformat() for d in days})
+    return availability, ""
+
+def _is_available(availability: Optional[Dict[str, Any]], day: date, shift_type: str) -> bool:
+    if not availability:
+        return True
+    if "weekdays" in availability and day.weekday() not in availability["weekdays"]:
+        return False
+    if "shift_types" in availability and shift_type not in availability["shift_types"]:
+        return False
+    return day.isoformat() not in availability.get("unavailable_dates", ())
+
+def _book_shift(restaurant_id: str, schedule: Dict[str, Any], employee: Dict[str, Any], day: date,
+                shift_type: str, role: str, notes: str = "") -> Dict[str, Any]:
+    """Record an already checked shift, index it and add it to the schedule totals."""
+    start_hour, end_hour = _get_shift_hours(shift_type)
+    duration_hours = end_hour - start_hour
+    shift_date = day.isoformat()
+    employee_id = employee["employee_id"]
+    hourly_rate = employee["hourly_rate"]
+    shift_cost = duration_hours * hourly_rate
+
+    shift_id = f"SHIFT_{restaurant_id}_{shift_date}_{employee_id}_{uuid.uuid4().hex[:4].upper()}"
+
+    shift = {
+        "shift_id": shift_id,
+        "schedule_id": schedule["schedule_id"],
+        "employee_id": employee_id,
+        "employee_name": employee["name"],
+        "role": role,
+        "shift_date": shift_date,
+        "shift_type": shift_type,
+        "start_time": f"{start_hour:02d}:00",
+        "end_time": f"{end_hour:02d}:00",
+        "duration_hours": duration_hours,
+        "hourly_rate": hourly_rate,
+        "shift_cost": shift_cost,
+        "status": ShiftStatus.ASSIGNED.value,
+        "created_at": datetime.now().isoformat(),
+        "notes": notes
+    }
+
+    _shifts[restaurant_id][shift_id] = shift
+    _employee_shifts(restaurant_id).setdefault(employee_id, EmployeeShifts()).add(
+        *_shift_interval(day, shift_type), shift_id)
+
+    schedule["shifts_assigned"] += 1
+    schedule["total_labor_hours"] += duration_hours
+    schedule["estimated_labor_cost"] += shift_cost
+    return shift
+
 def create_schedule(payload: dict) -> Dict[str, Any]:
     """Create a new schedule for a date range."""
     required = ["schedule_name", "start_date", "end_date"]
@@ -145,6 +353,10 @@ def create_schedule(payload: dict) -> Dict[str, Any]:
     except ValueError:
         return {"success": False, "error": "Invalid date format (use YYYY-MM-DD)"}
     
+    labor_budget = payload.get("labor_budget")
+    if labor_budget is not None and (not isinstance(labor_budget, (int, float)) or labor_budget < 0):
+        return {"success": False, "error": "labor_budget must be a non-negative number"}
+    
     schedule_id = f"SCHED_{restaurant_id}_{uuid.uuid4().hex[:8].upper()}"
     
     schedule = {
@@ -157,6 +369,7 @@ def create_schedule(payload: dict) -> Dict[str, Any]:
         "shifts_assigned": 0,
         "total_labor_hours": 0,
         "estimated_labor_cost": 0.0,
+        "labor_budget": labor_budget,
         "coverage": {}
     }
     
@@ -198,41 +411,31 @@ def assign_shift(payload: dict) -> Dict[str, Any]:
     if shift_type not in valid_shift_types:
         return {"success": False, "error": f"Invalid shift type: {shift_type}"}
     
-    # Get shift hours
-    start_hour, end_hour = _get_shift_hours(shift_type)
-    duration_hours = end_hour - start_hour
+    shift_day = _parse_day(shift_date)
+    if shift_day is None:
+        return {"success": False, "error": "Invalid date format (use YYYY-MM-DD)"}
     
     employee = _employees[restaurant_id][employee_id]
-    hourly_rate = employee["hourly_rate"]
-    shift_cost = duration_hours * hourly_rate
-    
-    shift_id = f"SHIFT_{restaurant_id}_{shift_date}_{employee_id}_{uuid.uuid4().hex[:4].upper()}"
+    schedule = _schedules[restaurant_id][schedule_id]
     
-    shift = {
-        "shift_id": shift_id,
-        "schedule_id": schedule_id,
-        "employee_id": employee_id,
-        "employee_name": employee["name"],
-        "role": employee["role"],
-        "shift_date": shift_date,
-        "shift_type": shift_type,
-        "start_time": f"{start_hour:02d}:00",
-        "end_time": f"{end_hour:02d}:00",
-        "duration_hours": duration_hours,
-        "hourly_rate": hourly_rate,
-        "shift_cost": shift_cost,
-        "status": ShiftStatus.ASSIGNED.value,
-        "created_at": datetime.now().isoformat(),
-        "notes": payload.get("notes", "")
-    }
+    # Conflict, availability and labor checks
+    start, end = _shift_interval(shift_day, shift_type)
+    shifts = _employee_shifts(restaurant_id).get(employee_id)
+    if shifts is not None:
+        conflict = shifts.conflict(start, end)
+        if conflict:
+            return {"success": False, "error": f"Employee {employee_id} already has overlapping shift {conflict}"}
+        max_hours = employee.get("max_hours_per_week", DEFAULT_MAX_HOURS_PER_WEEK)
+        if shifts.hours_in_week(start) + end - start > max_hours:
+            return {"success": False, "error": f"Shift would take {employee_id} over {max_hours} hours that week"}
+    if not _is_available(_availability[restaurant_id].get(employee_id), shift_day, shift_type):
+        return {"success": False, "error": f"Employee {employee_id} is not available for a {shift_type} shift on {shift_day.isoformat()}"}
+    budget = schedule.get("labor_budget")
+    if budget is not None and schedule["estimated_labor_cost"] + (end - start) * employee["hourly_rate"] > budget:
+        return {"success": False, "error": f"Shift would exceed the schedule labor budget of {budget}"}
     
-    _shifts[restaurant_id][shift_id] = shift
-    
-    # Update schedule
-    schedule = _schedules[restaurant_id][schedule_id]
-    schedule["shifts_assigned"] += 1
-    schedule["total_labor_hours"] += duration_hours
-    schedule["estimated_labor_cost"] += shift_cost
+    shift = _book_shift(restaurant_id, schedule, employee, shift_day, shift_type, employee["role"], payload.get("notes", ""))
+    shift_id = shift["shift_id"]
     
     _shift_history[restaurant_id].append({
         "action": "shift_assigned",
@@ -245,10 +448,10 @@ def assign_shift(payload: dict) -> Dict[str, Any]:
         "success": True,
         "shift_id": shift_id,
         "employee": employee["name"],
-        "date": shift_date,
+        "date": shift["shift_date"],
         "shift_type": shift_type,
-        "hours": duration_hours,
-        "cost": shift_cost
+        "hours": shift["duration_hours"],
+        "cost": shift["shift_cost"]
     }
 
 def update_shift(payload: dict) -> Dict[str, Any]:
@@ -268,27 +471,43 @@ def update_shift(payload: dict) -> Dict[str, Any]:
     
     shift = _shifts[restaurant_id][shift_id]
     
+    # Validate changes, then move the shift in the employee's interval index
+    new_status = payload.get("status", shift["status"])
+    if new_status not in [s.value for s in ShiftStatus]:
+        return {"success": False, "error": f"Invalid status: {new_status}"}
+    new_shift_type = payload.get("shift_type", shift["shift_type"])
+    if new_shift_type not in [s.value for s in ShiftType]:
+        new_shift_type = shift["shift_type"]
+    
+    shift_day = _parse_day(shift["shift_date"])
+    if shift_day is not None:
+        shifts = _employee_shifts(restaurant_id).setdefault(shift["employee_id"], EmployeeShifts())
+        old_start, old_end = _shift_interval(shift_day, shift["shift_type"])
+        was_active = shift["status"] != ShiftStatus.CANCELLED.value
+        if was_active:
+            shifts.remove(old_start, shift_id)
+        if new_status != ShiftStatus.CANCELLED.value:
+            start, end = _shift_interval(shift_day, new_shift_type)
+            conflict = shifts.conflict(start, end)
+            if conflict:
+                if was_active:
+                    shifts.add(old_start, old_end, shift_id)
+                return {"success": False, "error": f"Employee {shift['employee_id']} already has overlapping shift {conflict}"}
+            shifts.add(start, end, shift_id)
+    
     # Update fields
-    if "status" in payload:
-        new_status = payload["status"]
-        if new_status in [s.value for s in ShiftStatus]:
-            shift["status"] = new_status
-        else:
-            return {"success": False, "error": f"Invalid status: {new_status}"}
+    shift["status"] = new_status
     
     if "notes" in payload:
         shift["notes"] = payload["notes"]
     
-    if "shift_type" in payload:
-        new_shift_type = payload["shift_type"]
-        valid_types = [s.value for s in ShiftType]
-        if new_shift_type in valid_types:
-            start_hour, end_hour = _get_shift_hours(new_shift_type)
-            shift["shift_type"] = new_shift_type
-            shift["start_time"] = f"{start_hour:02d}:00"
-            shift["end_time"] = f"{end_hour:02d}:00"
-            shift["duration_hours"] = end_hour - start_hour
-            shift["shift_cost"] = shift["duration_hours"] * shift["hourly_rate"]
+    if new_shift_type != shift["shift_type"]:
+        start_hour, end_hour = _get_shift_hours(new_shift_type)
+        shift["shift_type"] = new_shift_type
+        shift["start_time"] = f"{start_hour:02d}:00"
+        shift["end_time"] = f"{end_hour:02d}:00"
+        shift["duration_hours"] = end_hour - start_hour
+        shift["shift_cost"] = shift["duration_hours"] * shift["hourly_rate"]
     
     _shift_history[restaurant_id].append({
         "action": "shift_updated",
@@ -455,30 +674,407 @@ def generate_schedule_report(payload: dict) -> Dict[str, Any]:
         "recent_changes": _shift_history[restaurant_id][-5:]
     }
 
+def set_availability(payload: dict) -> Dict[str, Any]:
+    """Set the weekdays and shift types an employee works and their dates off."""
+    required = ["employee_id"]
+    is_valid, error = _validate_params(payload, required)
+    if not is_valid:
+        return {"success": False, "error": error}
+    
+    restaurant_id = payload.get("restaurant_id", "REST_DEFAULT")
+    employee_id = payload.get("employee_id")
+    
+    _initialize_restaurant(restaurant_id)
+    
+    if employee_id not in _employees[restaurant_id]:
+        return {"success": False, "error": f"Employee {employee_id} not found"}
+    
+    availability, error = _normalize_availability(payload)
+    if error:
+        return {"success": False, "error": error}
+    _availability[restaurant_id][employee_id] = availability
+    
+    return {
+        "success": True,
+        "employee_id": employee_id,
+        "availability": availability
+    }
+
+def _upsert_employees(restaurant_id: str, records: List[Dict[str, Any]]) -> str:
+    """Add or update employees from auto_schedule's `employees`; returns an error or ''."""
+    valid_roles = [r.value for r in EmployeeRole]
+    for record in records:
+        employee_id = record.get("employee_id")
+        if not employee_id:
+            return "Each employee needs an employee_id"
+        employee = _employees[restaurant_id].get(employee_id)
+        if employee is None:
+            if record.get("role") is None or record.get("hourly_rate") is None:
+                return f"New employee {employee_id} needs a role and hourly_rate"
+            employee = {
+                "employee_id": employee_id,
+                "name": employee_id,
+                "hired_date": datetime.now().isoformat(),
+                "status": "active",
+                "max_hours_per_week": DEFAULT_MAX_HOURS_PER_WEEK,
+                "min_hours_per_week": 0,
+                "certifications": [],
+                "notes": ""
+            }
+        roles = [record.get("role", employee.get("role"))] + list(record.get("roles", employee.get("roles", [])))
+        invalid = [r for r in roles if r not in valid_roles]
+        if invalid:
+            return f"Invalid role for {employee_id}: {invalid[0]}"
+        for field in ("name", "role", "roles", "hourly_rate", "max_hours_per_week", "status"):
+            if field in record:
+                employee[field] = record[field]
+        _employees[restaurant_id][employee_id] = employee
+    return ""
+
+def _forecast_staffing(forecasts: Any, shift_share: Dict[str, float]) -> Tuple[Dict[Tuple[str, str, str], int], str]:
+    """Staff per (date, shift type, role) from DEMAND_FORECAST forecast_demand output."""
+    if isinstance(forecasts, dict):
+        forecasts = forecasts.get("forecasts", [])
+    valid_shift_types = [s.value for s in ShiftType]
+    invalid = [s for s in shift_share if s not in valid_shift_types]
+    if invalid:
+        return {}, f"Invalid shift type: {invalid[0]}"
+    needed = {}
+    for forecast in forecasts:
+        day = _parse_day(forecast.get("date"))
+        if day is None or forecast.get("forecasted_covers") is None:
+            return {}, "Each forecast needs a date and forecasted_covers"
+        for shift_type, share in shift_share.items():
+            covers = forecast["forecasted_covers"] * share
+            for role, (covers_per_staff, minimum) in COVERS_PER_STAFF.items():
+                needed[(day.isoformat(), shift_type, role)] = max(minimum, math.ceil(covers / covers_per_staff))
+    return needed, ""
+
+def _demand_slots(payload: dict, schedule: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], str]:
+    """Shift slots to fill from `forecasts` and `demand`; explicit demand wins on overlap."""
+    if payload.get("demand") is None and payload.get("forecasts") is None:
+        return [], "Missing required parameter: demand (or forecasts)"
+    
+    needed = {}
+    if payload.get("forecasts") is not None:
+        needed, error = _forecast_staffing(payload["forecasts"], payload.get("forecast_shifts", FORECAST_SHIFT_SHARE))
+        if error:
+            return [], error
+    
+    valid_shift_types = [s.value for s in ShiftType]
+    valid_roles = [r.value for r in EmployeeRole]
+    for entry in payload.get("demand") or []:
+        day = _parse_day(entry.get("date"))
+        if day is None:
+            return [], "Invalid date format in demand (use YYYY-MM-DD)"
+        shift_type = entry.get("shift_type")
+        if shift_type not in valid_shift_types:
+            return [], f"Invalid shift type: {shift_type}"
+        roles = entry.get("roles") or {entry.get("role"): entry.get("count", 1)}
+        for role, count in roles.items():
+            if role not in valid_roles:
+                return [], f"Invalid role: {role}"
+            if not isinstance(count, int) or count < 0:
+                return [], f"Staff count must be a non-negative integer: {count}"
+            needed[(day.isoformat(), shift_type, role)] = count
+    
+    first = datetime.fromisoformat(schedule["start_date"]).date()
+    last = datetime.fromisoformat(schedule["end_date"]).date()
+    slots = []
+    for (day_str, shift_type, role), count in sorted(needed.items()):
+        day = date.fromisoformat(day_str)
+        if not first <= day <= last:
+            return [], f"Demand on {day_str} is outside the schedule period"
+        if count:
+            start, end = _shift_interval(day, shift_type)
+            slots.append({"day": day, "shift_type": shift_type, "role": role, "needed": count,
+                          "start": start, "end": end})
+    return slots, ""
+
+def _independent_groups(candidates: List[List[Tuple[int, str]]]) -> List[List[int]]:
+    """Partition slot indices into groups that share no candidate employee."""
+    parent = list(range(len(candidates)))
+    
+    def find(k):
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+    
+    first_slot = {}
+    for k, row in enumerate(candidates):
+        for _, employee_id in row:
+            other = first_slot.setdefault(employee_id, k)
+            parent[find(k)] = find(other)
+    groups = {}
+    for k in range(len(candidates)):
+        groups.setdefault(find(k), []).append(k)
+    return list(groups.values())
+
+def _greedy_roster(slots: List[Dict[str, Any]], candidates: List[List[Tuple[int, str]]],
+                   caps: Dict[str, int], index: Dict[str, EmployeeShifts],
+                   budget: Optional[int]) -> List[List[str]]:
+    """Fill the scarcest slots first, each with its cheapest free eligible employees."""
+    booked = {}
+    spent = 0
+    assignment = [[] for _ in slots]
+    order = sorted(range(len(slots)), key=lambda k: (len(candidates[k]) - slots[k]["needed"], slots[k]["start"]))
+    for k in order:
+        slot = slots[k]
+        start, end = slot["start"], slot["end"]
+        for cost, employee_id in candidates[k]:
+            if len(assignment[k]) == slot["needed"]:
+                break
+            if budget is not None and spent + cost > budget:
+                break
+            shifts = booked.get(employee_id)
+            if shifts is None:
+                existing = index.get(employee_id)
+                shifts = booked[employee_id] = existing.copy() if existing else EmployeeShifts()
+            if shifts.conflict(start, end) or shifts.hours_in_week(start) + end - start > caps[employee_id]:
+                continue
+            shifts.add(start, end)
+            assignment[k].append(employee_id)
+            spent += cost
+    return assignment
+
+def _cp_sat_roster(slots: List[Dict[str, Any]], candidates: List[List[Tuple[int, str]]],
+                   caps: Dict[str, int], index: Dict[str, EmployeeShifts], budget: Optional[int],
+                   hint: List[List[str]], time_limit: float) -> Optional[Tuple[List[List[str]], str]]:
+    """Minimise shortfall, then labor cost, with CP-SAT; None if it finds no solution in time."""
+    model = cp_model.CpModel()
+    # Well above the cost of any one shift, so covering a head outweighs labor savings
+    penalty = 10 * max((c for row in candidates for c, _ in row), default=1)
+    variables = []
+    by_employee = {}
+    labor = []
+    shortfalls = []
+    for k, slot in enumerate(slots):
+        chosen = set(hint[k])
+        row = []
+        for cost, employee_id in candidates[k]:
+            var = model.NewBoolVar(f"x{k}_{employee_id}")
+            model.AddHint(var, employee_id in chosen)
+            row.append((employee_id, var))
+            by_employee.setdefault(employee_id, []).append((slot["start"], slot["end"], var))
+            labor.append(cost * var)
+        shortfall = model.NewIntVar(0, slot["needed"], f"short{k}")
+        # Hinting the shortfall too makes the greedy roster a complete first solution, so the
+        # search starts at its objective instead of spending the time limit rediscovering it
+        model.AddHint(shortfall, slot["needed"] - len(chosen))
+        model.Add(sum(var for _, var in row) + shortfall == slot["needed"])
+        shortfalls.append(shortfall)
+        variables.append(row)
+    
+    for employee_id, entries in by_employee.items():
+        entries.sort(key=lambda e: e[0])
+        weeks = {}
+        for i, (start, end, var) in enumerate(entries):
+            for other_start, _, other in entries[i + 1:]:
+                if other_start >= end:
+                    break
+                model.AddBoolOr([var.Not(), other.Not()])
+            weeks.setdefault(_week(start), []).append((end - start) * var)
+        existing = index.get(employee_id)
+        for week, hours in weeks.items():
+            booked = existing.week_hours.get(week, 0) if existing else 0
+            model.Add(sum(hours) <= caps[employee_id] - booked)
+    if budget is not None:
+        model.Add(sum(labor) <= budget)
+    model.Minimize(sum(labor) + penalty * sum(shortfalls))
+    
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.relative_gap_limit = SOLVER_GAP
+    solver.parameters.linearization_level = 2  # the LP relaxation of a roster is nearly tight
+    solver.parameters.num_workers = os.cpu_count() or 1
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+    assignment = [[employee_id for employee_id, var in row if solver.Value(var)] for row in variables]
+    return assignment, "optimal" if status == cp_model.OPTIMAL else "feasible"
+
+def auto_schedule(payload: dict) -> Dict[str, Any]:
+    """Fill a schedule with a cost-minimal, conflict-free roster for the demanded shifts."""
+    required = ["schedule_id"]
+    is_valid, error = _validate_params(payload, required)
+    if not is_valid:
+        return {"success": False, "error": error}
+    
+    restaurant_id = payload.get("restaurant_id", "REST_DEFAULT")
+    schedule_id = payload.get("schedule_id")
+    solver = payload.get("solver", "auto")
+    time_limit = float(payload.get("time_limit_seconds", SOLVER_TIME_LIMIT))
+    
+    _initialize_restaurant(restaurant_id)
+    
+    if schedule_id not in _schedules[restaurant_id]:
+        return {"success": False, "error": f"Schedule {schedule_id} not found"}
+    if solver not in SOLVERS:
+        return {"success": False, "error": f"Invalid solver: {solver} (use one of {', '.join(SOLVERS)})"}
+    if solver == "cp_sat" and not HAS_ORTOOLS:
+        return {"success": False, "error": "The cp_sat solver needs OR-Tools (pip install ortools)"}
+    schedule = _schedules[restaurant_id][schedule_id]
+    
+    error = _upsert_employees(restaurant_id, payload.get("employees", []))
+    if error:
+        return {"success": False, "error": error}
+    for employee_id, entry in (payload.get("availability") or {}).items():
+        if employee_id not in _employees[restaurant_id]:
+            return {"success": False, "error": f"Employee {employee_id} not found"}
+        availability, error = _normalize_availability(entry)
+        if error:
+            return {"success": False, "error": error}
+        _availability[restaurant_id][employee_id] = availability
+    
+    slots, error = _demand_slots(payload, schedule)
+    if error:
+        return {"success": False, "error": error}
+    
+    budget = payload.get("labor_budget", schedule.get("labor_budget"))
+    remaining = None if budget is None else max(0, int(round((budget - schedule["estimated_labor_cost"]) * 100)))
+    
+    # Eligible (cost in cents, employee) per slot: role, availability and what is already booked
+    employees = _employees[restaurant_id]
+    index = _employee_shifts(restaurant_id)
+    availability = _availability[restaurant_id]
+    by_role = {}
+    caps = {}
+    for employee_id, employee in employees.items():
+        if employee.get("status", "active") != "active":
+            continue
+        caps[employee_id] = employee.get("max_hours_per_week", DEFAULT_MAX_HOURS_PER_WEEK)
+        for role in _employee_roles(employee):
+            by_role.setdefault(role, []).append(employee)
+    candidates = []
+    for slot in slots:
+        start, end = slot["start"], slot["end"]
+        eligible = []
+        for employee in by_role.get(slot["role"], []):
+            employee_id = employee["employee_id"]
+            shifts = index.get(employee_id)
+            if shifts is not None and (shifts.conflict(start, end)
+                                       or shifts.hours_in_week(start) + end - start > caps[employee_id]):
+                continue
+            if end - start > caps[employee_id]:
+                continue
+            if not _is_available(availability.get(employee_id), slot["day"], slot["shift_type"]):
+                continue
+            eligible.append((int(round((end - start) * employee["hourly_rate"] * 100)), employee_id))
+        eligible.sort()
+        candidates.append(eligible)
+    
+    started = perf_counter()
+    assignment = _greedy_roster(slots, candidates, caps, index, remaining)
+    used, status = "greedy", "heuristic"
+    if solver != "greedy" and HAS_ORTOOLS and slots:
+        # Slots that share no employee (usually one group per role) are solved separately,
+        # unless a labor budget ties them together
+        groups = [list(range(len(slots)))] if remaining is not None else _independent_groups(candidates)
+        sizes = [sum(len(candidates[k]) for k in group) + 1 for group in groups]
+        deadline, left = started + time_limit, sum(sizes)
+        statuses = []
+        for group, size in zip(groups, sizes):
+            # Each group gets its share of the time still left, so unused time rolls over
+            share = max(0.0, deadline - perf_counter()) * size / left
+            left -= size
+            solved = _cp_sat_roster([slots[k] for k in group], [candidates[k] for k in group], caps, index,
+                                    remaining, [assignment[k] for k in group], share)
+            if solved is None:
+                statuses.append("heuristic")
+                continue
+            for k, employee_ids in zip(group, solved[0]):
+                assignment[k] = employee_ids
+            statuses.append(solved[1])
+        if "heuristic" in statuses:
+            logger.warning(f"CP-SAT found no roster for part of {schedule_id} in {time_limit}s; kept the greedy one there")
+        if set(statuses) != {"heuristic"}:
+            used = "cp_sat"
+            status = "optimal" if set(statuses) == {"optimal"} else "feasible"
+    solve_seconds = perf_counter() - started
+    
+    roster = []
+    shortfall = []
+    for slot, employee_ids in zip(slots, assignment):
+        for employee_id in employee_ids:
+            roster.append(_book_shift(restaurant_id, schedule, employees[employee_id], slot["day"],
+                                      slot["shift_type"], slot["role"], "auto_schedule"))
+        if len(employee_ids) < slot["needed"]:
+            shortfall.append({
+                "date": slot["day"].isoformat(),
+                "shift_type": slot["shift_type"],
+                "role": slot["role"],
+                "needed": slot["needed"],
+                "assigned": len(employee_ids)
+            })
+    
+    total_cost = sum(s["shift_cost"] for s in roster)
+    required_staff = sum(slot["needed"] for slot in slots)
+    
+    _shift_history[restaurant_id].append({
+        "action": "auto_scheduled",
+        "schedule_id": schedule_id,
+        "shifts": len(roster),
+        "solver": used,
+        "timestamp": datetime.now().isoformat()
+    })
+    
+    return {
+        "success": True,
+        "schedule_id": schedule_id,
+        "solver": used,
+        "status": status,
+        "solve_seconds": round(solve_seconds, 3),
+        "shifts_assigned": len(roster),
+        "total_labor_hours": sum(s["duration_hours"] for s in roster),
+        "total_cost": round(total_cost, 2),
+        "labor_budget": budget,
+        "within_budget": budget is None or schedule["estimated_labor_cost"] <= budget + 1e-6,
+        "coverage": {
+            "required": required_staff,
+            "assigned": len(roster),
+            "fill_rate": round(len(roster) / required_staff, 4) if required_staff else 1.0,
+            "shortfall": shortfall
+        },
+        "roster": [{k: s[k] for k in ("shift_id", "employee_id", "employee_name", "role", "shift_date",
+                                       "shift_type", "start_time", "end_time", "duration_hours", "shift_cost")}
+                   for s in roster]
+    }
+
 def execute_plugin(action: str, payload: dict) -> Dict[str, Any]:
     """Main plugin execution function."""
     try:
         action_lower = action.lower()
         
         if action_lower == "create_schedule":
-            return create_schedule(payload)
+            result = create_schedule(payload)
         elif action_lower == "assign_shift":
-            return assign_shift(payload)
+            result = assign_shift(payload)
         elif action_lower == "update_shift":
-            return update_shift(payload)
+            result = update_shift(payload)
         elif action_lower == "get_schedule":
-            return get_schedule(payload)
+            result = get_schedule(payload)
         elif action_lower == "track_labor_hours":
-            return track_labor_hours(payload)
+            result = track_labor_hours(payload)
         elif action_lower == "generate_schedule_report":
-            return generate_schedule_report(payload)
+            result = generate_schedule_report(payload)
+        elif action_lower == "set_availability":
+            result = set_availability(payload)
+        elif action_lower == "auto_schedule":
+            result = auto_schedule(payload)
         else:
             return {"success": False, "error": f"Unknown action: {action}"}
-    
+        
     except Exception as e:
         logger.error(f"Plugin error: {str(e)}", exc_info=True)
         return {"success": False, "error": str(e)}
 
+    try:
+        _state.persist()
+    except Exception as e:
+        logger.error(f"Failed to persist plugin state: {str(e)}", exc_info=True)
+    return result
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         try:
@@ -16,6 +16,12 @@ import uuid
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+try:
+    from stage7_state_store import PluginState
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'shared', 'python', 'lib')))
+    from stage7_state_store import PluginState
+
 class TableStatus(Enum):
     AVAILABLE = "available"
     OCCUPIED = "occupied"
@@ -38,6 +44,15 @@ _floor_layouts = {}
 _turnover_history = {}
 _server_assignments = {}
 
+# Persisted across calls; see shared/python/lib/stage7_state_store.py
+_state = PluginState("TABLE_MANAGEMENT", {
+    "tables": _tables,
+    "table_assignments": _table_assignments,
+    "floor_layouts": _floor_layouts,
+    "turnover_history": _turnover_history,
+    "server_assignments": _server_assignments
+})
+
 def _get_input(inputs: dict, key: str, aliases: list = [], default=None):
     """Safely retrieve input values with alias fallback."""
     val = inputs.get(key)
@@ -61,7 +76,7 @@ def _validate_params(payload: dict, required_fields: List[str]) -> Tuple[bool, s
 
 def _initialize_restaurant(restaurant_id: str) -> None:
     """Initialize restaurant table structures."""
-    if restaurant_id not in _tables:
+    if restaurant_id not in _tables and not _state.restore(restaurant_id):
         _tables[restaurant_id] = _create_floor_tables()
         _table_assignments[restaurant_id] = {}
         _floor_layouts[restaurant_id] = _create_floor_layout()
@@ -463,24 +478,30 @@ def execute_plugin(action: str, payload: dict) -> Dict[str, Any]:
         action_lower = action.lower()
         
         if action_lower == "assign_table":
-            return assign_table(payload)
+            result = assign_table(payload)
         elif action_lower == "reassign_table":
-            return reassign_table(payload)
+            result = reassign_table(payload)
         elif action_lower == "release_table":
-            return release_table(payload)
+            result = release_table(payload)
         elif action_lower == "check_table_status":
-            return check_table_status(payload)
+            result = check_table_status(payload)
         elif action_lower == "get_available_tables":
-            return get_available_tables(payload)
+            result = get_available_tables(payload)
         elif action_lower == "generate_floor_status":
-            return generate_floor_status(payload)
+            result = generate_floor_status(payload)
         else:
             return {"success": False, "error": f"Unknown action: {action}"}
-    
+        
     except Exception as e:
         logger.error(f"Plugin error: {str(e)}", exc_info=True)
         return {"success": False, "error": str(e)}
 
+    try:
+        _state.persist()
+    except Exception as e:
+        logger.error(f"Failed to persist plugin state: {str(e)}", exc_info=True)
+    return result
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         try:
@@ -11,6 +11,7 @@ import { ensurePythonDependencies, validatePythonOutput } from './pythonPluginHe
 import { ContainerExecutionRequest, ContainerPluginManifest } from '../types/containerTypes';
 import { createPluginOutputError } from './errorHelper';
 import { validateAndStandardizeInputs } from './validator';
+import { getPythonWorkerPool, isPythonWorkerPoolEnabled, shutdownPythonWorkerPools, PythonWorkerStartupError } from './pythonWorkerPool';
 
 interface ExecutionContext {
     inputValues: Map<string, InputValue>;
@@ -324,19 +325,48 @@ export class PluginExecutor {
             // Convert to [key, value] pairs format for Python plugins
             const inputsPairs = Object.entries(inputsObject);
             const inputsJsonString = JSON.stringify(inputsPairs);
+            const pythonEnv = {
+                ...environment.env,
+                PYTHONPATH: `${pluginRootPath}:${path.join(__dirname, '..', '..', '..', '..', 'shared', 'python')}`,
+                PYTHONUNBUFFERED: '1',
+                PYTHONDONTWRITEBYTECODE: '1',
+                S7_PLUGIN_CREDENTIALS: JSON.stringify(environment.credentials || [])
+            };
+            const timeoutMs = pluginDefinition.security?.sandboxOptions?.timeout || 60000;
+
+            const pool = isPythonWorkerPoolEnabled()
+                ? getPythonWorkerPool(pythonExecutable, mainFilePath, pluginRootPath, pythonEnv)
+                : null;
+            if (pool?.usable) {
+                // Reuse a warm interpreter that has already imported the plugin module. If the
+                // worker host cannot load this entry point, the pool remembers it and we spawn instead.
+                try {
+                    const { exitCode, stdout, stderr } = await pool.execute(inputsJsonString, pythonEnv, timeoutMs);
+                    if (exitCode !== 0) {
+                        const error = new Error(`Python plugin exited with code ${exitCode}. ${stderr ? `Stderr: ${stderr}` : `Stdout: ${stdout}`}`);
+                        (error as any).stdout = stdout;
+                        (error as any).stderr = stderr;
+                        throw error;
+                    }
+                    if (stderr) {
+                        console.warn(`[${trace_id}] ${source_component}: Raw stderr from pooled Python plugin ${pluginDefinition.verb} v${pluginDefinition.version}:\n${stderr}`);
+                    }
+                    return validatePythonOutput(stdout, pluginDefinition, trace_id);
+                } catch (error) {
+                    if (!(error instanceof PythonWorkerStartupError)) {
+                        throw error;
+                    }
+                    console.warn(`[${trace_id}] ${source_component}: Worker pool cannot serve ${pluginDefinition.verb} v${pluginDefinition.version}; spawning it directly from now on. ${error.message}`);
+                }
+            }
 
             return new Promise<PluginOutput[]>((resolve, reject) => {
-                                        const pythonProcess = spawn(pythonExecutable, [mainFilePath, pluginRootPath], {
-                                            cwd: pluginRootPath,
-                                            env: {
-                                                ...environment.env,
-                                                PYTHONPATH: `${pluginRootPath}:${path.join(__dirname, '..', '..', '..', '..', 'shared', 'python')}`,
-                                                PYTHONUNBUFFERED: '1',
-                                                PYTHONDONTWRITEBYTECODE: '1',
-                                                S7_PLUGIN_CREDENTIALS: JSON.stringify(environment.credentials || [])
-                                            },
-                                            timeout: pluginDefinition.security?.sandboxOptions?.timeout || 60000
-                                        });                let stdout = '';
+                const pythonProcess = spawn(pythonExecutable, [mainFilePath, pluginRootPath], {
+                    cwd: pluginRootPath,
+                    env: pythonEnv,
+                    timeout: timeoutMs
+                });
+                let stdout = '';
                 let stderr = '';
 
                 pythonProcess.stdout.on('data', (data) => {
@@ -528,6 +558,13 @@ export class PluginExecutor {
         }
     }
 
+    /**
+     * Stops all pooled Python workers. Called during CapabilitiesManager shutdown.
+     */
+    public shutdown(): void {
+        shutdownPythonWorkerPools();
+    }
+
     private inferResultType(value: any): PluginParameterType {
         if (typeof value === 'string') return PluginParameterType.STRING;
         if (typeof value === 'number') return PluginParameterType.NUMBER;
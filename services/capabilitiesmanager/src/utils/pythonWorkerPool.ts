@@ -0,0 +1,401 @@
+import path from 'path';
+import * as crypto from 'crypto';
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+
+/**
+ * PythonWorkerPool - keeps long-lived Python worker hosts per plugin venv.
+ *
+ * Each worker runs shared/python/lib/plugin_worker_host.py, which imports a plugin's
+ * entry module once and then serves many calls over a length-prefixed JSON protocol
+ * on stdin/stdout. This removes interpreter startup and import cost from every step.
+ *
+ * Workers are started with the stable part of the environment only; the full env of
+ * each step (including credentials) is sent with the call and applied just for that
+ * call. Pooled plugins must therefore read per-call settings from os.environ inside
+ * main(), not at import time.
+ */
+
+const FRAME_HEADER_BYTES = 4;
+
+export const WORKER_HOST_PATH = path.resolve(__dirname, '../../../../shared/python/lib/plugin_worker_host.py');
+
+export interface PythonWorkerPoolOptions {
+    poolSize: number;
+    maxCallsPerWorker: number;
+    maxRssMb: number;
+    startupTimeoutMs: number;
+}
+
+export interface PythonWorkerResult {
+    exitCode: number;
+    stdout: string;
+    stderr: string;
+}
+
+export function isPythonWorkerPoolEnabled(): boolean {
+    return (process.env.PYTHON_WORKER_POOL_ENABLED || 'false').toLowerCase() === 'true';
+}
+
+export function getPythonWorkerPoolOptions(): PythonWorkerPoolOptions {
+    const intFromEnv = (name: string, fallback: number): number => {
+        const parsed = parseInt(process.env[name] || '', 10);
+        return Number.isFinite(parsed) && parsed > 0 ? parsed : fallback;
+    };
+    return {
+        poolSize: intFromEnv('PYTHON_WORKER_POOL_SIZE', 2),
+        maxCallsPerWorker: intFromEnv('PYTHON_WORKER_MAX_CALLS', 200),
+        maxRssMb: intFromEnv('PYTHON_WORKER_MAX_RSS_MB', 512),
+        startupTimeoutMs: intFromEnv('PYTHON_WORKER_STARTUP_TIMEOUT_MS', 30000),
+    };
+}
+
+/**
+ * Raised when a worker host cannot import its plugin or never reports ready.
+ * Callers should fall back to spawning the plugin directly.
+ */
+export class PythonWorkerStartupError extends Error {
+    constructor(message: string) {
+        super(message);
+        this.name = 'PythonWorkerStartupError';
+    }
+}
+
+interface PendingCall {
+    id: string;
+    resolve: (result: PythonWorkerResult) => void;
+    reject: (error: Error) => void;
+    timer: NodeJS.Timeout;
+}
+
+class PythonWorker {
+    public calls = 0;
+    public busy = false;
+    public retired = false;
+    public lastRssKb = 0;
+    public readonly ready: Promise<void>;
+
+    private process: ChildProcessWithoutNullStreams;
+    private buffer: Buffer = Buffer.alloc(0);
+    private stderr = '';
+    private pending: PendingCall | null = null;
+    private onReady!: () => void;
+    private onReadyFailed!: (error: Error) => void;
+    private isReady = false;
+
+    constructor(
+        pythonExecutable: string,
+        mainFilePath: string,
+        pluginRootPath: string,
+        env: NodeJS.ProcessEnv,
+        startupTimeoutMs: number,
+        private readonly onExit: (worker: PythonWorker) => void
+    ) {
+        this.ready = new Promise<void>((resolve, reject) => {
+            this.onReady = resolve;
+            this.onReadyFailed = (error: Error) => reject(new PythonWorkerStartupError(error.message));
+        });
+
+        this.process = spawn(pythonExecutable, [WORKER_HOST_PATH, mainFilePath, pluginRootPath], {
+            cwd: pluginRootPath,
+            env,
+        });
+
+        const startupTimer = setTimeout(() => {
+            if (!this.isReady) {
+                this.onReadyFailed(new Error(`Python worker did not become ready within ${startupTimeoutMs}ms. Stderr: ${this.stderr}`));
+                this.kill();
+            }
+        }, startupTimeoutMs);
+        this.ready.then(() => clearTimeout(startupTimer), () => clearTimeout(startupTimer));
+
+        this.process.stdout.on('data', (chunk: Buffer) => this.handleData(chunk));
+        this.process.stderr.on('data', (chunk: Buffer) => {
+            this.stderr += chunk.toString();
+        });
+        this.process.on('error', (err) => this.fail(new Error(`Python worker process error: ${err.message}`)));
+        this.process.on('close', (code) => {
+            this.retired = true;
+            this.fail(new Error(`Python worker exited with code ${code === null ? 'null (terminated by signal)' : code}. Stderr: ${this.stderr}`));
+            this.onExit(this);
+        });
+    }
+
+    call(id: string, input: string, env: NodeJS.ProcessEnv, timeoutMs: number): Promise<PythonWorkerResult> {
+        this.busy = true;
+        this.stderr = '';
+        return new Promise<PythonWorkerResult>((resolve, reject) => {
+            const timer = setTimeout(() => {
+                this.fail(new Error(`Python worker call timed out after ${timeoutMs}ms`));
+                this.kill();
+            }, timeoutMs);
+            this.pending = { id, resolve, reject, timer };
+            this.writeFrame({ id, input, env });
+        });
+    }
+
+    shutdown(): void {
+        if (this.retired) {
+            return;
+        }
+        this.retired = true;
+        try {
+            this.writeFrame({ id: 'shutdown', shutdown: true });
+            this.process.stdin.end();
+        } catch {
+            this.kill();
+        }
+    }
+
+    kill(): void {
+        this.retired = true;
+        if (this.process.exitCode === null && !this.process.killed) {
+            this.process.kill('SIGKILL');
+        }
+    }
+
+    private writeFrame(message: object): void {
+        const body = Buffer.from(JSON.stringify(message), 'utf8');
+        const header = Buffer.alloc(FRAME_HEADER_BYTES);
+        header.writeUInt32BE(body.length, 0);
+        this.process.stdin.write(Buffer.concat([header, body]));
+    }
+
+    private handleData(chunk: Buffer): void {
+        this.buffer = Buffer.concat([this.buffer, chunk]);
+        while (this.buffer.length >= FRAME_HEADER_BYTES) {
+            const length = this.buffer.readUInt32BE(0);
+            if (this.buffer.length < FRAME_HEADER_BYTES + length) {
+                return;
+            }
+            const body = this.buffer.subarray(FRAME_HEADER_BYTES, FRAME_HEADER_BYTES + length).toString('utf8');
+            this.buffer = this.buffer.subarray(FRAME_HEADER_BYTES + length);
+
+            let message: any;
+            try {
+                message = JSON.parse(body);
+            } catch (err: any) {
+                this.fail(new Error(`Malformed frame from Python worker: ${err.message}`));
+                this.kill();
+                return;
+            }
+            this.handleMessage(message);
+        }
+    }
+
+    private handleMessage(message: any): void {
+        if (!this.isReady) {
+            if (message.ready) {
+                this.isReady = true;
+                this.lastRssKb = message.rssKb || 0;
+                this.onReady();
+            } else {
+                this.onReadyFailed(new Error(`Python worker failed to load plugin: ${message.error}. Stderr: ${this.stderr}`));
+                this.kill();
+            }
+            return;
+        }
+
+        const pending = this.pending;
+        if (!pending || message.id !== pending.id) {
+            return;
+        }
+        clearTimeout(pending.timer);
+        this.pending = null;
+        this.busy = false;
+        this.calls = message.calls || this.calls + 1;
+        this.lastRssKb = message.rssKb || 0;
+        pending.resolve({ exitCode: message.exitCode, stdout: message.stdout || '', stderr: this.stderr });
+    }
+
+    private fail(error: Error): void {
+        if (!this.isReady) {
+            this.onReadyFailed(error);
+        }
+        const pending = this.pending;
+        if (pending) {
+            clearTimeout(pending.timer);
+            this.pending = null;
+            this.busy = false;
+            pending.reject(Object.assign(error, { stderr: this.stderr }));
+        }
+    }
+}
+
+export class PythonWorkerPool {
+    private workers: PythonWorker[] = [];
+    private waiters: Array<(worker: PythonWorker) => void> = [];
+    private nextCallId = 0;
+    private closed = false;
+    private startupFailed = false;
+
+    constructor(
+        private readonly pythonExecutable: string,
+        private readonly mainFilePath: string,
+        private readonly pluginRootPath: string,
+        private readonly baseEnv: NodeJS.ProcessEnv,
+        private readonly options: PythonWorkerPoolOptions
+    ) {}
+
+    /**
+     * Runs one plugin call on a pooled worker. Workers are recycled after
+     * maxCallsPerWorker calls or once their RSS exceeds maxRssMb, and killed on timeout.
+     */
+    async execute(input: string, callEnv: NodeJS.ProcessEnv, timeoutMs: number): Promise<PythonWorkerResult> {
+        if (this.startupFailed) {
+            throw new PythonWorkerStartupError(`Python worker host cannot serve ${this.mainFilePath}`);
+        }
+        const worker = await this.acquire();
+        try {
+            try {
+                await worker.ready;
+            } catch (error) {
+                if (error instanceof PythonWorkerStartupError) {
+                    this.startupFailed = true;
+                }
+                throw error;
+            }
+            const callId = String(++this.nextCallId);
+            return await worker.call(callId, input, callEnv, timeoutMs);
+        } finally {
+            this.release(worker);
+        }
+    }
+
+    /** False once a worker has failed to start; the entry point should be spawned directly from then on. */
+    get usable(): boolean {
+        return !this.startupFailed;
+    }
+
+    get size(): number {
+        return this.workers.length;
+    }
+
+    shutdown(): void {
+        this.closed = true;
+        for (const worker of this.workers) {
+            if (!worker.busy) {
+                worker.shutdown();
+            }
+        }
+        this.workers = this.workers.filter(w => w.busy);
+    }
+
+    private async acquire(): Promise<PythonWorker> {
+        const idle = this.workers.find(w => !w.busy && !w.retired);
+        if (idle) {
+            idle.busy = true;
+            return idle;
+        }
+        if (this.workers.length < this.options.poolSize) {
+            const worker = this.spawnWorker();
+            worker.busy = true;
+            return worker;
+        }
+        return new Promise<PythonWorker>(resolve => this.waiters.push(resolve));
+    }
+
+    private release(worker: PythonWorker): void {
+        if (this.closed) {
+            // Calls in flight when the pool was shut down finish normally; their worker goes with them.
+            worker.shutdown();
+        }
+        const overCallLimit = worker.calls >= this.options.maxCallsPerWorker;
+        const overRssLimit = worker.lastRssKb > this.options.maxRssMb * 1024;
+        if (!worker.retired && (overCallLimit || overRssLimit)) {
+            console.log(`PythonWorkerPool: Recycling worker for ${this.mainFilePath} after ${worker.calls} calls (rss ${Math.round(worker.lastRssKb / 1024)}MB)`);
+            worker.shutdown();
+        }
+        if (worker.retired) {
+            this.removeWorker(worker);
+            worker.busy = false;
+            const waiter = this.waiters.shift();
+            if (waiter) {
+                const replacement = this.spawnWorker();
+                replacement.busy = true;
+                waiter(replacement);
+            }
+            return;
+        }
+
+        const waiter = this.waiters.shift();
+        if (waiter) {
+            waiter(worker);
+        } else {
+            worker.busy = false;
+        }
+    }
+
+    private spawnWorker(): PythonWorker {
+        const worker = new PythonWorker(
+            this.pythonExecutable,
+            this.mainFilePath,
+            this.pluginRootPath,
+            this.baseEnv,
+            this.options.startupTimeoutMs,
+            (exited) => this.removeWorker(exited)
+        );
+        // Startup failures are surfaced through execute(); avoid unhandled rejections for idle workers.
+        worker.ready.catch(() => undefined);
+        this.workers.push(worker);
+        return worker;
+    }
+
+    private removeWorker(worker: PythonWorker): void {
+        this.workers = this.workers.filter(w => w !== worker);
+    }
+}
+
+interface PoolEntry {
+    envKey: string;
+    pool: PythonWorkerPool;
+}
+
+const pools = new Map<string, PoolEntry>();
+
+/**
+ * Per-call variables that must never be baked into a long-lived worker or its pool key.
+ * Service tokens are reissued between calls; they reach the plugin through the per-call env.
+ */
+const VOLATILE_ENV_KEYS = ['S7_PLUGIN_CREDENTIALS', 'S7_CM_TOKEN', 'S7_BRAIN_TOKEN'];
+
+function stableEnv(env: NodeJS.ProcessEnv): NodeJS.ProcessEnv {
+    const stable: NodeJS.ProcessEnv = { ...env };
+    for (const key of VOLATILE_ENV_KEYS) {
+        delete stable[key];
+    }
+    return stable;
+}
+
+function envFingerprint(env: NodeJS.ProcessEnv): string {
+    const entries = Object.keys(env).sort().map(key => [key, env[key]]);
+    return crypto.createHash('sha1').update(JSON.stringify(entries)).digest('hex');
+}
+
+/**
+ * Returns the shared pool for a plugin entry point and interpreter, creating it on first use.
+ */
+export function getPythonWorkerPool(pythonExecutable: string, mainFilePath: string, pluginRootPath: string, baseEnv: NodeJS.ProcessEnv): PythonWorkerPool {
+    const workerEnv = stableEnv(baseEnv);
+    const envKey = envFingerprint(workerEnv);
+    const key = `${pythonExecutable}::${mainFilePath}`;
+    const existing = pools.get(key);
+    if (existing && existing.envKey === envKey) {
+        return existing.pool;
+    }
+    // The stable environment changed: retire the old workers rather than letting a
+    // pool inherit whichever environment first spawned it, or keeping both alive.
+    if (existing) {
+        console.log(`PythonWorkerPool: Stable environment changed for ${mainFilePath}; replacing pool`);
+        existing.pool.shutdown();
+    }
+    const pool = new PythonWorkerPool(pythonExecutable, mainFilePath, pluginRootPath, workerEnv, getPythonWorkerPoolOptions());
+    pools.set(key, { envKey, pool });
+    return pool;
+}
+
+export function shutdownPythonWorkerPools(): void {
+    for (const entry of pools.values()) {
+        entry.pool.shutdown();
+    }
+    pools.clear();
+}
@@ -0,0 +1 @@
+# Plugin benchmarks package (run directly, not collected by pytest)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark for CONTRACT_ANALYSIS.
+
+Renders the records from TestDataGenerator.generate_contracts into contract text of
+--pages pages (about 250 words each) and times:
+
+- analyze_contract against the previous approach (one re.finditer per clause pattern
+  with context slicing, plus one re.search per risk and red-flag pattern, over three
+  lowercased copies of the text),
+- batch_analyze serially and across the process pool.
+
+    python benchmarks/benchmark_contract_analysis.py [--contracts 50] [--pages 100] [--repeat 3]
+"""
+
+import argparse
+import logging
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fixtures.generator import TestDataGenerator
+from fixtures.plugin_loader import load_plugin
+
+FILLER = ("The parties shall perform their obligations in good faith and in a workmanlike "
+          "manner consistent with industry practice and the schedules attached hereto. ")
+
+CLAUSES = [
+    "Payment. Customer shall pay each invoice within net 30 days of receipt.",
+    "Limitation of Liability. Neither party shall be liable for indirect damages.",
+    "Termination. Either party may terminate this Agreement on sixty days notice.",
+    "Confidentiality. Each party shall protect the other's proprietary information.",
+    "Warranties. Provider represents and warrants that the services conform to the specifications.",
+    "Intellectual Property. All patent and copyright rights remain with their owner.",
+    "Governing Law. This Agreement is governed by the laws of Delaware; disputes go to arbitration.",
+]
+
+RISKY_CLAUSES = [
+    "Renewal. This Agreement is subject to automatic renewal for successive one year terms.",
+    "The deliverables are provided as is and Provider disclaims all other warranties.",
+    "Provider retains a unilateral termination right exercisable at any time.",
+]
+
+
+def render_contract(record: Dict[str, Any], pages: int, index: int) -> str:
+    parties = " and ".join(record["parties"])
+    sections = [f"{record['type']} {record['contract_id']} between {parties}, valued at {record['value']}."]
+    clauses = CLAUSES + RISKY_CLAUSES[:index % (len(RISKY_CLAUSES) + 1)]
+    words_per_section = max(1, pages * 250 // len(clauses))
+    filler_words = len(FILLER.split())
+    for clause in clauses:
+        sections.append(clause + " " + FILLER * max(1, words_per_section // filler_words))
+    return "\n\n".join(sections)
+
+
+def legacy_analyze(contract: Any, text: str) -> Dict[str, Any]:
+    """The per-pattern scanning analyze_contract replaced, kept for comparison."""
+    clauses = {}
+    for clause_type, info in contract.STANDARD_CLAUSES.items():
+        for match in re.finditer(info['pattern'], text.lower()):
+            start, end = max(0, match.start() - 50), min(len(text), match.end() + 50)
+            clauses.setdefault(clause_type, text[start:end].strip())
+    lower = text.lower()
+    missing = [t for t, info in contract.STANDARD_CLAUSES.items() if not re.search(info['pattern'], lower)]
+    unusual = [p['pattern'] for p in contract.UNUSUAL_TERM_PATTERNS if re.search(p['pattern'], lower)]
+    lower = text.lower()
+    flags = [p['flag'] for p in contract.RED_FLAG_PATTERNS if re.search(p['pattern'], lower)]
+    return {'clauses': clauses, 'missing': missing, 'unusual': unusual, 'red_flags': flags}
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--contracts", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    contract = load_plugin("CONTRACT_ANALYSIS")
+    records = TestDataGenerator.generate_contracts(args.contracts)
+    texts: List[str] = [render_contract(r, args.pages, i) for i, r in enumerate(records)]
+    batch = [dict(record, contract_text=text) for record, text in zip(records, texts)]
+    size_kb = sum(len(t) for t in texts) / 1024
+
+    print(f"{len(texts)} contracts, {args.pages} pages each, {size_kb:.0f} KB total")
+    legacy = best_of(args.repeat, lambda: [legacy_analyze(contract, t) for t in texts])
+    single = best_of(args.repeat, lambda: [contract.analyze_contract({'contract_text': t}) for t in texts])
+    print(f"{'analyze (per-pattern scans)':<32} {legacy * 1000:>9.1f} ms")
+    print(f"{'analyze (single-pass scanner)':<32} {single * 1000:>9.1f} ms  {legacy / single:>5.1f}x")
+
+    serial = best_of(args.repeat, lambda: contract.batch_analyze({'contracts': batch, 'max_workers': 1}))
+    pooled_result = contract.batch_analyze({'contracts': batch, 'max_workers': args.workers})
+    pooled = best_of(args.repeat, lambda: contract.batch_analyze({'contracts': batch, 'max_workers': args.workers}))
+    print(f"{'batch_analyze serial':<32} {serial * 1000:>9.1f} ms")
+    print(f"{'batch_analyze process pool':<32} {pooled * 1000:>9.1f} ms  {serial / pooled:>5.1f}x "
+          f"({pooled_result['workers']} workers)")
+
+
+if __name__ == "__main__":
+    main()
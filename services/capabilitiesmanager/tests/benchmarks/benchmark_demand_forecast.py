@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark for DEMAND_FORECAST.
+
+Builds synthetic daily covers with a linear trend, a weekly pattern, an annual cycle and
+Gaussian noise, holds out the last --holdout days and, for each history length:
+
+- fits the Holt-Winters model (record_covers on a fresh restaurant) and times it,
+- times one incremental update with a single new day and a forecast_demand call,
+- compares holdout MAPE and RMSE with the weekday average forecast_demand used to make,
+  and times that approach (a fromisoformat parse of every record for every forecast day).
+
+    python benchmarks/benchmark_demand_forecast.py [--years 1 3 5] [--holdout 56] [--repeat 3]
+"""
+
+import argparse
+import logging
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("STAGE7_PLUGIN_STATE_BACKEND", "memory")
+
+from fixtures.plugin_loader import load_plugin
+
+WEEKLY_PATTERN = (-15, -10, -8, 0, 20, 35, 10)
+
+
+def synthetic_covers(days: int, end: date, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    start = end - timedelta(days=days - 1)
+    records = []
+    for i in range(days):
+        day = start + timedelta(days=i)
+        annual = 25 * math.sin(2 * math.pi * (day.timetuple().tm_yday - 100) / 365.25)
+        covers = 100 + 0.02 * i + WEEKLY_PATTERN[day.weekday()] + annual + rng.gauss(0, 6)
+        records.append({"date": day.isoformat(), "covers": max(0, int(round(covers)))})
+    return records
+
+
+def legacy_forecast(history: Dict[str, Any], start: date, days: int) -> List[float]:
+    """The weekday average forecast_demand replaced, kept for comparison."""
+    forecasts = []
+    for offset in range(days):
+        weekday = (start + timedelta(days=offset)).weekday()
+        same_day = [h for h in history.values() if datetime.fromisoformat(h["date"]).weekday() == weekday]
+        forecasts.append(sum(h["covers"] for h in same_day) / len(same_day) if same_day else 85)
+    return forecasts
+
+
+def errors(actual: List[Dict[str, Any]], predicted: List[float]) -> str:
+    mape = sum(abs(a["covers"] - p) / a["covers"] for a, p in zip(actual, predicted)) / len(actual)
+    rmse = math.sqrt(sum((a["covers"] - p) ** 2 for a, p in zip(actual, predicted)) / len(actual))
+    return f"MAPE {mape * 100:5.1f}%  RMSE {rmse:6.2f}"
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--holdout", type=int, default=56)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    forecast = load_plugin("DEMAND_FORECAST")
+    print(f"NumPy candidate evaluation: {'on' if forecast.HAS_NUMPY else 'off'}")
+
+    for years in args.years:
+        records = synthetic_covers(years * 365 + args.holdout, date.today() - timedelta(days=1), args.seed)
+        train, test = records[:-args.holdout], records[-args.holdout:]
+        start = date.fromisoformat(test[0]["date"])
+        restaurant_id = f"BENCH_{years}Y"
+
+        def fit():
+            return forecast.record_covers({"restaurant_id": restaurant_id, "records": train, "replace_history": True})
+
+        fit_time = best_of(args.repeat, fit)
+        model = fit()["model"]
+        payload = {"restaurant_id": restaurant_id, "forecast_date": start.isoformat(), "forecast_days": args.holdout}
+        result = forecast.forecast_demand(payload)
+        predicted = [f["forecasted_covers"] for f in result["forecasts"]]
+        forecast_time = best_of(args.repeat, lambda: forecast.forecast_demand(payload))
+
+        history = forecast._historical_data[restaurant_id]
+        legacy = legacy_forecast(history, start, args.holdout)
+        legacy_time = best_of(args.repeat, lambda: legacy_forecast(history, start, args.holdout))
+
+        update_time = best_of(1, lambda: forecast.record_covers({"restaurant_id": restaurant_id, "records": test[:1]}))
+
+        print(f"\n{years} year(s) of history, {len(train)} days, {args.holdout}-day holdout, "
+              f"seasonality: {', '.join(model['seasonality'])}")
+        print(f"  {'holt-winters':<16} {errors(test, predicted)}  fit {fit_time * 1000:8.1f} ms  "
+              f"forecast {forecast_time * 1000:6.2f} ms  incremental update {update_time * 1000:6.2f} ms")
+        print(f"  {'weekday average':<16} {errors(test, legacy)}  forecast {legacy_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark for HOTEL_RESERVATION_SYSTEM and ROOM_ASSIGNMENT availability.
+
+Generates --reservations stays of 1-7 nights with check-ins spread over --days days and
+room types drawn uniformly, for a hotel of --rooms rooms split evenly across the five
+room types.
+
+- HOTEL_RESERVATION_SYSTEM: sets the room inventory, times create_reservation for every
+  stay, then check_availability on random ranges against the per-night strptime/strftime
+  day walk over a date-keyed dict that it replaced.
+- ROOM_ASSIGNMENT: times assign_room for every stay on a hotel of --rooms rooms, then
+  checks the rooms' bookings never overlap and times finding a free room for random
+  ranges against a scan of every room's bookings (on a tenth of the ranges).
+
+    python benchmarks/benchmark_hotel_availability.py [--rooms 10000] [--reservations 1000000] [--days 730]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("STAGE7_PLUGIN_STATE_BACKEND", "memory")
+
+from fixtures.plugin_loader import load_plugin
+
+ROOM_TYPES = ["standard", "deluxe", "suite", "penthouse", "accessible"]
+
+
+def random_stays(count: int, start: date, days: int, seed: int):
+    rng = random.Random(seed)
+    stays = []
+    for _ in range(count):
+        check_in = start + timedelta(days=rng.randrange(days))
+        check_out = check_in + timedelta(days=rng.randint(1, 7))
+        stays.append((rng.choice(ROOM_TYPES), check_in.isoformat(), check_out.isoformat()))
+    return stays
+
+
+def legacy_count(per_day, check_in: str, check_out: str, inventory: int) -> int:
+    """The per-night day walk _count_available_rooms replaced, kept for comparison."""
+    current = datetime.strptime(check_in, "%Y-%m-%d")
+    end = datetime.strptime(check_out, "%Y-%m-%d")
+    available = inventory
+    while current < end:
+        available = min(available, inventory - per_day.get(current.strftime("%Y-%m-%d"), 0))
+        current += timedelta(days=1)
+    return max(0, available)
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_reservations(stays, rooms: int, queries) -> None:
+    hotel = load_plugin("HOTEL_RESERVATION_SYSTEM")
+    inventory = rooms // len(ROOM_TYPES)
+    hotel.set_room_inventory({"hotel_id": "BENCH", "inventory": {rt: inventory for rt in ROOM_TYPES}})
+
+    start = time.perf_counter()
+    created = sum(hotel.create_reservation({"hotel_id": "BENCH", "guest_id": f"G{i}", "guest_name": "Bench",
+                                            "check_in_date": check_in, "check_out_date": check_out,
+                                            "room_type": room_type})["success"]
+                  for i, (room_type, check_in, check_out) in enumerate(stays))
+    elapsed = time.perf_counter() - start
+    print(f"HOTEL_RESERVATION_SYSTEM: {created}/{len(stays)} reservations in {elapsed:.1f} s "
+          f"({elapsed / len(stays) * 1e6:.1f} us each)")
+
+    # The date-keyed per-night counts the day walk read from
+    per_day = {rt: {} for rt in ROOM_TYPES}
+    for reservation in hotel._reservations.values():
+        day = date.fromisoformat(reservation["check_in_date"])
+        for offset in range(reservation["num_nights"]):
+            key = (day + timedelta(days=offset)).isoformat()
+            counts = per_day[reservation["room_type"]]
+            counts[key] = counts.get(key, 0) + 1
+
+    for room_type, check_in, check_out in queries:
+        result = hotel.check_availability({"hotel_id": "BENCH", "room_type": room_type,
+                                           "check_in_date": check_in, "check_out_date": check_out})
+        assert result["availability"]["rooms_by_type"][room_type]["available"] == \
+            legacy_count(per_day[room_type], check_in, check_out, inventory)
+
+    def indexed():
+        for room_type, check_in, check_out in queries:
+            hotel.check_availability({"hotel_id": "BENCH", "room_type": room_type,
+                                      "check_in_date": check_in, "check_out_date": check_out})
+
+    def walked():
+        for room_type, check_in, check_out in queries:
+            legacy_count(per_day[room_type], check_in, check_out, inventory)
+
+    index_time = best_of(3, indexed)
+    walk_time = best_of(3, walked)
+    print(f"  {len(queries)} availability checks: segment tree {index_time * 1000:.1f} ms, "
+          f"day walk {walk_time * 1000:.1f} ms ({walk_time / index_time:.1f}x)")
+
+
+def bench_assignments(stays, rooms: int, queries) -> None:
+    assigner = load_plugin("ROOM_ASSIGNMENT")
+    assigner._initialize_hotel_rooms("BENCH", rooms)
+
+    start = time.perf_counter()
+    assigned = sum(assigner.assign_room({"hotel_id": "BENCH", "guest_id": f"G{i}", "room_type": room_type,
+                                         "check_in_date": check_in, "check_out_date": check_out})["success"]
+                   for i, (room_type, check_in, check_out) in enumerate(stays))
+    elapsed = time.perf_counter() - start
+    print(f"ROOM_ASSIGNMENT: {assigned}/{len(stays)} stays assigned to {rooms} rooms in {elapsed:.1f} s "
+          f"({elapsed / len(stays) * 1e6:.1f} us each)")
+
+    bookings = {}
+    for assignment in assigner._assignments_database["BENCH"].values():
+        stay = (date.fromisoformat(assignment["check_in_date"]).toordinal(),
+                date.fromisoformat(assignment["check_out_date"]).toordinal())
+        bookings.setdefault(assignment["room_id"], []).append(stay)
+    for stays_in_room in bookings.values():
+        stays_in_room.sort()
+        assert all(a[1] <= b[0] for a, b in zip(stays_in_room, stays_in_room[1:])), "double-booked room"
+
+    calendars = assigner._calendars("BENCH")
+    rooms_by_type = {}
+    for room_id, room in assigner._rooms_database["BENCH"].items():
+        rooms_by_type.setdefault(room["room_type"], []).append(room_id)
+    ranges = [(room_type, *assigner.stay_ordinals(check_in, check_out)) for room_type, check_in, check_out in queries]
+
+    def indexed():
+        for room_type, first, last in ranges:
+            calendars[room_type].find(first, last)
+
+    # The scan takes seconds per thousand searches on a full hotel, so it gets a sample
+    sample = ranges[:max(1, len(ranges) // 10)]
+
+    def scanned():
+        for room_type, first, last in sample:
+            for room_id in rooms_by_type[room_type]:
+                if all(last <= s or e <= first for s, e in bookings.get(room_id, ())):
+                    break
+
+    index_time = best_of(3, indexed)
+    scan_time = best_of(1, scanned)
+    index_each, scan_each = index_time / len(ranges), scan_time / len(sample)
+    print(f"  free-room search: gap index {index_each * 1e6:.1f} us, "
+          f"room scan {scan_each * 1e6:.0f} us ({scan_each / index_each:.0f}x, {len(sample)} scanned)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=10000)
+    parser.add_argument("--reservations", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    start = date(2027, 1, 1)
+    stays = random_stays(args.reservations, start, args.days, args.seed)
+    queries = random_stays(args.queries, start, args.days, args.seed + 1)
+    print(f"{args.rooms} rooms, {args.reservations} stays over {args.days} days\n")
+
+    bench_reservations(stays, args.rooms, queries)
+    bench_assignments(stays, args.rooms, queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark for STAFF_SCHEDULER auto_schedule.
+
+Builds a restaurant with --employees staff across six roles, random hourly rates and two
+days off a week each, and demand for morning, afternoon and evening shifts over --weeks
+weeks that peaks at weekends. For each solver it times auto_schedule on a fresh schedule
+and reports labor cost and coverage, then checks the roster is conflict-free and within
+every employee's weekly hours. For CP-SAT it also reports how much of the time limit
+(the plugin default unless --time-limit is given) the solve used and how much cheaper
+its roster is than the greedy one.
+
+It also times conflict checks of candidate shifts against the filled roster: the
+per-employee interval index against a scan of the restaurant's shift list.
+
+    python benchmarks/benchmark_staff_scheduler.py [--employees 200] [--weeks 4] [--repeat 3]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("STAGE7_PLUGIN_STATE_BACKEND", "memory")
+
+from fixtures.plugin_loader import load_plugin
+
+# role: (share of staff, hourly rate range, staff per shift at 100 covers)
+ROLES = {
+    "server": (0.40, (14.0, 19.0), 6),
+    "cook": (0.20, (16.0, 24.0), 3),
+    "busser": (0.15, (12.5, 15.0), 2),
+    "host": (0.10, (13.5, 16.5), 1),
+    "bartender": (0.10, (15.0, 21.0), 1),
+    "manager": (0.05, (21.0, 30.0), 1),
+}
+SHIFTS = {"morning": 0.6, "afternoon": 0.8, "evening": 1.0}
+WEEKLY_PATTERN = (0.8, 0.8, 0.9, 1.0, 1.3, 1.4, 1.1)
+
+
+def build_payload(count: int, start: date, weeks: int, seed: int):
+    rng = random.Random(seed)
+    employees, availability = [], {}
+    for i in range(count):
+        role = rng.choices(list(ROLES), weights=[r[0] for r in ROLES.values()])[0]
+        low, high = ROLES[role][1]
+        employee_id = f"B{i:04d}"
+        employees.append({"employee_id": employee_id, "role": role, "hourly_rate": round(rng.uniform(low, high), 2)})
+        availability[employee_id] = {"weekdays": sorted(rng.sample(range(7), 5))}
+
+    staff_by_role = {role: sum(e["role"] == role for e in employees) for role in ROLES}
+    demand = []
+    for offset in range(weeks * 7):
+        day = start + timedelta(days=offset)
+        for shift_type, load in SHIFTS.items():
+            scale = load * WEEKLY_PATTERN[day.weekday()]
+            roles = {role: max(1, min(round(per_shift * scale * count / 100), staff_by_role[role] // 2))
+                     for role, (_, _, per_shift) in ROLES.items()}
+            demand.append({"date": day.isoformat(), "shift_type": shift_type, "roles": roles})
+    return employees, availability, demand
+
+
+def check_roster(scheduler, restaurant_id: str, roster) -> None:
+    booked = {}
+    hours = {}
+    employees = scheduler._employees[restaurant_id]
+    for shift in roster:
+        day = date.fromisoformat(shift["shift_date"])
+        start, end = scheduler._shift_interval(day, shift["shift_type"])
+        for other_start, other_end in booked.get(shift["employee_id"], []):
+            assert not (start < other_end and other_start < end), f"overlapping shifts for {shift['employee_id']}"
+        booked.setdefault(shift["employee_id"], []).append((start, end))
+        key = (shift["employee_id"], scheduler._week(start))
+        hours[key] = hours.get(key, 0) + end - start
+        assert hours[key] <= employees[shift["employee_id"]]["max_hours_per_week"], "weekly hours exceeded"
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--time-limit", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    scheduler = load_plugin("STAFF_SCHEDULER")
+    start = date(2025, 3, 3)
+    end = start + timedelta(days=args.weeks * 7 - 1)
+    employees, availability, demand = build_payload(args.employees, start, args.weeks, args.seed)
+    print(f"{args.employees} employees, {args.weeks} weeks, {len(demand)} shifts, "
+          f"{sum(sum(d['roles'].values()) for d in demand)} staff required; "
+          f"OR-Tools: {'installed' if scheduler.HAS_ORTOOLS else 'not installed'}")
+    time_limit = scheduler.SOLVER_TIME_LIMIT if args.time_limit is None else args.time_limit
+    greedy_cost = None
+
+    solvers = ["greedy"] + (["cp_sat"] if scheduler.HAS_ORTOOLS else [])
+    for solver in solvers:
+        restaurant_id = f"BENCH_{solver.upper()}"
+        scheduler._initialize_restaurant(restaurant_id)
+        results = []
+
+        def run():
+            # A fresh restaurant each time so every run schedules from empty
+            for store in (scheduler._employees, scheduler._shifts, scheduler._schedules):
+                store.pop(restaurant_id, None)
+            scheduler._initialize_restaurant(restaurant_id)
+            scheduler._employees[restaurant_id].clear()
+            schedule = scheduler.create_schedule({"restaurant_id": restaurant_id, "schedule_name": "bench",
+                                                  "start_date": start.isoformat(), "end_date": end.isoformat()})
+            results.append(scheduler.auto_schedule({
+                "restaurant_id": restaurant_id, "schedule_id": schedule["schedule_id"], "solver": solver,
+                "employees": employees, "availability": availability, "demand": demand,
+                "time_limit_seconds": time_limit}))
+
+        elapsed = best_of(args.repeat, run)
+        result = results[-1]
+        check_roster(scheduler, restaurant_id, result["roster"])
+        coverage = result["coverage"]
+        print(f"  {solver:<7} {elapsed * 1000:8.1f} ms  ({result['status']}, solve {result['solve_seconds'] * 1000:.1f} ms)  "
+              f"cost {result['total_cost']:10.2f}  filled {coverage['assigned']}/{coverage['required']}  "
+              f"short slots {len(coverage['shortfall'])}")
+        if solver == "greedy":
+            greedy_cost = result["total_cost"]
+        else:
+            print(f"          used {result['solve_seconds'] / time_limit:.0%} of the {time_limit:g} s limit, "
+                  f"{greedy_cost - result['total_cost']:.2f} cheaper than greedy "
+                  f"({(greedy_cost - result['total_cost']) / greedy_cost:.2%})")
+
+    # Conflict checks against the last roster
+    shifts = list(scheduler._shifts[restaurant_id].values())
+    index = scheduler._employee_shifts(restaurant_id)
+    rng = random.Random(args.seed)
+    probes = [(rng.choice(employees)["employee_id"], start + timedelta(days=rng.randrange(args.weeks * 7)),
+               rng.choice(list(SHIFTS))) for _ in range(2000)]
+
+    def indexed():
+        for employee_id, day, shift_type in probes:
+            if employee_id in index:
+                index[employee_id].conflict(*scheduler._shift_interval(day, shift_type))
+
+    def scanned():
+        for employee_id, day, shift_type in probes:
+            start, end = scheduler._shift_interval(day, shift_type)
+            for shift in shifts:
+                if shift["employee_id"] == employee_id:
+                    other_start, other_end = scheduler._shift_interval(date.fromisoformat(shift["shift_date"]),
+                                                                       shift["shift_type"])
+                    if start < other_end and other_start < end:
+                        break
+
+    index_time = best_of(args.repeat, indexed)
+    scan_time = best_of(1, scanned)
+    print(f"\n{len(probes)} conflict checks against {len(shifts)} shifts: interval index {index_time * 1000:.2f} ms, "
+          f"list scan {scan_time * 1000:.1f} ms ({scan_time / index_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,13 @@ def plugins_dir() -> Path:
     return PLUGINS_PATH
 
 
+@pytest.fixture(scope="session")
+def load_plugin():
+    """Import a plugin's main.py by verb, e.g. load_plugin("CONTRACT_ANALYSIS")."""
+    from fixtures.plugin_loader import load_plugin as _load_plugin
+    return _load_plugin
+
+
 @pytest.fixture(scope="session")
 def test_data_dir() -> Path:
     """Get the test data directory path."""
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Import plugin entry points for tests and benchmarks
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+PLUGINS_PATH = Path(__file__).resolve().parent.parent.parent / "src" / "plugins"
+
+
+def load_plugin(verb: str):
+    """Import a plugin's main.py as a module named after its verb."""
+    name = f"plugin_{verb.lower()}"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, PLUGINS_PATH / verb / "main.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
@@ -335,3 +335,50 @@ class TestAnalyticsEdgeCases:
         
         # Efficient processing
         assert num_records > 100000
+
+
+class TestScenarioSimulation:
+    """Test suite for the SCENARIO_ANALYZER Monte Carlo engine."""
+    
+    @pytest.fixture
+    def analyzer(self, load_plugin):
+        module = load_plugin("SCENARIO_ANALYZER")
+        plugin = module.ScenarioAnalyzerPlugin()
+        scenario = plugin.create_scenario({"variables": {"revenue": 100.0, "cost": 40.0}})
+        return plugin, scenario["scenario_id"]
+    
+    @pytest.mark.unit
+    def test_seeded_simulation_is_reproducible_and_summarized(self, analyzer):
+        """Same seed, same statistics; raw outcomes are omitted by default."""
+        plugin, scenario_id = analyzer
+        params = {"iterations": 5000, "variance": 0.1, "seed": 42}
+        first = plugin.run_simulation(scenario_id, params)
+        second = plugin.run_simulation(scenario_id, params)
+        
+        assert first["seed"] == 42
+        assert "outcomes" not in first["results"]
+        assert first["results"]["statistics"] == second["results"]["statistics"]
+        
+        stats = first["results"]["statistics"]["revenue_outcome"]
+        assert 108.0 <= stats["min"] <= stats["percentiles"]["p50"] <= stats["max"] <= 132.0
+        assert abs(stats["mean"] - 120.0) < 1.0
+    
+    @pytest.mark.unit
+    def test_raw_samples_match_streaming_statistics(self, analyzer):
+        """Requested samples are returned and agree with the streamed mean and spread."""
+        plugin, scenario_id = analyzer
+        result = plugin.run_simulation(scenario_id, {"iterations": 300, "seed": 3, "return_samples": True})
+        outcomes = result["results"]["outcomes"]
+        assert [o["iteration"] for o in outcomes] == list(range(300))
+        
+        values = [o["projected_values"]["cost_outcome"] for o in outcomes]
+        mean = sum(values) / len(values)
+        std_dev = (sum((v - mean) ** 2 for v in values) / len(values)) ** 0.5
+        stats = result["results"]["statistics"]["cost_outcome"]
+        assert stats["mean"] == pytest.approx(mean)
+        assert stats["std_dev"] == pytest.approx(std_dev)
+        low, high = result["results"]["confidence_intervals"]["cost_outcome"]
+        assert low == pytest.approx(mean - 1.96 * std_dev)
+        
+        analysis = plugin.analyze_outcomes(result["simulation_id"], {"cost": 0})
+        assert analysis["success_rate"] == 100
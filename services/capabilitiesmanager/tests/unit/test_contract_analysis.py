@@ -236,3 +236,61 @@ class TestContractAnalysisEdgeCases:
         
         assert len(missing) == 2
         assert "Termination" in missing
+
+
+class TestContractScanner:
+    """Tests for the single-pass clause, risk and red-flag scanner."""
+    
+    @pytest.fixture
+    def contract(self, load_plugin):
+        return load_plugin("CONTRACT_ANALYSIS")
+    
+    @pytest.mark.unit
+    @pytest.mark.legal
+    def test_scan_matches_per_pattern_search(self, contract):
+        """Every pattern's first match is found, including overlapping ones."""
+        import random
+        
+        vocab = ("payment due net 30 liability liable indemnify terminate cancel nda standard "
+                 "trade secret trademark warrant as is has basis no warranty auto renew automatic "
+                 "renewal unlimited damages unilateral termination entire agreement sole remedy").split()
+        rng = random.Random(3)
+        for _ in range(300):
+            text = "".join(rng.choice(vocab) + rng.choice([" ", "\n", ""]) for _ in range(40))
+            hits = contract._SCANNER.scan(text)
+            for key, compiled in contract._SCANNER.compiled.items():
+                match = compiled.search(text)
+                assert hits.get(key) == (match.span() if match else None), (key, text)
+    
+    @pytest.mark.unit
+    @pytest.mark.legal
+    def test_analyze_contract_reports_clauses_risks_and_flags(self, contract):
+        """analyze_contract combines all three analyses from one scan."""
+        text = ("Services Agreement. Payment is due net 30 days after invoice. "
+                "This agreement renews by automatic renewal and the software is provided as is. "
+                "Disputes are settled by arbitration.")
+        result = contract.analyze_contract({"contract_text": text})
+        
+        clause_types = [c["type"] for c in result["clauses"]]
+        assert clause_types == ["payment_terms", "dispute_resolution"]
+        assert any(r["description"] == "Automatic renewal clause" for r in result["risks"])
+        flags = [f["flag"] for f in result["red_flags"]]
+        assert "Automatic renewal clause present" in flags
+        assert "Product/service provided as-is without warranty" in flags
+    
+    @pytest.mark.unit
+    @pytest.mark.legal
+    def test_batch_analyze_keeps_input_order(self, contract):
+        """batch_analyze returns one result per contract, in input order."""
+        contracts = [
+            {"contract_id": "CTR1", "contract_text": "Payment terms: invoice due net 30. " * 3},
+            "Too short",
+            {"contract_id": "CTR3", "contract_text": "The vendor shall indemnify and is liable for losses. " * 2},
+        ]
+        result = contract.batch_analyze({"contracts": contracts})
+        
+        assert result["success"] is True
+        assert [r["index"] for r in result["results"]] == [0, 1, 2]
+        assert result["results"][0]["contract_id"] == "CTR1"
+        assert result["results"][1]["success"] is False
+        assert result["contracts_analyzed"] == 2
@@ -240,3 +240,52 @@ class TestDatabaseEdgeCases:
         }
         
         assert timeout_config["query_timeout"] > 0
+
+
+class TestDatabasePluginBounds:
+    """Test suite for the bounded logs, result cache and input views of the DATABASE plugin."""
+    
+    @pytest.mark.unit
+    def test_logs_and_cache_stay_bounded(self, load_plugin, monkeypatch):
+        """A long-running worker keeps only the newest audit entries and cached results."""
+        module = load_plugin("DATABASE")
+        from stage7_plugin_store import BoundedLog, CacheManager
+        monkeypatch.setitem(module._data, 'audit_log', BoundedLog(50))
+        monkeypatch.setitem(module._data, 'cache', CacheManager(ttl_seconds=300, max_entries=20))
+        
+        for i in range(200):
+            assert module.execute('create_table', {'data': {'table': f't{i}'}})['status'] == 'success'
+        
+        stats = module.get_stats()
+        assert stats['audit_log_size'] == 50
+        assert stats['cache']['size'] == 20 and stats['cache']['evictions'] == 180
+        assert module.get_audit_log(3)[-1]['action'] == 'create_table'
+        assert len(module.export_data(include_logs=True)['data']['audit_log']) == 50
+    
+    @pytest.mark.unit
+    def test_result_data_is_a_copy_on_write_view(self, load_plugin):
+        """Changing the returned data never changes the caller's input."""
+        module = load_plugin("DATABASE")
+        payload = {'table': 'users', 'columns': [{'name': 'id', 'type': 'int'}]}
+        result = module.execute('create_table', {'data': payload})
+        result['data']['columns'][0]['type'] = 'bigint'
+        result['data']['columns'].append({'name': 'email'})
+        
+        assert payload == {'table': 'users', 'columns': [{'name': 'id', 'type': 'int'}]}
+        assert json.loads(json.dumps(result))['data']['columns'][0]['type'] == 'bigint'
+    
+    @pytest.mark.unit
+    def test_malformed_bounds_fall_back_to_defaults(self, monkeypatch):
+        """Bad size settings in the environment do not stop the plugin from importing."""
+        import importlib.util
+        from fixtures.plugin_loader import PLUGINS_PATH
+        monkeypatch.setenv('PLUGIN_AUDIT_LOG_SIZE', 'lots')
+        monkeypatch.setenv('PLUGIN_ERROR_LOG_SIZE', '0')
+        monkeypatch.setenv('PLUGIN_RESULT_CACHE_SIZE', '')
+        spec = importlib.util.spec_from_file_location('plugin_database_bad_env', PLUGINS_PATH / 'DATABASE' / 'main.py')
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        
+        assert module._data['audit_log'].max_entries == 1000
+        assert module._metrics['error_log'].max_entries == 1
+        assert module._data['cache'].max_entries == 1000
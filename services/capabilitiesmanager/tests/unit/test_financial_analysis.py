@@ -184,3 +184,123 @@ class TestFinancialAnalysisEdgeCases:
         
         assert len(tickers) == 150
         assert abs(sum(weights) - 1.0) < 0.001
+
+
+class TestPortfolioOptimizer:
+    """Tests for the PORTFOLIO_MANAGEMENT optimizer and shared price cache (mock prices)."""
+    
+    TICKERS = ["AAA", "BBB", "CCC", "DDD"]
+    
+    @pytest.fixture
+    def portfolio(self, load_plugin, tmp_path, monkeypatch):
+        pytest.importorskip("numpy")
+        monkeypatch.setenv("PORTFOLIO_PRICE_SOURCE", "mock")
+        monkeypatch.setenv("PORTFOLIO_PRICE_CACHE_DIR", str(tmp_path))
+        return load_plugin("PORTFOLIO_MANAGEMENT")
+    
+    @pytest.mark.unit
+    @pytest.mark.finance
+    def test_optimizer_respects_bounds(self, portfolio):
+        """Every objective returns fully invested weights inside [min_weight, max_weight]."""
+        for objective in ("min_variance", "max_sharpe", "max_return"):
+            result = portfolio.optimize_allocation({
+                "tickers": self.TICKERS, "objective": objective,
+                "min_weight": 0.1, "max_weight": 0.4
+            })
+            weights = list(result["optimized_allocation"].values())
+            assert result["success"], result
+            assert sum(weights) == pytest.approx(1.0, abs=1e-3)
+            assert min(weights) >= 0.1 - 1e-4 and max(weights) <= 0.4 + 1e-4
+        
+        infeasible = portfolio.optimize_allocation({"tickers": self.TICKERS, "min_weight": 0.3})
+        assert not infeasible["success"]
+    
+    @pytest.mark.unit
+    @pytest.mark.finance
+    def test_min_variance_matches_closed_form(self, portfolio):
+        """With loose bounds the solver reproduces the analytic minimum-variance portfolio."""
+        import numpy as np
+        
+        covariance = np.array([[0.04, 0.006, 0.002], [0.006, 0.09, 0.01], [0.002, 0.01, 0.0625]])
+        mean_returns = np.array([0.08, 0.12, 0.1])
+        expected = np.linalg.solve(covariance, np.ones(3))
+        expected /= expected.sum()
+        weights = portfolio._risk_aversion_weights(mean_returns, covariance, 0.0, -1.0, 1.0)
+        assert np.allclose(weights, expected, atol=1e-5)
+    
+    @pytest.mark.unit
+    @pytest.mark.finance
+    def test_actions_share_cached_prices(self, portfolio, tmp_path):
+        """Prices are fetched once per ticker and reused by the other actions."""
+        optimized = portfolio.optimize_allocation({"tickers": self.TICKERS, "include_frontier": True})
+        assert not optimized["data"]["cached"]
+        assert len(optimized["efficient_frontier"]) == portfolio.FRONTIER_POINTS
+        
+        correlations = portfolio.calculate_correlations({"tickers": self.TICKERS[:2]})
+        assert correlations["data"]["cached"]
+        assert correlations["correlation_matrix"]["AAA"]["AAA"] == 1.0
+        
+        rebalance = portfolio.rebalance_portfolio({"tickers": self.TICKERS[:2], "current_weights": [0.8, 0.2]})
+        assert rebalance["success"] and rebalance["rebalancing_needed"]
+        assert len(list(tmp_path.rglob("*.npy"))) == len(self.TICKERS)
+
+
+class TestMarketDataIndicators:
+    """Tests for the MARKET_DATA indicator engine and batch mode (mock bars)."""
+    
+    @pytest.fixture
+    def market(self, load_plugin, tmp_path, monkeypatch):
+        pytest.importorskip("numpy")
+        monkeypatch.setenv("MARKET_DATA_SOURCE", "mock")
+        monkeypatch.setenv("MARKET_DATA_CACHE_DIR", str(tmp_path))
+        return load_plugin("MARKET_DATA")
+    
+    @pytest.mark.unit
+    @pytest.mark.finance
+    def test_incremental_update_matches_full_series(self, market):
+        """Continuing from stored EMA/Wilder state gives the same series as recomputing."""
+        import numpy as np
+        
+        params = market.INDICATOR_DEFAULTS
+        bars = market.MockBarSource().fetch(["AAPL"], "1y")["AAPL"]
+        highs, lows, closes = bars[market.HIGH], bars[market.LOW], bars[market.CLOSE]
+        full, full_state = market.compute_indicators(highs, lows, closes, params)
+        
+        # Wilder RSI reference for the last bar
+        deltas = np.diff(closes)
+        gain = np.clip(deltas[:14], 0, None).mean()
+        loss = np.clip(-deltas[:14], 0, None).mean()
+        for delta in deltas[14:]:
+            gain = (gain * 13 + max(delta, 0)) / 14
+            loss = (loss * 13 + max(-delta, 0)) / 14
+        assert full["rsi"][-1] == pytest.approx(100 - 100 / (1 + gain / loss))
+        assert np.isnan(full["rsi"][:14]).all() and np.isnan(full["macd_signal"][:33]).all()
+        
+        for split in (30, 100, len(closes) - 1):
+            head, state = market.compute_indicators(highs[:split], lows[:split], closes[:split], params)
+            tail, tail_state = market.update_indicators(highs, lows, closes, split, state, params, split)
+            for name in market.SERIES_NAMES:
+                assert np.allclose(np.concatenate([head[name], tail[name]]), full[name], equal_nan=True), name
+            assert np.allclose(tail_state, full_state)
+    
+    @pytest.mark.unit
+    @pytest.mark.finance
+    def test_batch_mode_shares_cached_bars_and_series(self, market):
+        """A batch computes every ticker once; later calls reuse the stored series."""
+        tickers = [f"T{i:02d}" for i in range(20)]
+        batch = market.calculate_indicators({"tickers": tickers, "lookback": 10})
+        assert batch["success"] and batch["count"] == 20 and not batch["errors"]
+        assert {r["update"]["mode"] for r in batch["results"].values()} == {"full"}
+        
+        series = batch["results"]["T03"]["series"]
+        assert len(series["dates"]) == len(series["rsi"]) == 10
+        assert all(0 <= value <= 100 for value in series["rsi"] + series["stoch_k"])
+        
+        single = market.calculate_indicators({"ticker": "t03"})
+        assert single["update"] == {"mode": "cached", "new_bars": 0}
+        assert single["data"]["cached"]
+        assert single["indicators"] == batch["results"]["T03"]["indicators"]
+        assert single["series"]["rsi"][-10:] == series["rsi"]
+        
+        invalid = market.calculate_indicators({"ticker": "T03", "macd_fast": 30})
+        assert not invalid["success"]
@@ -200,3 +200,107 @@ class TestHotelReservationSystemEdgeCases:
         
         assert group_booking["group_size"] > 0
         assert group_booking["group_rate"] > 0
+
+
+class TestHotelAvailabilityIndex:
+    """Test suite for the day-ordinal availability indexes of HOTEL_RESERVATION_SYSTEM and ROOM_ASSIGNMENT."""
+    
+    @pytest.fixture
+    def hotel(self, load_plugin):
+        return load_plugin("HOTEL_RESERVATION_SYSTEM")
+    
+    @pytest.fixture
+    def rooms(self, load_plugin, monkeypatch):
+        module = load_plugin("ROOM_ASSIGNMENT")
+        from stage7_state_store import MemoryStateBackend
+        monkeypatch.setattr(module._state, "_backend", MemoryStateBackend())
+        return module
+    
+    @staticmethod
+    def reserve(hotel, guest_id, check_in, check_out, room_type="suite"):
+        return hotel.create_reservation({"hotel_id": "HA_HOTEL", "guest_id": guest_id, "guest_name": guest_id,
+                                         "check_in_date": check_in, "check_out_date": check_out, "room_type": room_type})
+    
+    @pytest.mark.unit
+    @pytest.mark.operations
+    def test_availability_counts_the_busiest_night_of_a_stay(self, hotel):
+        """Overlapping reservations fill the inventory only on the nights they share."""
+        assert hotel.set_room_inventory({"hotel_id": "HA_HOTEL", "room_type": "suite", "rooms": 2})["success"]
+        first = self.reserve(hotel, "G1", "2026-03-01", "2026-03-05")
+        assert first["reservation"]["num_nights"] == 4
+        assert self.reserve(hotel, "G2", "2026-03-04", "2026-03-08")["success"]
+        assert not self.reserve(hotel, "G3", "2026-03-03", "2026-03-06")["success"]
+        assert self.reserve(hotel, "G3", "2026-03-05", "2026-03-06")["success"]
+        
+        def available(check_in, check_out):
+            result = hotel.check_availability({"hotel_id": "HA_HOTEL", "room_type": "suite",
+                                               "check_in_date": check_in, "check_out_date": check_out})
+            return result["availability"]["rooms_by_type"]["suite"]["available"]
+        
+        assert available("2026-03-01", "2026-03-04") == 1
+        assert available("2026-03-04", "2026-03-05") == 0
+        assert available("2026-03-08", "2026-03-10") == 2
+        
+        assert not hotel.set_room_inventory({"hotel_id": "HA_HOTEL", "inventory": {"suite": 1}})["success"]
+        hotel.cancel_reservation({"confirmation_number": first["confirmation_details"]["confirmation_number"]})
+        assert available("2026-03-04", "2026-03-05") == 1
+        assert not hotel.check_availability({"hotel_id": "HA_HOTEL", "check_in_date": "2026-03-05",
+                                             "check_out_date": "2026-03-05"})["success"]
+    
+    @pytest.mark.unit
+    @pytest.mark.operations
+    def test_room_assignment_books_rooms_by_date(self, rooms):
+        """Stays that do not overlap share a room; overlapping ones get another room until the type is full."""
+        rooms._initialize_hotel_rooms("HA_ROOMS", 10)
+        stay = {"hotel_id": "HA_ROOMS", "room_type": "suite", "check_in_date": "2030-05-01", "check_out_date": "2030-05-04"}
+        first = rooms.assign_room(dict(stay, guest_id="G1"))["assignment"]
+        second = rooms.assign_room(dict(stay, guest_id="G2"))["assignment"]
+        assert first["room_id"] != second["room_id"]
+        assert rooms._rooms_database["HA_ROOMS"][first["room_id"]]["status"] == "available"
+        
+        # Two suites in ten rooms: a third overlapping stay does not fit, a following one does
+        full = rooms.assign_room(dict(stay, guest_id="G3", check_in_date="2030-05-03", check_out_date="2030-05-06"))
+        assert not full["success"] and "deluxe" in full["available_types"]
+        after = rooms.assign_room(dict(stay, guest_id="G3", check_in_date="2030-05-04", check_out_date="2030-05-06"))
+        assert after["assignment"]["room_id"] in (first["room_id"], second["room_id"])
+        
+        free = rooms.get_available_rooms({"hotel_id": "HA_ROOMS", "room_type": "suite",
+                                          "check_in_date": "2030-05-02", "check_out_date": "2030-05-03"})
+        assert free["count"] == 0
+        
+        moved = rooms.reassign_room({"hotel_id": "HA_ROOMS", "guest_id": "G1", "new_room_type": "deluxe"})
+        assert moved["previous_room"] == first["room_id"]
+        retry = rooms.assign_room(dict(stay, guest_id="G4", check_in_date="2030-05-02", check_out_date="2030-05-03"))
+        assert retry["assignment"]["room_id"] == first["room_id"]
+    
+    @pytest.mark.unit
+    @pytest.mark.operations
+    def test_release_room_frees_the_rest_of_the_stay(self, rooms):
+        """A current stay occupies its room; checking out frees its remaining nights."""
+        rooms._initialize_hotel_rooms("HA_RELEASE", 5)
+        today = datetime.now().date()
+        stay = {"hotel_id": "HA_RELEASE", "room_type": "deluxe", "check_in_date": (today - timedelta(days=2)).isoformat(),
+                "check_out_date": (today + timedelta(days=3)).isoformat()}
+        room_id = rooms.assign_room(dict(stay, guest_id="G1"))["assignment"]["room_id"]
+        assert rooms._rooms_database["HA_RELEASE"][room_id]["status"] == "occupied"
+        assert not rooms.assign_room(dict(stay, guest_id="G2"))["success"]
+        
+        released = rooms.release_room({"hotel_id": "HA_RELEASE", "room_id": room_id})
+        assert released["released_room"]["occupancy_duration_nights"] == 5
+        assert rooms.assign_room(dict(stay, guest_id="G2"))["assignment"]["room_id"] == room_id
+    
+    @pytest.mark.unit
+    @pytest.mark.operations
+    def test_persist_failure_keeps_the_action_result(self, rooms, monkeypatch):
+        """A state write that fails after the action ran is logged, not reported as a failed action."""
+        rooms._initialize_hotel_rooms("HA_PERSIST", 5)
+        
+        def broken_persist(*args, **kwargs):
+            raise TypeError("Object of type set is not JSON serializable")
+        
+        monkeypatch.setattr(rooms._state, "persist", broken_persist)
+        result = rooms.execute_plugin({"action": "assign_room", "payload": {
+            "hotel_id": "HA_PERSIST", "guest_id": "G1", "room_type": "deluxe",
+            "check_in_date": "2030-06-01", "check_out_date": "2030-06-03"}})
+        assert result["success"]
+        assert result["result"]["assignment"]["guest_id"] == "G1"
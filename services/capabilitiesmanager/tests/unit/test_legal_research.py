@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Unit tests for LEGAL_RESEARCH plugin
+Tests BM25 case search, corpus loading and the citation graph
+"""
+
+import json
+import pytest
+
+
+class TestLegalResearch:
+    """Test suite for LEGAL_RESEARCH plugin."""
+
+    @pytest.fixture
+    def legal(self, load_plugin, tmp_path, monkeypatch):
+        module = load_plugin("LEGAL_RESEARCH")
+        monkeypatch.setenv("LEGAL_RESEARCH_INDEX_DIR", str(tmp_path / "index"))
+        monkeypatch.delenv("LEGAL_RESEARCH_CORPUS", raising=False)
+        monkeypatch.setattr(module, "_corpus", None)
+        return module
+
+    @pytest.fixture
+    def corpus_file(self, tmp_path):
+        records = [
+            {"type": "case", "name": "Doe v. Roe", "citation": "900 U.S. 1 (2030)",
+             "court": "U.S. Supreme Court", "year": 2030, "topic": "Drone Surveillance",
+             "holding": "Persistent drone surveillance of a home is a search",
+             "rule": "Warrant required", "facts": "Police flew drones over a backyard",
+             "cites": ["384 U.S. 436"]},
+            {"type": "case", "name": "Poe v. Moe", "citation": "901 U.S. 7 (2031)",
+             "court": "U.S. Supreme Court", "year": 2031, "topic": "Contracts",
+             "holding": "Drone delivery contracts are enforceable", "rule": "", "facts": "",
+             "cites": ["900 U.S. 1"]},
+            {"type": "statute", "name": "Drone Privacy Act", "citation": "49 U.S.C. §999",
+             "jurisdiction": "Federal", "topic": "Privacy", "summary": "Limits drone surveillance"},
+        ]
+        path = tmp_path / "corpus.jsonl"
+        path.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+        return path
+
+    @pytest.mark.unit
+    @pytest.mark.legal
+    def test_search_cases_ranks_topic_above_holding(self, legal, corpus_file):
+        """Loaded cases are searchable and topic matches outrank holding matches."""
+        loaded = legal.load_corpus({"path": str(corpus_file)})
+        assert loaded["success"] and loaded["cases"] == 7 and loaded["statutes"] == 4
+
+        result = legal.search_cases({"query": "drone surveillance", "limit": 1})
+        assert result["results_found"] == 2
+        assert [c["name"] for c in result["cases"]] == ["Doe v. Roe"]
+
+        statutes = legal.search_statutes({"query": "drone"})
+        assert statutes["statutes"][0]["name"] == "Drone Privacy Act"
+
+    @pytest.mark.unit
+    @pytest.mark.legal
+    def test_saved_index_is_reopened(self, legal, corpus_file, monkeypatch):
+        """A fresh process reopens the saved index instead of rebuilding it."""
+        legal.load_corpus({"paths": [str(corpus_file)]})
+        monkeypatch.setattr(legal, "_corpus", None)
+        monkeypatch.setattr(legal.LegalCorpus, "build", classmethod(lambda *a, **k: pytest.fail("rebuilt")))
+
+        precedent = legal.analyze_precedent({"case_name": "Doe v. Roe", "issue": "drone surveillance"})
+        assert precedent["success"] and precedent["precedent_applicable"]
+
+    @pytest.mark.unit
+    @pytest.mark.legal
+    def test_analyze_citations_uses_citation_graph(self, legal, corpus_file):
+        """Citations resolve to cases with their citing and cited authorities."""
+        legal.load_corpus({"path": str(corpus_file)})
+        result = legal.analyze_citations({"citations": ["900 U.S. 1 (2030)", "384 U.S. 436 (1966)"]})
+
+        doe, miranda = result["analysis"]
+        assert doe["case_name"] == "Doe v. Roe"
+        assert doe["cites"] == ["384 U.S. 436"]
+        assert doe["cited_by"] == ["Poe v. Moe"]
+        assert miranda["case_found"] and miranda["cited_by_count"] == 1
+        assert result["relationships"] == [{"citing": "Doe v. Roe", "cited": "Miranda v. Arizona"}]
@@ -222,3 +222,95 @@ class TestMedicalRecordsEdgeCases:
         # System should flag as abnormal
         assert abnormal_vitals["heart_rate"] > 100
         assert abnormal_vitals["temperature"] > 101
+
+
+class TestMedicalRecordStore:
+    """Tests for the shared WAL connection, schema migrations and bulk actions."""
+    
+    @pytest.fixture
+    def records(self, load_plugin, tmp_path, monkeypatch):
+        pytest.importorskip("cryptography")
+        module = load_plugin("MEDICAL_RECORDS")
+        monkeypatch.setenv("RECORDS_DB_PATH", str(tmp_path / "records.db"))
+        monkeypatch.setenv("AUDIT_DB_PATH", str(tmp_path / "audit.db"))
+        return module
+    
+    @staticmethod
+    def _run(module, action, payload):
+        return module.execute_plugin({"action": action, "payload": payload})[0]["result"]
+    
+    @pytest.mark.unit
+    @pytest.mark.healthcare
+    def test_schema_migrated_once_with_wal(self, records, tmp_path):
+        """Both database files are in WAL mode and stamped with the schema version."""
+        import sqlite3
+        
+        db = records._get_record_db()
+        assert db is records._get_record_db()
+        for name in ("records.db", "audit.db"):
+            conn = sqlite3.connect(str(tmp_path / name))
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == records.SCHEMA_MIGRATIONS[-1][0]
+            conn.close()
+    
+    @pytest.mark.unit
+    @pytest.mark.healthcare
+    def test_bulk_store_and_retrieve(self, records):
+        """Bulk actions store valid records, report rejects and audit every access."""
+        batch = [
+            {"patient_id": "P100", "record_type": "note", "provider_id": "DR100",
+             "title": f"Visit {i}", "content": f"Note {i}"}
+            for i in range(5)
+        ]
+        batch.insert(2, {"patient_id": "P100", "record_type": "unknown", "provider_id": "DR100",
+                         "title": "Bad", "content": "x"})
+        stored = self._run(records, "bulk_store_records", {"records": batch, "user_id": "USR100"})
+        assert stored["stored_count"] == 5
+        assert [f["index"] for f in stored["failed"]] == [2]
+        
+        record_ids = [r["record_id"] for r in stored["records"]]
+        retrieved = self._run(records, "bulk_retrieve", {
+            "record_ids": list(reversed(record_ids)) + ["missing"],
+            "patient_id": "P100", "user_id": "USR100"})
+        assert [r["content"] for r in retrieved["records"]] == [f"Note {i}" for i in reversed(range(5))]
+        assert retrieved["not_found"] == ["missing"]
+        
+        trail = self._run(records, "get_audit_trail", {"patient_id": "P100"})["audit_trail"]
+        events = sorted(e["event_type"] for e in trail)
+        assert events.count("RECORD_CREATED") == 5
+        assert events.count("RECORD_RETRIEVED") == 6
+    
+    @pytest.mark.unit
+    @pytest.mark.healthcare
+    def test_audit_log_defaults_to_records_file(self, records, tmp_path, monkeypatch):
+        """Without AUDIT_DB_PATH the audit rows commit in the records file, not an attached one."""
+        import sqlite3
+        
+        monkeypatch.delenv("AUDIT_DB_PATH")
+        db = records._get_record_db()
+        assert db.audit_table == "audit_log" and not db.db.attached
+        
+        stored = self._run(records, "store_record", {
+            "patient_id": "P200", "record_type": "note", "provider_id": "DR200",
+            "title": "Visit", "content": "Note", "user_id": "USR200"})
+        assert stored["success"]
+        conn = sqlite3.connect(str(tmp_path / "records.db"))
+        assert conn.execute("SELECT COUNT(*) FROM audit_log WHERE event_type = 'RECORD_CREATED'").fetchone()[0] == 1
+        conn.close()
+        assert not (tmp_path / "audit.db").exists()
+    
+    @pytest.mark.unit
+    @pytest.mark.healthcare
+    def test_bulk_retrieve_reports_malformed_entries(self, records):
+        """A malformed request entry fails on its own instead of failing the whole batch."""
+        stored = self._run(records, "bulk_store_records", {"records": [
+            {"patient_id": "P300", "record_type": "note", "provider_id": "DR300",
+             "title": "Visit", "content": "Note"}], "user_id": "USR300"})
+        record_id = stored["records"][0]["record_id"]
+        
+        retrieved = self._run(records, "bulk_retrieve", {"records": [
+            "not-an-object", {"record_id": record_id, "patient_id": "P300"}, {"record_id": record_id}],
+            "user_id": "USR300"})
+        assert retrieved["success"]
+        assert [r["content"] for r in retrieved["records"]] == ["Note"]
+        assert [f["index"] for f in retrieved["failed"]] == [0, 2]
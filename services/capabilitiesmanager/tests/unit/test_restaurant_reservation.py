@@ -189,3 +189,162 @@ class TestRestaurantReservationSystemEdgeCases:
         
         accommodations_needed = sum(1 for v in restrictions.values() if v)
         assert accommodations_needed == 3
+
+
+class TestDemandForecast:
+    """Test suite for the DEMAND_FORECAST Holt-Winters engine."""
+    
+    @pytest.fixture
+    def forecast(self, load_plugin, monkeypatch):
+        module = load_plugin("DEMAND_FORECAST")
+        from stage7_state_store import MemoryStateBackend
+        monkeypatch.setattr(module._state, "_backend", MemoryStateBackend())
+        monkeypatch.setattr(module._model_state, "_backend", MemoryStateBackend())
+        return module
+    
+    @staticmethod
+    def covers(days, start):
+        """Trend, weekly pattern and annual cycle without noise."""
+        import math
+        weekly = (-15, -10, -8, 0, 20, 35, 10)
+        records = []
+        for i in range(days):
+            day = start + timedelta(days=i)
+            annual = 25 * math.sin(2 * math.pi * day.timetuple().tm_yday / 365.25)
+            records.append({"date": day.date().isoformat(), "covers": round(100 + 0.02 * i + weekly[day.weekday()] + annual)})
+        return records
+    
+    @pytest.mark.unit
+    @pytest.mark.operations
+    def test_forecast_tracks_weekly_and_annual_seasonality(self, forecast):
+        """Two years of history fit both seasonal rings and forecast a holdout closely."""
+        records = self.covers(2 * 365 + 28, datetime(2023, 1, 2))
+        train, test = records[:-28], records[-28:]
+        recorded = forecast.record_covers({"restaurant_id": "HW_SEASONAL", "records": train, "replace_history": True})
+        assert recorded["model"]["update"] == "full"
+        assert recorded["model"]["seasonality"] == ["weekly", "annual"]
+        
+        result = forecast.forecast_demand({"restaurant_id": "HW_SEASONAL", "forecast_date": test[0]["date"], "forecast_days": 28})
+        assert result["model"]["update"] == "cached"
+        errors = [abs(f["forecasted_covers"] - a["covers"]) / a["covers"] for f, a in zip(result["forecasts"], test)]
+        assert sum(errors) / len(errors) < 0.02
+        assert all(f["covers_lower"] <= f["forecasted_covers"] <= f["covers_upper"] for f in result["forecasts"])
+    
+    @pytest.mark.unit
+    @pytest.mark.operations
+    def test_new_covers_update_the_cached_model_incrementally(self, forecast):
+        """New days continue the stored state; revising a seen day forces a full refit."""
+        records = self.covers(120, datetime(2024, 3, 4))
+        forecast.record_covers({"restaurant_id": "HW_INCR", "records": records[:-2], "replace_history": True})
+        params = forecast._forecast_models["HW_INCR"]["params"]
+        
+        update = forecast.record_covers({"restaurant_id": "HW_INCR", "records": records[-2:]})
+        assert update["model"]["update"] == "incremental"
+        assert update["model"]["fitted_through"] == records[-1]["date"]
+        assert forecast._forecast_models["HW_INCR"]["params"] == params
+        
+        peak = forecast.predict_peak_hours({"restaurant_id": "HW_INCR", "prediction_date": "2024-07-06"})
+        staffing = forecast.recommend_staffing({"restaurant_id": "HW_INCR", "forecast_date": "2024-07-06"})
+        assert peak["model"]["update"] == "cached"
+        assert staffing["forecasted_covers"] == peak["forecasted_covers"]
+        
+        revised = forecast.record_covers({"restaurant_id": "HW_INCR", "records": [dict(records[10], covers=0)]})
+        assert revised["model"]["update"] == "full"
+        assert not forecast.record_covers({"restaurant_id": "HW_INCR", "records": [{"date": "bad"}]})["success"]
+
+
+class TestStaffScheduler:
+    """Test suite for STAFF_SCHEDULER shift checks and auto_schedule."""
+    
+    @pytest.fixture
+    def scheduler(self, load_plugin, monkeypatch):
+        module = load_plugin("STAFF_SCHEDULER")
+        from stage7_state_store import MemoryStateBackend
+        monkeypatch.setattr(module._state, "_backend", MemoryStateBackend())
+        return module
+    
+    @staticmethod
+    def schedule(scheduler, restaurant_id, **extra):
+        return scheduler.create_schedule(dict({"restaurant_id": restaurant_id, "schedule_name": "Week 1",
+                                               "start_date": "2025-03-03", "end_date": "2025-03-09"}, **extra))["schedule_id"]
+    
+    @pytest.mark.unit
+    @pytest.mark.operations
+    def test_assign_shift_rejects_conflicts_and_unavailability(self, scheduler):
+        """Overlapping shifts, days off and cancelled shifts go through the interval index."""
+        schedule_id = self.schedule(scheduler, "SS_CHECKS")
+        shift = {"restaurant_id": "SS_CHECKS", "schedule_id": schedule_id, "employee_id": "EMP001", "shift_date": "2025-03-03"}
+        
+        first = scheduler.assign_shift(dict(shift, shift_type="afternoon"))
+        assert first["success"]
+        overlap = scheduler.assign_shift(dict(shift, shift_type="evening"))
+        assert not overlap["success"] and first["shift_id"] in overlap["error"]
+        assert scheduler.assign_shift(dict(shift, shift_type="morning"))["success"]
+        
+        scheduler.set_availability({"restaurant_id": "SS_CHECKS", "employee_id": "EMP001", "weekdays": ["monday", "tuesday"]})
+        assert not scheduler.assign_shift(dict(shift, shift_date="2025-03-05", shift_type="morning"))["success"]
+        
+        scheduler.update_shift({"restaurant_id": "SS_CHECKS", "shift_id": first["shift_id"], "status": "cancelled"})
+        assert scheduler.assign_shift(dict(shift, shift_type="evening"))["success"]
+    
+    @pytest.mark.unit
+    @pytest.mark.operations
+    def test_auto_schedule_builds_cheapest_conflict_free_roster(self, scheduler):
+        """Demand from explicit shifts and DEMAND_FORECAST output is filled cheapest-first within all limits."""
+        schedule_id = self.schedule(scheduler, "SS_AUTO")
+        employees = [{"employee_id": f"S{i}", "role": "server", "hourly_rate": 12 + i, "max_hours_per_week": 16}
+                     for i in range(4)]
+        result = scheduler.auto_schedule({
+            "restaurant_id": "SS_AUTO", "schedule_id": schedule_id, "solver": "greedy",
+            "employees": employees,
+            "availability": {"S0": {"unavailable_dates": ["2025-03-04"]}},
+            "demand": [{"date": "2025-03-03", "shift_type": "afternoon", "role": "server", "count": 2},
+                       {"date": "2025-03-03", "shift_type": "evening", "role": "server", "count": 2},
+                       {"date": "2025-03-04", "shift_type": "morning", "roles": {"server": 2}}],
+        })
+        assert result["success"] and result["solver"] == "greedy"
+        assert result["coverage"]["required"] == 6 and result["coverage"]["shortfall"] == []
+        
+        by_slot = {}
+        for shift in result["roster"]:
+            by_slot.setdefault((shift["shift_date"], shift["shift_type"]), set()).add(shift["employee_id"])
+        # Afternoon and evening overlap, so nobody works both; S0 is off on the 4th
+        assert not by_slot[("2025-03-03", "afternoon")] & by_slot[("2025-03-03", "evening")]
+        assert by_slot[("2025-03-04", "morning")] == {"S1", "S2"}
+        assert result["total_cost"] == 8 * (12 + 13) + 6 * (14 + 15) + 8 * (13 + 14)
+        
+        # Nobody has hours left for a third 8-hour shift; forecasts add demand the roster cannot fill
+        more = scheduler.auto_schedule({
+            "restaurant_id": "SS_AUTO", "schedule_id": schedule_id, "solver": "greedy",
+            "forecasts": {"forecasts": [{"date": "2025-03-05", "forecasted_covers": 150}]},
+            "forecast_shifts": {"morning": 1.0},
+        })
+        shortfall = {s["role"]: s for s in more["coverage"]["shortfall"]}
+        assert shortfall["server"]["needed"] == 10 and shortfall["server"]["assigned"] < 10
+        assert not scheduler.auto_schedule({"restaurant_id": "SS_AUTO", "schedule_id": schedule_id,
+                                            "demand": [{"date": "2025-04-01", "shift_type": "morning", "role": "server"}]})["success"]
+    
+    @pytest.mark.unit
+    @pytest.mark.operations
+    def test_auto_schedule_respects_labor_budget(self, scheduler):
+        """A schedule's labor budget caps the roster, leaving the rest as shortfall."""
+        schedule_id = self.schedule(scheduler, "SS_BUDGET", labor_budget=300)
+        result = scheduler.auto_schedule({
+            "restaurant_id": "SS_BUDGET", "schedule_id": schedule_id, "solver": "greedy",
+            "demand": [{"date": "2025-03-03", "shift_type": "morning", "role": "server", "count": 3}],
+        })
+        assert result["within_budget"] and result["total_cost"] <= 300
+        assert result["coverage"]["assigned"] == 2
+    
+    @pytest.mark.unit
+    @pytest.mark.operations
+    def test_cp_sat_roster_matches_demand(self, scheduler):
+        """With OR-Tools installed the CP-SAT model proves its roster and fills what greedy fills."""
+        pytest.importorskip("ortools")
+        schedule_id = self.schedule(scheduler, "SS_CPSAT")
+        demand = [{"date": f"2025-03-0{d}", "shift_type": t, "roles": {"server": 2, "cook": 1}}
+                  for d in range(3, 8) for t in ("morning", "evening")]
+        result = scheduler.auto_schedule({"restaurant_id": "SS_CPSAT", "schedule_id": schedule_id,
+                                          "solver": "cp_sat", "demand": demand})
+        assert result["solver"] == "cp_sat" and result["status"] == "optimal"
+        assert len(result["roster"]) == len({(s["employee_id"], s["shift_date"], s["shift_type"]) for s in result["roster"]})
@@ -350,3 +350,387 @@ class TestUtilityEdgeCases:
         content = "English 中文 Русский العربية 😀"
         assert "中文" in content
         assert "😀" in content
+
+
+class TestPluginRuntimeMigration:
+    """Test suite for template plugins that run through stage7_plugin_runtime."""
+    
+    @pytest.mark.unit
+    @pytest.mark.parametrize("verb, action, payload", [
+        ("ATS", "screen", {}),
+        ("DECISION_SUPPORT", "list_options", {}),
+        ("RISK_MITIGATION", "create_plan", {}),
+        ("COMPLIANCE", "create_report", {"framework": "gdpr"}),
+    ])
+    def test_stdin_payload_reaches_the_action(self, load_plugin, verb, action, payload):
+        """Pairs from stdin are parsed by the shared runtime and dispatched without template errors."""
+        import json
+        module = load_plugin(verb)
+        from stage7_plugin_runtime import parse_inputs
+        stdin = json.dumps([["action", {"value": action}], ["payload", {"value": payload}]])
+        result = module.execute_plugin(parse_inputs(stdin))
+        assert result[0]["success"], result
+        assert not hasattr(module, "parse_inputs")
+
+
+class TestSearchPython:
+    """Test suite for SEARCH_PYTHON concurrent terms and hedged provider races."""
+    
+    @pytest.fixture
+    def search(self, load_plugin, monkeypatch):
+        module = load_plugin("SEARCH_PYTHON")
+        monkeypatch.setattr(module, "_search_cache", None)
+        return module
+    
+    @staticmethod
+    def provider(search, name, score, delay, fail=False, calls=None):
+        import time
+        
+        class Provider(search.SearchProvider):
+            def search(self, search_term, **kwargs):
+                if calls is not None:
+                    calls.append(name)
+                time.sleep(delay)
+                if fail:
+                    raise RuntimeError(f"{name} unavailable")
+                return [{"title": search_term, "url": f"https://{name.lower()}.example/{search_term}", "snippet": name}]
+        
+        return Provider(name, performance_score=score)
+    
+    @pytest.mark.unit
+    def test_terms_run_concurrently_and_keep_their_order(self, search, monkeypatch):
+        """Four slow terms take about as long as one, results stay in term order, latencies are reported."""
+        import time
+        monkeypatch.setattr(search, "SEARCH_MAX_PARALLEL", 4)
+        plugin = search.SearchPlugin({})
+        plugin.providers = [self.provider(search, "DownTerms", 100, 0.0, fail=True),
+                            self.provider(search, "SlowTerms", 10, 0.2)]
+        
+        started = time.perf_counter()
+        results, errors = plugin.execute_search(["a", "b", "c", "d"])
+        assert time.perf_counter() - started < 0.6
+        assert [r["title"] for r in results] == ["a", "b", "c", "d"]
+        assert len(errors) == 4 and all("DownTerms" in e for e in errors)
+        
+        metadata = plugin.search_metadata()
+        assert [t["provider"] for t in metadata["terms"]] == ["SlowTerms"] * 4
+        assert metadata["terms"][0]["providers_tried"] == ["DownTerms", "SlowTerms"]
+        latency = metadata["providers"]["SlowTerms"]["latency"]
+        assert latency["count"] == 4 and latency["buckets"] == {"<=250ms": 4}
+        assert metadata["providers"]["DownTerms"]["latency"]["errors"] == 4
+    
+    @pytest.mark.unit
+    def test_hedged_search_takes_the_first_non_empty_answer(self, search, monkeypatch):
+        """A provider slower than its budget is hedged with the next-ranked one, which wins."""
+        import time
+        monkeypatch.setattr(search, "HEDGE_DEFAULT_BUDGET", 0.05)
+        plugin = search.SearchPlugin({})
+        plugin.providers = [self.provider(search, "SlowHedge", 100, 1.0), self.provider(search, "FastHedge", 50, 0.01)]
+        
+        started = time.perf_counter()
+        results, errors = plugin.execute_search(["hedged"], hedge=True)
+        assert time.perf_counter() - started < 0.5
+        assert results[0]["snippet"] == "FastHedge" and not errors
+        assert plugin.search_metadata()["terms"][0]["providers_tried"] == ["SlowHedge", "FastHedge"]
+        
+        # Without hedging the slow provider is simply waited for
+        results, _ = plugin.execute_search(["patient"])
+        assert results[0]["snippet"] == "SlowHedge"
+    
+    @pytest.mark.unit
+    def test_results_and_scores_persist_across_plugin_instances(self, search, monkeypatch, tmp_path):
+        """A near-identical term is answered from the on-disk cache, and saved scores rank the next process."""
+        from search_result_cache import SearchResultCache
+        monkeypatch.setattr(search, "_search_cache", SearchResultCache(str(tmp_path / "search.sqlite3"),
+                                                                       provider_ttls={"CachedDown": 60, "CachedUp": 60}))
+        calls = []
+        
+        def plugin():
+            instance = search.SearchPlugin({})
+            instance.providers = [self.provider(search, "CachedDown", 100, 0.0, fail=True, calls=calls),
+                                  self.provider(search, "CachedUp", 90, 0.0, calls=calls)]
+            instance._restore_scores()
+            return instance
+        
+        first = plugin()
+        results, _ = first.execute_search(["What is the Python GIL?"])
+        assert calls == ["CachedDown", "CachedUp"]
+        
+        second = plugin()
+        assert second.providers[0].performance_score == 80  # the failure was saved
+        cached, errors = second.execute_search(["python   gil"])
+        assert cached == results and not errors and calls == ["CachedDown", "CachedUp"]
+        assert second.search_metadata()["terms"][0]["cached"]
+    
+    @pytest.mark.unit
+    def test_demoted_provider_recovers_across_short_lived_processes(self, search, monkeypatch, tmp_path):
+        """A provider saved at 0 climbs back while others answer, with a new process every minute for a day."""
+        from search_result_cache import SearchResultCache
+        now = [1_000_000.0]
+        monkeypatch.setattr(search.time, "time", lambda: now[0])
+        monkeypatch.setattr(search, "_search_cache", SearchResultCache(str(tmp_path / "search.sqlite3"),
+                                                                       provider_ttls={}, default_ttl=0))
+        search._search_cache.save_scores({"Demoted": 0})
+        
+        restored = []
+        for _ in range(24 * 60):
+            now[0] += 60
+            plugin = search.SearchPlugin({})
+            plugin.providers = [self.provider(search, "Demoted", 100, 0.0), self.provider(search, "Healthy", 90, 0.0)]
+            plugin._restore_scores()
+            restored.append(plugin.providers[0].get_performance())
+            plugin.execute_search(["status page"])
+        
+        assert 45 <= restored[6 * 60 - 1] <= 55  # one recovery half-life
+        assert restored[-1] >= 90
+    
+    @pytest.mark.unit
+    def test_concurrent_score_updates_are_not_lost(self, search):
+        """Scores updated from many threads at once add up as if applied one by one."""
+        from concurrent.futures import ThreadPoolExecutor
+        provider = self.provider(search, "Contended", 50, 0.0)
+        
+        def churn(_):
+            for _ in range(200):
+                provider.adjust_performance(1)
+                provider.adjust_performance(-1)
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(churn, range(8)))
+        assert provider.get_performance() == 50
+
+
+class TestScrape:
+    """Test suite for the SCRAPE fetch pipeline, HTTP cache and parser backends."""
+    
+    @pytest.fixture
+    def scrape(self, load_plugin, monkeypatch):
+        pytest.importorskip("bs4")
+        module = load_plugin("SCRAPE")
+        monkeypatch.setattr(module, "_http_cache", None)
+        return module
+    
+    @pytest.mark.unit
+    def test_urls_are_fetched_concurrently_in_input_order(self, scrape, monkeypatch):
+        """Slow pages on different hosts overlap, results keep URL order and the config is parsed once."""
+        import time
+        monkeypatch.setattr(scrape, "SCRAPE_MAX_PARALLEL", 4)
+        plugin = scrape.ScrapePlugin()
+        delays = {"https://a.example": 0.3, "https://b.example": 0.1, "https://c.example": 0.2}
+        
+        def fetch_html(url):
+            if url == "https://down.example":
+                raise Exception("connection refused")
+            time.sleep(delays[url])
+            return f"<main><p>{url}</p></main>"
+        
+        monkeypatch.setattr(plugin, "fetch_html", fetch_html)
+        parsed = []
+        parse_config = plugin.parse_config
+        monkeypatch.setattr(plugin, "parse_config", lambda inputs: parsed.append(inputs) or parse_config(inputs))
+        
+        started = time.perf_counter()
+        result = plugin.execute({"url": {"value": ["a.example", "down.example", "b.example", "c.example"]},
+                                 "selector": {"value": "p"}})[0]
+        assert time.perf_counter() - started < 0.5
+        assert result["success"] and len(parsed) == 1
+        assert result["result"] == ["https://a.example", "https://b.example", "https://c.example"]
+        assert [e["url"] for e in result["errors"]] == ["https://down.example"]
+    
+    @pytest.mark.unit
+    def test_host_token_bucket_spaces_requests_after_the_burst(self, scrape):
+        """A burst of two is free, later requests wait 1/rate seconds each."""
+        bucket = scrape.TokenBucket(rate=10.0, capacity=2)
+        waits = [bucket.reserve() for _ in range(4)]
+        assert waits[:2] == [0.0, 0.0]
+        assert waits[2] == pytest.approx(0.1, abs=0.01) and waits[3] == pytest.approx(0.2, abs=0.01)
+    
+    @pytest.mark.unit
+    def test_gzip_body_is_streamed_decompressed_and_capped(self, scrape, monkeypatch):
+        """fetch_html decompresses gzip over a pooled keep-alive session and stops at SCRAPE_MAX_BYTES."""
+        import gzip
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        
+        page = ("<html><body><main>" + "café " * 2000 + "</main></body></html>").encode("utf-8")
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                body = gzip.compress(page)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/docs"
+            plugin = scrape.ScrapePlugin()
+            assert plugin.fetch_html(url).encode("utf-8") == page
+            
+            monkeypatch.setattr(scrape, "SCRAPE_MAX_BYTES", 100)
+            truncated = plugin.fetch_html(url)
+            assert len(truncated) <= 100 and page.decode("utf-8").startswith(truncated[:-1])
+        finally:
+            server.shutdown()
+            server.server_close()
+    
+    @pytest.mark.unit
+    def test_pages_are_served_fresh_from_cache_or_revalidated(self, scrape, monkeypatch, tmp_path):
+        """max-age pages skip the network, no-cache pages are revalidated and reused on 304."""
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from http_response_cache import HttpResponseCache
+        monkeypatch.setattr(scrape, "_http_cache", HttpResponseCache(str(tmp_path / "http.sqlite3")))
+        requests_seen = []
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                requests_seen.append((self.path, self.headers.get("If-None-Match")))
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self.send_response(304)
+                    self.send_header("ETag", '"v1"')
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = f"<main>{self.path}</main>".encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                if self.path == "/dashboard":
+                    self.send_header("Cache-Control", "no-cache")
+                    self.send_header("ETag", '"v1"')
+                else:
+                    self.send_header("Cache-Control", "max-age=60")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            base = f"http://127.0.0.1:{server.server_port}"
+            plugin = scrape.ScrapePlugin()
+            for _ in range(2):
+                assert plugin.fetch_html(f"{base}/docs") == "<main>/docs</main>"
+                assert plugin.fetch_html(f"{base}/dashboard") == "<main>/dashboard</main>"
+            
+            # Pages cut off at SCRAPE_MAX_BYTES are never cached
+            monkeypatch.setattr(scrape, "SCRAPE_MAX_BYTES", 10)
+            for _ in range(2):
+                assert plugin.fetch_html(f"{base}/large-report") == "<main>/lar"
+        finally:
+            server.shutdown()
+            server.server_close()
+        
+        assert requests_seen == [("/docs", None), ("/dashboard", None), ("/dashboard", '"v1"'),
+                                 ("/large-report", None), ("/large-report", None)]
+        stats = scrape._http_cache.get_stats()
+        assert stats["hits"] == 1 and stats["revalidations"] == 1
+    
+    @pytest.mark.unit
+    @pytest.mark.parametrize("backend", ["html.parser", "lxml", "selectolax"])
+    def test_parser_backends_agree_on_selector_priority(self, scrape, backend):
+        """Fallbacks are chosen by priority rather than document order, the same way on every backend."""
+        if scrape.parser_backend(backend) != backend:
+            pytest.skip(f"{backend} is not installed")
+        plugin = scrape.ScrapePlugin()
+        plugin.parser = backend
+        html = """<html><body><div class="content"><p>intro</p></div>
+                  <article><p data-id="7">story</p><p>more</p></article></body></html>"""
+        
+        assert plugin.scrape_content(html, {"selector": "p"}) == ["intro", "story", "more"]
+        assert plugin.scrape_content(html, {"selector": "p.missing"}) == ["storymore"]
+        assert plugin.scrape_content(html, {"selector": "p[data-id]", "attribute": "data-id"}) == ["7"]
+        assert plugin.scrape_content(html, {"selector": "article p", "attribute": "html", "limit": 1}) == \
+            ['<p data-id="7">story</p>']
+        assert plugin.scrape_content("<p>nothing to see</p>", {}) == []
+
+
+class TestAccomplishPlanner:
+    """Test suite for ACCOMPLISH's speculative planning strategies."""
+    
+    @pytest.fixture
+    def accomplish(self, load_plugin, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)  # the plugin opens accomplish_debug.log in the working directory
+        monkeypatch.setenv("ACCOMPLISH_STRATEGY_STATS_DIR", str(tmp_path / "stats"))
+        monkeypatch.setenv("PLUGIN_MANIFEST_CACHE_DIR", str(tmp_path / "manifests"))
+        return load_plugin("ACCOMPLISH")
+    
+    @pytest.mark.unit
+    def test_first_valid_strategy_wins_within_the_brain_call_budget(self, accomplish, monkeypatch):
+        """Strategies race two at a time; the slow one is cut off and the winner ranks first next time."""
+        import threading
+        from types import SimpleNamespace
+        
+        # original_prompt's brain call blocks until the test releases it, after the race is decided
+        release = threading.Event()
+        calls, in_flight, peak = [], [0], [0]
+        lock = threading.Lock()
+        
+        def call_brain(prompt, inputs, response_type="json"):
+            with lock:
+                calls.append(prompt)
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            if prompt == "original_prompt":
+                assert release.wait(timeout=10)
+            with lock:
+                in_flight[0] -= 1
+            return prompt, "request"
+        
+        monkeypatch.setattr(accomplish, "call_brain", call_brain)
+        monkeypatch.setattr(accomplish, "ACCOMPLISH_MAX_BRAIN_CALLS", 2)
+        planner = accomplish.RobustMissionPlanner({"__auth_token": {"value": "token"}})
+        
+        def prose(goal, mission_goal, inputs, strategy, mission_context):
+            return planner._call_brain(strategy, inputs, "text")[0]
+        
+        def convert(prose_plan, goal, mission_goal, mission_id, inputs, strategy):
+            return [{"id": "step_1", "strategy": planner._call_brain(strategy, inputs)[0]}]
+        
+        def generated(strategy):
+            return lambda *args: [{"id": "step_1", "strategy": planner._call_brain(strategy, {})[0]}]
+        
+        def validate(plan, goal, inputs):
+            valid = plan[0]["strategy"] != "simplified_prompt"
+            return SimpleNamespace(is_valid=valid, plan=plan, errors=[] if valid else ["bad"],
+                                   get_error_messages=lambda: [] if valid else ["bad"])
+        
+        monkeypatch.setattr(planner, "_get_prose_plan_with_strategy", prose)
+        monkeypatch.setattr(planner, "_convert_to_structured_plan_with_recovery", convert)
+        monkeypatch.setattr(planner, "_generate_step_by_step_plan", generated("step_by_step_guidance"))
+        monkeypatch.setattr(planner, "_generate_alternative_plan", generated("alternative_approach"))
+        monkeypatch.setattr(planner.validator, "validate_and_repair", validate)
+        
+        plan = planner._generate_role_specific_plan("goal", None, "mission", "General",
+                                                    {"speculative_planning": {"value": True}}, {})
+        assert plan[0]["strategy"] == "step_by_step_guidance"
+        assert not release.is_set() and calls.count("original_prompt") == 1
+        
+        # Let the slow strategy's first call return: its second call must be refused
+        slow = [t for t in threading.enumerate() if t.name == "plan-original_prompt"]
+        release.set()
+        for thread in slow:
+            thread.join(timeout=10)
+            assert not thread.is_alive()
+        assert peak[0] == 2
+        assert calls.count("original_prompt") == 1 and "alternative_approach" not in calls
+        
+        stats = planner.strategy_stats.get_stats()
+        assert set(stats) == {"simplified_prompt", "step_by_step_guidance"}
+        reranked = accomplish.RobustMissionPlanner({"__auth_token": {"value": "token"}})
+        assert reranked.retry_strategies == ["step_by_step_guidance", "original_prompt",
+                                             "alternative_approach", "simplified_prompt"]
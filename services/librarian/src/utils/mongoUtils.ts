@@ -101,6 +101,19 @@ export async function loadFromMongo(collectionName: string, query: any, options?
     }
 }
 
+/**
+ * True for `{ $in: [...] }` with only primitive members, the one operator callers may pass
+ * through the sanitizer; anything else is still matched literally with $eq.
+ */
+function isPrimitiveInClause(value: any): boolean {
+    if (!value || typeof value !== 'object' || Array.isArray(value)) {
+        return false;
+    }
+    const keys = Object.keys(value);
+    return keys.length === 1 && keys[0] === '$in' && Array.isArray(value.$in)
+        && value.$in.every((member: any) => ['string', 'number', 'boolean'].includes(typeof member));
+}
+
 export async function loadManyFromMongo(collectionName: string, query: any, options?: any): Promise<any> {
     try {
         if (!connected) {
@@ -127,7 +140,7 @@ export async function loadManyFromMongo(collectionName: string, query: any, opti
         // Only sanitize if query is not empty
         if (Object.keys(query).length > 0) {
             for (const key in query) {
-                sanitizedQuery[key] = { $eq: query[key] };
+                sanitizedQuery[key] = isPrimitiveInClause(query[key]) ? { $in: query[key].$in } : { $eq: query[key] };
             }
         }
 
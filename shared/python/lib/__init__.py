@@ -3,6 +3,17 @@ Stage7 Shared Python Library
 
 This package provides common utilities for Stage7 Python plugins:
 - plan_validator: Plan validation and repair functionality
+- stage7_plugin_runtime: Shared input parsing, output and main() helpers for plugins
+- plugin_manifest_cache: On-disk TTL cache of plugin manifests shared by ACCOMPLISH and REFLECT
+- plan_validation_cache: Plan fingerprints and a cross-mission cache of validation outcomes
+- planning_strategy_stats: Persisted win rates that order ACCOMPLISH's planning strategies
+- search_result_cache: On-disk SEARCH_PYTHON results by normalized query and provider, plus saved provider scores
+- http_response_cache: On-disk SCRAPE pages with ETag/Last-Modified revalidation and Cache-Control freshness
+- sqlite_lru_cache: SQLite WAL file, LRU eviction and counters shared by the on-disk result caches
+- stage7_plugin_store: Indexed in-memory DataStore, TTL/LRU CacheManager, BoundedLog ring buffer and copy-on-write views for plugins
+- stage7_state_store: Durable per-tenant plugin state (SQLite WAL, JSON snapshot or memory backends)
+- stage7_text_index: Fielded BM25 inverted index with memory-mapped postings
+- stage7_calendar_index: Day-ordinal segment trees for per-night booking counts and free-room search
 """
 
 from .plan_validator import PlanValidator, AccomplishError, PLAN_STEP_SCHEMA, PLAN_ARRAY_SCHEMA
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for PlanValidator scaling.
+
+Builds synthetic chain plans (each step consumes the previous step's output) and
+fan-out plans (every step consumes the first step's output) of 10 to 2,000 steps and
+times validate_and_repair with a pre-populated plugin cache and no Brain calls.
+
+    python benchmark_plan_validation.py [--sizes 10,100,500,1000,2000] [--repeat 3]
+"""
+
+import argparse
+import logging
+import time
+import uuid
+from typing import Any, Dict, List
+
+from plan_validator import PlanValidator
+
+DEFAULT_SIZES = (10, 100, 500, 1000, 2000)
+
+PLUGIN_CACHE = {
+    "TRANSFORM": {
+        "verb": "TRANSFORM",
+        "inputDefinitions": [{"name": "text", "type": "string", "required": True}],
+        "outputDefinitions": [{"name": "text", "type": "string"}],
+    },
+}
+
+
+def _step(step_id: str, source_id: str = None) -> Dict[str, Any]:
+    if source_id:
+        text_input = {"outputName": "text", "sourceStep": source_id}
+    else:
+        text_input = {"value": "seed", "valueType": "string"}
+    return {
+        "id": step_id,
+        "actionVerb": "TRANSFORM",
+        "description": "Synthetic benchmark step.",
+        "inputs": {"text": text_input},
+        "outputs": {"text": {"type": "string", "description": "Transformed text."}},
+    }
+
+
+def chain_plan(size: int) -> List[Dict[str, Any]]:
+    ids = [str(uuid.uuid4()) for _ in range(size)]
+    return [_step(step_id, ids[i - 1] if i else None) for i, step_id in enumerate(ids)]
+
+
+def fan_out_plan(size: int) -> List[Dict[str, Any]]:
+    ids = [str(uuid.uuid4()) for _ in range(size)]
+    return [_step(step_id, ids[0] if i else None) for i, step_id in enumerate(ids)]
+
+
+def time_validation(plan: List[Dict[str, Any]], repeat: int) -> float:
+    """Best-of-``repeat`` wall time in seconds for one validation pass."""
+    best = float("inf")
+    for _ in range(repeat):
+        validator = PlanValidator()
+        validator.plugin_cache = dict(PLUGIN_CACHE)
+        start = time.perf_counter()
+        result = validator.validate_and_repair([dict(step) for step in plan], "benchmark", {})
+        best = min(best, time.perf_counter() - start)
+        if not result.is_valid:
+            raise RuntimeError(f"Synthetic plan failed validation: {result.get_error_messages()[:3]}")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    print(f"{'steps':>6} {'chain ms':>10} {'fan-out ms':>11} {'us/step':>8}")
+    for size in sizes:
+        chain = time_validation(chain_plan(size), args.repeat)
+        fan_out = time_validation(fan_out_plan(size), args.repeat)
+        print(f"{size:>6} {chain * 1000:>10.1f} {fan_out * 1000:>11.1f} {chain / size * 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+On-disk HTTP response cache with conditional revalidation for SCRAPE.
+
+Agents re-scrape the same dashboards and documentation pages every few minutes, and each
+SCRAPE invocation is a fresh process. This cache keeps page bodies in one SQLite file
+(WAL journal, shared by concurrent plugin processes) keyed by URL, together with the
+validators the server sent (ETag, Last-Modified) and a freshness deadline computed from
+Cache-Control max-age, or from Expires when there is no max-age.
+
+A fresh entry is served without touching the network. A stale entry is revalidated by
+sending ``conditional_headers`` (If-None-Match / If-Modified-Since); on a 304 the caller
+calls ``revalidated`` and reuses the stored body. Responses marked ``no-store``, and
+responses that carry neither validators nor a freshness lifetime, are not stored.
+
+The SQLite WAL file, LRU eviction and counters come from ``sqlite_lru_cache``. Any SQLite
+or filesystem error is logged and treated as a miss, so a broken cache never
+fails a scrape.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+try:
+    from .sqlite_lru_cache import SqliteLruCache, cache_dir, cache_enabled, env_number
+except ImportError:
+    from sqlite_lru_cache import SqliteLruCache, cache_dir, cache_enabled, env_number
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 2000
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Cache-Control directives by lower-cased name; directives without an argument map to None."""
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.strip().lower()] = argument.strip().strip('"') or None
+    return directives
+
+
+def freshness_lifetime(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds a response stays fresh from now, 0 if it must be revalidated before reuse, or
+    None if it must not be stored at all (Cache-Control: no-store).
+    """
+    headers = {k.lower(): v for k, v in headers.items()}
+    directives = parse_cache_control(headers.get('cache-control'))
+    if 'no-store' in directives:
+        return None
+    if 'no-cache' in directives:
+        return 0.0
+    lifetime = 0.0
+    if 'max-age' in directives:
+        try:
+            lifetime = float(directives['max-age'])
+        except (TypeError, ValueError):
+            lifetime = 0.0
+    elif headers.get('expires'):
+        expires = _http_date(headers['expires'])
+        date = _http_date(headers.get('date')) or (time.time() if now is None else now)
+        lifetime = (expires - date) if expires is not None else 0.0
+    try:
+        lifetime -= float(headers.get('age', 0))
+    except ValueError:
+        pass
+    return max(0.0, lifetime)
+
+
+class HttpResponseCache(SqliteLruCache):
+    """Response bodies by URL with their validators and freshness deadline, LRU-bounded."""
+
+    _SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS http_responses (
+            url TEXT PRIMARY KEY,
+            body TEXT NOT NULL,
+            content_type TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            expires_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS http_responses_by_use ON http_responses (last_used)",
+    )
+
+    _TABLE = "http_responses"
+    _KEY = "url"
+
+    _GET = "SELECT body, content_type, etag, last_modified, expires_at FROM http_responses WHERE url = ?"
+    _TOUCH = "UPDATE http_responses SET last_used = ? WHERE url = ?"
+    _PUT = ("INSERT OR REPLACE INTO http_responses (url, body, content_type, etag, last_modified, expires_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)")
+    _REVALIDATE = ("UPDATE http_responses SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), "
+                   "expires_at = ?, last_used = ? WHERE url = ?")
+    _DELETE = "DELETE FROM http_responses WHERE url = ?"
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(path, max_entries)
+        self.stale = 0
+        self.revalidations = 0
+
+    @classmethod
+    def from_environment(cls, prefix: str = 'SCRAPE') -> Optional['HttpResponseCache']:
+        """
+        Cache configured from the environment, or None if <prefix>_CACHE is "off".
+
+        <prefix>_CACHE_DIR (default: the system temp dir) holds the file and
+        <prefix>_CACHE_MAX_ENTRIES bounds it.
+        """
+        if not cache_enabled(f'{prefix}_CACHE'):
+            return None
+        directory = cache_dir(f'{prefix}_CACHE_DIR', f'stage7_{prefix.lower()}_cache')
+        max_entries = max(1, int(env_number(f'{prefix}_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)))
+        return cls(os.path.join(directory, 'http_cache.sqlite3'), max_entries)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        The stored response for a URL, or None. The entry's "fresh" flag says whether it can be
+        used as is; a stale entry still provides conditional_headers for revalidation.
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(self._GET, (url,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute(self._TOUCH, (now, url))
+                fresh = row[4] > now
+                if fresh:
+                    self.hits += 1
+                else:
+                    self.stale += 1
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"HTTP cache lookup failed ({self.path}): {e}")
+            return None
+        return {"body": row[0], "content_type": row[1], "etag": row[2], "last_modified": row[3],
+                "expires_at": row[4], "fresh": fresh}
+
+    @staticmethod
+    def conditional_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url: str, headers: Mapping[str, str], body: str):
+        """Store a 200 response, then evict least recently used entries beyond max_entries."""
+        now = time.time()
+        lifetime = freshness_lifetime(headers, now)
+        lowered = {k.lower(): v for k, v in headers.items()}
+        etag, last_modified = lowered.get('etag'), lowered.get('last-modified')
+        try:
+            with self._lock:
+                conn = self._connection()
+                if lifetime is None or (lifetime <= 0 and not etag and not last_modified):
+                    # Nothing reusable: drop whatever an earlier response left behind
+                    conn.execute(self._DELETE, (url,))
+                    return
+                with self._bounded_write(conn):
+                    conn.execute(self._PUT, (url, body, lowered.get('content-type'), etag, last_modified,
+                                             now + lifetime, now))
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"HTTP cache write failed ({self.path}): {e}")
+
+    def revalidated(self, url: str, headers: Mapping[str, str]):
+        """Record a 304 for a stored URL: new validators and freshness from the 304's headers."""
+        now = time.time()
+        lifetime = freshness_lifetime(headers, now)
+        lowered = {k.lower(): v for k, v in headers.items()}
+        try:
+            with self._lock:
+                conn = self._connection()
+                if lifetime is None:
+                    conn.execute(self._DELETE, (url,))
+                else:
+                    conn.execute(self._REVALIDATE, (lowered.get('etag'), lowered.get('last-modified'),
+                                                    now + lifetime, now, url))
+                self.revalidations += 1
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"HTTP cache update failed ({self.path}): {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        # Stale lookups count against the hit rate unless a 304 let the stored body be reused
+        lookups = self.hits + self.stale + self.misses
+        stats = super().get_stats()
+        stats.update({
+            "stale": self.stale,
+            "revalidations": self.revalidations,
+            "hit_rate": ((self.hits + self.revalidations) / lookups) if lookups else 0.0
+        })
+        return stats
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
@@ -13,9 +13,11 @@ from typing import Dict, List, Any, Optional, Set, Tuple
 try:
     from .plugin_type_service import PluginTypeService, create_plugin_type_service
     from .plan_validator import PlanValidator
+    from .plan_validation_cache import get_shared_validation_cache
 except ImportError:
     from plugin_type_service import PluginTypeService, create_plugin_type_service
     from plan_validator import PlanValidator
+    from plan_validation_cache import get_shared_validation_cache
 
 logger = logging.getLogger(__name__)
 
@@ -44,7 +46,9 @@ class HybridValidationService:
         
         # Initialize components
         self.plugin_type_service = create_plugin_type_service(inputs)
-        self.plan_validator = PlanValidator(max_retries)
+        self.validation_cache = get_shared_validation_cache()
+        self.plan_validator = PlanValidator(validation_cache=self.validation_cache)
+        self.plan_validator.max_retries = max_retries
         
         # Configure the plan validator to use API-based types
         if self.plugin_type_service:
@@ -215,7 +219,7 @@ class HybridValidationService:
     def get_validation_stats(self) -> Dict[str, Any]:
         """Get statistics about the validation service performance."""
         stats = {
-            'api_based_types_enabled': self.plan_validator.use_api_based_types,
+            'api_based_types_enabled': getattr(self.plan_validator, 'use_api_based_types', False),
             'runtime_modifications_applied': len(self.runtime_modifications),
             'novel_verbs_discovered': len(self.novel_verbs_cache),
             'novel_verbs': list(self.novel_verbs_cache.keys())
@@ -223,6 +227,9 @@ class HybridValidationService:
         
         if self.plugin_type_service:
             stats.update(self.plugin_type_service.get_cache_stats())
+
+        # Cross-mission plan validation cache (hits, misses, hit rate)
+        stats.update(self.validation_cache.get_stats())
         
         return stats
     
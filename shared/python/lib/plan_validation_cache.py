@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Cross-mission cache of plan validation outcomes.
+
+Missions often regenerate plans with the same verbs and wiring but different literal
+values and fresh UUIDs. ``plan_fingerprint`` reduces a plan to a canonical structure:
+step ids are replaced by their order of appearance, and literal values (input values
+and descriptions) are replaced by a type marker and hashed separately. Plans with the
+same structure share a cache entry recording whether they validated and which FOREACH
+wraps were needed, so ``PlanValidator`` can replay the wraps immediately instead of
+discovering them one validation pass at a time.
+
+Entries live in a bounded in-memory LRU backed by one small JSON file per structure.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_ENTRIES = 4096
+
+# Keys whose values are free text or literals rather than plan structure
+LITERAL_KEYS = frozenset({'value', 'description'})
+
+
+@dataclass(frozen=True)
+class PlanFingerprint:
+    """Canonical structure hash, literal-values hash and the step ids in canonical order."""
+    structure: str
+    literals: str
+    step_ids: List[str]
+
+
+def _is_sub_plan(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(s, dict) and 'actionVerb' in s for s in value)
+
+
+def _literal_marker(value: Any) -> str:
+    empty = value is None or value == '' or value == [] or value == {}
+    return f"<{type(value).__name__}:{'empty' if empty else 'set'}>"
+
+
+def plan_fingerprint(plan: List[Dict[str, Any]], context: Optional[Dict[str, Any]] = None) -> PlanFingerprint:
+    """
+    Fingerprint a plan. ``context`` holds anything else the validation outcome depends on
+    (e.g. mission input names, plugin manifest versions) and is folded into the structure.
+    """
+    ordinals: Dict[str, str] = {}
+    step_ids: List[str] = []
+
+    def collect_ids(steps: List[Dict[str, Any]]):
+        for step in steps:
+            step_id = step.get('id')
+            if isinstance(step_id, str) and step_id not in ordinals:
+                ordinals[step_id] = f"#{len(ordinals)}"
+                step_ids.append(step_id)
+            for value in _nested_values(step):
+                if _is_sub_plan(value):
+                    collect_ids(value)
+
+    literals: List[Any] = []
+
+    def canonical(node: Any, key: Optional[str] = None) -> Any:
+        if isinstance(node, dict):
+            return {k: canonical(v, k) for k, v in sorted(node.items())}
+        if key in ('id', 'sourceStep') and isinstance(node, str):
+            return ordinals.get(node, node)
+        if key in LITERAL_KEYS and not _is_sub_plan(node):
+            literals.append(node)
+            return _literal_marker(node)
+        if isinstance(node, list):
+            return [canonical(item) for item in node]
+        return node
+
+    collect_ids(plan)
+    structure = canonical({'plan': plan, 'context': context or {}})
+    return PlanFingerprint(
+        structure=_digest(structure),
+        literals=_digest(literals),
+        step_ids=step_ids,
+    )
+
+
+def _nested_values(step: Dict[str, Any]):
+    yield step.get('steps')
+    inputs = step.get('inputs')
+    if isinstance(inputs, dict):
+        for input_def in inputs.values():
+            if isinstance(input_def, dict):
+                yield input_def.get('value')
+
+
+def _digest(obj: Any) -> str:
+    encoded = json.dumps(obj, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class PlanValidationCache:
+    """Bounded LRU of structure fingerprint -> validation outcome, persisted per entry."""
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 max_memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 max_disk_entries: int = DEFAULT_DISK_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.exact_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> 'PlanValidationCache':
+        """Configured by PLAN_VALIDATION_CACHE_DIR and PLAN_VALIDATION_CACHE_SIZE."""
+        cache_dir = os.environ.get('PLAN_VALIDATION_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'stage7_plan_validation')
+        try:
+            size = int(os.environ.get('PLAN_VALIDATION_CACHE_SIZE', DEFAULT_MEMORY_ENTRIES))
+        except ValueError:
+            size = DEFAULT_MEMORY_ENTRIES
+        return cls(cache_dir, max_memory_entries=max(1, size))
+
+    def get(self, fingerprint: PlanFingerprint) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            outcome = self._entries.get(fingerprint.structure)
+            if outcome is not None:
+                self._entries.move_to_end(fingerprint.structure)
+            else:
+                outcome = self._read_disk(fingerprint.structure)
+                if outcome is not None:
+                    self._remember(fingerprint.structure, outcome)
+
+            if outcome is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if outcome.get('literals') == fingerprint.literals:
+                self.exact_hits += 1
+            return outcome
+
+    def put(self, fingerprint: PlanFingerprint, outcome: Dict[str, Any]):
+        outcome = dict(outcome, literals=fingerprint.literals, storedAt=time.time())
+        with self._lock:
+            self._remember(fingerprint.structure, outcome)
+            self._write_disk(fingerprint.structure, outcome)
+
+    def invalidate(self, fingerprint: PlanFingerprint):
+        with self._lock:
+            self._entries.pop(fingerprint.structure, None)
+            path = self._path(fingerprint.structure)
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.exact_hits = self.misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'validation_cache_hits': self.hits,
+            'validation_cache_exact_hits': self.exact_hits,
+            'validation_cache_misses': self.misses,
+            'validation_cache_hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'validation_cache_entries': len(self._entries),
+        }
+
+    def _remember(self, key: str, outcome: Dict[str, Any]):
+        self._entries[key] = outcome
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_memory_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> Optional[str]:
+        return os.path.join(self.cache_dir, f"{key}.json") if self.cache_dir else None
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        if not path:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                outcome = json.load(f)
+            os.utime(path)  # keep recently used entries out of the disk eviction
+            return outcome if isinstance(outcome, dict) else None
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable validation cache entry {path}: {e}")
+            return None
+
+    def _write_disk(self, key: str, outcome: Dict[str, Any]):
+        path = self._path(key)
+        if not path:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.entry_', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(outcome, f)
+            os.replace(tmp_path, path)
+            self._prune_disk()
+        except OSError as e:
+            logger.warning(f"Could not persist validation cache entry to {path}: {e}")
+
+    def _prune_disk(self):
+        entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith('.json')]
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort(key=lambda p: os.path.getmtime(p))
+        for path in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_shared_cache: Optional[PlanValidationCache] = None
+
+
+def get_shared_validation_cache() -> PlanValidationCache:
+    """Process-wide cache instance, created from the environment on first use."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = PlanValidationCache.from_env()
+    return _shared_cache
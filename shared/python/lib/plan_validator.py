@@ -7,10 +7,17 @@ import re
 import copy
 import os
 import sys
-from typing import Dict, Any, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Mapping, Optional, Set, Tuple
 from dataclasses import dataclass, field
-from enum import Enum
+from enum import Enum, IntEnum
 import requests
+try:
+    from .plugin_manifest_cache import PluginManifestCache
+    from .plan_validation_cache import PlanValidationCache, PlanFingerprint, plan_fingerprint, get_shared_validation_cache
+except ImportError:
+    from plugin_manifest_cache import PluginManifestCache
+    from plan_validation_cache import PlanValidationCache, PlanFingerprint, plan_fingerprint, get_shared_validation_cache
 
 # Configure logging if not already configured
 if not logging.root.handlers:
@@ -137,30 +144,192 @@ class TransformationTracker:
     """Prevents infinite loops by tracking applied transformations."""
     def __init__(self):
         self.applied: Set[str] = set()
+        # (step_id, source_step, source_output, target_input) in the order they were applied
+        self.foreach_wraps: List[Tuple[str, str, str, str]] = []
     
     def can_apply(self, transformation_key: str) -> bool:
         return transformation_key not in self.applied
     
     def mark_applied(self, transformation_key: str):
         self.applied.add(transformation_key)
+
+    def record_foreach_wrap(self, step_id: str, source_step: str, source_output: str, target_input: str):
+        self.mark_applied(self.get_key_for_foreach_wrap(step_id, source_step, source_output))
+        self.foreach_wraps.append((step_id, source_step, source_output, target_input))
     
     def get_key_for_foreach_wrap(self, step_id: str, source_step: str, 
                                    source_output: str) -> str:
         return f"FOREACH:{step_id}:{source_step}:{source_output}"
 
 
+class TypeKind(IntEnum):
+    """Interned classes of plugin input/output type strings used by the compatibility table."""
+    STRING = 0
+    NUMBER = 1
+    BOOLEAN = 2
+    OBJECT = 3
+    ARRAY = 4
+    ANY = 5
+    OTHER = 6
+
+
+ARRAY_LIKE_TYPES = frozenset({'array', 'list', 'list[string]', 'list[number]',
+                              'list[boolean]', 'list[object]', 'list[any]'})
+
+_TYPE_KINDS: Dict[str, TypeKind] = {
+    'string': TypeKind.STRING,
+    'number': TypeKind.NUMBER,
+    'boolean': TypeKind.BOOLEAN,
+    'object': TypeKind.OBJECT,
+    'any': TypeKind.ANY,
+    **{array_type: TypeKind.ARRAY for array_type in ARRAY_LIKE_TYPES},
+}
+
+# Valid output types that steps can declare
+VALID_OUTPUT_TYPES = frozenset(_TYPE_KINDS) | {'plan', 'plugin'}
+
+
+def type_kind(type_name: Optional[str]) -> TypeKind:
+    return _TYPE_KINDS.get(type_name, TypeKind.OTHER)
+
+
+def _build_compatibility_table(novel_verb: bool) -> Tuple[Tuple[bool, ...], ...]:
+    """table[dest_kind][source_kind]; identical type strings are always compatible and checked separately."""
+    table = []
+    for dest in TypeKind:
+        row = []
+        for source in TypeKind:
+            if dest is TypeKind.ANY or source is TypeKind.ANY:
+                compatible = True
+            elif dest is TypeKind.STRING:
+                compatible = source in (TypeKind.NUMBER, TypeKind.BOOLEAN, TypeKind.OBJECT) or (novel_verb and source is TypeKind.ARRAY)
+            elif dest is TypeKind.ARRAY:
+                # Known plugins accept any array-like output for an array-like input
+                compatible = source is TypeKind.ARRAY and not novel_verb
+            else:
+                compatible = False
+            row.append(compatible)
+        table.append(tuple(row))
+    return tuple(table)
+
+
+_COMPATIBILITY = {False: _build_compatibility_table(False), True: _build_compatibility_table(True)}
+
+
+def types_compatible(dest_type: str, source_type: str, novel_verb: bool = False) -> bool:
+    if dest_type == source_type:
+        return True
+    return _COMPATIBILITY[novel_verb][type_kind(dest_type)][type_kind(source_type)]
+
+
+@dataclass(frozen=True)
+class CompiledManifest:
+    """A plugin manifest reduced to name -> type maps for constant-time edge checks."""
+    source: Dict[str, Any] = field(compare=False, repr=False)
+    input_types: Dict[str, Optional[str]]
+    output_types: Dict[str, Optional[str]]
+
+    @classmethod
+    def compile(cls, plugin_def: Dict[str, Any]) -> 'CompiledManifest':
+        # First definition wins, matching the linear scans this replaces
+        input_types: Dict[str, Optional[str]] = {}
+        for in_def in plugin_def.get('inputDefinitions', []) or []:
+            if isinstance(in_def, dict):
+                input_types.setdefault(in_def.get('name'), in_def.get('type'))
+        output_types: Dict[str, Optional[str]] = {}
+        for out_def in plugin_def.get('outputDefinitions', []) or []:
+            if isinstance(out_def, dict):
+                output_types.setdefault(out_def.get('name'), out_def.get('type'))
+        return cls(plugin_def, input_types, output_types)
+
+
+@dataclass
+class IndexChange:
+    """A single entry in the plan index change log"""
+    kind: str  # 'added', 'moved' or 'removed'
+    step_id: str
+    scope_id: str
+
+
 @dataclass
 class PlanIndex:
-    """Incremental index for plan structure to avoid repeated traversals"""
+    """Incremental index for plan structure to avoid repeated traversals.
+
+    Scopes are keyed by the id of the step that owns the sub-plan, or ROOT_SCOPE for
+    the top-level plan, so cached execution orders survive across validation passes
+    and only the scopes touched by a transformation are recomputed.
+    """
+    ROOT_SCOPE = "root"
+
     steps: Dict[str, Any] = field(default_factory=dict)
     parents: Dict[str, str] = field(default_factory=dict)
     outputs: Dict[str, Dict[str, str]] = field(default_factory=dict)
     execution_orders: Dict[str, List[str]] = field(default_factory=dict)
+    positions: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    scopes: Dict[str, List[str]] = field(default_factory=dict)
+    changes: List[IndexChange] = field(default_factory=list)
     
+    def scope_of(self, step_id: str) -> str:
+        """Scope that currently contains the given step"""
+        return self.parents.get(step_id, self.ROOT_SCOPE)
+
     def invalidate_scope(self, scope_id: str):
         """Invalidate cached data for a specific scope"""
         if scope_id in self.execution_orders:
             del self.execution_orders[scope_id]
+        self.positions.pop(scope_id, None)
+
+    def set_execution_order(self, scope_id: str, execution_order: List[str]):
+        """Cache a scope's execution order together with its step -> position map"""
+        self.execution_orders[scope_id] = execution_order
+        self.positions[scope_id] = {step_id: i for i, step_id in enumerate(execution_order)}
+
+    def record_change(self, kind: str, step_id: str, scope_id: str):
+        """Append to the change log and invalidate the affected scope"""
+        self.changes.append(IndexChange(kind, step_id, scope_id))
+        self.invalidate_scope(scope_id)
+
+
+class AvailableOutputs(Mapping):
+    """
+    Read-only view of the outputs visible to one step: every step that precedes it in
+    its scope's execution order, plus its ancestors (with FOREACH item/index).
+
+    Built in O(1) from the scope's position map instead of copying the outputs of all
+    preceding steps, so validating a scope is linear rather than quadratic.
+    """
+    __slots__ = ('_order', '_positions', '_cutoff', '_outputs', '_ancestors')
+
+    def __init__(self, order: List[str], positions: Dict[str, int], cutoff: int,
+                 outputs: Dict[str, Dict[str, str]], ancestors: Dict[str, Dict[str, str]]):
+        self._order = order
+        self._positions = positions
+        self._cutoff = cutoff
+        self._outputs = outputs
+        self._ancestors = ancestors
+
+    def _precedes(self, step_id: str) -> bool:
+        position = self._positions.get(step_id)
+        return position is not None and position < self._cutoff and step_id in self._outputs
+
+    def __getitem__(self, step_id: str) -> Dict[str, str]:
+        if step_id in self._ancestors:
+            return self._ancestors[step_id]
+        if self._precedes(step_id):
+            return self._outputs[step_id]
+        raise KeyError(step_id)
+
+    def __contains__(self, step_id: object) -> bool:
+        return step_id in self._ancestors or (isinstance(step_id, str) and self._precedes(step_id))
+
+    def __iter__(self) -> Iterator[str]:
+        for step_id in self._order[:self._cutoff]:
+            if step_id in self._outputs and step_id not in self._ancestors:
+                yield step_id
+        yield from self._ancestors
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
 
 
 class PlanValidator:
@@ -170,37 +339,158 @@ class PlanValidator:
     CONTROL_FLOW_VERBS = {'WHILE', 'SEQUENCE', 'IF_THEN', 'UNTIL', 'FOREACH', 'REPEAT', 'REGROUP'}
     ALLOWED_ROLES = {'coordinator', 'researcher', 'coder', 'creative', 'critic', 'executor', 'domain expert'}
     
-    def __init__(self, brain_call: callable = None, report_logic_failure_call: callable = None, librarian_info: Optional[Dict[str, Any]] = None):
+    def __init__(self, brain_call: callable = None, report_logic_failure_call: callable = None, librarian_info: Optional[Dict[str, Any]] = None,
+                 validation_cache: Optional[PlanValidationCache] = None):
         self.brain_call = brain_call
         self.report_logic_failure_call = report_logic_failure_call
         self.max_retries = 3
+        # Upper bound on concurrent Brain calls when repairing independent error signatures
+        try:
+            self.max_parallel_repairs = max(1, int(os.environ.get('PLAN_REPAIR_MAX_PARALLEL', '4')))
+        except ValueError:
+            self.max_parallel_repairs = 4
         self.librarian_info = librarian_info or {}
         self.plugin_cache: Dict[str, Dict[str, Any]] = {}
+        # Verbs the Librarian could not resolve during this run; avoids repeating both lookups per step
+        self._undiscoverable_verbs: Set[str] = set()
+        self._compiled_manifests: Dict[str, CompiledManifest] = {}
+        self.manifest_cache: Optional[PluginManifestCache] = None
+        if self._has_librarian_info():
+            self.manifest_cache = PluginManifestCache.for_librarian(self.librarian_info['url'])
+        # Outcomes shared across missions; on by default wherever the manifest cache is
+        self.validation_cache: Optional[PlanValidationCache] = validation_cache
+        if self.validation_cache is None and self.manifest_cache is not None:
+            self.validation_cache = get_shared_validation_cache()
+
+    def _has_librarian_info(self) -> bool:
+        return bool(self.librarian_info and self.librarian_info.get('url') and self.librarian_info.get('auth_token'))
 
     def _get_plugin_definition(self, action_verb: str) -> Optional[Dict[str, Any]]:
         """
-        Retrieves a plugin definition for a given action verb, using an in-memory cache
-        and falling back to dynamic discovery from the Librarian.
+        Retrieves a plugin definition for a given action verb, using the in-memory cache,
+        then the on-disk manifest cache, and finally dynamic discovery from the Librarian.
         """
         verb_upper = action_verb.upper()
         
         # 1. Check cache first
         if verb_upper in self.plugin_cache:
             return self.plugin_cache[verb_upper]
+        if verb_upper in self._undiscoverable_verbs:
+            return None
+
+        # 2. Manifests persisted by earlier ACCOMPLISH / REFLECT runs
+        if self.manifest_cache:
+            plugin_def = self.manifest_cache.get(verb_upper)
+            if plugin_def:
+                self.plugin_cache[verb_upper] = plugin_def
+                return plugin_def
         
-        # 2. On cache miss, discover from Librarian
+        # 3. On cache miss, discover from Librarian
         plugin_def = self._discover_single_plugin(action_verb)
         if plugin_def:
             self.plugin_cache[verb_upper] = plugin_def
+            if self.manifest_cache:
+                self.manifest_cache.put(verb_upper, plugin_def)
+        else:
+            self._undiscoverable_verbs.add(verb_upper)
         return plugin_def
 
+    def _get_compiled_manifest(self, action_verb: str) -> Optional[CompiledManifest]:
+        """Compiled name -> type maps for a verb, rebuilt only if its plugin definition changes."""
+        plugin_def = self._get_plugin_definition(action_verb)
+        if not plugin_def:
+            return None
+        verb_upper = action_verb.upper()
+        compiled = self._compiled_manifests.get(verb_upper)
+        if compiled is None or compiled.source is not plugin_def:
+            compiled = CompiledManifest.compile(plugin_def)
+            self._compiled_manifests[verb_upper] = compiled
+        return compiled
+
+    def _collect_action_verbs(self, plan: List[Dict[str, Any]], verbs: Optional[Set[str]] = None) -> Set[str]:
+        """Every distinct actionVerb in the plan, including nested sub-plans (e.g. FOREACH steps)."""
+        if verbs is None:
+            verbs = set()
+        for step in plan:
+            if not isinstance(step, dict):
+                continue
+            action_verb = step.get('actionVerb')
+            if isinstance(action_verb, str) and action_verb:
+                verbs.add(action_verb.upper())
+            for input_def in (step.get('inputs') or {}).values():
+                sub_plan = input_def.get('value') if isinstance(input_def, dict) else None
+                if isinstance(sub_plan, list) and any(isinstance(s, dict) and 'actionVerb' in s for s in sub_plan):
+                    self._collect_action_verbs(sub_plan, verbs)
+        return verbs
+
+    def prefetch_plugin_definitions(self, plan: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Resolves every verb used by the plan before validation starts: in-memory cache,
+        then the on-disk cache, then one batched Librarian query for the rest. Verbs the
+        batch does not return fall back to the per-verb exact match, then semantic search.
+        """
+        missing = [verb for verb in sorted(self._collect_action_verbs(plan))
+                   if verb not in self.plugin_cache and verb not in self._undiscoverable_verbs]
+        if not missing:
+            return {}
+
+        resolved: Dict[str, Dict[str, Any]] = {}
+        if self.manifest_cache:
+            resolved.update(self.manifest_cache.get_many(missing))
+            missing = [verb for verb in missing if verb not in resolved]
+
+        if missing and self._has_librarian_info():
+            discovered = self._discover_plugins_batch(missing) or {}
+            for verb in missing:
+                if verb not in discovered:
+                    # An empty batch result is not proof the verb is unknown (a Librarian that
+                    # cannot evaluate $in matches nothing), so try the exact match before semantic search
+                    plugin_def = self._discover_single_plugin(verb)
+                    if plugin_def:
+                        discovered[verb] = plugin_def
+                    else:
+                        self._undiscoverable_verbs.add(verb)
+            if self.manifest_cache:
+                self.manifest_cache.put_many(discovered)
+            resolved.update(discovered)
+
+        self.plugin_cache.update(resolved)
+        logger.info(f"Prefetched {len(resolved)} plugin definitions; {len(self._undiscoverable_verbs)} verbs unresolved")
+        return resolved
+
+    def _discover_plugins_batch(self, verbs: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Looks up many verbs with a single exact-match Librarian query. Returns None if the query failed."""
+        librarian_url = self.librarian_info['url']
+        headers = {'Authorization': f"Bearer {self.librarian_info['auth_token']}", 'Content-Type': 'application/json'}
+        payload = {
+            'collection': 'tools',
+            'query': {'metadata.verb': {'$in': verbs}}
+        }
+        try:
+            response = requests.post(f"http://{librarian_url}/queryData", headers=headers, json=payload, timeout=10)
+            response.raise_for_status()
+            response_data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Batched discovery for {len(verbs)} verbs failed: {e}")
+            return None
+
+        discovered: Dict[str, Dict[str, Any]] = {}
+        documents = response_data.get('data') if isinstance(response_data, dict) else None
+        for document in documents if isinstance(documents, list) else []:
+            manifest = document.get('metadata') if isinstance(document, dict) else None
+            verb = manifest.get('verb') if isinstance(manifest, dict) else None
+            if isinstance(verb, str) and verb.upper() in verbs:
+                discovered[verb.upper()] = manifest
+        logger.info(f"Batched discovery resolved {len(discovered)}/{len(verbs)} verbs")
+        return discovered
+
     def _discover_single_plugin(self, action_verb: str) -> Optional[Dict[str, Any]]:
         """
         Dynamically discovers a single plugin definition from the Librarian using a hybrid approach.
         1. Tries a direct, exact-match query for a known verb.
         2. Falls back to a semantic search if the direct query fails.
         """
-        if not self.librarian_info or not self.librarian_info.get('url') or not self.librarian_info.get('auth_token'):
+        if not self._has_librarian_info():
             logger.warning(f"Librarian info is incomplete, cannot dynamically discover plugin for '{action_verb}'.")
             return None
 
@@ -220,7 +510,7 @@ class PlanValidator:
             response = requests.post(f"http://{librarian_url}/queryData", headers=headers, json=direct_payload, timeout=5)
             response.raise_for_status()
             response_data = response.json()
-            
+        
             if response_data and isinstance(response_data, dict) and 'data' in response_data and isinstance(response_data['data'], list) and response_data['data']:
                 exact_match = response_data['data'][0]
                 logger.info(f"Direct discovery successful for '{verb_upper}'.")
@@ -333,9 +623,24 @@ class PlanValidator:
             logger.info(f"Applied UUID mapping with {len(uuid_map)} replacements")
             plan = self._apply_uuid_map_recursive(plan, uuid_map)
         
+        self.prefetch_plugin_definitions(plan)
+
+        fingerprint = None
+        if self.validation_cache is not None:
+            fingerprint = self._plan_fingerprint(plan, inputs)
+            cached_outcome = self.validation_cache.get(fingerprint)
+            if cached_outcome:
+                cached_result = self._replay_cached_outcome(plan, fingerprint, cached_outcome, inputs)
+                if cached_result:
+                    logger.info(f"Plan structure matched a cached validation outcome; replayed {len(cached_outcome.get('foreachWraps', []))} FOREACH wraps")
+                    return cached_result
+                logger.info("Cached validation outcome no longer applies; validating from scratch")
+                self.validation_cache.invalidate(fingerprint)
+
         index = self._build_plan_index(plan)
         tracker = TransformationTracker()
         current_result = None
+        llm_repaired = False
         
         for attempt in range(self.max_retries):
             logger.info(f"Validation attempt {attempt + 1}/{self.max_retries}")
@@ -344,6 +649,8 @@ class PlanValidator:
             
             if current_result.is_valid:
                 logger.info(f"Plan successfully validated after {attempt + 1} attempts")
+                if fingerprint is not None and not llm_repaired:
+                    self._store_validation_outcome(fingerprint, tracker)
                 # Sanitize plan before returning: remove internal metadata fields
                 current_result.plan = self._sanitize_plan(current_result.plan)
                 return current_result
@@ -351,16 +658,19 @@ class PlanValidator:
             logger.warning(f"Validation attempt {attempt + 1} found {len(current_result.errors)} errors.")
 
             # If programmatic transforms were applied, they might have fixed something.
-            # The loop will continue and re-validate.
+            # The loop will continue and re-validate. The index was already updated
+            # scope-locally while transforming, so it is reused as-is.
             if current_result.transformations_applied:
                 plan = current_result.plan
-                index = self._build_plan_index(plan)
+                logger.debug(f"Index change log: {len(index.changes)} entries")
                 continue
 
             # No improvement from programmatic transforms, try LLM repair
             logger.warning("No improvement from programmatic transformations. Attempting LLM repair.")
             try:
                 plan = self._repair_plan_with_llm(plan, current_result.errors, goal, inputs, tracker)
+                llm_repaired = True
+                self.prefetch_plugin_definitions(plan) # The repair may introduce new verbs
                 index = self._build_plan_index(plan) # Re-index after potential repair
             except Exception as e:
                 logger.error(f"LLM repair failed: {e}. Aborting repair attempts.")
@@ -372,6 +682,77 @@ class PlanValidator:
             current_result.plan = self._sanitize_plan(current_result.plan)
         return current_result
 
+    def _plan_fingerprint(self, plan: List[Dict[str, Any]], inputs: Dict[str, Any]) -> PlanFingerprint:
+        """Fingerprint including everything else the outcome depends on: mission input names and manifests."""
+        manifests = {}
+        for verb in sorted(self._collect_action_verbs(plan)):
+            plugin_def = self.plugin_cache.get(verb)
+            manifests[verb] = json.dumps(plugin_def, sort_keys=True, default=str) if plugin_def else None
+        context = {'inputs': sorted(inputs.keys()) if isinstance(inputs, dict) else [], 'manifests': manifests}
+        return plan_fingerprint(plan, context)
+
+    def _store_validation_outcome(self, fingerprint: PlanFingerprint, tracker: TransformationTracker):
+        """Record a programmatically reached valid outcome, with wraps expressed as step ordinals."""
+        ordinals = {step_id: i for i, step_id in enumerate(fingerprint.step_ids)}
+        wraps = []
+        for step_id, source_step, source_output, target_input in tracker.foreach_wraps:
+            if step_id not in ordinals or source_step not in ordinals:
+                return  # Wrapped a step the original plan did not have; not replayable
+            wraps.append([ordinals[step_id], ordinals[source_step], source_output, target_input])
+        self.validation_cache.put(fingerprint, {'valid': True, 'foreachWraps': wraps})
+
+    def _replay_cached_outcome(self, plan: List[Dict[str, Any]], fingerprint: PlanFingerprint,
+                               outcome: Dict[str, Any], inputs: Dict[str, Any]) -> Optional[ValidationResult]:
+        """
+        Applies the cached FOREACH wraps in one go, then confirms with a single validation
+        pass (which also applies the usual in-place normalizations). Both work on a copy of
+        the plan, so when the cached outcome does not hold (None is returned) the from-scratch
+        pass still starts from the caller's untouched steps.
+        """
+        if not outcome.get('valid'):
+            return None
+        plan = copy.deepcopy(plan)
+        index = self._build_plan_index(plan)
+        tracker = TransformationTracker()
+        replayed = []
+        try:
+            for step_ordinal, source_ordinal, source_output, target_input in outcome.get('foreachWraps', []):
+                step_id = fingerprint.step_ids[step_ordinal]
+                source_id = fingerprint.step_ids[source_ordinal]
+                plan = self._apply_foreach_wrap(plan, index, step_id, source_id, source_output, target_input)
+                tracker.record_foreach_wrap(step_id, source_id, source_output, target_input)
+                replayed.append(tracker.get_key_for_foreach_wrap(step_id, source_id, source_output))
+        except (IndexError, KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Could not replay cached FOREACH wraps: {e}")
+            return None
+
+        result = self._validate_and_transform(plan, index, tracker, inputs)
+        if not result.is_valid:
+            return None
+        result.transformations_applied = replayed + result.transformations_applied
+        result.plan = self._sanitize_plan(result.plan)
+        return result
+
+    def _apply_foreach_wrap(self, plan: List[Dict[str, Any]], index: PlanIndex, step_id: str,
+                            source_step_id: str, source_output_name: str, target_input_name: str) -> List[Dict[str, Any]]:
+        """Wraps step_id in a FOREACH within whichever scope currently holds it and re-indexes that scope."""
+        if step_id not in index.steps:
+            raise KeyError(step_id)
+        scope_id = index.scope_of(step_id)
+        scope_plan = plan if scope_id == PlanIndex.ROOT_SCOPE else self._get_sub_plan(index.steps[scope_id])
+        if scope_plan is None:
+            raise ValueError(f"Scope {scope_id} has no sub-plan")
+
+        new_scope_plan = self._wrap_step_in_foreach(
+            scope_plan, step_id, source_step_id, source_output_name, target_input_name, index.steps, str(uuid.uuid4())
+        )
+        if scope_id == PlanIndex.ROOT_SCOPE:
+            plan = new_scope_plan
+        else:
+            self._update_sub_plan(index.steps[scope_id], new_scope_plan)
+        self._reindex_scope(new_scope_plan, scope_id, index)
+        return plan
+
     def _validate_and_transform(self, plan: List[Dict[str, Any]], 
                                index: PlanIndex,
                                tracker: TransformationTracker,
@@ -384,7 +765,7 @@ class PlanValidator:
         # Recursive validation with transformation tracking
         transformed_plan, errors, warnings, transformations = self._transform_plan_recursive(
             plan, 
-            scope_id="root",
+            scope_id=PlanIndex.ROOT_SCOPE,
             index=index,
             tracker=tracker,
             accomplish_inputs=accomplish_inputs
@@ -416,6 +797,7 @@ class PlanValidator:
         index = PlanIndex()
         
         def traverse(current_plan: List[Dict[str, Any]], parent_id: Optional[str] = None):
+            members = []
             for step in current_plan:
                 if not isinstance(step, dict):
                     continue
@@ -424,44 +806,53 @@ class PlanValidator:
                 if not step_id or not self._is_valid_uuid(step_id):
                     continue
 
-                index.steps[step_id] = step
-                if parent_id:
-                    index.parents[step_id] = parent_id
-
-                # Extract output types
-                step_outputs = {}
-                outputs = step.get('outputs', {})
-                
-                # Handle case where outputs is a list instead of dict
-                if isinstance(outputs, list):
-                    # Convert list to dict format for compatibility
-                    for i, out_def in enumerate(outputs):
-                        if isinstance(out_def, dict):
-                            out_name = out_def.get('name', f'output_{i}')
-                            if 'type' in out_def:
-                                step_outputs[out_name] = out_def['type']
-                            else:
-                                step_outputs[out_name] = 'string'
-                        elif isinstance(out_def, str):
-                            step_outputs[f'output_{i}'] = 'string'
-                elif isinstance(outputs, dict):
-                    for out_name, out_def in outputs.items():
-                        if isinstance(out_def, dict) and 'type' in out_def:
-                            step_outputs[out_name] = out_def['type']
-                        elif isinstance(out_def, str):
-                            step_outputs[out_name] = 'string'
-                
-                index.outputs[step_id] = step_outputs
+                self._index_step(index, step, parent_id)
+                members.append(step_id)
 
                 # Recurse into sub-plans
                 sub_plan = self._get_sub_plan(step)
                 if sub_plan:
                     traverse(sub_plan, step_id)
+            index.scopes[parent_id or PlanIndex.ROOT_SCOPE] = members
 
         traverse(plan)
         logger.debug(f"Plan index built: {len(index.steps)} steps")
         return index
 
+    def _index_step(self, index: PlanIndex, step: Dict[str, Any], parent_id: Optional[str]):
+        """Record a single step, its parent and its declared output types in the index."""
+        step_id = step['id']
+        index.steps[step_id] = step
+        if parent_id:
+            index.parents[step_id] = parent_id
+        else:
+            index.parents.pop(step_id, None)
+
+        # Extract output types
+        step_outputs = {}
+        outputs = step.get('outputs', {})
+        
+        # Handle case where outputs is a list instead of dict
+        if isinstance(outputs, list):
+            # Convert list to dict format for compatibility
+            for i, out_def in enumerate(outputs):
+                if isinstance(out_def, dict):
+                    out_name = out_def.get('name', f'output_{i}')
+                    if 'type' in out_def:
+                        step_outputs[out_name] = out_def['type']
+                    else:
+                        step_outputs[out_name] = 'string'
+                elif isinstance(out_def, str):
+                    step_outputs[f'output_{i}'] = 'string'
+        elif isinstance(outputs, dict):
+            for out_name, out_def in outputs.items():
+                if isinstance(out_def, dict) and 'type' in out_def:
+                    step_outputs[out_name] = out_def['type']
+                elif isinstance(out_def, str):
+                    step_outputs[out_name] = 'string'
+        
+        index.outputs[step_id] = step_outputs
+
     def _assign_consistent_uuids(self, plan: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
         """
         Assigns consistent UUIDs to all steps in the plan as a one-time operation.
@@ -547,20 +938,19 @@ class PlanValidator:
         
         # Get or compute execution order for this scope
         if scope_id not in index.execution_orders:
-            execution_order = self._get_execution_order(plan, index.steps)
-            index.execution_orders[scope_id] = execution_order
-        else:
-            execution_order = index.execution_orders[scope_id]
+            index.set_execution_order(scope_id, self._get_execution_order(plan, index.steps))
+        execution_order = index.execution_orders[scope_id]
         
         # Validate each step in execution order
         wrappable_errors = []
+        ancestor_cache: Dict[Optional[str], Dict[str, Dict[str, str]]] = {}
         for step_id in execution_order:
             step = index.steps.get(step_id)
             if not step:
                 continue
 
             available_outputs = self._get_available_outputs_for_step(
-                step_id, execution_order, index.outputs, index.parents, index.steps
+                step_id, scope_id, index, ancestor_cache
             )
             
             step_errors, step_wrappable = self._validate_step(
@@ -592,12 +982,16 @@ class PlanValidator:
                         new_scope_id
                     )
                     
-                    tracker.mark_applied(transformation_key)
+                    tracker.record_foreach_wrap(
+                        wrappable['step_id'],
+                        wrappable['source_step_id'],
+                        wrappable['source_output_name'],
+                        wrappable['target_input_name']
+                    )
                     transformations.append(transformation_key)
                     
-                    # Rebuild index for this scope after transformation
-                    index.invalidate_scope(scope_id)
-                    self._update_index_after_transformation(plan, index)
+                    # Re-index only the transformed scope
+                    self._reindex_scope(plan, scope_id, index)
                     
                     # Only apply ONE transformation per pass
                     break
@@ -606,7 +1000,7 @@ class PlanValidator:
         for step in plan:
             sub_plan = self._get_sub_plan(step)
             if sub_plan:
-                sub_scope_id = step.get('scope_id', str(uuid.uuid4()))
+                sub_scope_id = step.get('id')
                 
                 sub_plan_transformed, sub_errors, sub_warnings, sub_transforms = \
                     self._transform_plan_recursive(
@@ -626,57 +1020,65 @@ class PlanValidator:
         
         return plan, errors, warnings, transformations
 
-    def _update_index_after_transformation(self, plan: List[Dict[str, Any]], 
-                                          index: PlanIndex):
+    def _reindex_scope(self, scope_plan: List[Dict[str, Any]], scope_id: str, index: PlanIndex):
         """
-        Incrementally update index after a transformation instead of full rebuild.
+        Incrementally re-index a single scope after a transformation.
+
+        Only the given scope is re-walked. Steps whose object is unchanged keep their
+        nested index entries; new or replaced steps (e.g. a FOREACH wrapping moved steps)
+        have their sub-plans indexed. Added, moved and removed step ids are recorded in
+        index.changes and every affected scope's execution order is invalidated.
         """
-        # For now, we do a targeted update of the affected scope
-        # In a more sophisticated version, we'd track exactly which steps changed
-        def update_steps(current_plan: List[Dict[str, Any]], parent_id: Optional[str] = None):
-            for step in current_plan:
-                if not isinstance(step, dict):
-                    continue
-                
-                step_id = step.get('id')
-                if step_id and self._is_valid_uuid(step_id):
-                    index.steps[step_id] = step
-                    if parent_id:
-                        index.parents[step_id] = parent_id
-                    
-                    # Update outputs
-                    step_outputs = {}
-                    outputs = step.get('outputs', {})
-                    
-                    # Handle case where outputs is a list instead of dict
-                    if isinstance(outputs, list):
-                        # Convert list to dict format for compatibility
-                        for i, out_def in enumerate(outputs):
-                            if isinstance(out_def, dict):
-                                out_name = out_def.get('name', f'output_{i}')
-                                if 'type' in out_def:
-                                    step_outputs[out_name] = out_def['type']
-                                else:
-                                    step_outputs[out_name] = 'string'
-                            elif isinstance(out_def, str):
-                                step_outputs[f'output_{i}'] = 'string'
-                    elif isinstance(outputs, dict):
-                        for out_name, out_def in outputs.items():
-                            if isinstance(out_def, dict) and 'type' in out_def:
-                                step_outputs[out_name] = out_def['type']
-                            elif isinstance(out_def, str):
-                                step_outputs[out_name] = 'string'
-                    
-                    index.outputs[step_id] = step_outputs
-                    
-                    sub_plan = self._get_sub_plan(step)
-                    if sub_plan:
-                        update_steps(sub_plan, step_id)
-        
-        update_steps(plan)
+        old_members = index.scopes.get(scope_id, [])
+        old_member_set = set(old_members)
+        parent_id = None if scope_id == PlanIndex.ROOT_SCOPE else scope_id
+        new_members: List[str] = []
+
+        for step in scope_plan:
+            if not isinstance(step, dict):
+                continue
+            step_id = step.get('id')
+            if not step_id or not self._is_valid_uuid(step_id):
+                continue
+
+            previous_obj = index.steps.get(step_id)
+            previous_scope = index.scope_of(step_id) if previous_obj is not None else None
+            self._index_step(index, step, parent_id)
+            new_members.append(step_id)
+
+            if step_id not in old_member_set:
+                if previous_scope is not None and previous_scope != scope_id:
+                    index.record_change('moved', step_id, scope_id)
+                    index.invalidate_scope(previous_scope)
+                else:
+                    index.record_change('added', step_id, scope_id)
+
+            if previous_obj is not step:
+                sub_plan = self._get_sub_plan(step)
+                if sub_plan:
+                    self._reindex_scope(sub_plan, step_id, index)
+
+        index.scopes[scope_id] = new_members
+        new_member_set = set(new_members)
+        for step_id in old_members:
+            # Steps re-homed into another scope (e.g. moved into a FOREACH) are not removals
+            if step_id not in new_member_set and index.scope_of(step_id) == scope_id:
+                self._drop_from_index(index, step_id, scope_id)
+
+        index.invalidate_scope(scope_id)
+
+    def _drop_from_index(self, index: PlanIndex, step_id: str, scope_id: str):
+        """Remove a step and everything nested under it from the index."""
+        for child_id in index.scopes.pop(step_id, []):
+            self._drop_from_index(index, child_id, step_id)
+        index.steps.pop(step_id, None)
+        index.outputs.pop(step_id, None)
+        index.parents.pop(step_id, None)
+        index.invalidate_scope(step_id)
+        index.record_change('removed', step_id, scope_id)
 
     def _validate_step(self, step: Dict[str, Any],
-                      available_outputs: Dict[str, Dict[str, str]],
+                      available_outputs: Mapping[str, Dict[str, str]],
                       all_steps: Dict[str, Any],
                       parents: Dict[str, str],
                       accomplish_inputs: Dict[str, Any]) -> Tuple[List[StructuredError], List[Dict[str, Any]]]:
@@ -912,10 +1314,10 @@ class PlanValidator:
         Checks type compatibility with improved handling of unknown types.
         """
         dest_action_verb = dest_step['actionVerb'].upper()
-        dest_plugin_def = self._get_plugin_definition(dest_action_verb)
+        dest_manifest = self._get_compiled_manifest(dest_action_verb)
         
         source_action_verb = source_step['actionVerb'].upper()
-        source_plugin_def = self._get_plugin_definition(source_action_verb)
+        source_manifest = self._get_compiled_manifest(source_action_verb)
 
         # Determine source output type
         source_output_type = None
@@ -933,11 +1335,8 @@ class PlanValidator:
             source_output_def = outputs.get(source_output_name)
             if isinstance(source_output_def, dict) and 'type' in source_output_def:
                 source_output_type = source_output_def['type']
-            elif source_plugin_def:
-                for out_def in source_plugin_def.get('outputDefinitions', []):
-                    if out_def.get('name') == source_output_name:
-                        source_output_type = out_def.get('type')
-                        break
+            elif source_manifest:
+                source_output_type = source_manifest.output_types.get(source_output_name)
         
         if not source_output_type:
             # Can't determine source type - skip wrapping but add warning
@@ -946,11 +1345,8 @@ class PlanValidator:
 
         # Determine destination input type
         dest_input_type = None
-        if dest_plugin_def:
-            for in_def in dest_plugin_def.get('inputDefinitions', []):
-                if in_def.get('name') == dest_input_name:
-                    dest_input_type = in_def.get('type')
-                    break
+        if dest_manifest:
+            dest_input_type = dest_manifest.input_types.get(dest_input_name)
         
         # Only default to 'string' if we have high confidence this is a real mismatch
         # For novel verbs or unknown types, don't assume
@@ -964,11 +1360,7 @@ class PlanValidator:
                 dest_input_type = 'string'
 
         # Check for FOREACH wrapping opportunity
-        is_wrappable = (
-            dest_input_type == 'string' and 
-            source_output_type in ['array', 'list', 'list[string]', 'list[number]', 
-                                   'list[boolean]', 'list[object]', 'list[any]']
-        )
+        is_wrappable = dest_input_type == 'string' and type_kind(source_output_type) is TypeKind.ARRAY
 
         if is_wrappable:
             # Skip wrapping for control flow steps
@@ -989,22 +1381,7 @@ class PlanValidator:
             return (None, wrappable_info)
 
         # General type compatibility check
-        if is_dest_novel_verb:
-            types_compatible = (
-                dest_input_type == source_output_type or
-                dest_input_type == 'any' or source_output_type == 'any' or
-                (dest_input_type == 'string' and source_output_type in ['number', 'boolean', 'object', 'array'])
-            )
-        else:
-            types_compatible = (
-                dest_input_type == source_output_type or
-                dest_input_type == 'any' or source_output_type == 'any' or
-                (dest_input_type == 'string' and source_output_type in ['number', 'boolean', 'object']) or
-                (dest_input_type in ['array', 'list', 'list[string]', 'list[number]', 'list[boolean]', 'list[object]', 'list[any]']
-                 and source_output_type in ['array', 'list', 'list[string]', 'list[number]', 'list[boolean]', 'list[object]', 'list[any]'])
-            )
-
-        if not types_compatible:
+        if not types_compatible(dest_input_type, source_output_type, is_dest_novel_verb):
             return (StructuredError(
                 ErrorType.TYPE_MISMATCH,
                 f"Type mismatch for input '{dest_input_name}'. Expected '{dest_input_type}' but got '{source_output_type}' from step {source_step['id']}",
@@ -1235,18 +1612,14 @@ class PlanValidator:
 
                 # Check expected input type
                 consumer_action_verb = consumer_step.get('actionVerb', '').upper()
-                consumer_plugin_def = self._get_plugin_definition(consumer_action_verb)
+                consumer_manifest = self._get_compiled_manifest(consumer_action_verb)
 
                 expected_input_type = 'string'
-                if consumer_plugin_def:
-                    for in_def in consumer_plugin_def.get('inputDefinitions', []):
-                        if in_def.get('name') == consumer_input_name:
-                            expected_input_type = in_def.get('type', 'string')
-                            break
+                if consumer_manifest and consumer_input_name in consumer_manifest.input_types:
+                    expected_input_type = consumer_manifest.input_types[consumer_input_name]
 
                 # Stop if consumer expects array
-                if expected_input_type in ['array', 'list', 'list[string]', 'list[number]', 
-                                          'list[boolean]', 'list[object]', 'list[any]']:
+                if type_kind(expected_input_type) is TypeKind.ARRAY:
                     logger.debug(f"Stopping at {consumer_step_id}: expects array")
                     continue
 
@@ -1333,35 +1706,49 @@ class PlanValidator:
 
         return execution_order
 
-    def _get_available_outputs_for_step(self, step_id: str, 
-                                       execution_order: List[str], 
-                                       all_outputs: Dict[str, Dict[str, str]], 
-                                       parents: Dict[str, str], 
-                                       all_steps: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+    def _get_available_outputs_for_step(self, step_id: str,
+                                       scope_id: str,
+                                       index: PlanIndex,
+                                       ancestor_cache: Optional[Dict[Optional[str], Dict[str, Dict[str, str]]]] = None) -> AvailableOutputs:
         """
         Determines all outputs available to a given step.
+
+        Uses the scope's cached position map, so this is O(1) per step. Ancestor outputs
+        are shared by every step with the same parent and can be cached by the caller.
         """
-        available: Dict[str, Dict[str, str]] = {}
-        
-        try:
-            current_index = execution_order.index(step_id)
-        except ValueError:
+        if scope_id not in index.positions:
+            order = index.execution_orders.get(scope_id)
+            if order is None:
+                logger.warning(f"No execution order cached for scope {scope_id}")
+                order = []
+            index.set_execution_order(scope_id, order)
+        order = index.execution_orders[scope_id]
+        positions = index.positions[scope_id]
+
+        cutoff = positions.get(step_id)
+        if cutoff is None:
             logger.warning(f"Step {step_id} not in execution order")
-            return available
-        
-        # Add preceding steps
-        for i in range(current_index):
-            prev_step_id = execution_order[i]
-            if prev_step_id in all_outputs:
-                available[prev_step_id] = all_outputs[prev_step_id]
-
-        # Add parent hierarchy
-        current_ancestor_id = parents.get(step_id)
+            return AvailableOutputs([], {}, 0, {}, {})
+
+        parent_id = index.parents.get(step_id)
+        if ancestor_cache is not None and parent_id in ancestor_cache:
+            ancestors = ancestor_cache[parent_id]
+        else:
+            ancestors = self._get_ancestor_outputs(parent_id, index)
+            if ancestor_cache is not None:
+                ancestor_cache[parent_id] = ancestors
+
+        return AvailableOutputs(order, positions, cutoff, index.outputs, ancestors)
+
+    def _get_ancestor_outputs(self, parent_id: Optional[str], index: PlanIndex) -> Dict[str, Dict[str, str]]:
+        """Outputs of the parent hierarchy, including implicit FOREACH item/index outputs."""
+        ancestors: Dict[str, Dict[str, str]] = {}
+        current_ancestor_id = parent_id
         while current_ancestor_id:
-            ancestor_step = all_steps.get(current_ancestor_id)
-            if ancestor_step:
-                if current_ancestor_id not in available:
-                    available[current_ancestor_id] = all_outputs.get(current_ancestor_id, {})
+            ancestor_step = index.steps.get(current_ancestor_id)
+            if ancestor_step and current_ancestor_id not in ancestors:
+                # Copy so implicit outputs never leak into the shared index
+                ancestor_outputs = dict(index.outputs.get(current_ancestor_id, {}))
                 
                 # Add implicit outputs for FOREACH
                 if ancestor_step.get('actionVerb') == 'FOREACH':
@@ -1371,12 +1758,13 @@ class PlanValidator:
                         if 'valueType' in foreach_array_input:
                             item_type = foreach_array_input['valueType']
                     
-                    available[current_ancestor_id]['item'] = item_type
-                    available[current_ancestor_id]['index'] = 'number'
+                    ancestor_outputs['item'] = item_type
+                    ancestor_outputs['index'] = 'number'
+                ancestors[current_ancestor_id] = ancestor_outputs
             
-            current_ancestor_id = parents.get(current_ancestor_id)
+            current_ancestor_id = index.parents.get(current_ancestor_id)
             
-        return available
+        return ancestors
 
     def _validate_outputs_against_manifest(self, step: Dict[str, Any]) -> List[StructuredError]:
         """Validate that step outputs match the verb's manifest output definitions."""
@@ -1387,12 +1775,6 @@ class PlanValidator:
         if not action_verb:
             return errors
         
-        # Valid output types that steps can declare
-        VALID_OUTPUT_TYPES = {
-            'string', 'number', 'boolean', 'array', 'object', 'plan', 'plugin', 'any',
-            'list', 'list[string]', 'list[number]', 'list[boolean]', 'list[object]', 'list[any]'
-        }
-        
         # Get step outputs
         step_outputs = step.get('outputs', {})
         if not isinstance(step_outputs, dict):
@@ -1602,13 +1984,22 @@ class PlanValidator:
             except Exception as e:
                 logger.error(f"Unexpected error deserializing availablePlugins: {e}. Using empty list for repair instructions.")
 
-        # Group errors by specific signature
+        # Group errors by specific signature, remembering which top-level steps each touches
         grouped_errors: Dict[str, List[str]] = {}
+        signature_steps: Dict[str, Optional[Set[str]]] = {}
         for error in errors:
             signature = self._get_error_signature(error, all_steps)
             if signature not in grouped_errors:
                 grouped_errors[signature] = []
+                signature_steps[signature] = set()
             grouped_errors[signature].append(error.to_string())
+            if not error.step_id:
+                # Plan-wide errors may touch anything and are never repaired concurrently
+                signature_steps[signature] = None
+            elif signature_steps[signature] is not None:
+                for step_id in (error.step_id, error.source_step_id):
+                    if step_id:
+                        signature_steps[signature].add(self._top_level_step_id(step_id, index))
 
         error_priority = [
             "CIRCULAR_DEPENDENCY", "INVALID_REFERENCE",
@@ -1620,8 +2011,6 @@ class PlanValidator:
         current_plan = copy.deepcopy(plan)
         initial_error_count = len(errors)
 
-        processed_signatures = set()
-
         # Function to get intelligent repair instructions for missing inputs
         def get_missing_input_instructions(signature):
             """Generate repair instructions for missing required inputs based on the verb definition."""
@@ -1675,23 +2064,21 @@ class PlanValidator:
             # Fallback if verb not found in available plugins
             return f"The '{verb_name}' verb requires a '{input_name}' input. Please add this input to the step, providing either a static value or a reference to a previous step's output."
         
-        # Function to process a signature
-        def process_signature(signature):
-            nonlocal current_plan
-            if signature in grouped_errors and signature not in processed_signatures:
-                error_messages = grouped_errors[signature]
-                logger.info(f"--- LLM Repair Cycle: Targeting signature '{signature}' ({len(error_messages)} issues) ---")
-
-                # --- Custom Prompt Logic ---
-                if signature in ["TYPE_MISMATCH:array->string", "TYPE_MISMATCH:list->string"]:
-                    specific_instructions = """This error commonly occurs when an output that is a list or array is passed to an input that expects a single item (like a string).
+        # Function to build the repair prompt for a signature against a given plan
+        def build_repair_prompt(signature, base_plan):
+            error_messages = grouped_errors[signature]
+            logger.info(f"--- LLM Repair Cycle: Targeting signature '{signature}' ({len(error_messages)} issues) ---")
+
+            # --- Custom Prompt Logic ---
+            if signature in ["TYPE_MISMATCH:array->string", "TYPE_MISMATCH:list->string"]:
+                specific_instructions = """This error commonly occurs when an output that is a list or array is passed to an input that expects a single item (like a string).
 The standard solution is to wrap the receiving step in a `FOREACH` loop.
 **Action:** For each error listed, please modify the plan to wrap the consumer step in a `FOREACH` block to correctly process the array input. Do not modify the producing step."""
-                elif signature.startswith("INPUT_NAME_MISMATCH"):
-                    specific_instructions = """This error indicates a step has exactly one input, and its verb requires exactly one input, but the names do not match.
+            elif signature.startswith("INPUT_NAME_MISMATCH"):
+                specific_instructions = """This error indicates a step has exactly one input, and its verb requires exactly one input, but the names do not match.
 **Action:** For each error listed, fix the plan by renaming the provided input key to the required input key. For example, if the step has `inputs: { "my_input": ... }` but requires `needed_input`, change it to `inputs: { "needed_input": ... }`."""
-                elif signature == "MISSING_INPUT:GENERATE.prompt":
-                    specific_instructions = """The GENERATE verb requires a mandatory 'prompt' input that tells the LLM what to generate.
+            elif signature == "MISSING_INPUT:GENERATE.prompt":
+                specific_instructions = """The GENERATE verb requires a mandatory 'prompt' input that tells the LLM what to generate.
 
 **GENERATE Structure:**
 ```json
@@ -1720,11 +2107,11 @@ The 'prompt' input can be:
 3. Text with placeholders referencing previous steps: {"value": "Summarize this: {previous_analysis}", "valueType": "string"}
 
 **Action:** For each GENERATE step missing a 'prompt', add the prompt input with meaningful content that describes what should be generated."""
-                elif signature.startswith("MISSING_INPUT:"):
-                    # Use generic handler for all missing required inputs
-                    specific_instructions = get_missing_input_instructions(signature)
-                elif signature == "MISSING_FIELD":
-                    specific_instructions = """This error indicates that input definitions are not in the expected format. The Brain often generates flattened input structures that need to be converted to the proper nested format.
+            elif signature.startswith("MISSING_INPUT:"):
+                # Use generic handler for all missing required inputs
+                specific_instructions = get_missing_input_instructions(signature)
+            elif signature == "MISSING_FIELD":
+                specific_instructions = """This error indicates that input definitions are not in the expected format. The Brain often generates flattened input structures that need to be converted to the proper nested format.
 
 **Expected Format:**
 Each input should have EITHER:
@@ -1741,10 +2128,10 @@ Each input should have EITHER:
 }
 
 **Action:** Convert any flattened input definitions to the proper nested format by ensuring each input has the correct structure."""
-                else:
-                    specific_instructions = "Please fix the errors as described. Pay close attention to step IDs and input/output names."
+            else:
+                specific_instructions = "Please fix the errors as described. Pay close attention to step IDs and input/output names."
 
-                prompt = f"""A JSON plan designed to accomplish a goal has validation issues. Your task is to act as a precise repair tool. You must correct ONLY the specific errors listed under the signature '{signature}'.
+            prompt = f"""A JSON plan designed to accomplish a goal has validation issues. Your task is to act as a precise repair tool. You must correct ONLY the specific errors listed under the signature '{signature}'.
 
 **Goal:** {goal}
 
@@ -1762,31 +2149,134 @@ Each input should have EITHER:
 
 **Current Plan (contains the errors listed above):**
 ```json
-{json.dumps(current_plan, indent=2)}
+{json.dumps(base_plan, indent=2)}
 ```
 
 Return ONLY the full, corrected JSON plan as a valid JSON array. Do not include any explanations, comments, or surrounding markdown. The response must be the complete plan, not just the modified parts.
 """
-                
-                current_plan = self._call_llm_for_repair(prompt, inputs, current_plan, signature)
-                processed_signatures.add(signature)
+            return prompt
 
-        # Process prioritized errors first
+        # Prioritized signatures first (partial matches like TYPE_MISMATCH), then the rest
+        ordered_signatures: List[str] = []
         for signature in error_priority:
-            # Handle partial matches (like TYPE_MISMATCH)
-            for s_key in list(grouped_errors.keys()):
-                if s_key.startswith(signature):
-                    process_signature(s_key)
-
-        # Process any remaining errors
-        for signature in list(grouped_errors.keys()):
-            if signature not in processed_signatures:
-                process_signature(signature)
+            for s_key in grouped_errors:
+                if s_key.startswith(signature) and s_key not in ordered_signatures:
+                    ordered_signatures.append(s_key)
+        ordered_signatures.extend(s_key for s_key in grouped_errors if s_key not in ordered_signatures)
+
+        # Signatures touching disjoint steps are repaired concurrently against the same plan;
+        # overlapping or plan-wide ones start a new wave so they see the earlier fixes.
+        for wave in self._plan_repair_waves(ordered_signatures, signature_steps):
+            if len(wave) == 1:
+                signature = wave[0]
+                current_plan = self._call_llm_for_repair(build_repair_prompt(signature, current_plan), inputs, current_plan, signature)
+                continue
+
+            base_plan = current_plan
+            prompts = [build_repair_prompt(signature, base_plan) for signature in wave]
+            with ThreadPoolExecutor(max_workers=min(len(wave), self.max_parallel_repairs)) as pool:
+                results = list(pool.map(
+                    lambda job: self._call_llm_for_repair(job[1], inputs, base_plan, job[0]),
+                    zip(wave, prompts)
+                ))
+
+            current_plan, conflicting = self._merge_repair_patches(base_plan, list(zip(wave, results)))
+            for signature in conflicting:
+                logger.info(f"Repair for '{signature}' overlapped an earlier repair in its wave; re-running it serially.")
+                current_plan = self._call_llm_for_repair(build_repair_prompt(signature, current_plan), inputs, current_plan, signature)
         
         final_error_count = len(self._validate_and_transform(current_plan, self._build_plan_index(current_plan), tracker, inputs).errors)
         logger.info(f"LLM repair process finished. Initial errors: {initial_error_count}, Final errors: {final_error_count}.")
         return current_plan
 
+    def _top_level_step_id(self, step_id: str, index: PlanIndex) -> str:
+        """The root-scope step that contains step_id (itself when it is not nested)."""
+        seen = set()
+        while step_id in index.parents and step_id not in seen:
+            seen.add(step_id)
+            step_id = index.parents[step_id]
+        return step_id
+
+    def _plan_repair_waves(self, signatures: List[str],
+                           signature_steps: Dict[str, Optional[Set[str]]]) -> List[List[str]]:
+        """
+        Splits the ordered signatures into consecutive waves whose members touch disjoint
+        top-level steps. Plan-wide signatures (no step set) always run alone.
+        """
+        waves: List[List[str]] = []
+        wave: List[str] = []
+        touched: Set[str] = set()
+        for signature in signatures:
+            steps = signature_steps.get(signature)
+            fits = (steps is not None and not (steps & touched)
+                    and len(wave) < self.max_parallel_repairs
+                    and all(signature_steps.get(member) is not None for member in wave))
+            if wave and not fits:
+                waves.append(wave)
+                wave, touched = [], set()
+            wave.append(signature)
+            touched |= steps or set()
+        if wave:
+            waves.append(wave)
+        return waves
+
+    def _merge_repair_patches(self, base_plan: List[Dict[str, Any]],
+                              results: List[Tuple[str, List[Dict[str, Any]]]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Merges plans returned by concurrent repairs of the same base plan.
+
+        Each result is reduced to a patch of top-level steps it changed, added or removed.
+        Patches are applied in wave order; a patch touching a step id already changed by an
+        earlier patch is not applied and its signature is returned as conflicting. Malformed
+        (non-dict) steps have no id to patch by: they stay where they are, and a repair that
+        adds, drops or changes one is returned as conflicting so it is re-run serially.
+        """
+        base_by_id = {step.get('id'): step for step in base_plan if isinstance(step, dict)}
+        base_malformed = [step for step in base_plan if not isinstance(step, dict)]
+        merged = list(base_plan)
+        claimed: Set[str] = set()
+        conflicting: List[str] = []
+
+        for signature, repaired in results:
+            if repaired is base_plan:
+                continue
+            if [step for step in repaired if not isinstance(step, dict)] != base_malformed:
+                conflicting.append(signature)
+                continue
+            repaired_by_id = {step.get('id'): step for step in repaired if isinstance(step, dict)}
+            changed = {sid for sid, step in repaired_by_id.items() if base_by_id.get(sid) != step}
+            removed = set(base_by_id) - set(repaired_by_id)
+            touched = changed | removed
+            if touched & claimed:
+                conflicting.append(signature)
+                continue
+            claimed |= touched
+
+            merged = [
+                step if not isinstance(step, dict)
+                else repaired_by_id[step.get('id')] if step.get('id') in changed
+                else step
+                for step in merged
+                if not (isinstance(step, dict) and step.get('id') in removed)
+            ]
+            # New steps go right after the nearest earlier step of the repaired plan that is still
+            # in the merged plan; at the front only if nothing precedes them, otherwise at the end
+            earlier_ids: List[Any] = []
+            for step in repaired:
+                if not isinstance(step, dict):
+                    continue
+                sid = step.get('id')
+                if sid in changed and sid not in base_by_id:
+                    positions = {existing.get('id'): i for i, existing in enumerate(merged) if isinstance(existing, dict)}
+                    anchor = next((positions[eid] for eid in reversed(earlier_ids) if eid in positions), None)
+                    if anchor is not None:
+                        position = anchor + 1
+                    else:
+                        position = 0 if not earlier_ids else len(merged)
+                    merged.insert(position, step)
+                earlier_ids.append(sid)
+        return merged, conflicting
+
     def _call_llm_for_repair(self, prompt: str, inputs: Dict[str, Any], current_plan: List[Dict[str, Any]], signature: str) -> List[Dict[str, Any]]:
         """Helper function to call the LLM and return the repaired plan data."""
         if not self.brain_call:
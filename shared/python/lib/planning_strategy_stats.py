@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Win rates of ACCOMPLISH's planning strategies, persisted across plugin processes.
+
+``RobustMissionPlanner`` tries its strategies (original prompt, simplified prompt, ...)
+in a default order. Each strategy that runs to completion is recorded as an attempt,
+and the one whose plan validates as a win. ``order`` ranks strategies by smoothed win
+rate, so the order adapts to what has worked; strategies without data, or with equal
+rates, keep their default order.
+
+Counts live in one JSON file. Once a strategy has more than ``window`` attempts, its
+counts are halved, so old outcomes fade and the order can change again. Saving merges
+this process's new outcomes into whatever other processes wrote since it loaded the
+file, then writes a temp file and ``os.replace``s it into place.
+"""
+
+import os
+import json
+import logging
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATS_FORMAT_VERSION = 1
+DEFAULT_WINDOW = 200
+
+
+class StrategyStats:
+    """Attempts and wins per strategy, persisted as JSON."""
+
+    def __init__(self, stats_path: Optional[str], window: int = DEFAULT_WINDOW):
+        self.stats_path = stats_path
+        self.window = window
+        self._lock = threading.Lock()
+        self._counts: Optional[Dict[str, Dict[str, float]]] = None
+        # Outcomes recorded by this process and not yet saved
+        self._pending: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_environment(cls) -> 'StrategyStats':
+        """Stats in ACCOMPLISH_STRATEGY_STATS_DIR (default: the system temp dir)."""
+        stats_dir = os.environ.get('ACCOMPLISH_STRATEGY_STATS_DIR') or os.path.join(tempfile.gettempdir(), 'stage7_accomplish')
+        return cls(os.path.join(stats_dir, 'strategy_stats.json'))
+
+    def record(self, strategy: str, won: bool):
+        with self._lock:
+            counts = self._load()
+            for target in (counts, self._pending):
+                entry = target.setdefault(strategy, {'attempts': 0, 'wins': 0})
+                entry['attempts'] += 1
+                entry['wins'] += 1 if won else 0
+            self._age(counts)
+
+    def win_rate(self, strategy: str) -> float:
+        """Laplace-smoothed win rate: 0.5 for a strategy that has never run."""
+        with self._lock:
+            entry = self._load().get(strategy, {})
+        return (entry.get('wins', 0) + 1) / (entry.get('attempts', 0) + 2)
+
+    def order(self, strategies: Iterable[str]) -> List[str]:
+        """Strategies by descending win rate; ties keep the given order."""
+        strategies = list(strategies)
+        rates = {strategy: self.win_rate(strategy) for strategy in strategies}
+        return sorted(strategies, key=lambda strategy: -rates[strategy])
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {strategy: {**entry, 'win_rate': (entry['wins'] + 1) / (entry['attempts'] + 2)}
+                    for strategy, entry in self._load().items()}
+
+    def save(self):
+        """Merge this process's outcomes into the file's current counts and persist them."""
+        with self._lock:
+            if not self._pending or not self.stats_path:
+                return
+            merged = self._read_file()
+            for strategy, delta in self._pending.items():
+                entry = merged.setdefault(strategy, {'attempts': 0, 'wins': 0})
+                entry['attempts'] += delta['attempts']
+                entry['wins'] += delta['wins']
+            self._age(merged)
+            self._counts = merged
+            self._pending = {}
+
+            stats_dir = os.path.dirname(self.stats_path)
+            try:
+                os.makedirs(stats_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=stats_dir, prefix='.strategy_stats_', suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'formatVersion': STATS_FORMAT_VERSION, 'strategies': merged}, f)
+                os.replace(tmp_path, self.stats_path)
+            except OSError as e:
+                logger.warning(f"Could not persist planning strategy stats to {self.stats_path}: {e}")
+
+    def _age(self, counts: Dict[str, Dict[str, float]]):
+        for entry in counts.values():
+            if entry['attempts'] > self.window:
+                entry['attempts'] /= 2
+                entry['wins'] /= 2
+
+    def _load(self) -> Dict[str, Dict[str, float]]:
+        if self._counts is None:
+            self._counts = self._read_file()
+        return self._counts
+
+    def _read_file(self) -> Dict[str, Dict[str, float]]:
+        if not self.stats_path:
+            return {}
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable planning strategy stats {self.stats_path}: {e}")
+            return {}
+        if not isinstance(data, dict) or data.get('formatVersion') != STATS_FORMAT_VERSION:
+            return {}
+        strategies = data.get('strategies')
+        if not isinstance(strategies, dict):
+            return {}
+        counts = {}
+        for strategy, entry in strategies.items():
+            try:
+                counts[strategy] = {'attempts': float(entry['attempts']), 'wins': float(entry['wins'])}
+            except (KeyError, TypeError, ValueError):
+                continue
+        return counts
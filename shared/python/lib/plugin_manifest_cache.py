@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of plugin manifests discovered from the Librarian.
+
+ACCOMPLISH and REFLECT each run in a fresh process, so the in-memory
+``PlanValidator.plugin_cache`` is lost between invocations. This cache keeps the
+manifests in one JSON file per Librarian, with a TTL per entry, so later
+invocations resolve known verbs without touching the network.
+
+Entries are keyed by verb and record the manifest version they were fetched at.
+A later fetch of a different version replaces the entry; ``invalidate`` drops
+entries explicitly. Writes go through a temp file and ``os.replace`` so concurrent
+plugin processes never read a half-written file.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_TTL_SECONDS = 3600
+
+
+class PluginManifestCache:
+    """TTL cache of verb -> manifest, persisted as JSON."""
+
+    def __init__(self, cache_path: str, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+
+    @classmethod
+    def for_librarian(cls, librarian_url: str) -> 'PluginManifestCache':
+        """
+        Cache shared by every plugin process talking to the same Librarian.
+
+        Location and TTL come from PLUGIN_MANIFEST_CACHE_DIR (default: the system temp
+        dir) and PLUGIN_MANIFEST_CACHE_TTL (seconds, default 3600).
+        """
+        cache_dir = os.environ.get('PLUGIN_MANIFEST_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'stage7_plugin_manifests')
+        try:
+            ttl = float(os.environ.get('PLUGIN_MANIFEST_CACHE_TTL', DEFAULT_TTL_SECONDS))
+        except ValueError:
+            ttl = DEFAULT_TTL_SECONDS
+        digest = hashlib.sha1(librarian_url.encode('utf-8')).hexdigest()[:12]
+        return cls(os.path.join(cache_dir, f"manifests_{digest}.json"), ttl)
+
+    @staticmethod
+    def manifest_version(manifest: Dict[str, Any]) -> str:
+        return str(manifest.get('version') or '0')
+
+    def get(self, verb: str) -> Optional[Dict[str, Any]]:
+        """Return the cached manifest for a verb, or None if missing or expired."""
+        entry = self._load().get(verb.upper())
+        if not entry:
+            return None
+        if time.time() - entry.get('fetchedAt', 0) > self.ttl_seconds:
+            return None
+        return entry.get('manifest')
+
+    def get_many(self, verbs: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        for verb in verbs:
+            manifest = self.get(verb)
+            if manifest is not None:
+                found[verb.upper()] = manifest
+        return found
+
+    def put_many(self, manifests: Dict[str, Dict[str, Any]]):
+        """Store manifests for several verbs and persist them in one write."""
+        if not manifests:
+            return
+        entries = self._load()
+        now = time.time()
+        for verb, manifest in manifests.items():
+            verb_upper = verb.upper()
+            version = self.manifest_version(manifest)
+            previous = entries.get(verb_upper)
+            if previous and previous.get('version') != version:
+                logger.info(f"Manifest for '{verb_upper}' changed version {previous.get('version')} -> {version}")
+            entries[verb_upper] = {'version': version, 'fetchedAt': now, 'manifest': manifest}
+        self._save()
+
+    def put(self, verb: str, manifest: Dict[str, Any]):
+        self.put_many({verb: manifest})
+
+    def invalidate(self, verbs: Optional[Iterable[str]] = None):
+        """Drop the given verbs, or every entry when no verbs are given."""
+        entries = self._load()
+        if verbs is None:
+            removed = set(entries) | set(self._read_file())
+        else:
+            removed = {verb.upper() for verb in verbs}
+        for verb in removed:
+            entries.pop(verb, None)
+        self._save(removed)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            self._entries = self._read_file()
+        return self._entries
+
+    def _read_file(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable plugin manifest cache {self.cache_path}: {e}")
+            return {}
+        if not isinstance(data, dict) or data.get('formatVersion') != CACHE_FORMAT_VERSION:
+            return {}
+        entries = data.get('entries')
+        return entries if isinstance(entries, dict) else {}
+
+    def _save(self, removed: Iterable[str] = ()):
+        # Merge with whatever other processes wrote since we loaded, ours wins per verb.
+        merged = self._read_file()
+        for verb in removed:
+            merged.pop(verb, None)
+        merged.update(self._entries or {})
+        now = time.time()
+        merged = {verb: entry for verb, entry in merged.items()
+                  if now - entry.get('fetchedAt', 0) <= self.ttl_seconds}
+        self._entries = merged
+
+        cache_dir = os.path.dirname(self.cache_path)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='.manifests_', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'formatVersion': CACHE_FORMAT_VERSION, 'entries': merged}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not persist plugin manifest cache to {self.cache_path}: {e}")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Persistent worker host for Python plugins.
+
+The CapabilitiesManager normally spawns a fresh interpreter for every plugin call,
+which pays interpreter startup and all module imports before any real work happens.
+This host imports a plugin's entry module once and then serves many calls over
+stdin/stdout using a length-prefixed framing:
+
+    <4-byte big-endian length><UTF-8 JSON body>
+
+Requests:  {"id": "...", "input": "<plugin stdin payload>", "env": {...}}
+           {"id": "...", "shutdown": true}
+Responses: {"id": "...", "exitCode": 0, "stdout": "...", "rssKb": 12345, "calls": 3}
+
+On startup the host writes a single frame {"ready": true, "pid": ...} once the plugin
+module has been imported (or {"ready": false, "error": "..."} if the import failed).
+Each call runs the plugin's ``main()`` with ``sys.stdin``/``sys.stdout`` redirected,
+so existing plugins work unmodified. Plugins that have no ``main()`` and keep their entry
+logic under ``if __name__ == "__main__":`` are re-run with ``runpy`` as ``__main__`` on
+each call instead; their third-party imports are still cached from the initial import. A call's ``env`` is applied to ``os.environ`` only
+for the duration of that call and the host's own environment is restored afterwards, so
+nothing one mission sends (credentials, tokens) is visible to later calls. Plugins served
+this way must therefore read per-call settings from ``os.environ`` inside ``main()``, not
+at import time: module-level reads see only the environment the worker was started with.
+
+Usage: python plugin_worker_host.py <path/to/main.py> <plugin_root>
+"""
+
+import io
+import os
+import sys
+import json
+import struct
+import runpy
+import resource
+import traceback
+import importlib.util
+from typing import Any, Dict, Optional, BinaryIO
+
+FRAME_HEADER = struct.Struct('>I')
+PLUGIN_MODULE_NAME = 'stage7_plugin_main'
+
+
+def read_frame(stream: BinaryIO) -> Optional[Dict[str, Any]]:
+    """Read one length-prefixed JSON frame. Returns None on EOF."""
+    header = stream.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+    (length,) = FRAME_HEADER.unpack(header)
+    body = stream.read(length)
+    if len(body) < length:
+        return None
+    return json.loads(body.decode('utf-8'))
+
+
+def write_frame(stream: BinaryIO, message: Dict[str, Any]) -> None:
+    """Write one length-prefixed JSON frame and flush it."""
+    body = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    stream.write(FRAME_HEADER.pack(len(body)) + body)
+    stream.flush()
+
+
+def current_rss_kb() -> int:
+    """Resident set size of this process in KiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm', 'r') as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS and KiB on Linux
+        return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def load_plugin_module(main_path: str, plugin_root: str):
+    """Import the plugin entry file once under a fixed module name."""
+    if plugin_root not in sys.path:
+        sys.path.insert(0, plugin_root)
+    lib_dir = os.path.dirname(os.path.abspath(__file__))
+    if lib_dir not in sys.path:
+        sys.path.append(lib_dir)
+
+    spec = importlib.util.spec_from_file_location(PLUGIN_MODULE_NAME, main_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load plugin module from {main_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PLUGIN_MODULE_NAME] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def invoke_plugin(module, main_path: str) -> None:
+    """Call the plugin's main(), or run the entry file as __main__ when it has none."""
+    entry = getattr(module, 'main', None)
+    if callable(entry):
+        entry()
+    else:
+        runpy.run_path(main_path, run_name='__main__')
+
+
+def run_call(module, request: Dict[str, Any], main_path: str, plugin_root: str) -> Dict[str, Any]:
+    """Run the plugin entry point once with redirected stdio and the call's env, and return the captured result."""
+    saved_environ = dict(os.environ)
+    env = request.get('env') or {}
+    if isinstance(env, dict):
+        os.environ.update({str(k): str(v) for k, v in env.items() if v is not None})
+
+    captured_stdout = io.StringIO()
+    saved_stdin, saved_stdout, saved_argv = sys.stdin, sys.stdout, sys.argv
+    sys.stdin = io.StringIO(request.get('input') or '')
+    sys.stdout = captured_stdout
+    sys.argv = [main_path, plugin_root]
+    exit_code = 0
+    try:
+        invoke_plugin(module, main_path)
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc(file=sys.stderr)
+        exit_code = 1
+    finally:
+        sys.stdin, sys.stdout, sys.argv = saved_stdin, saved_stdout, saved_argv
+        os.environ.clear()
+        os.environ.update(saved_environ)
+        sys.stderr.flush()
+
+    return {'exitCode': exit_code, 'stdout': captured_stdout.getvalue()}
+
+
+def serve(main_path: str, plugin_root: str) -> int:
+    # Keep a private handle on the real stdout for the protocol, then point fd 1 at
+    # stderr so stray prints or native writes can never corrupt a frame.
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    protocol_in = sys.stdin.buffer
+
+    os.chdir(plugin_root)
+    try:
+        module = load_plugin_module(main_path, plugin_root)
+    except BaseException as e:
+        traceback.print_exc(file=sys.stderr)
+        write_frame(protocol_out, {'ready': False, 'error': f"{type(e).__name__}: {e}"})
+        return 1
+
+    write_frame(protocol_out, {'ready': True, 'pid': os.getpid(), 'rssKb': current_rss_kb()})
+
+    calls = 0
+    while True:
+        request = read_frame(protocol_in)
+        if request is None or request.get('shutdown'):
+            return 0
+        calls += 1
+        response = run_call(module, request, main_path, plugin_root)
+        response.update({'id': request.get('id'), 'rssKb': current_rss_kb(), 'calls': calls})
+        write_frame(protocol_out, response)
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: plugin_worker_host.py <main.py> <plugin_root>", file=sys.stderr)
+        sys.exit(2)
+    main_path = os.path.abspath(sys.argv[1])
+    plugin_root = os.path.abspath(sys.argv[2])
+    sys.exit(serve(main_path, plugin_root))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of web search results and provider scores for SEARCH_PYTHON.
+
+Agents repeat the same or nearly the same searches within and across missions, and each
+SEARCH_PYTHON invocation is a fresh process. This cache keeps provider results in one
+SQLite file (WAL journal, shared by concurrent plugin processes) keyed by provider and
+``normalize_query`` of the term, so "The Python  GIL" and "python gil" share an entry.
+
+Each provider has its own TTL (``DEFAULT_PROVIDER_TTLS``, overridable per provider from
+the environment). The file holds at most ``max_entries`` results; the least recently
+used are evicted first. The same file stores each provider's ``performance_score`` so
+ranking survives restarts.
+
+The SQLite WAL file, LRU eviction and counters come from ``sqlite_lru_cache``. Any SQLite
+or filesystem error is logged and treated as a miss, so a broken cache never
+fails a search.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from .sqlite_lru_cache import SqliteLruCache, cache_dir, cache_enabled, env_number
+except ImportError:
+    from sqlite_lru_cache import SqliteLruCache, cache_dir, cache_enabled, env_number
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+# Seconds results stay fresh per provider; 0 disables caching for that provider
+DEFAULT_PROVIDER_TTLS = {
+    'GoogleWebSearch': 6 * 3600,
+    'Langsearch': 6 * 3600,
+    'DuckDuckGo': 24 * 3600,  # instant answers change rarely
+    'SearxNG': 3600,
+    'Brain': 0,               # generated, not retrieved
+}
+
+STOP_WORDS = frozenset("""
+a an and are as at be by for from how in into is it of on or the to was what when where which who
+why with
+""".split())
+
+_TOKEN = re.compile(r"[\w+#]+(?:[.'][\w+#]+)*")
+
+
+def normalize_query(query: str) -> str:
+    """Case-, whitespace-, punctuation- and stop-word-insensitive form of a search term."""
+    text = unicodedata.normalize('NFKC', query or '').casefold()
+    tokens = _TOKEN.findall(text)
+    kept = [token for token in tokens if token not in STOP_WORDS]
+    # A term made only of stop words ("the who") keeps them rather than becoming empty
+    return ' '.join(kept or tokens)
+
+
+class SearchResultCache(SqliteLruCache):
+    """Provider results by normalized query, with per-provider TTLs and LRU eviction."""
+
+    _SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS search_results (
+            provider TEXT NOT NULL,
+            query_key TEXT NOT NULL,
+            query TEXT NOT NULL,
+            results TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (provider, query_key)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS search_results_by_use ON search_results (last_used)",
+        """CREATE TABLE IF NOT EXISTS provider_scores (
+            provider TEXT PRIMARY KEY,
+            score INTEGER NOT NULL,
+            updated_at REAL NOT NULL
+        )""",
+    )
+
+    _TABLE = "search_results"
+    _KEY = "provider, query_key"
+
+    _GET = "SELECT results, expires_at FROM search_results WHERE provider = ? AND query_key = ?"
+    _TOUCH = "UPDATE search_results SET last_used = ? WHERE provider = ? AND query_key = ?"
+    _PUT = ("INSERT OR REPLACE INTO search_results (provider, query_key, query, results, expires_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)")
+    _DELETE_EXPIRED = "DELETE FROM search_results WHERE expires_at <= ?"
+    _LOAD_SCORES = "SELECT provider, score, updated_at FROM provider_scores"
+    _SAVE_SCORE = "INSERT OR REPLACE INTO provider_scores (provider, score, updated_at) VALUES (?, ?, ?)"
+
+    def __init__(self, path: str, provider_ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(path, max_entries)
+        self.provider_ttls = dict(DEFAULT_PROVIDER_TTLS if provider_ttls is None else provider_ttls)
+        self.default_ttl = default_ttl
+
+    @classmethod
+    def from_environment(cls) -> Optional['SearchResultCache']:
+        """
+        Cache configured from the environment, or None if SEARCH_CACHE is "off".
+
+        SEARCH_CACHE_DIR (default: the system temp dir) holds the file, SEARCH_CACHE_MAX_ENTRIES
+        bounds it, SEARCH_CACHE_TTL is the TTL of providers without a default, and
+        SEARCH_CACHE_TTL_<PROVIDER> (e.g. SEARCH_CACHE_TTL_DUCKDUCKGO) overrides one provider.
+        """
+        if not cache_enabled('SEARCH_CACHE'):
+            return None
+        directory = cache_dir('SEARCH_CACHE_DIR', 'stage7_search_cache')
+        default_ttl = env_number('SEARCH_CACHE_TTL', DEFAULT_TTL_SECONDS)
+        max_entries = int(env_number('SEARCH_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        ttls = dict(DEFAULT_PROVIDER_TTLS)
+        for name, value in os.environ.items():
+            if name.startswith('SEARCH_CACHE_TTL_'):
+                provider = name[len('SEARCH_CACHE_TTL_'):]
+                match = next((p for p in ttls if p.upper() == provider), provider)
+                ttls[match] = env_number(name, ttls.get(match, default_ttl))
+        return cls(os.path.join(directory, 'search_cache.sqlite3'), ttls, default_ttl, max_entries)
+
+    def ttl_for(self, provider: str) -> float:
+        return self.provider_ttls.get(provider, self.default_ttl)
+
+    def get(self, provider: str, query: str) -> Optional[List[Dict[str, Any]]]:
+        """Fresh cached results of a provider for a query, or None."""
+        key = normalize_query(query)
+        if not key or self.ttl_for(provider) <= 0:
+            return None
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(self._GET, (provider, key)).fetchone()
+                if row is None or row[1] <= now:
+                    self.misses += 1
+                    return None
+                conn.execute(self._TOUCH, (now, provider, key))
+                self.hits += 1
+            return json.loads(row[0])
+        except (OSError, sqlite3.Error, ValueError) as e:
+            logger.warning(f"Search cache lookup failed ({self.path}): {e}")
+            return None
+
+    def put(self, provider: str, query: str, results: List[Dict[str, Any]]):
+        """Store a provider's results for a query, then evict expired and least recently used entries."""
+        key = normalize_query(query)
+        ttl = self.ttl_for(provider)
+        if not key or ttl <= 0 or not results:
+            return
+        now = time.time()
+        try:
+            payload = json.dumps(results)
+            with self._lock:
+                with self._bounded_write(self._connection()) as conn:
+                    conn.execute(self._PUT, (provider, key, query, payload, now + ttl, now))
+                    conn.execute(self._DELETE_EXPIRED, (now,))
+        except (OSError, sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Search cache write failed ({self.path}): {e}")
+
+    def load_scores(self) -> Dict[str, Tuple[int, float]]:
+        """provider -> (performance_score, time it was saved)"""
+        try:
+            with self._lock:
+                return {provider: (score, updated_at)
+                        for provider, score, updated_at in self._connection().execute(self._LOAD_SCORES)}
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Could not load provider scores ({self.path}): {e}")
+            return {}
+
+    def save_scores(self, scores: Dict[str, int]):
+        now = time.time()
+        try:
+            with self._lock:
+                self._connection().executemany(self._SAVE_SCORE, [(p, int(s), now) for p, s in scores.items()])
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Could not save provider scores ({self.path}): {e}")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+SQLite plumbing shared by the on-disk plugin caches (search_result_cache, http_response_cache).
+
+Plugins run as short-lived processes, often several at once, so these caches live in one
+SQLite file per cache opened in WAL mode: readers never block the single writer, and a
+crashed process cannot leave a half-written file behind. ``SqliteLruCache`` owns the
+connection, the lock that serialises this process's use of it, write transactions that
+trim the table to ``max_entries`` by ``last_used``, the hit/miss/eviction counters and
+``close``. Subclasses declare their table and keep only what is specific to their entries.
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class SqliteLruCache:
+    """One table of entries with a ``last_used`` column, evicted least recently used first."""
+
+    _SCHEMA: Tuple[str, ...] = ()
+    _TABLE = ''
+    _KEY = ''  # primary key column(s), e.g. "url" or "provider, query_key"
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self._SCHEMA:
+                conn.execute(statement)
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _bounded_write(self, conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+        """Write transaction that evicts least recently used entries beyond max_entries before committing."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            excess = conn.execute(f"SELECT COUNT(*) FROM {self._TABLE}").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(f"DELETE FROM {self._TABLE} WHERE ({self._KEY}) IN "
+                             f"(SELECT {self._KEY} FROM {self._TABLE} ORDER BY last_used LIMIT ?)", (excess,))
+                self.evictions += excess
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "max_entries": self.max_entries
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def cache_enabled(variable: str) -> bool:
+    """False when the variable turns the cache "off" (also false/0/no); caches are on by default."""
+    return os.environ.get(variable, 'on').strip().lower() not in ('off', 'false', '0', 'no')
+
+
+def cache_dir(variable: str, default_name: str) -> str:
+    """Directory named by the variable, or default_name under the system temp dir."""
+    return os.environ.get(variable) or os.path.join(tempfile.gettempdir(), default_name)
+
+
+def env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
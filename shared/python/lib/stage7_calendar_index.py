@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Day-ordinal availability indexes for booking plugins.
+
+Stays are half-open ``[start, end)`` ranges of ``date.toordinal()`` days, parsed once
+with ``stay_ordinals`` instead of re-parsing date strings on every comparison.
+
+``BookingCounts`` counts bookings per day for a pool of interchangeable units (a hotel's
+rooms of one type) in a lazy segment tree: booking or releasing a stay is a range add,
+and the busiest night of a stay is a range max, both O(log days).
+
+``FreeUnits`` tracks which specific units are free. Each unit's bookings are a sorted
+list, so checking one unit is a bisect. The free gaps between bookings are indexed by
+the day they start in a segment tree of gap ends, so the unit whose gap fits a stay
+most tightly (the gap that opens latest on or before check-in) is found by descending
+the tree in O(log days) rather than by trying every unit.
+
+Both trees cover a window of days that doubles whenever a stay falls outside it.
+
+    from stage7_calendar_index import BookingCounts, FreeUnits, stay_ordinals
+
+    start, end = stay_ordinals("2026-02-01", "2026-02-05")
+    counts = BookingCounts()
+    counts.add(start, end)
+    busiest = counts.max(start, end)
+
+    rooms = FreeUnits(["ROOM_101", "ROOM_102"])
+    room = rooms.find(start, end)
+    rooms.book(room, start, end)
+"""
+
+from bisect import bisect_left
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+WINDOW_DAYS = 1024  # initial days covered by a tree; doubles on demand
+OPEN_END = 1 << 40  # end ordinal of a gap with no booking after it
+
+
+def stay_ordinals(check_in: str, check_out: str) -> Tuple[int, int]:
+    """Day ordinals of YYYY-MM-DD check-in and check-out dates; ValueError if either is malformed."""
+    try:
+        return date.fromisoformat(check_in).toordinal(), date.fromisoformat(check_out).toordinal()
+    except TypeError:
+        raise ValueError(f"Invalid dates: {check_in!r}, {check_out!r}")
+
+
+class BookingCounts:
+    """Bookings per day with O(log days) range add and range max."""
+
+    __slots__ = ("_lo", "_n", "_h", "_tree", "_lazy")
+
+    def __init__(self, window: int = WINDOW_DAYS):
+        self._lo: Optional[int] = None
+        self._resize(1 << max(1, window - 1).bit_length())
+
+    def _resize(self, size: int) -> None:
+        self._n = size
+        self._h = size.bit_length() - 1
+        self._tree = [0] * (2 * size)
+        self._lazy = [0] * size
+
+    def _leaves(self) -> List[int]:
+        """Push every pending add down and return the per-day counts."""
+        tree, lazy = self._tree, self._lazy
+        for node in range(1, self._n):
+            if lazy[node]:
+                for child in (2 * node, 2 * node + 1):
+                    tree[child] += lazy[node]
+                    if child < self._n:
+                        lazy[child] += lazy[node]
+                lazy[node] = 0
+        return tree[self._n:]
+
+    def _cover(self, start: int, end: int) -> None:
+        """Grow the window so it covers [start, end)."""
+        if self._lo is None:
+            self._lo = start - self._n // 8
+        lo, hi = self._lo, self._lo + self._n
+        if lo <= start and end <= hi:
+            return
+        new_lo, new_hi = min(lo, start), max(hi, end)
+        size = self._n
+        while size < new_hi - new_lo:
+            size *= 2
+        if start < lo:
+            new_lo = new_hi - size
+        counts = self._leaves()
+        self._resize(size)
+        offset = lo - new_lo
+        self._tree[size + offset:size + offset + len(counts)] = counts
+        for node in range(size - 1, 0, -1):
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+        self._lo = new_lo
+
+    def _push(self, leaf: int) -> None:
+        tree, lazy = self._tree, self._lazy
+        for shift in range(self._h, 0, -1):
+            node = leaf >> shift
+            value = lazy[node]
+            if value:
+                left = 2 * node
+                tree[left] += value
+                tree[left + 1] += value
+                if left < self._n:
+                    lazy[left] += value
+                    lazy[left + 1] += value
+                lazy[node] = 0
+
+    def _pull(self, leaf: int) -> None:
+        tree, lazy = self._tree, self._lazy
+        node = leaf >> 1
+        while node:
+            left = tree[2 * node]
+            right = tree[2 * node + 1]
+            tree[node] = (left if left > right else right) + lazy[node]
+            node >>= 1
+
+    def add(self, start: int, end: int, count: int = 1) -> None:
+        """Add `count` bookings (negative to release) to every day in [start, end)."""
+        self._cover(start, end)
+        n = self._n
+        tree, lazy = self._tree, self._lazy
+        left = start - self._lo + n
+        right = end - self._lo + n
+        first, last = left, right - 1
+        while left < right:
+            if left & 1:
+                tree[left] += count
+                if left < n:
+                    lazy[left] += count
+                left += 1
+            if right & 1:
+                right -= 1
+                tree[right] += count
+                if right < n:
+                    lazy[right] += count
+            left >>= 1
+            right >>= 1
+        self._pull(first)
+        self._pull(last)
+
+    def peak(self) -> int:
+        """Most bookings on any day."""
+        return self._tree[1] if self._lo is not None else 0
+
+    def max(self, start: int, end: int) -> int:
+        """Most bookings on any day in [start, end)."""
+        if self._lo is None:
+            return 0
+        lo, n = self._lo, self._n
+        # Days outside the window have no bookings
+        start, end = max(start, lo), min(end, lo + n)
+        if start >= end:
+            return 0
+        tree = self._tree
+        left = start - lo + n
+        right = end - lo + n
+        self._push(left)
+        self._push(right - 1)
+        best = 0
+        while left < right:
+            if left & 1:
+                if tree[left] > best:
+                    best = tree[left]
+                left += 1
+            if right & 1:
+                right -= 1
+                if tree[right] > best:
+                    best = tree[right]
+            left >>= 1
+            right >>= 1
+        return best
+
+
+class FreeUnits:
+    """Date-aware free/booked state of individually identified units (rooms)."""
+
+    __slots__ = ("_starts", "_ends", "_buckets", "_lo", "_n", "_tree")
+
+    def __init__(self, units: Iterable[str] = (), window: int = WINDOW_DAYS):
+        self._starts: Dict[str, List[int]] = {}
+        self._ends: Dict[str, List[int]] = {}
+        # Gap start -> {gap end: {unit: None}}; None is the open start before a unit's first booking
+        self._buckets: Dict[Optional[int], Dict[int, Dict[str, None]]] = {}
+        self._lo: Optional[int] = None
+        self._n = 1 << max(1, window - 1).bit_length()
+        self._tree = [-1] * (2 * self._n)
+        for unit in units:
+            self.add_unit(unit)
+
+    def __contains__(self, unit: str) -> bool:
+        return unit in self._starts
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    # Gap tree: leaf 0 holds gaps with an open start, leaf i > 0 gaps starting on day _lo + i - 1
+
+    def _leaf(self, gap_start: Optional[int]) -> int:
+        return 0 if gap_start is None else gap_start - self._lo + 1
+
+    def _cover(self, day: int) -> None:
+        if self._lo is None:
+            self._lo = day - self._n // 8
+        if self._lo <= day <= self._lo + self._n - 2:
+            return
+        starts = [s for s in self._buckets if s is not None] + [day]
+        new_lo, new_hi = min(min(starts), self._lo), max(max(starts), self._lo + self._n - 2)
+        size = self._n
+        while size < new_hi - new_lo + 2:
+            size *= 2
+        if day < self._lo:
+            new_lo = new_hi + 2 - size
+        self._lo, self._n = new_lo, size
+        self._tree = [-1] * (2 * size)
+        for gap_start, bucket in self._buckets.items():
+            self._tree[size + self._leaf(gap_start)] = max(bucket)
+        for node in range(size - 1, 0, -1):
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+
+    def _set_leaf(self, gap_start: Optional[int], value: int) -> None:
+        tree = self._tree
+        node = self._leaf(gap_start) + self._n
+        tree[node] = value
+        node >>= 1
+        while node:
+            left, right = tree[2 * node], tree[2 * node + 1]
+            value = left if left > right else right
+            if tree[node] == value:
+                break
+            tree[node] = value
+            node >>= 1
+
+    def _add_gap(self, unit: str, gap_start: Optional[int], gap_end: int) -> None:
+        if gap_start is not None:
+            if gap_start >= gap_end:
+                return
+            self._cover(gap_start)
+        elif self._lo is None:
+            self._cover(gap_end if gap_end != OPEN_END else date.today().toordinal())
+        bucket = self._buckets.setdefault(gap_start, {})
+        bucket.setdefault(gap_end, {})[unit] = None
+        leaf = self._tree[self._leaf(gap_start) + self._n]
+        if gap_end > leaf:
+            self._set_leaf(gap_start, gap_end)
+
+    def _remove_gap(self, unit: str, gap_start: Optional[int], gap_end: int) -> None:
+        if gap_start is not None and gap_start >= gap_end:
+            return
+        bucket = self._buckets[gap_start]
+        units = bucket[gap_end]
+        del units[unit]
+        if not units:
+            del bucket[gap_end]
+            if not bucket:
+                del self._buckets[gap_start]
+                self._set_leaf(gap_start, -1)
+            elif gap_end > max(bucket):
+                self._set_leaf(gap_start, max(bucket))
+
+    def _gap(self, unit: str, start: int, end: int) -> Optional[Tuple[int, Optional[int], int]]:
+        """(insert position, gap start, gap end) of the free gap holding [start, end), or None."""
+        starts, ends = self._starts[unit], self._ends[unit]
+        i = bisect_left(starts, end)
+        if i and ends[i - 1] > start:
+            return None
+        if i < len(starts) and starts[i] < end:
+            return None
+        return i, (ends[i - 1] if i else None), (starts[i] if i < len(starts) else OPEN_END)
+
+    def add_unit(self, unit: str) -> None:
+        if unit not in self._starts:
+            self._starts[unit], self._ends[unit] = [], []
+            self._add_gap(unit, None, OPEN_END)
+
+    def remove_unit(self, unit: str) -> None:
+        """Drop a unit and its bookings."""
+        starts, ends = self._starts.pop(unit), self._ends.pop(unit)
+        previous = None
+        for start, end in zip(starts, ends):
+            self._remove_gap(unit, previous, start)
+            previous = end
+        self._remove_gap(unit, previous, OPEN_END)
+
+    def bookings(self, unit: str) -> List[Tuple[int, int]]:
+        return list(zip(self._starts[unit], self._ends[unit]))
+
+    def is_free(self, unit: str, start: int, end: int) -> bool:
+        return self._gap(unit, start, end) is not None
+
+    def find(self, start: int, end: int) -> Optional[str]:
+        """A unit free for all of [start, end), preferring the tightest fit; None if all are taken."""
+        if self._lo is None:
+            return None
+        n, tree = self._n, self._tree
+        limit = min(max(start - self._lo + 1, 0), n - 1)
+        # Canonical nodes covering leaves [0, limit], visited right to left
+        left, right = n, limit + n + 1
+        right_nodes, left_nodes = [], []
+        while left < right:
+            if left & 1:
+                left_nodes.append(left)
+                left += 1
+            if right & 1:
+                right -= 1
+                right_nodes.append(right)
+            left >>= 1
+            right >>= 1
+        for node in right_nodes + left_nodes[::-1]:
+            if tree[node] >= end:
+                while node < n:
+                    node = 2 * node + 1 if tree[2 * node + 1] >= end else 2 * node
+                leaf = node - n
+                bucket = self._buckets[None if leaf == 0 else self._lo + leaf - 1]
+                gap_end = min(e for e in bucket if e >= end)
+                return next(iter(bucket[gap_end]))
+        return None
+
+    def book(self, unit: str, start: int, end: int) -> bool:
+        """Book [start, end) on a unit; False if it overlaps one of the unit's bookings."""
+        gap = self._gap(unit, start, end)
+        if gap is None:
+            return False
+        i, gap_start, gap_end = gap
+        self._remove_gap(unit, gap_start, gap_end)
+        self._add_gap(unit, gap_start, start)
+        self._add_gap(unit, end, gap_end)
+        self._starts[unit].insert(i, start)
+        self._ends[unit].insert(i, end)
+        return True
+
+    def release(self, unit: str, start: int, end: int) -> bool:
+        """Free a booking made with `book`; False if the unit has no such booking."""
+        starts, ends = self._starts.get(unit), self._ends.get(unit)
+        if starts is None:
+            return False
+        i = bisect_left(starts, start)
+        if i == len(starts) or starts[i] != start or ends[i] != end:
+            return False
+        gap_start = ends[i - 1] if i else None
+        gap_end = starts[i + 1] if i + 1 < len(starts) else OPEN_END
+        self._remove_gap(unit, gap_start, start)
+        self._remove_gap(unit, end, gap_end)
+        del starts[i], ends[i]
+        self._add_gap(unit, gap_start, gap_end)
+        return True
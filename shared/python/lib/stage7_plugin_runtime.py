@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Shared runtime for Stage7 Python plugins.
+
+Replaces the per-plugin copies of ``parse_inputs``, ``_get_input``, ``PluginOutput``
+and the ``main()`` boilerplate with one implementation:
+
+- ``parse_inputs``: decodes the ``[[key, value], ...]`` stdin payload (or a serialized
+  Map / plain object) in a single pass; ``parse_payload`` does the same for a payload
+  that is already decoded.
+- ``get_input``: alias-aware lookup that unwraps ``{'value': ...}`` InputValues.
+- ``PluginOutput`` / ``error_output``: the standard output shape.
+- ``run(execute_plugin)``: reads stdin, dispatches, and writes compact JSON to stdout.
+
+Uses ``orjson`` when it is installed and falls back to the standard ``json`` module.
+A plugin only needs:
+
+    from stage7_plugin_runtime import run, get_input as _get_input
+
+    def main():
+        run(execute_plugin)
+"""
+
+import sys
+import json
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - depends on the plugin venv
+    _orjson = None
+
+logger = logging.getLogger(__name__)
+
+JSON_BACKEND = 'orjson' if _orjson else 'json'
+
+
+def loads(data: Any) -> Any:
+    """Decode JSON text or bytes with the fastest available backend."""
+    if _orjson is not None:
+        return _orjson.loads(data)
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """Encode to compact JSON text with the fastest available backend."""
+    if _orjson is not None:
+        try:
+            return _orjson.dumps(obj, default=str).decode('utf-8')
+        except TypeError:
+            # orjson rejects e.g. non-string dict keys; the stdlib encoder coerces them.
+            pass
+    return json.dumps(obj, separators=(',', ':'), default=str)
+
+
+def parse_inputs(inputs_str: str, wrap_values: bool = False) -> Dict[str, Any]:
+    """Parse the plugin stdin payload into a dict of inputName -> value.
+
+    Accepts a JSON array of ``[key, value]`` pairs (the CapabilitiesManager format), a
+    serialized Map ``{"_type": "Map", "entries": [...]}``, or a plain object. With
+    ``wrap_values`` non-dict values are normalized to ``{'value': raw}``.
+    """
+    return parse_payload(loads(inputs_str), wrap_values=wrap_values)
+
+
+def parse_payload(payload: Any, wrap_values: bool = False) -> Dict[str, Any]:
+    """``parse_inputs`` for a payload that is already decoded."""
+    if isinstance(payload, list):
+        pairs: Iterable[Any] = payload
+    elif isinstance(payload, dict) and payload.get('_type') == 'Map' and isinstance(payload.get('entries'), list):
+        pairs = payload['entries']
+    elif isinstance(payload, dict):
+        pairs = ((k, v) for k, v in payload.items() if k not in ('_type', 'entries'))
+    else:
+        raise ValueError("Unsupported input format: expected array of pairs, Map with entries, or object mapping")
+
+    inputs: Dict[str, Any] = {}
+    for item in pairs:
+        if isinstance(item, (list, tuple)) and len(item) == 2:
+            key, value = item
+            if wrap_values and not isinstance(value, dict):
+                value = {'value': value}
+            inputs[key] = value
+        else:
+            logger.debug(f"Skipping invalid input item: {item}")
+    return inputs
+
+
+def get_input(inputs: Dict[str, Any], key: str, aliases: Iterable[str] = (), default: Any = None) -> Any:
+    """Get an input value by name or alias, unwrapping ``{'value': ...}`` wrappers."""
+    raw_val = inputs.get(key)
+    if raw_val is None:
+        for alias in aliases:
+            raw_val = inputs.get(alias)
+            if raw_val is not None:
+                break
+    if raw_val is None:
+        return default
+    if isinstance(raw_val, dict) and 'value' in raw_val:
+        return raw_val['value'] if raw_val['value'] is not None else default
+    return raw_val
+
+
+class PluginOutput:
+    """Represents a plugin output result."""
+    def __init__(self, success: bool, name: str, result_type: str,
+                 result: Any, result_description: str, error: Optional[str] = None):
+        self.success = success
+        self.name = name
+        self.result_type = result_type
+        self.result = result
+        self.result_description = result_description
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        output = {
+            "success": self.success,
+            "name": self.name,
+            "resultType": self.result_type,
+            "result": self.result,
+            "resultDescription": self.result_description
+        }
+        if self.error:
+            output["error"] = self.error
+        return output
+
+
+def error_output(message: str) -> List[Dict[str, Any]]:
+    """Standard single-item error result."""
+    return [{
+        "success": False,
+        "name": "error",
+        "resultType": "error",
+        "result": message,
+        "resultDescription": message,
+        "error": message
+    }]
+
+
+def run(execute_plugin: Callable[[Dict[str, Any]], Any], wrap_values: bool = False) -> None:
+    """Plugin entry point: read stdin, call ``execute_plugin(inputs)``, print compact JSON."""
+    try:
+        input_data = sys.stdin.read().strip()
+        if not input_data:
+            result = error_output("No input data received")
+        else:
+            result = execute_plugin(parse_inputs(input_data, wrap_values=wrap_values))
+    except Exception as e:
+        logger.error(f"Plugin execution failed: {str(e)}")
+        result = error_output(str(e))
+
+    sys.stdout.write(dumps(result))
+    sys.stdout.write('\n')
+    sys.stdout.flush()
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Shared in-memory storage for Stage7 Python plugins.
+
+Replaces the per-plugin copies of ``DataStore`` and ``CacheManager``:
+
+- ``DataStore``: collections of records keyed by ``id`` in insertion-ordered dicts, so
+  ``get_by_id`` / ``update`` / ``delete`` are O(1). Optional secondary indexes on chosen
+  fields back ``find``.
+- ``CacheManager``: a TTL cache with LRU eviction and hit/miss/eviction counters.
+- ``BoundedLog``: a ring buffer for audit and error logs that keeps the newest entries and
+  optionally spills older ones to an append-only JSON-lines file.
+- ``plugin_limits_from_env``: the audit log, error log and result cache bounds a plugin
+  reads from ``PLUGIN_AUDIT_LOG_SIZE`` (default 1000), ``PLUGIN_ERROR_LOG_SIZE`` (200),
+  ``PLUGIN_RESULT_CACHE_SIZE`` (1000) and ``PLUGIN_AUDIT_LOG_DIR``, where evicted audit
+  entries are appended to ``<plugin>.audit.jsonl`` if set. Results expire after 300 s.
+- ``cow_view``: a copy-on-write view of a JSON-like value, for handing inputs back in
+  results without ``copy.deepcopy``. Nested dicts and lists are shared with the source
+  and each is shallow-copied only when first read through the view, so writes through the
+  view never reach the source. ``dict(view)`` and JSON encoding read the shared values.
+
+    from stage7_plugin_store import DataStore, CacheManager, BoundedLog, cow_view, plugin_limits_from_env
+
+    store = DataStore(indexed_fields=("status", "assignee"))
+    cache = CacheManager(ttl_seconds=300, max_entries=1000)
+    audit = BoundedLog(max_entries=1000, spill_path="/var/log/stage7/plugin.audit.jsonl")
+    errors = plugin_limits_from_env("DATABASE").error_log()
+    result["data"] = cow_view(inputs["data"])
+"""
+
+import os
+import json
+import time
+import logging
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+
+class CacheManager:
+    """TTL cache with LRU eviction."""
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 1024):
+        self.cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl_seconds is None else ttl_seconds
+        self.cache[key] = {
+            "value": value,
+            "created_at": datetime.now().isoformat(),
+            "expires_at": time.monotonic() + ttl
+        }
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str, default: Any = None) -> Optional[Any]:
+        entry = self.cache.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        if entry["expires_at"] <= time.monotonic():
+            del self.cache[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self.cache.move_to_end(key)
+        self.hits += 1
+        return entry["value"]
+
+    def delete(self, key: str) -> bool:
+        return self.cache.pop(key, None) is not None
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry; returns how many were removed."""
+        now = time.monotonic()
+        expired = [key for key, entry in self.cache.items() if entry["expires_at"] <= now]
+        for key in expired:
+            del self.cache[key]
+        self.expirations += len(expired)
+        return len(expired)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def __contains__(self, key: str) -> bool:
+        """Whether key holds an unexpired value; unlike get, leaves counters and LRU order alone"""
+        entry = self.cache.get(key)
+        return entry is not None and entry["expires_at"] > time.monotonic()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.cache),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class BoundedLog:
+    """Ring buffer of the newest log entries, spilling evicted ones to a file if configured."""
+    def __init__(self, max_entries: int = 1000, spill_path: Optional[str] = None):
+        self.entries: 'deque[Dict[str, Any]]' = deque()
+        self.max_entries = max_entries
+        self.spill_path = spill_path
+        self.appended = 0
+        self.spilled = 0
+        self.dropped = 0
+        self._spill_file = None
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        if len(self.entries) >= self.max_entries:
+            self._evict(self.entries.popleft())
+        self.entries.append(entry)
+        self.appended += 1
+
+    def _evict(self, entry: Dict[str, Any]) -> None:
+        if self.spill_path:
+            try:
+                if self._spill_file is None:
+                    self._spill_file = open(self.spill_path, "a", encoding="utf-8", buffering=1)
+                self._spill_file.write(json.dumps(entry, default=str) + "\n")
+                self.spilled += 1
+                return
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Could not spill log entry to {self.spill_path}: {e}")
+        self.dropped += 1
+
+    def recent(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """The newest `limit` entries, oldest first"""
+        if limit <= 0:
+            return []
+        if limit >= len(self.entries):
+            return list(self.entries)
+        return [self.entries[i] for i in range(len(self.entries) - limit, len(self.entries))]
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def close(self) -> None:
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "appended": self.appended,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+            "spill_path": self.spill_path
+        }
+
+
+class PluginLimits:
+    """Sizes of one plugin's audit log, error log and result cache."""
+    def __init__(self, plugin_name: str, audit_log_size: int = 1000, error_log_size: int = 200,
+                 result_cache_size: int = 1000, result_cache_ttl: float = 300,
+                 audit_log_dir: Optional[str] = None):
+        self.plugin_name = plugin_name
+        self.audit_log_size = audit_log_size
+        self.error_log_size = error_log_size
+        self.result_cache_size = result_cache_size
+        self.result_cache_ttl = result_cache_ttl
+        self.audit_log_dir = audit_log_dir
+
+    def audit_log(self) -> BoundedLog:
+        spill_path = os.path.join(self.audit_log_dir, f"{self.plugin_name}.audit.jsonl") if self.audit_log_dir else None
+        return BoundedLog(self.audit_log_size, spill_path)
+
+    def error_log(self) -> BoundedLog:
+        return BoundedLog(self.error_log_size)
+
+    def result_cache(self) -> CacheManager:
+        return CacheManager(ttl_seconds=self.result_cache_ttl, max_entries=self.result_cache_size)
+
+
+def _positive_int_from_env(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, str(default))))
+    except ValueError:
+        return default
+
+
+def plugin_limits_from_env(plugin_name: str) -> PluginLimits:
+    """Read the PLUGIN_* bounds; malformed sizes fall back to the defaults and are never below 1"""
+    return PluginLimits(
+        plugin_name,
+        audit_log_size=_positive_int_from_env("PLUGIN_AUDIT_LOG_SIZE", 1000),
+        error_log_size=_positive_int_from_env("PLUGIN_ERROR_LOG_SIZE", 200),
+        result_cache_size=_positive_int_from_env("PLUGIN_RESULT_CACHE_SIZE", 1000),
+        audit_log_dir=os.environ.get("PLUGIN_AUDIT_LOG_DIR") or None
+    )
+
+
+def cow_view(value: Any) -> Any:
+    """Copy-on-write view of a dict or list; other values are returned as they are"""
+    if type(value) is dict:
+        return CowDict(value)
+    if type(value) is list:
+        return CowList(value)
+    return value
+
+
+class CowDict(dict):
+    """
+    Shallow copy of a dict whose nested dicts and lists are copied the first time they are read.
+
+    Reads through the view's own methods never expose the source's nested values. Code that
+    reads the underlying dict storage directly (``dict(view)``, ``{**view}``, ``copy.copy``)
+    still gets the shared nested values and must not mutate them.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key: Any) -> Any:
+        value = dict.__getitem__(self, key)
+        if type(value) is dict or type(value) is list:
+            value = cow_view(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        return cow_view(dict.pop(self, key, *default))
+
+    def popitem(self) -> Any:
+        key, value = dict.popitem(self)
+        return key, cow_view(value)
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            dict.__setitem__(self, key, default)
+        return self[key]
+
+    def __or__(self, other: Any) -> 'CowDict':
+        merged = CowDict(self)
+        merged.update(other)
+        return merged
+
+    def copy(self) -> 'CowDict':
+        return CowDict(self)
+
+
+class CowList(list):
+    """
+    Shallow copy of a list whose nested dicts and lists are copied the first time they are read.
+
+    The same limits as ``CowDict`` apply to code that reads the list storage directly.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return CowList([self[i] for i in range(*index.indices(len(self)))])
+        value = list.__getitem__(self, index)
+        if type(value) is dict or type(value) is list:
+            value = cow_view(value)
+            list.__setitem__(self, index, value)
+        return value
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __reversed__(self) -> Iterator[Any]:
+        for i in range(len(self) - 1, -1, -1):
+            yield self[i]
+
+    def __add__(self, other: Any) -> 'CowList':
+        return CowList(list.__add__(self, other))
+
+    def __mul__(self, count: int) -> 'CowList':
+        return CowList(list.__mul__(self, count))
+
+    __rmul__ = __mul__
+
+    def pop(self, index: int = -1) -> Any:
+        return cow_view(list.pop(self, index))
+
+    def copy(self) -> 'CowList':
+        return CowList(self)
+
+
+class DataStore:
+    """In-memory data storage with full CRUD operations, indexed by id and optional fields"""
+    def __init__(self, indexed_fields: Iterable[str] = ()):
+        # key -> {item_id: item}; dicts keep insertion order, so get_all is unchanged
+        self.data: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        self.indexed_fields = tuple(indexed_fields)
+        # key -> field -> value -> ids (a dict, so matches come back in insertion order)
+        self.indices: Dict[str, Dict[str, Dict[Any, Dict[str, None]]]] = defaultdict(lambda: defaultdict(lambda: defaultdict(dict)))
+        self.metadata = {
+            "created_at": datetime.now().isoformat(),
+            "version": "2.0",
+            "total_operations": 0
+        }
+
+    def add(self, key: str, value: Dict[str, Any]) -> str:
+        """Add item to store"""
+        item_id = str(uuid4())
+        now = datetime.now().isoformat()
+        item = {
+            "id": item_id,
+            **value,
+            "created_at": now,
+            "updated_at": now
+        }
+        self.data[key][item_id] = item
+        self._index(key, item)
+        self.metadata["total_operations"] += 1
+        logger.debug(f"Added item {item_id} to {key}")
+        return item_id
+
+    def get_all(self, key: str) -> List[Dict[str, Any]]:
+        """Get all items for key"""
+        items = self.data.get(key)
+        return list(items.values()) if items else []
+
+    def get_by_id(self, key: str, item_id: str) -> Optional[Dict[str, Any]]:
+        """Get specific item by ID"""
+        items = self.data.get(key)
+        return items.get(item_id) if items else None
+
+    def find(self, key: str, field: str, value: Any) -> List[Dict[str, Any]]:
+        """Items whose field equals value; uses the secondary index when the field is indexed"""
+        items = self.data.get(key)
+        if not items:
+            return []
+        if field in self.indexed_fields and value is not None and self._hashable(value):
+            ids = self.indices[key][field].get(value, ())
+            return [items[item_id] for item_id in ids if item_id in items]
+        return [item for item in items.values() if item.get(field) == value]
+
+    def update(self, key: str, item_id: str, updates: Dict[str, Any]) -> bool:
+        """Update item"""
+        item = self.get_by_id(key, item_id)
+        if item is None:
+            return False
+        self._unindex(key, item)
+        item.update({k: v for k, v in updates.items() if k != "id"})
+        item["updated_at"] = datetime.now().isoformat()
+        self._index(key, item)
+        self.metadata["total_operations"] += 1
+        logger.debug(f"Updated item {item_id}")
+        return True
+
+    def delete(self, key: str, item_id: str) -> bool:
+        """Delete item"""
+        items = self.data.get(key)
+        item = items.pop(item_id, None) if items else None
+        if item is None:
+            return False
+        self._unindex(key, item)
+        self.metadata["total_operations"] += 1
+        logger.debug(f"Deleted item {item_id}")
+        return True
+
+    def count(self, key: str) -> int:
+        """Count items for key"""
+        return len(self.data.get(key, ()))
+
+    def clear(self, key: Optional[str] = None) -> None:
+        """Remove every item, or only the items for one key"""
+        if key is None:
+            self.data.clear()
+            self.indices.clear()
+        else:
+            self.data.pop(key, None)
+            self.indices.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get storage statistics"""
+        total_items = sum(len(items) for items in self.data.values())
+        return {
+            "total_items": total_items,
+            "total_keys": len(self.data),
+            "total_operations": self.metadata["total_operations"],
+            "indexed_fields": list(self.indexed_fields),
+            "created_at": self.metadata["created_at"]
+        }
+
+    @staticmethod
+    def _hashable(value: Any) -> bool:
+        try:
+            hash(value)
+            return True
+        except TypeError:
+            return False
+
+    def _index(self, key: str, item: Dict[str, Any]) -> None:
+        for field in self.indexed_fields:
+            value = item.get(field)
+            if value is not None and self._hashable(value):
+                self.indices[key][field][value][item["id"]] = None
+
+    def _unindex(self, key: str, item: Dict[str, Any]) -> None:
+        for field in self.indexed_fields:
+            value = item.get(field)
+            if value is not None and self._hashable(value):
+                ids = self.indices[key][field].get(value)
+                if ids:
+                    ids.pop(item["id"], None)
+                    if not ids:
+                        del self.indices[key][field][value]
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Durable per-tenant state for the stateful Stage7 plugins.
+
+The hospitality plugins keep their state in module-level dicts keyed by restaurant or
+hotel id. Each call runs in a fresh process, so without a backing store every call
+regenerates the sample data from scratch. ``PluginState`` binds those dicts to a
+backend: a tenant is restored on first use and, after the action ran, only the records
+that changed are written back.
+
+Each collection is stored one record per row (dict entries and list items), keyed by
+(namespace, tenant, collection, key) and indexed by record date, so a tenant and a date
+range can be read without touching anything else. Records must be JSON-serializable:
+anything else raises ``TypeError`` from ``persist`` rather than being stored as a string
+that would come back with a different type.
+
+Backends, selected with STAGE7_PLUGIN_STATE_BACKEND:
+
+- ``sqlite`` (default): one database in WAL mode with parameterized statements.
+  STAGE7_PLUGIN_STATE_MMAP_SIZE (bytes) turns on SQLite memory-mapped reads.
+- ``snapshot``: one JSON snapshot file per tenant, read whole and replaced atomically.
+- ``memory``: process-local, nothing survives the process.
+
+STAGE7_PLUGIN_STATE_PATH sets the database file or snapshot directory (default:
+``stage7_plugin_state`` under the system temp dir).
+
+    from stage7_state_store import PluginState
+
+    _state = PluginState("ROOM_ASSIGNMENT", {"rooms": _rooms_database})
+    if not _state.restore(hotel_id):
+        ...  # build the defaults
+    _state.persist()
+"""
+
+import os
+import re
+import json
+import sqlite3
+import logging
+import tempfile
+import threading
+from urllib.parse import quote, unquote
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+DEFAULT_STATE_DIR = 'stage7_plugin_state'
+
+# Record fields consulted, in order, for the date a row is indexed under
+DATE_FIELDS = ('date', 'shift_date', 'check_in_date', 'start_date', 'timestamp', 'created_at')
+
+_ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+# (collection, record_key)
+RowKey = Tuple[str, str]
+# (record_date, payload, position)
+Row = Tuple[Optional[str], str, int]
+
+_HEADER_KEY = ''
+
+
+def record_date(key: str, record: Any) -> Optional[str]:
+    """The ``YYYY-MM-DD`` a record is indexed under: its key if that is a date, else its first date field."""
+    if _ISO_DATE.match(key):
+        return key[:10]
+    if isinstance(record, dict):
+        for field in DATE_FIELDS:
+            value = record.get(field)
+            if isinstance(value, str) and _ISO_DATE.match(value):
+                return value[:10]
+    return None
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'))
+
+
+class MemoryStateBackend:
+    """Process-local backend; also the reference behaviour for the others."""
+
+    def __init__(self):
+        self._tenants: Dict[Tuple[str, str], Dict[RowKey, Row]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, namespace: str, tenant_id: str) -> Dict[RowKey, Row]:
+        with self._lock:
+            return dict(self._tenants.get((namespace, tenant_id), {}))
+
+    def apply(self, namespace: str, tenant_id: str, upserts: Dict[RowKey, Row], deletes: Iterable[RowKey]):
+        with self._lock:
+            rows = self._tenants.setdefault((namespace, tenant_id), {})
+            for key in deletes:
+                rows.pop(key, None)
+            rows.update(upserts)
+
+    def query(self, namespace: str, tenant_id: str, collection: str,
+              start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Tuple[str, str]]:
+        rows = self.load(namespace, tenant_id)
+        return _filter_rows(rows, collection, start_date, end_date)
+
+    def tenants(self, namespace: str) -> List[str]:
+        with self._lock:
+            return sorted(tenant for ns, tenant in self._tenants if ns == namespace)
+
+    def delete_tenant(self, namespace: str, tenant_id: str):
+        with self._lock:
+            self._tenants.pop((namespace, tenant_id), None)
+
+    def close(self):
+        pass
+
+
+def _filter_rows(rows: Dict[RowKey, Row], collection: str,
+                 start_date: Optional[str], end_date: Optional[str]) -> List[Tuple[str, str]]:
+    matches = []
+    for (row_collection, key), (date, payload, position) in rows.items():
+        if row_collection != collection or key == _HEADER_KEY or date is None:
+            continue
+        if (start_date and date < start_date) or (end_date and date > end_date):
+            continue
+        matches.append((date, position, key, payload))
+    matches.sort()
+    return [(key, payload) for _, _, key, payload in matches]
+
+
+class SQLiteStateBackend:
+    """Rows in one SQLite table, WAL journal, one shared connection per process."""
+
+    _SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS plugin_state (
+            namespace TEXT NOT NULL,
+            tenant_id TEXT NOT NULL,
+            collection TEXT NOT NULL,
+            record_key TEXT NOT NULL,
+            record_date TEXT,
+            payload TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (namespace, tenant_id, collection, record_key)
+        ) WITHOUT ROWID""",
+        """CREATE INDEX IF NOT EXISTS plugin_state_by_date
+            ON plugin_state (namespace, tenant_id, collection, record_date)""",
+    )
+
+    # Fixed SQL text, so sqlite3's statement cache prepares each one once per connection
+    _LOAD = ("SELECT collection, record_key, record_date, payload, position FROM plugin_state "
+             "WHERE namespace = ? AND tenant_id = ?")
+    _UPSERT = ("INSERT OR REPLACE INTO plugin_state "
+               "(namespace, tenant_id, collection, record_key, record_date, payload, position) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?)")
+    _DELETE = ("DELETE FROM plugin_state "
+               "WHERE namespace = ? AND tenant_id = ? AND collection = ? AND record_key = ?")
+    _QUERY = ("SELECT record_key, payload FROM plugin_state "
+              "WHERE namespace = ? AND tenant_id = ? AND collection = ? "
+              "AND record_date IS NOT NULL AND record_date >= ? AND record_date <= ? "
+              "ORDER BY record_date, position")
+    _TENANTS = "SELECT DISTINCT tenant_id FROM plugin_state WHERE namespace = ? ORDER BY tenant_id"
+    _DELETE_TENANT = "DELETE FROM plugin_state WHERE namespace = ? AND tenant_id = ?"
+
+    def __init__(self, path: str, mmap_size: int = 0):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                     check_same_thread=False, cached_statements=64)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if mmap_size > 0:
+            self._conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        for statement in self._SCHEMA:
+            self._conn.execute(statement)
+
+    def load(self, namespace: str, tenant_id: str) -> Dict[RowKey, Row]:
+        with self._lock:
+            cursor = self._conn.execute(self._LOAD, (namespace, tenant_id))
+            return {(collection, key): (date, payload, position)
+                    for collection, key, date, payload, position in cursor}
+
+    def apply(self, namespace: str, tenant_id: str, upserts: Dict[RowKey, Row], deletes: Iterable[RowKey]):
+        deletes = [(namespace, tenant_id, collection, key) for collection, key in deletes]
+        upserts = [(namespace, tenant_id, collection, key, date, payload, position)
+                   for (collection, key), (date, payload, position) in upserts.items()]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if deletes:
+                    self._conn.executemany(self._DELETE, deletes)
+                if upserts:
+                    self._conn.executemany(self._UPSERT, upserts)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def query(self, namespace: str, tenant_id: str, collection: str,
+              start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Tuple[str, str]]:
+        with self._lock:
+            cursor = self._conn.execute(self._QUERY, (namespace, tenant_id, collection,
+                                                      start_date or '0000-01-01', end_date or '9999-12-31'))
+            return list(cursor)
+
+    def tenants(self, namespace: str) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute(self._TENANTS, (namespace,))]
+
+    def delete_tenant(self, namespace: str, tenant_id: str):
+        with self._lock:
+            self._conn.execute(self._DELETE_TENANT, (namespace, tenant_id))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SnapshotStateBackend:
+    """One JSON snapshot file per tenant, read whole on load and replaced atomically on write."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, namespace: str, tenant_id: str) -> str:
+        return os.path.join(self.directory, quote(namespace, safe=''), f"{quote(tenant_id, safe='')}.json")
+
+    def _read(self, path: str) -> Dict[RowKey, Row]:
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            if not raw:
+                return {}
+            data = json.loads(raw)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable plugin state snapshot {path}: {e}")
+            return {}
+        if not isinstance(data, dict) or data.get('formatVersion') != SNAPSHOT_FORMAT_VERSION:
+            return {}
+        return {(collection, key): (date, payload, position)
+                for collection, key, date, payload, position in data.get('rows', [])}
+
+    def load(self, namespace: str, tenant_id: str) -> Dict[RowKey, Row]:
+        with self._lock:
+            return self._read(self._path(namespace, tenant_id))
+
+    def apply(self, namespace: str, tenant_id: str, upserts: Dict[RowKey, Row], deletes: Iterable[RowKey]):
+        path = self._path(namespace, tenant_id)
+        with self._lock:
+            rows = self._read(path)
+            for key in deletes:
+                rows.pop(key, None)
+            rows.update(upserts)
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.state_', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'formatVersion': SNAPSHOT_FORMAT_VERSION,
+                    'rows': [[collection, key, date, payload, position]
+                             for (collection, key), (date, payload, position) in rows.items()],
+                }, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+
+    def query(self, namespace: str, tenant_id: str, collection: str,
+              start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Tuple[str, str]]:
+        return _filter_rows(self.load(namespace, tenant_id), collection, start_date, end_date)
+
+    def tenants(self, namespace: str) -> List[str]:
+        directory = os.path.join(self.directory, quote(namespace, safe=''))
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return sorted(unquote(name[:-5]) for name in names if name.endswith('.json'))
+
+    def delete_tenant(self, namespace: str, tenant_id: str):
+        try:
+            os.remove(self._path(namespace, tenant_id))
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        pass
+
+
+def create_state_backend(kind: Optional[str] = None, path: Optional[str] = None):
+    """
+    Backend from explicit arguments or STAGE7_PLUGIN_STATE_BACKEND / STAGE7_PLUGIN_STATE_PATH /
+    STAGE7_PLUGIN_STATE_MMAP_SIZE. Falls back to the memory backend if the store cannot be opened.
+    """
+    kind = (kind or os.environ.get('STAGE7_PLUGIN_STATE_BACKEND') or 'sqlite').lower()
+    base = path or os.environ.get('STAGE7_PLUGIN_STATE_PATH') or os.path.join(tempfile.gettempdir(), DEFAULT_STATE_DIR)
+    try:
+        if kind == 'memory':
+            return MemoryStateBackend()
+        if kind == 'snapshot':
+            return SnapshotStateBackend(base)
+        if kind != 'sqlite':
+            logger.warning(f"Unknown plugin state backend '{kind}', using sqlite")
+        try:
+            mmap_size = int(os.environ.get('STAGE7_PLUGIN_STATE_MMAP_SIZE', 0))
+        except ValueError:
+            mmap_size = 0
+        db_path = base if base.endswith('.db') else os.path.join(base, 'state.db')
+        return SQLiteStateBackend(db_path, mmap_size=mmap_size)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Could not open plugin state backend '{kind}' at {base}: {e}; state will not persist")
+        return MemoryStateBackend()
+
+
+_shared_backend = None
+_shared_backend_lock = threading.Lock()
+
+
+def get_state_backend():
+    """Process-wide backend, created from the environment on first use."""
+    global _shared_backend
+    with _shared_backend_lock:
+        if _shared_backend is None:
+            _shared_backend = create_state_backend()
+        return _shared_backend
+
+
+class PluginState:
+    """
+    Persists a plugin's per-tenant collections.
+
+    ``collections`` maps a stable collection name to one of the plugin's module-level
+    dicts (``tenant_id -> value``). Values that are dicts are stored one row per entry,
+    lists one row per item, anything else as a single value.
+    """
+
+    def __init__(self, namespace: str, collections: Dict[str, Dict[str, Any]], backend=None):
+        self.namespace = namespace
+        self.collections = collections
+        self._backend = backend
+        # tenant -> rows as last loaded from / written to the backend
+        self._known: Dict[str, Dict[RowKey, Row]] = {}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = get_state_backend()
+        return self._backend
+
+    def restore(self, tenant_id: str) -> bool:
+        """
+        Load a tenant's collections into the bound dicts. Returns False, leaving the
+        dicts alone, when the tenant has no stored state for every collection.
+        """
+        try:
+            rows = self.backend.load(self.namespace, tenant_id)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Could not load {self.namespace} state for {tenant_id}: {e}")
+            rows = {}
+        self._known[tenant_id] = rows
+        decoded = self._decode(rows)
+        if any(name not in decoded for name in self.collections):
+            return False
+        for name, target in self.collections.items():
+            target[tenant_id] = decoded[name]
+        return True
+
+    def persist(self, tenant_ids: Optional[Iterable[str]] = None) -> int:
+        """Write back what changed for the given tenants (default: every tenant in memory); returns rows written."""
+        if tenant_ids is None:
+            tenant_ids = {tenant for target in self.collections.values() for tenant in target}
+        written = 0
+        for tenant_id in tenant_ids:
+            known = self._known.get(tenant_id)
+            if known is None:
+                known = self.backend.load(self.namespace, tenant_id)
+            rows = self._encode(tenant_id, known)
+            upserts = {key: row for key, row in rows.items()
+                       if key not in known or known[key][:2] != row[:2]}
+            deletes = [key for key in known if key not in rows]
+            if upserts or deletes:
+                try:
+                    self.backend.apply(self.namespace, tenant_id, upserts, deletes)
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"Could not persist {self.namespace} state for {tenant_id}: {e}")
+                    continue
+                written += len(upserts) + len(deletes)
+            self._known[tenant_id] = rows
+        return written
+
+    def records_between(self, tenant_id: str, collection: str,
+                        start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Any]:
+        """Stored records of one collection dated within [start_date, end_date], oldest first."""
+        return [json.loads(payload) for _, payload in
+                self.backend.query(self.namespace, tenant_id, collection, start_date, end_date)]
+
+    def forget(self, tenant_id: str):
+        """Drop a tenant from the backend and from the bound dicts."""
+        self.backend.delete_tenant(self.namespace, tenant_id)
+        self._known.pop(tenant_id, None)
+        for target in self.collections.values():
+            target.pop(tenant_id, None)
+
+    def _encode(self, tenant_id: str, known: Dict[RowKey, Row]) -> Dict[RowKey, Row]:
+        rows: Dict[RowKey, Row] = {}
+        next_position = max((row[2] for row in known.values()), default=-1) + 1
+        for name, target in self.collections.items():
+            if tenant_id not in target:
+                continue
+            value = target[tenant_id]
+            if isinstance(value, dict):
+                rows[(name, _HEADER_KEY)] = (None, '{"kind":"map"}', 0)
+                items = ((f"k:{key}", key, item) for key, item in value.items())
+            elif isinstance(value, list):
+                rows[(name, _HEADER_KEY)] = (None, '{"kind":"list"}', 0)
+                items = ((f"i:{index:08d}", '', item) for index, item in enumerate(value))
+            else:
+                rows[(name, _HEADER_KEY)] = (None, _dumps({'kind': 'value', 'value': value}), 0)
+                items = ()
+            for row_key, key, item in items:
+                previous = known.get((name, row_key))
+                if previous is not None:
+                    position = previous[2]
+                else:
+                    position = next_position
+                    next_position += 1
+                rows[(name, row_key)] = (record_date(str(key), item), _dumps(item), position)
+        return rows
+
+    @staticmethod
+    def _decode(rows: Dict[RowKey, Row]) -> Dict[str, Any]:
+        headers: Dict[str, Dict[str, Any]] = {}
+        items: Dict[str, List[Tuple[int, str, str]]] = {}
+        for (collection, key), (_, payload, position) in rows.items():
+            if key == _HEADER_KEY:
+                headers[collection] = json.loads(payload)
+            else:
+                items.setdefault(collection, []).append((position, key, payload))
+
+        decoded: Dict[str, Any] = {}
+        for collection, header in headers.items():
+            entries = sorted(items.get(collection, ()))
+            kind = header.get('kind')
+            if kind == 'map':
+                decoded[collection] = {key[2:]: json.loads(payload) for _, key, payload in entries}
+            elif kind == 'list':
+                decoded[collection] = [json.loads(payload) for _, key, payload in sorted(entries, key=lambda e: e[1])]
+            else:
+                decoded[collection] = header.get('value')
+        return decoded
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Fielded BM25 inverted index for plugin search.
+
+Documents have several text fields with a weight each. Term frequencies are
+length-normalised per field, weighted and summed before BM25 saturation (BM25F),
+so a term in a heavily weighted field counts for more than the same term elsewhere.
+Only documents containing a query term are scored, and the top k are picked with a
+heap instead of sorting every match.
+
+Postings are flat ``uint32`` arrays: for each term, one ``(doc, tf_field_1, ..., tf_field_n)``
+entry per document containing it. ``save`` writes them and the per-field document
+lengths as raw binary files next to a JSON lexicon; ``load`` memory-maps the binary
+files, so opening a large index costs the lexicon parse and nothing more.
+
+    from stage7_text_index import BM25Index
+
+    index = BM25Index.build(docs, fields={"title": 2.0, "body": 1.0})
+    index.save("/var/cache/my_index")
+    hits, total = BM25Index.load("/var/cache/my_index").search("breach of contract", k=10)
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import mmap
+import heapq
+import logging
+import tempfile
+from array import array
+from operator import itemgetter
+from typing import Any, Container, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in into is it its of on or "
+    "that the their this to was were which with".split()
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric terms, stopwords dropped and simple plurals folded ('rights' -> 'right')."""
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s'):
+            if token.endswith(('ches', 'shes', 'sses', 'xes')):
+                token = token[:-2]
+            elif not token.endswith(('ss', 'us', 'is')):
+                token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+def _map_uint32(path: str):
+    """Read-only uint32 view of a binary file, memory-mapped when it is non-empty."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return array('I')
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped).cast('I')
+
+
+class BM25Index:
+    """BM25F over weighted fields; built in memory, optionally saved and memory-mapped back."""
+
+    def __init__(self, fields: Dict[str, float], k1: float = 1.2, b: float = 0.75):
+        self.fields = dict(fields)
+        self.field_names = list(self.fields)
+        self.weights = [float(self.fields[name]) for name in self.field_names]
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.avg_lengths: List[float] = [0.0] * len(self.field_names)
+        # term -> (offset into postings, document frequency)
+        self._lexicon: Dict[str, Tuple[int, int]] = {}
+        self._postings = array('I')
+        self._lengths = array('I')
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, Dict[str, Any]]], fields: Dict[str, float],
+              k1: float = 1.2, b: float = 0.75) -> 'BM25Index':
+        """Index ``(doc_id, {field: text})`` pairs; missing fields count as empty."""
+        index = cls(fields, k1, b)
+        field_count = len(index.field_names)
+        postings: Dict[str, array] = {}
+        lengths = array('I')
+
+        for ordinal, (doc_id, doc) in enumerate(documents):
+            index.doc_ids.append(doc_id)
+            counts: Dict[str, List[int]] = {}
+            for position, field in enumerate(index.field_names):
+                terms = tokenize(str(doc.get(field) or ''))
+                lengths.append(len(terms))
+                for term in terms:
+                    tf = counts.get(term)
+                    if tf is None:
+                        tf = counts[term] = [0] * field_count
+                    tf[position] += 1
+            for term, tf in counts.items():
+                entries = postings.get(term)
+                if entries is None:
+                    entries = postings[term] = array('I')
+                entries.append(ordinal)
+                entries.extend(tf)
+
+        stride = field_count + 1
+        flat = array('I')
+        for term in sorted(postings):
+            entries = postings[term]
+            index._lexicon[term] = (len(flat), len(entries) // stride)
+            flat.extend(entries)
+        index._postings = flat
+        index._lengths = lengths
+        index._compute_averages()
+        return index
+
+    def _compute_averages(self):
+        field_count = len(self.field_names)
+        doc_count = len(self.doc_ids)
+        if not doc_count:
+            return
+        totals = [0] * field_count
+        for position, length in enumerate(self._lengths):
+            totals[position % field_count] += length
+        self.avg_lengths = [total / doc_count for total in totals]
+
+    def search(self, query: str, k: int = 10,
+               candidates: Optional[Container[int]] = None) -> Tuple[List[Tuple[str, float]], int]:
+        """
+        Top ``k`` ``(doc_id, score)`` pairs for the query, best first, and how many
+        documents matched at all. ``candidates`` restricts scoring to those ordinals.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.doc_ids:
+            return [], 0
+
+        field_count = len(self.field_names)
+        stride = field_count + 1
+        doc_count = len(self.doc_ids)
+        k1, b = self.k1, self.b
+        # weight / (1 - b + b * len / avg) == weight / (norm_base + norm_scale[f] * len)
+        norm_base = 1 - b
+        norm_scale = [b / avg if avg else 0.0 for avg in self.avg_lengths]
+        weights = self.weights
+        lengths = self._lengths
+        postings = self._postings
+
+        scores: Dict[int, float] = {}
+        for term in terms:
+            entry = self._lexicon.get(term)
+            if entry is None:
+                continue
+            offset, df = entry
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            end = offset + df * stride
+            for start in range(offset, end, stride):
+                doc = postings[start]
+                if candidates is not None and doc not in candidates:
+                    continue
+                base = doc * field_count
+                tf = 0.0
+                for field in range(field_count):
+                    count = postings[start + 1 + field]
+                    if count:
+                        tf += weights[field] * count / (norm_base + norm_scale[field] * lengths[base + field])
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (k1 + 1) / (k1 + tf)
+
+        top = heapq.nlargest(k, scores.items(), key=itemgetter(1)) if k > 0 else []
+        return [(self.doc_ids[doc], score) for doc, score in top], len(scores)
+
+    def save(self, directory: str):
+        """
+        Write the index to ``directory``. Binary files get a fresh generation name and the
+        lexicon is replaced last, so readers never see a half-written index.
+        """
+        os.makedirs(directory, exist_ok=True)
+        generation = os.urandom(6).hex()
+        postings_name = f"postings-{generation}.bin"
+        lengths_name = f"lengths-{generation}.bin"
+        for name, data in ((postings_name, self._postings), (lengths_name, self._lengths)):
+            with open(os.path.join(directory, name), 'wb') as f:
+                f.write(data.tobytes() if isinstance(data, memoryview) else bytes(data))
+
+        meta = {
+            'formatVersion': INDEX_FORMAT_VERSION,
+            'byteorder': sys.byteorder,
+            'fields': self.fields,
+            'k1': self.k1,
+            'b': self.b,
+            'avgLengths': self.avg_lengths,
+            'docIds': self.doc_ids,
+            'postings': postings_name,
+            'lengths': lengths_name,
+            'lexicon': self._lexicon,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.lexicon_', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, separators=(',', ':'))
+        os.replace(tmp_path, os.path.join(directory, 'lexicon.json'))
+
+        for name in os.listdir(directory):
+            if name.endswith('.bin') and name not in (postings_name, lengths_name):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    @classmethod
+    def load(cls, directory: str) -> Optional['BM25Index']:
+        """Open a saved index with memory-mapped postings; None if missing or incompatible."""
+        try:
+            with open(os.path.join(directory, 'lexicon.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable index in {directory}: {e}")
+            return None
+        if meta.get('formatVersion') != INDEX_FORMAT_VERSION or meta.get('byteorder') != sys.byteorder:
+            return None
+
+        index = cls(meta['fields'], meta['k1'], meta['b'])
+        index.doc_ids = meta['docIds']
+        index.avg_lengths = meta['avgLengths']
+        index._lexicon = {term: tuple(entry) for term, entry in meta['lexicon'].items()}
+        try:
+            index._postings = _map_uint32(os.path.join(directory, meta['postings']))
+            index._lengths = _map_uint32(os.path.join(directory, meta['lengths']))
+        except OSError as e:
+            logger.warning(f"Could not map index files in {directory}: {e}")
+            return None
+        return index
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import http_response_cache as cache_module
+from http_response_cache import HttpResponseCache, freshness_lifetime, parse_cache_control
+
+
+def test_freshness_follows_cache_control_then_expires():
+    assert parse_cache_control('public, Max-Age="60", no-transform') == \
+        {"public": None, "max-age": "60", "no-transform": None}
+    assert freshness_lifetime({"Cache-Control": "max-age=300", "Age": "100"}) == 200
+    assert freshness_lifetime({"cache-control": "no-cache, max-age=300"}) == 0
+    assert freshness_lifetime({"Cache-Control": "private, no-store"}) is None
+    assert freshness_lifetime({"Date": "Wed, 21 Oct 2026 07:28:00 GMT",
+                               "Expires": "Wed, 21 Oct 2026 07:38:00 GMT"}) == 600
+    # max-age wins over Expires; unparseable values mean "revalidate"
+    assert freshness_lifetime({"Cache-Control": "max-age=5", "Expires": "Wed, 21 Oct 2026 07:38:00 GMT"}) == 5
+    assert freshness_lifetime({"Expires": "0"}) == 0
+    assert freshness_lifetime({}) == 0
+
+
+def test_entries_go_stale_and_are_refreshed_by_a_304(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    path = str(tmp_path / "http.sqlite3")
+    cache = HttpResponseCache(path)
+
+    cache.put("https://docs.example/a", {"Cache-Control": "max-age=60", "ETag": '"v1"',
+                                         "Last-Modified": "Wed, 21 Oct 2026 07:28:00 GMT"}, "<main>a</main>")
+    entry = cache.get("https://docs.example/a")
+    assert entry["fresh"] and entry["body"] == "<main>a</main>"
+
+    now[0] += 120
+    reopened = HttpResponseCache(path)
+    entry = reopened.get("https://docs.example/a")
+    assert not entry["fresh"]
+    assert reopened.conditional_headers(entry) == {"If-None-Match": '"v1"',
+                                                   "If-Modified-Since": "Wed, 21 Oct 2026 07:28:00 GMT"}
+
+    reopened.revalidated("https://docs.example/a", {"Cache-Control": "max-age=30", "ETag": '"v2"'})
+    entry = reopened.get("https://docs.example/a")
+    assert entry["fresh"] and entry["etag"] == '"v2"' and entry["last_modified"].startswith("Wed")
+    stats = reopened.get_stats()
+    assert (stats["hits"], stats["stale"], stats["revalidations"]) == (1, 1, 1)
+
+
+def test_unreusable_responses_are_not_stored_and_old_entries_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = HttpResponseCache(str(tmp_path / "http.sqlite3"), max_entries=2)
+
+    cache.put("https://a.example/", {"ETag": '"a"'}, "a")
+    cache.put("https://a.example/", {"Cache-Control": "no-store"}, "a2")
+    cache.put("https://b.example/", {}, "b")
+    assert cache.get("https://a.example/") is None and cache.get("https://b.example/") is None
+
+    for name in ("c", "d", "e"):
+        now[0] += 1
+        cache.put(f"https://{name}.example/", {"Cache-Control": "max-age=600"}, name)
+    assert cache.get("https://c.example/") is None
+    assert cache.get("https://e.example/")["body"] == "e"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_broken_cache_path_is_a_miss(tmp_path):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    cache = HttpResponseCache(str(blocker / "http.sqlite3"))
+    cache.put("https://a.example/", {"Cache-Control": "max-age=60"}, "a")
+    assert cache.get("https://a.example/") is None
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import copy
 import json
 import pytest
 try:
@@ -223,3 +224,379 @@ def test_foreach_wrapping_on_array_to_string_mismatch():
     # Crucially, check that the input of the wrapped step now refers to the loop item
     assert wrapped_step['inputs']['url']['outputName'] == 'item'
     assert wrapped_step['inputs']['url']['sourceStep'] == 2 # Refers to the FOREACH step itself
+
+
+SEARCH_ID = "11111111-1111-4111-8111-111111111111"
+SCRAPE_ID = "22222222-2222-4222-8222-222222222222"
+SUMMARIZE_ID = "33333333-3333-4333-8333-333333333333"
+
+
+def _wrappable_plan():
+    return [
+        {
+            "id": SEARCH_ID,
+            "actionVerb": "SEARCH",
+            "description": "Search for pages.",
+            "inputs": {"searchTerm": {"value": "stage7", "valueType": "string"}},
+            "outputs": {"results": {"type": "array", "description": "Result URLs."}}
+        },
+        {
+            "id": SCRAPE_ID,
+            "actionVerb": "SCRAPE",
+            "description": "Scrape one page.",
+            "inputs": {"url": {"outputName": "results", "sourceStep": SEARCH_ID}},
+            "outputs": {"content": {"type": "string", "description": "Page text."}}
+        },
+        {
+            "id": SUMMARIZE_ID,
+            "actionVerb": "SUMMARIZE_PAGE",
+            "description": "Summarize one page.",
+            "inputs": {"text": {"outputName": "content", "sourceStep": SCRAPE_ID}},
+            "outputs": {"summary": {"type": "string", "description": "Summary."}}
+        }
+    ]
+
+
+def _validator_with_known_plugins():
+    validator = PlanValidator(brain_call=mock_call_brain)
+    validator.plugin_cache = {
+        "SEARCH": {"verb": "SEARCH", "inputDefinitions": [{"name": "searchTerm", "type": "string", "required": True}],
+                   "outputDefinitions": [{"name": "results", "type": "array"}]},
+        "SCRAPE": {"verb": "SCRAPE", "inputDefinitions": [{"name": "url", "type": "string", "required": True}],
+                   "outputDefinitions": [{"name": "content", "type": "string"}]},
+        "FOREACH": {"verb": "FOREACH", "inputDefinitions": [{"name": "array", "type": "array", "required": True}],
+                    "outputDefinitions": [{"name": "steps", "type": "array"}]},
+        "REGROUP": {"verb": "REGROUP", "inputDefinitions": [], "outputDefinitions": [{"name": "result", "type": "array"}]},
+    }
+    return validator
+
+
+def test_reindex_scope_records_moves_into_foreach():
+    validator = _validator_with_known_plugins()
+    plan = _wrappable_plan()
+    index = validator._build_plan_index(plan)
+    index.execution_orders["root"] = validator._get_execution_order(plan, index.steps)
+
+    new_plan = validator._wrap_step_in_foreach(plan, SCRAPE_ID, SEARCH_ID, "results", "url", index.steps, "scope")
+    validator._reindex_scope(new_plan, "root", index)
+
+    foreach_id = next(step["id"] for step in new_plan if step["actionVerb"] == "FOREACH")
+    moved = {c.step_id for c in index.changes if c.kind == "moved"}
+    added = {c.step_id for c in index.changes if c.kind == "added"}
+
+    assert moved == {SCRAPE_ID, SUMMARIZE_ID}
+    assert foreach_id in added
+    assert not [c for c in index.changes if c.kind == "removed"]
+    assert index.parents[SCRAPE_ID] == foreach_id
+    assert index.scopes[foreach_id] == [SCRAPE_ID, SUMMARIZE_ID]
+    assert index.steps[SCRAPE_ID]["inputs"]["url"] == {"outputName": "item", "sourceStep": "0"}
+    assert "root" not in index.execution_orders
+
+
+def test_validate_and_repair_wraps_with_incremental_index():
+    validator = _validator_with_known_plugins()
+    result = validator.validate_and_repair(_wrappable_plan(), "test goal", {})
+
+    verbs = [step["actionVerb"] for step in result.plan]
+    assert verbs[0] == "SEARCH"
+    assert verbs[1] == "FOREACH"
+    sub_plan = result.plan[1]["inputs"]["steps"]["value"]
+    assert [step["id"] for step in sub_plan] == [SCRAPE_ID, SUMMARIZE_ID]
+    assert result.is_valid, result.get_error_messages()
+
+
+def test_available_outputs_view_sees_only_preceding_steps_and_foreach_item():
+    validator = _validator_with_known_plugins()
+    plan = _wrappable_plan()
+    index = validator._build_plan_index(plan)
+    index.set_execution_order("root", validator._get_execution_order(plan, index.steps))
+
+    available = validator._get_available_outputs_for_step(SCRAPE_ID, "root", index)
+    assert list(available) == [SEARCH_ID]
+    assert available[SEARCH_ID] == {"results": "array"}
+    assert SUMMARIZE_ID not in available
+
+    wrapped = validator._wrap_step_in_foreach(plan, SCRAPE_ID, SEARCH_ID, "results", "url", index.steps, "scope")
+    validator._reindex_scope(wrapped, "root", index)
+    foreach_id = index.parents[SCRAPE_ID]
+    index.set_execution_order(foreach_id, [SCRAPE_ID, SUMMARIZE_ID])
+
+    nested = validator._get_available_outputs_for_step(SUMMARIZE_ID, foreach_id, index)
+    assert nested[SCRAPE_ID] == {"content": "string"}
+    assert nested[foreach_id]["index"] == "number"
+    assert "item" not in index.outputs[foreach_id]
+
+
+class _FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+def _fake_librarian_post(known, calls, supports_in=True):
+    """Serves queryData the way Librarian's mongoUtils sanitizes it: every key becomes {$eq: value},
+    except a {$in: [primitives]} clause when the Librarian supports it."""
+    def matches(verb, condition):
+        if supports_in and isinstance(condition, dict) and list(condition) == ["$in"]:
+            return verb in condition["$in"]
+        return verb == condition
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        calls.append((url, json))
+        if url.endswith("/queryData"):
+            condition = json["query"]["metadata.verb"]
+            # Two stored versions per verb, as the tools collection keeps them
+            return _FakeResponse({"data": [{"metadata": known[v]} for v in sorted(known) for _ in range(2)
+                                           if matches(v, condition)]})
+        return _FakeResponse({"data": []})
+    return fake_post
+
+
+def test_prefetch_batches_verbs_and_persists_manifests(monkeypatch, tmp_path):
+    monkeypatch.setenv("PLUGIN_MANIFEST_CACHE_DIR", str(tmp_path))
+    known = _validator_with_known_plugins().plugin_cache
+    calls = []
+    fake_post = _fake_librarian_post(known, calls)
+
+    monkeypatch.setattr("plan_validator.requests.post", fake_post)
+    librarian_info = {"url": "librarian:5040", "auth_token": "token"}
+
+    wrapped = _wrappable_plan()
+    wrapped[1] = {"id": "foreach", "actionVerb": "FOREACH", "inputs": {
+        "array": {"outputName": "results", "sourceStep": SEARCH_ID},
+        "steps": {"value": [wrapped[1], wrapped[2]]}}}
+    del wrapped[2]
+
+    validator = PlanValidator(brain_call=mock_call_brain, librarian_info=librarian_info)
+    resolved = validator.prefetch_plugin_definitions(wrapped)
+
+    assert set(resolved) == {"SEARCH", "SCRAPE", "FOREACH"}
+    batch_calls = [c for c in calls if c[0].endswith("/queryData")]
+    assert len(batch_calls) == 2
+    assert sorted(batch_calls[0][1]["query"]["metadata.verb"]["$in"]) == ["FOREACH", "SCRAPE", "SEARCH", "SUMMARIZE_PAGE"]
+    assert "limit" not in batch_calls[0][1]
+    # Only the verb the batch could not resolve falls back to its exact match and semantic search, once
+    assert batch_calls[1][1]["query"] == {"metadata.verb": "SUMMARIZE_PAGE"}
+    assert [c[1]["queryText"] for c in calls if c[0].endswith("/tools/search")] == ["SUMMARIZE_PAGE"]
+    assert validator._get_plugin_definition("SUMMARIZE_PAGE") is None
+    assert len(calls) == 3
+
+    # A new process for the same Librarian is served from disk
+    calls.clear()
+    fresh = PlanValidator(brain_call=mock_call_brain, librarian_info=librarian_info)
+    assert fresh._get_plugin_definition("SCRAPE") == known["SCRAPE"]
+    assert calls == []
+
+    fresh.manifest_cache.invalidate(["SCRAPE"])
+    assert PlanValidator(librarian_info=librarian_info).manifest_cache.get("SCRAPE") is None
+
+
+def test_prefetch_uses_exact_match_when_librarian_cannot_evaluate_in(monkeypatch, tmp_path):
+    monkeypatch.setenv("PLUGIN_MANIFEST_CACHE_DIR", str(tmp_path))
+    known = _validator_with_known_plugins().plugin_cache
+    calls = []
+    monkeypatch.setattr("plan_validator.requests.post", _fake_librarian_post(known, calls, supports_in=False))
+
+    validator = PlanValidator(brain_call=mock_call_brain, librarian_info={"url": "librarian:5040", "auth_token": "token"})
+    resolved = validator.prefetch_plugin_definitions(_wrappable_plan())
+
+    assert resolved == {"SEARCH": known["SEARCH"], "SCRAPE": known["SCRAPE"]}
+    exact_queries = [c[1]["query"]["metadata.verb"] for c in calls[1:] if c[0].endswith("/queryData")]
+    assert exact_queries == ["SCRAPE", "SEARCH", "SUMMARIZE_PAGE"]
+    # Known verbs never reach semantic search, so a wrong manifest cannot be cached for them
+    assert [c[1]["queryText"] for c in calls if c[0].endswith("/tools/search")] == ["SUMMARIZE_PAGE"]
+
+
+def test_type_compatibility_table_matches_edge_rules():
+    from plan_validator import types_compatible, CompiledManifest
+
+    assert types_compatible("string", "number")
+    assert types_compatible("list[string]", "array")
+    assert not types_compatible("list[string]", "array", novel_verb=True)
+    assert types_compatible("plan", "plan") and not types_compatible("plan", "object")
+    assert types_compatible("any", "custom") and not types_compatible("number", "string")
+
+    manifest = CompiledManifest.compile({
+        "inputDefinitions": [{"name": "url", "type": "string"}, {"name": "url", "type": "array"}],
+        "outputDefinitions": [{"name": "content", "type": "string"}],
+    })
+    assert manifest.input_types == {"url": "string"}
+    assert manifest.output_types["content"] == "string"
+
+
+def test_check_type_compatibility_uses_compiled_manifests():
+    validator = _validator_with_known_plugins()
+    plan = _wrappable_plan()
+    search, scrape = plan[0], plan[1]
+
+    error, wrappable = validator._check_type_compatibility(scrape, "url", {}, search, "results")
+    assert error is None and wrappable["source_step_id"] == SEARCH_ID
+    compiled = validator._compiled_manifests["SCRAPE"]
+
+    validator._check_type_compatibility(scrape, "url", {}, search, "results")
+    assert validator._compiled_manifests["SCRAPE"] is compiled
+
+    validator.plugin_cache["SCRAPE"] = {"verb": "SCRAPE", "inputDefinitions": [{"name": "url", "type": "number"}]}
+    error, wrappable = validator._check_type_compatibility(scrape, "url", {}, search, "results")
+    assert wrappable is None and error.error_type.value == "type_mismatch"
+
+
+def _repair_errors(*specs):
+    from plan_validator import StructuredError, ErrorType
+    return [StructuredError(ErrorType.MISSING_INPUT, f"Missing {name}", step_id=step_id, input_name=name)
+            for step_id, name in specs]
+
+
+def test_llm_repair_runs_disjoint_signatures_concurrently_and_merges():
+    import threading
+    from plan_validator import TransformationTracker
+
+    plan = [
+        {"id": SEARCH_ID, "actionVerb": "SEARCH", "description": "Search.", "inputs": {}, "outputs": {"results": {"type": "array", "description": "r"}}},
+        {"id": SCRAPE_ID, "actionVerb": "SCRAPE", "description": "Scrape.", "inputs": {}, "outputs": {"content": {"type": "string", "description": "c"}}},
+    ]
+    both_in_flight = threading.Barrier(2, timeout=5)
+
+    def brain_call(prompt, inputs, response_type):
+        both_in_flight.wait()
+        repaired = json.loads(prompt.split("```json\n", 1)[1].split("\n```", 1)[0])
+        target = SEARCH_ID if "MISSING_INPUT:SEARCH.searchTerm" in prompt.split("**Goal:**")[0] else SCRAPE_ID
+        name = "searchTerm" if target == SEARCH_ID else "url"
+        for step in repaired:
+            if step["id"] == target:
+                step["inputs"][name] = {"value": "x", "valueType": "string"}
+        return json.dumps(repaired), "req"
+
+    validator = _validator_with_known_plugins()
+    validator.brain_call = brain_call
+    errors = _repair_errors((SEARCH_ID, "searchTerm"), (SCRAPE_ID, "url"))
+    repaired = validator._repair_plan_with_llm(plan, errors, "goal", {}, TransformationTracker())
+
+    assert [step["id"] for step in repaired] == [SEARCH_ID, SCRAPE_ID]
+    assert repaired[0]["inputs"]["searchTerm"]["value"] == "x"
+    assert repaired[1]["inputs"]["url"]["value"] == "x"
+
+
+def test_repair_waves_and_conflicting_patches():
+    validator = _validator_with_known_plugins()
+    waves = validator._plan_repair_waves(
+        ["A", "B", "C", "D"], {"A": {"s1"}, "B": {"s2"}, "C": {"s1"}, "D": None})
+    assert waves == [["A", "B"], ["C"], ["D"]]
+
+    base = [{"id": "s1", "v": 0}, {"id": "s2", "v": 0}]
+    first = [{"id": "s1", "v": 1}, {"id": "new", "v": 9}, {"id": "s2", "v": 0}]
+    second = [{"id": "s1", "v": 2}, {"id": "s2", "v": 0}]
+    merged, conflicting = validator._merge_repair_patches(base, [("A", first), ("B", second)])
+    assert merged == first
+    assert conflicting == ["B"]
+
+    # A new step whose predecessor another patch removed lands after the nearest surviving step
+    base = [{"id": "s1", "v": 0}, {"id": "s2", "v": 0}, {"id": "s3", "v": 0}]
+    removes_s2 = [{"id": "s1", "v": 0}, {"id": "s3", "v": 0}]
+    inserts_after_s2 = [{"id": "s1", "v": 0}, {"id": "s2", "v": 0}, {"id": "new", "v": 9}, {"id": "s3", "v": 0}]
+    merged, conflicting = validator._merge_repair_patches(base, [("A", removes_s2), ("B", inserts_after_s2)])
+    assert [step["id"] for step in merged] == ["s1", "new", "s3"]
+    assert conflicting == []
+
+    # With no surviving earlier step it goes to the end, never ahead of the steps it follows
+    removes_s1_s2 = [{"id": "s3", "v": 0}]
+    merged, _ = validator._merge_repair_patches(base, [("A", removes_s1_s2), ("B", inserts_after_s2)])
+    assert [step["id"] for step in merged] == ["s3", "new"]
+
+    # Malformed steps stay put; a repair that changes them is re-run serially
+    base = [{"id": "s1", "v": 0}, "not a step", {"id": "s2", "v": 0}]
+    changes_s2 = [{"id": "s1", "v": 0}, "not a step", {"id": "s2", "v": 1}]
+    malformed = [{"id": "s1", "v": 1}, None, {"id": "s2", "v": 0}]
+    merged, conflicting = validator._merge_repair_patches(base, [("A", changes_s2), ("B", malformed)])
+    assert merged == changes_s2
+    assert conflicting == ["B"]
+
+
+def test_plan_fingerprint_ignores_uuids_and_literal_values():
+    from plan_validation_cache import plan_fingerprint
+
+    original = plan_fingerprint(_wrappable_plan())
+    renamed = json.loads(json.dumps(_wrappable_plan()).replace(SEARCH_ID, "44444444-4444-4444-8444-444444444444"))
+    renamed[0]["inputs"]["searchTerm"]["value"] = "something else"
+    other = plan_fingerprint(renamed)
+
+    assert other.structure == original.structure
+    assert other.literals != original.literals
+    assert other.step_ids[0] == "44444444-4444-4444-8444-444444444444"
+
+    rewired = _wrappable_plan()
+    rewired[2]["inputs"]["text"]["outputName"] = "other"
+    assert plan_fingerprint(rewired).structure != original.structure
+
+
+def test_validation_cache_replays_foreach_wraps_for_same_structure():
+    from plan_validation_cache import PlanValidationCache
+
+    cache = PlanValidationCache(cache_dir=None)
+    first = _validator_with_known_plugins()
+    first.validation_cache = cache
+    first_result = first.validate_and_repair(_wrappable_plan(), "goal", {})
+    assert first_result.is_valid
+    assert cache.get_stats()["validation_cache_misses"] == 1
+
+    second_plan = json.loads(json.dumps(_wrappable_plan()).replace(SCRAPE_ID, "55555555-5555-4555-8555-555555555555"))
+    second_plan[0]["inputs"]["searchTerm"]["value"] = "another mission"
+    second = _validator_with_known_plugins()
+    second.validation_cache = cache
+    replay_passes = []
+    original_pass = PlanValidator._validate_and_transform
+
+    def counting_pass(*args, **kwargs):
+        replay_passes.append(1)
+        return original_pass(second, *args, **kwargs)
+
+    second._validate_and_transform = counting_pass
+    result = second.validate_and_repair(second_plan, "goal", {})
+
+    assert result.is_valid
+    assert [step["actionVerb"] for step in result.plan] == [step["actionVerb"] for step in first_result.plan]
+    assert result.transformations_applied[0].startswith("FOREACH:55555555-5555-4555-8555-555555555555")
+    assert len(replay_passes) == 1
+    stats = cache.get_stats()
+    assert stats["validation_cache_hits"] == 1 and stats["validation_cache_hit_rate"] == 0.5
+
+
+
+def test_failed_replay_leaves_nested_steps_untouched():
+    from plan_validation_cache import PlanValidationCache
+    from plan_validator import ValidationResult
+
+    topics_id = "66666666-6666-4666-8666-666666666666"
+
+    def nested_plan():
+        return [
+            {"id": topics_id, "actionVerb": "SEARCH", "description": "Find topics.",
+             "inputs": {"searchTerm": {"value": "topics", "valueType": "string"}},
+             "outputs": {"results": {"type": "array", "description": "Topics."}}},
+            {"id": "77777777-7777-4777-8777-777777777777", "actionVerb": "FOREACH", "description": "Per topic.",
+             "inputs": {"array": {"outputName": "results", "sourceStep": topics_id},
+                        "steps": {"value": _wrappable_plan(), "valueType": "array"}},
+             "outputs": {"steps": {"type": "array", "description": "Summaries."}}},
+        ]
+
+    cache = PlanValidationCache(cache_dir=None)
+    first = _validator_with_known_plugins()
+    first.validation_cache = cache
+    assert first.validate_and_repair(nested_plan(), "goal", {}).is_valid
+
+    validator = _validator_with_known_plugins()
+    plan = nested_plan()
+    fingerprint = validator._plan_fingerprint(plan, {})
+    outcome = cache.get(fingerprint)
+    assert outcome["foreachWraps"]
+    snapshot = copy.deepcopy(plan)
+
+    # The wrap lands inside the FOREACH's sub-plan; a failed replay must not leave it there
+    validator._validate_and_transform = lambda *args: ValidationResult(plan=args[0], errors=[], is_valid=False)
+    assert validator._replay_cached_outcome(plan, fingerprint, outcome, {}) is None
+    assert plan == snapshot
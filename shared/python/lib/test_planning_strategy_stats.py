@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+from planning_strategy_stats import StrategyStats
+
+DEFAULT_ORDER = ["original_prompt", "simplified_prompt", "step_by_step_guidance", "alternative_approach"]
+
+
+def test_order_follows_win_rates_and_keeps_default_order_on_ties(tmp_path):
+    stats = StrategyStats(str(tmp_path / "stats.json"))
+    assert stats.order(DEFAULT_ORDER) == DEFAULT_ORDER
+
+    for _ in range(3):
+        stats.record("original_prompt", False)
+    stats.record("step_by_step_guidance", True)
+    assert stats.order(DEFAULT_ORDER) == ["step_by_step_guidance", "simplified_prompt",
+                                          "alternative_approach", "original_prompt"]
+    assert stats.win_rate("simplified_prompt") == 0.5
+    assert stats.get_stats()["original_prompt"]["win_rate"] == 0.2
+
+
+def test_saves_merge_outcomes_from_concurrent_processes(tmp_path):
+    path = str(tmp_path / "stats.json")
+    first, second = StrategyStats(path), StrategyStats(path)
+    first.win_rate("original_prompt")  # both have loaded the (empty) file
+    second.win_rate("original_prompt")
+
+    first.record("original_prompt", True)
+    second.record("original_prompt", False)
+    second.record("simplified_prompt", True)
+    first.save()
+    second.save()
+    second.save()  # nothing pending: not counted twice
+
+    merged = StrategyStats(path).get_stats()
+    assert merged["original_prompt"]["attempts"] == 2 and merged["original_prompt"]["wins"] == 1
+    assert merged["simplified_prompt"]["wins"] == 1
+
+
+def test_old_outcomes_fade_and_unreadable_files_are_ignored(tmp_path):
+    path = tmp_path / "stats.json"
+    stats = StrategyStats(str(path), window=10)
+    for _ in range(10):
+        stats.record("original_prompt", True)
+    for _ in range(4):
+        stats.record("original_prompt", False)
+    # Halved once the window was exceeded, so recent failures weigh more
+    entry = stats.get_stats()["original_prompt"]
+    assert entry["attempts"] < 10 and entry["wins"] / entry["attempts"] < 10 / 14
+
+    path.write_text("{not json")
+    assert StrategyStats(str(path)).order(DEFAULT_ORDER) == DEFAULT_ORDER
+    assert StrategyStats(None).get_stats() == {}
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import struct
+import subprocess
+import textwrap
+
+import pytest
+
+HOST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plugin_worker_host.py')
+
+PLUGIN_SOURCE = textwrap.dedent('''
+    import os
+    import sys
+    import json
+
+    IMPORT_COUNT = globals().get('IMPORT_COUNT', 0) + 1
+    _calls = []
+
+    def main():
+        payload = json.loads(sys.stdin.read())
+        if payload == "fail":
+            sys.exit(3)
+        _calls.append(payload)
+        print("this goes to the plugin stdout")
+        print(json.dumps([{"success": True, "name": "echo", "result": payload, "calls": len(_calls),
+                           "token": os.environ.get("S7_TOKEN")}]))
+''')
+
+
+def _write_frame(stream, message):
+    body = json.dumps(message).encode('utf-8')
+    stream.write(struct.pack('>I', len(body)) + body)
+    stream.flush()
+
+
+def _read_frame(stream):
+    header = stream.read(4)
+    (length,) = struct.unpack('>I', header)
+    return json.loads(stream.read(length).decode('utf-8'))
+
+
+@pytest.fixture
+def worker(tmp_path):
+    main_path = tmp_path / 'main.py'
+    main_path.write_text(PLUGIN_SOURCE)
+    proc = subprocess.Popen(
+        [sys.executable, HOST_PATH, str(main_path), str(tmp_path)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    yield proc
+    proc.kill()
+    proc.wait()
+
+
+def test_worker_serves_multiple_calls_from_one_import(worker):
+    ready = _read_frame(worker.stdout)
+    assert ready['ready'] is True
+
+    for i in range(3):
+        _write_frame(worker.stdin, {'id': str(i), 'input': json.dumps({'n': i}), 'env': {'S7_TEST': 'x'}})
+        response = _read_frame(worker.stdout)
+        assert response['id'] == str(i)
+        assert response['exitCode'] == 0
+        assert response['calls'] == i + 1
+        assert response['rssKb'] > 0
+        result = json.loads(response['stdout'].splitlines()[-1])
+        # Module state survives between calls, proving the module was imported only once
+        assert result[0]['calls'] == i + 1
+        assert result[0]['result'] == {'n': i}
+
+    _write_frame(worker.stdin, {'id': 'bye', 'shutdown': True})
+    assert worker.wait(timeout=10) == 0
+
+
+def test_worker_reports_exit_code_and_keeps_serving(worker):
+    assert _read_frame(worker.stdout)['ready'] is True
+
+    _write_frame(worker.stdin, {'id': 'a', 'input': json.dumps('fail')})
+    assert _read_frame(worker.stdout)['exitCode'] == 3
+
+    _write_frame(worker.stdin, {'id': 'b', 'input': json.dumps('ok')})
+    response = _read_frame(worker.stdout)
+    assert response['exitCode'] == 0
+    assert response['id'] == 'b'
+
+
+def test_worker_reports_import_failure(tmp_path):
+    main_path = tmp_path / 'main.py'
+    main_path.write_text('raise RuntimeError("broken plugin")\n')
+    proc = subprocess.run(
+        [sys.executable, HOST_PATH, str(main_path), str(tmp_path)],
+        input=b'', stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=30
+    )
+    assert proc.returncode == 1
+    length = struct.unpack('>I', proc.stdout[:4])[0]
+    ready = json.loads(proc.stdout[4:4 + length])
+    assert ready['ready'] is False
+    assert 'broken plugin' in ready['error']
+
+
+def test_call_env_does_not_leak_into_later_calls(worker):
+    assert _read_frame(worker.stdout)['ready'] is True
+
+    tokens = []
+    for i, env in enumerate(({'S7_TOKEN': 'mission-a'}, {}, {'S7_TOKEN': 'mission-b'}, None)):
+        _write_frame(worker.stdin, {'id': str(i), 'input': json.dumps({'n': i}), 'env': env})
+        response = _read_frame(worker.stdout)
+        tokens.append(json.loads(response['stdout'].splitlines()[-1])[0]['token'])
+    assert tokens == ['mission-a', None, 'mission-b', None]
+
+
+def test_plugin_without_main_runs_as_script(tmp_path):
+    main_path = tmp_path / 'main.py'
+    main_path.write_text(
+        'import sys\n'
+        'import json\n'
+        '\n'
+        'def execute_plugin(inputs):\n'
+        '    return {"success": True, "echo": inputs}\n'
+        '\n'
+        'if __name__ == "__main__":\n'
+        '    print(json.dumps(execute_plugin(json.loads(sys.stdin.read()))))\n'
+    )
+    proc = subprocess.Popen(
+        [sys.executable, HOST_PATH, str(main_path), str(tmp_path)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        assert _read_frame(proc.stdout)['ready'] is True
+        for n in (1, 2):
+            _write_frame(proc.stdin, {'id': str(n), 'input': json.dumps({'n': n})})
+            response = _read_frame(proc.stdout)
+            assert response['exitCode'] == 0
+            assert json.loads(response['stdout']) == {'success': True, 'echo': {'n': n}}
+    finally:
+        proc.kill()
+        proc.wait()
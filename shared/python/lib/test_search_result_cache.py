@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import search_result_cache as cache_module
+from search_result_cache import SearchResultCache, normalize_query
+
+RESULTS = [{"title": "GIL", "url": "https://example.com/gil", "snippet": "global interpreter lock"}]
+
+
+def test_normalize_query_ignores_case_whitespace_punctuation_and_stop_words():
+    assert normalize_query("  What is the Python   GIL? ") == "python gil"
+    assert normalize_query("python gil") == normalize_query("The PYTHON gil")
+    assert normalize_query("C++ vs C#") == "c++ vs c#"
+    assert normalize_query("node.js") == "node.js"
+    assert normalize_query("The Who") == "the who"
+
+
+def test_results_expire_per_provider_and_are_shared_across_instances(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    path = str(tmp_path / "search.sqlite3")
+    cache = SearchResultCache(path, provider_ttls={"Fast": 60, "Slow": 600, "Brain": 0})
+
+    cache.put("Fast", "Python GIL", RESULTS)
+    cache.put("Slow", "python gil", RESULTS)
+    cache.put("Brain", "python gil", RESULTS)
+    assert cache.get("Fast", "what is the python gil") == RESULTS
+    assert cache.get("Brain", "python gil") is None
+
+    now[0] += 120
+    reopened = SearchResultCache(path, provider_ttls={"Fast": 60, "Slow": 600})
+    assert reopened.get("Fast", "python gil") is None
+    assert reopened.get("Slow", "python gil") == RESULTS
+    assert reopened.get_stats()["hits"] == 1
+
+
+def test_least_recently_used_results_are_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = SearchResultCache(str(tmp_path / "search.sqlite3"), provider_ttls={}, max_entries=2)
+    for term in ("alpha", "beta"):
+        now[0] += 1
+        cache.put("P", term, RESULTS)
+    now[0] += 1
+    assert cache.get("P", "alpha") == RESULTS  # beta is now least recently used
+    now[0] += 1
+    cache.put("P", "gamma", RESULTS)
+
+    assert cache.get("P", "beta") is None
+    assert cache.get("P", "alpha") == RESULTS and cache.get("P", "gamma") == RESULTS
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_provider_scores_survive_restarts(tmp_path):
+    path = str(tmp_path / "search.sqlite3")
+    SearchResultCache(path).save_scores({"GoogleWebSearch": 35, "DuckDuckGo": 80})
+    scores = SearchResultCache(path).load_scores()
+    assert {provider: score for provider, (score, _) in scores.items()} == {"GoogleWebSearch": 35, "DuckDuckGo": 80}
+
+    (tmp_path / "blocker").write_text("")
+    broken = SearchResultCache(str(tmp_path / "blocker" / "search.sqlite3"))
+    broken.put("P", "term", RESULTS)
+    assert broken.get("P", "term") is None and broken.load_scores() == {}
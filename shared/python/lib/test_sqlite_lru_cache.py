@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import os
+
+import pytest
+
+from sqlite_lru_cache import SqliteLruCache, cache_dir, cache_enabled, env_number
+
+
+class _PairCache(SqliteLruCache):
+    _SCHEMA = ("CREATE TABLE IF NOT EXISTS pairs (a TEXT, b TEXT, last_used REAL NOT NULL, PRIMARY KEY (a, b))",)
+    _TABLE = "pairs"
+    _KEY = "a, b"
+
+    def put(self, a, b, used):
+        with self._lock, self._bounded_write(self._connection()) as conn:
+            conn.execute("INSERT OR REPLACE INTO pairs VALUES (?, ?, ?)", (a, b, used))
+
+    def keys(self):
+        with self._lock:
+            return sorted(self._connection().execute("SELECT a, b FROM pairs").fetchall())
+
+
+def test_bounded_write_evicts_least_recently_used_and_rolls_back_on_error(tmp_path):
+    cache = _PairCache(str(tmp_path / "nested" / "pairs.sqlite3"), max_entries=2)
+    cache.put("x", "1", 1.0)
+    cache.put("x", "2", 3.0)
+    cache.put("y", "1", 2.0)
+    assert cache.keys() == [("x", "2"), ("y", "1")]
+    assert cache.get_stats()["evictions"] == 1
+
+    with pytest.raises(RuntimeError):
+        with cache._lock, cache._bounded_write(cache._connection()) as conn:
+            conn.execute("DELETE FROM pairs")
+            raise RuntimeError("abort")
+    assert cache.keys() == [("x", "2"), ("y", "1")]
+
+    cache.close()
+    assert os.path.exists(tmp_path / "nested" / "pairs.sqlite3")
+    assert _PairCache(cache.path, max_entries=2).keys() == [("x", "2"), ("y", "1")]
+
+
+def test_environment_helpers(monkeypatch, tmp_path):
+    monkeypatch.setenv("DEMO_CACHE", "Off")
+    monkeypatch.setenv("DEMO_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("DEMO_CACHE_TTL", "soon")
+    assert not cache_enabled("DEMO_CACHE")
+    assert cache_enabled("OTHER_CACHE")
+    assert cache_dir("DEMO_CACHE_DIR", "unused") == str(tmp_path)
+    assert cache_dir("OTHER_CACHE_DIR", "stage7_demo").endswith("stage7_demo")
+    assert env_number("DEMO_CACHE_TTL", 60) == 60
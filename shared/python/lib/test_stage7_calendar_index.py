@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import random
+
+import pytest
+
+from stage7_calendar_index import BookingCounts, FreeUnits, stay_ordinals
+
+
+def test_stay_ordinals_parses_once_and_rejects_bad_dates():
+    start, end = stay_ordinals("2026-02-27", "2026-03-02")
+    assert end - start == 3
+    for bad in (("2026-02-30", "2026-03-02"), (None, "2026-03-02"), ("02/27/2026", "2026-03-02")):
+        with pytest.raises(ValueError):
+            stay_ordinals(*bad)
+
+
+def test_booking_counts_match_a_per_day_tally_across_window_growth():
+    rng = random.Random(7)
+    counts = BookingCounts(window=16)
+    tally = {}
+    base = stay_ordinals("2026-01-01", "2026-01-02")[0]
+    for _ in range(600):
+        start = base + rng.randrange(-300, 300)
+        end = start + rng.randrange(1, 20)
+        count = rng.choice((1, 1, 2, -1)) if min(tally.get(d, 0) for d in range(start, end)) > 0 else 1
+        counts.add(start, end, count)
+        for day in range(start, end):
+            tally[day] = tally.get(day, 0) + count
+
+        probe = base + rng.randrange(-320, 320)
+        probe_end = probe + rng.randrange(1, 30)
+        assert counts.max(probe, probe_end) == max(tally.get(d, 0) for d in range(probe, probe_end))
+    assert counts.peak() == max(tally.values())
+
+
+def test_free_units_find_the_tightest_free_unit():
+    rooms = FreeUnits(["A", "B", "C"])
+    assert rooms.book("A", 10, 20) and rooms.book("B", 14, 16)
+    assert not rooms.book("A", 19, 22)
+    assert not rooms.is_free("B", 15, 17) and rooms.is_free("B", 16, 30)
+
+    # B's gap opens on 16, the latest of the gaps that contain the stay
+    assert rooms.find(17, 19) == "B"
+    assert rooms.find(20, 25) == "A"
+    assert rooms.release("B", 14, 16) and not rooms.release("B", 14, 16)
+    assert rooms.bookings("A") == [(10, 20)]
+
+    rooms.remove_unit("C")
+    assert "C" not in rooms and len(rooms) == 2
+    assert rooms.book("B", 0, 100) and rooms.find(5, 15) is None
+
+
+def test_free_units_agree_with_a_brute_force_scan():
+    rng = random.Random(11)
+    units = [f"R{i}" for i in range(12)]
+    rooms = FreeUnits(units, window=8)
+    booked = {unit: [] for unit in units}
+
+    def free(unit, start, end):
+        return all(end <= s or e <= start for s, e in booked[unit])
+
+    for _ in range(2000):
+        start = rng.randrange(0, 400)
+        end = start + rng.randrange(1, 15)
+        unit = rooms.find(start, end)
+        candidates = [u for u in units if free(u, start, end)]
+        if unit is None:
+            assert not candidates
+        else:
+            assert unit in candidates
+            rooms.book(unit, start, end)
+            booked[unit].append((start, end))
+        if rng.random() < 0.4:
+            unit = rng.choice(units)
+            if booked[unit]:
+                stay = booked[unit].pop(rng.randrange(len(booked[unit])))
+                assert rooms.release(unit, *stay)
+    for unit in units:
+        assert rooms.bookings(unit) == sorted(booked[unit])
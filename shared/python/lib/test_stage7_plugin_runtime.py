@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+import io
+import json
+import sys
+
+import stage7_plugin_runtime as runtime
+
+
+def test_parse_inputs_pairs_map_and_object():
+    pairs = json.dumps([["action", {"value": "list"}], ["limit", 5], ["bad"]])
+    assert runtime.parse_inputs(pairs) == {"action": {"value": "list"}, "limit": 5}
+
+    as_map = json.dumps({"_type": "Map", "entries": [["a", 1]]})
+    assert runtime.parse_inputs(as_map) == {"a": 1}
+
+    as_object = json.dumps({"a": 1, "_type": "Object"})
+    assert runtime.parse_inputs(as_object) == {"a": 1}
+
+    assert runtime.parse_inputs(pairs, wrap_values=True)["limit"] == {"value": 5}
+    assert runtime.parse_payload([["a", 1]], wrap_values=True) == {"a": {"value": 1}}
+
+
+def test_get_input_aliases_and_unwrapping():
+    inputs = {"query": {"value": "stage7"}, "empty": {"value": None}, "raw": 3}
+    assert runtime.get_input(inputs, "searchTerm", ["q", "query"]) == "stage7"
+    assert runtime.get_input(inputs, "empty", default="fallback") == "fallback"
+    assert runtime.get_input(inputs, "raw") == 3
+    assert runtime.get_input(inputs, "missing", default=[]) == []
+
+
+def test_run_writes_compact_json(monkeypatch):
+    def execute_plugin(inputs):
+        return [runtime.PluginOutput(True, "echo", "object", inputs, "Echo").to_dict()]
+
+    monkeypatch.setattr(sys, "stdin", io.StringIO(json.dumps([["x", {"value": 1}]])))
+    out = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", out)
+    runtime.run(execute_plugin)
+
+    text = out.getvalue().strip()
+    assert ": " not in text
+    assert json.loads(text)[0]["result"] == {"x": {"value": 1}}
+
+
+def test_run_reports_empty_input_and_exceptions(monkeypatch):
+    def execute_plugin(inputs):
+        raise RuntimeError("boom")
+
+    for payload, message in (("", "No input data received"), ("[]", "boom")):
+        monkeypatch.setattr(sys, "stdin", io.StringIO(payload))
+        out = io.StringIO()
+        monkeypatch.setattr(sys, "stdout", out)
+        runtime.run(execute_plugin)
+        result = json.loads(out.getvalue())
+        assert result[0]["success"] is False
+        assert result[0]["error"] == message
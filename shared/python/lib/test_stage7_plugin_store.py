@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+import json
+
+import stage7_plugin_store as store_module
+from stage7_plugin_store import BoundedLog, CacheManager, DataStore, cow_view, plugin_limits_from_env
+
+
+def test_data_store_crud_and_secondary_index():
+    store = DataStore(indexed_fields=("status",))
+    first = store.add("tickets", {"status": "open", "title": "a"})
+    second = store.add("tickets", {"status": "open", "title": "b"})
+    store.add("tickets", {"status": "closed", "title": "c"})
+
+    assert store.get_by_id("tickets", first)["title"] == "a"
+    assert [t["title"] for t in store.find("tickets", "status", "open")] == ["a", "b"]
+
+    assert store.update("tickets", first, {"status": "closed", "id": "ignored"})
+    assert store.get_by_id("tickets", first)["id"] == first
+    assert store.get_by_id("tickets", first)["status"] == "closed"
+    assert [t["title"] for t in store.find("tickets", "status", "open")] == ["b"]
+    assert [t["title"] for t in store.find("tickets", "title", "c")] == ["c"]
+
+    assert store.delete("tickets", second)
+    assert not store.delete("tickets", second)
+    assert store.find("tickets", "status", "open") == []
+    assert [t["title"] for t in store.get_all("tickets")] == ["a", "c"]
+    assert store.count("tickets") == 2
+
+    store.clear()
+    assert store.get_stats()["total_items"] == 0
+    assert store.get_by_id("tickets", first) is None
+
+
+def test_cache_manager_enforces_ttl_and_lru(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(store_module.time, "monotonic", lambda: now[0])
+
+    cache = CacheManager(ttl_seconds=10, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1          # a is now most recently used
+    cache.set("c", 3)                   # evicts b
+    assert "b" not in cache
+    assert "a" in cache                 # membership neither counts as a hit nor refreshes LRU order
+    cache.set("d", 4)                   # evicts a, the least recently used
+    assert "a" not in cache and "c" in cache
+    assert cache.get("c") == 3 and cache.get("d") == 4
+
+    now[0] += 11
+    assert "c" not in cache and len(cache) == 2
+    assert cache.get("c") is None
+    assert cache.purge_expired() == 1
+    assert len(cache) == 0
+
+    stats = cache.get_stats()
+    assert stats["evictions"] == 2
+    assert stats["expirations"] == 2
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+
+
+def test_bounded_log_keeps_newest_entries_and_spills_the_rest(tmp_path):
+    log = BoundedLog(max_entries=3)
+    for i in range(5):
+        log.append({"n": i})
+    assert [e["n"] for e in log] == [2, 3, 4]
+    assert [e["n"] for e in log.recent(2)] == [3, 4]
+    assert log.get_stats()["dropped"] == 2
+
+    spill = tmp_path / "audit.jsonl"
+    log = BoundedLog(max_entries=2, spill_path=str(spill))
+    for i in range(5):
+        log.append({"n": i, "at": tmp_path})
+    log.close()
+    assert [json.loads(line)["n"] for line in spill.read_text().splitlines()] == [0, 1, 2]
+    assert log.get_stats()["spilled"] == 3 and log.get_stats()["dropped"] == 0
+    assert len(log) == 2
+
+
+def test_plugin_limits_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("PLUGIN_AUDIT_LOG_SIZE", "lots")
+    monkeypatch.setenv("PLUGIN_ERROR_LOG_SIZE", "0")
+    monkeypatch.setenv("PLUGIN_RESULT_CACHE_SIZE", "50")
+    monkeypatch.setenv("PLUGIN_AUDIT_LOG_DIR", str(tmp_path))
+    limits = plugin_limits_from_env("EMAIL")
+
+    assert limits.audit_log().max_entries == 1000
+    assert limits.audit_log().spill_path == str(tmp_path / "EMAIL.audit.jsonl")
+    assert limits.error_log().max_entries == 1
+    assert limits.error_log().spill_path is None
+    assert limits.result_cache().max_entries == 50
+    assert limits.result_cache().ttl == 300
+
+    monkeypatch.delenv("PLUGIN_AUDIT_LOG_DIR")
+    assert plugin_limits_from_env("EMAIL").audit_log().spill_path is None
+
+
+def test_cow_view_never_writes_through_to_the_source():
+    source = {"rows": [{"id": 1, "tags": ["a"]}], "name": "t"}
+    view = cow_view(source)
+    view["rows"][0]["tags"].append("b")
+    view["rows"].append({"id": 2})
+    view["name"] = "u"
+    for row in view["rows"]:
+        row["seen"] = True
+
+    assert source == {"rows": [{"id": 1, "tags": ["a"]}], "name": "t"}
+    assert json.loads(json.dumps(view)) == {"rows": [{"id": 1, "tags": ["a", "b"], "seen": True},
+                                                     {"id": 2, "seen": True}], "name": "u"}
+    assert cow_view("scalar") == "scalar"
+
+    nested = {"a": {"x": [1]}, "l": [{"k": 1}, {"k": 2}], "b": {"y": [1]}, "c": {"z": [1]}}
+    snapshot = json.loads(json.dumps(nested))
+    view = cow_view(nested)
+    view.setdefault("a", {})["x"].append(2)
+    for entry in reversed(view["l"]):
+        entry["k"] = 9
+    for entry in sorted(view["l"], key=lambda e: e["k"]):
+        entry["k"] = 8
+    (view["l"] + [])[0]["k"] = 7
+    (view["l"] * 2)[0]["k"] = 7
+    (view | {})["b"]["y"].append(2)
+    for value in view.copy().values():
+        if isinstance(value, dict):
+            value["touched"] = True
+    view.popitem()[1]["z"].append(2)
+    assert nested == snapshot
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import pytest
+
+import stage7_state_store as state_store
+from stage7_state_store import PluginState, MemoryStateBackend, SQLiteStateBackend, SnapshotStateBackend
+
+
+def _backends(tmp_path):
+    return {
+        "memory": MemoryStateBackend(),
+        "sqlite": SQLiteStateBackend(str(tmp_path / "state.db")),
+        "snapshot": SnapshotStateBackend(str(tmp_path / "snapshots")),
+    }
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite", "snapshot"])
+def test_state_round_trips_and_writes_only_changes(tmp_path, kind):
+    backend = _backends(tmp_path)[kind]
+    rooms, history, settings = {}, {}, {}
+    state = PluginState("ROOMS", {"rooms": rooms, "history": history, "settings": settings}, backend=backend)
+
+    assert state.restore("H1") is False
+    rooms["H1"] = {f"ROOM_{i:03d}": {"room_id": f"ROOM_{i:03d}", "status": "available"} for i in (3, 1, 2)}
+    history["H1"] = [{"date": "2026-01-02", "n": 1}, {"date": "2026-01-01", "n": 2}]
+    settings["H1"] = 7
+    assert state.persist() == 8
+
+    rooms["H1"]["ROOM_001"]["status"] = "occupied"
+    del rooms["H1"]["ROOM_002"]
+    rooms["H1"]["ROOM_004"] = {"room_id": "ROOM_004", "status": "available"}
+    history["H1"].append({"date": "2026-01-03", "n": 3})
+    assert state.persist() == 4
+    assert state.persist() == 0
+
+    rooms2, history2, settings2 = {}, {}, {}
+    fresh = PluginState("ROOMS", {"rooms": rooms2, "history": history2, "settings": settings2}, backend=backend)
+    assert fresh.restore("H1") is True
+    assert list(rooms2["H1"]) == ["ROOM_003", "ROOM_001", "ROOM_004"]
+    assert rooms2["H1"]["ROOM_001"]["status"] == "occupied"
+    assert history2["H1"] == history["H1"]
+    assert settings2["H1"] == 7
+
+    assert [r["n"] for r in fresh.records_between("H1", "history", "2026-01-02")] == [1, 3]
+    assert [r["n"] for r in fresh.records_between("H1", "history", end_date="2026-01-02")] == [2, 1]
+    assert backend.tenants("ROOMS") == ["H1"]
+
+    fresh.forget("H1")
+    assert "H1" not in rooms2
+    assert fresh.restore("H1") is False
+
+
+def test_restore_requires_every_collection():
+    backend = MemoryStateBackend()
+    first = {"T": {"x": 1}}
+    PluginState("NS", {"a": first}, backend=backend).persist()
+
+    a, b = {}, {}
+    widened = PluginState("NS", {"a": a, "b": b}, backend=backend)
+    assert widened.restore("T") is False
+    assert a == {} and b == {}
+
+
+def test_persist_rejects_records_that_are_not_json():
+    from datetime import date
+
+    bookings = {"T": [{"date": date(2026, 1, 1)}]}
+    with pytest.raises(TypeError):
+        PluginState("NS", {"bookings": bookings}, backend=MemoryStateBackend()).persist()
+
+
+def test_sqlite_state_is_shared_across_connections(tmp_path):
+    path = str(tmp_path / "shared" / "state.db")
+    writer = SQLiteStateBackend(path, mmap_size=1 << 20)
+    items = {}
+    PluginState("INV", {"items": items}, backend=writer).restore("R1")
+    items["R1"] = {"ITEM_001": {"name": "Tomatoes"}}
+    PluginState("INV", {"items": items}, backend=writer).persist()
+
+    reader = SQLiteStateBackend(path)
+    restored = {}
+    assert PluginState("INV", {"items": restored}, backend=reader).restore("R1") is True
+    assert restored["R1"] == {"ITEM_001": {"name": "Tomatoes"}}
+    assert reader._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_create_state_backend_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("STAGE7_PLUGIN_STATE_PATH", str(tmp_path))
+    monkeypatch.setenv("STAGE7_PLUGIN_STATE_BACKEND", "snapshot")
+    assert isinstance(state_store.create_state_backend(), SnapshotStateBackend)
+    monkeypatch.setenv("STAGE7_PLUGIN_STATE_BACKEND", "sqlite")
+    backend = state_store.create_state_backend()
+    assert isinstance(backend, SQLiteStateBackend)
+    assert backend.path == str(tmp_path / "state.db")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+import os
+
+from stage7_text_index import BM25Index, tokenize
+
+FIELDS = {"topic": 0.4, "holding": 0.3, "rule": 0.2, "facts": 0.1}
+
+DOCS = [
+    ("topic-match", {"topic": "search and seizure", "holding": "", "facts": "police stop"}),
+    ("facts-match", {"topic": "contracts", "holding": "", "facts": "unlawful search of a car"}),
+    ("no-match", {"topic": "employment", "holding": "discrimination in hiring"}),
+    ("holding-match", {"topic": "privacy", "holding": "warrantless searches are unreasonable"}),
+]
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize("The Rights of the Accused, 2 cases") == ["right", "accused", "2", "case"]
+    assert tokenize("class classes status searches") == ["class", "class", "status", "search"]
+
+
+def test_search_ranks_by_field_weight_and_counts_all_matches():
+    index = BM25Index.build(DOCS, FIELDS)
+
+    hits, total = index.search("search", k=10)
+    assert total == 3
+    assert [doc_id for doc_id, _ in hits] == ["topic-match", "holding-match", "facts-match"]
+    assert all(score > 0 for _, score in hits)
+
+    top, total = index.search("search", k=1)
+    assert top == hits[:1] and total == 3
+
+    assert index.search("the of", k=5) == ([], 0)
+    assert index.search("unknownterm", k=5) == ([], 0)
+
+
+def test_search_can_be_restricted_to_candidates():
+    index = BM25Index.build(DOCS, FIELDS)
+    hits, total = index.search("search", k=10, candidates={1})
+    assert [doc_id for doc_id, _ in hits] == ["facts-match"]
+    assert total == 1
+
+
+def test_save_and_load_round_trip_memory_maps_postings(tmp_path):
+    index = BM25Index.build(DOCS, FIELDS)
+    index.save(str(tmp_path))
+
+    loaded = BM25Index.load(str(tmp_path))
+    assert isinstance(loaded._postings, memoryview)
+    assert len(loaded) == len(DOCS)
+    assert loaded.search("warrantless search", k=3) == index.search("warrantless search", k=3)
+
+    # Saving again replaces the binary files instead of accumulating them
+    index.save(str(tmp_path))
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".bin")]) == 2
+
+    assert BM25Index.load(str(tmp_path / "missing")) is None